@@ -1,14 +1,190 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from config.config import settings
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional
 
-DATABASE_URL = settings.DATABASE_URL
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.sql.dml import UpdateBase
+from app.config.settings import settings
 
-engine = create_async_engine(DATABASE_URL, future=True)
-SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+logger = logging.getLogger("spreadsaver.db")
+
+
+# Scheme → sync driver. Bare postgresql:// would pick SQLAlchemy's default driver, which
+# isn't necessarily the installed one (requirements.txt ships psycopg2); an explicit
+# driver (e.g. postgresql+psycopg:// for psycopg 3) is left alone.
+_SYNC_SCHEMES = {
+    "postgresql+asyncpg": "postgresql+psycopg2",
+    "postgresql": "postgresql+psycopg2",
+    "postgres": "postgresql+psycopg2",
+    "sqlite+aiosqlite": "sqlite",
+}
+
+
+def sync_url(url: str) -> str:
+    """Services use the sync Session API; map async driver URLs to their sync drivers."""
+    scheme, sep, rest = url.partition("://")
+    return _SYNC_SCHEMES.get(scheme, scheme) + sep + rest if sep else url
+
+
+def engine_options(url: str) -> dict:
+    options = {"future": True, "pool_pre_ping": True, "query_cache_size": settings.DB_QUERY_CACHE_SIZE}
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        )
+    return options
+
+
+def create_db_engine(url: str) -> Engine:
+    db_engine = create_engine(url, **engine_options(url))
+    if db_engine.dialect.name == "sqlite":
+
+        @event.listens_for(db_engine, "connect")
+        def _foreign_keys(dbapi_connection, _record):
+            # SQLite only enforces FOREIGN KEY (and ON DELETE CASCADE) when asked, per connection
+            dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    if db_engine.dialect.name == "postgresql" and db_engine.dialect.driver != "psycopg":
+        if settings.DB_PREPARE_THRESHOLD >= 0:
+            logger.info(
+                "DB_PREPARE_THRESHOLD has no effect with the %s driver (psycopg 3 only: "
+                "postgresql+psycopg://); statements are not prepared server-side",
+                db_engine.dialect.driver,
+            )
+    if db_engine.dialect.driver == "psycopg":
+        threshold = settings.DB_PREPARE_THRESHOLD
+
+        @event.listens_for(db_engine, "connect")
+        def _prepared_statements(dbapi_connection, _record):
+            dbapi_connection.prepare_threshold = threshold if threshold >= 0 else None
+            dbapi_connection.prepared_max = settings.DB_PREPARED_MAX
+
+    return db_engine
+
+
+DATABASE_URL = sync_url(settings.DATABASE_URL)
+
+engine = create_db_engine(DATABASE_URL)
+SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
 
 Base = declarative_base()
 
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# ---------------------------------------------------------------------------
+# Read replicas
+# ---------------------------------------------------------------------------
+
+class RoutingSession(Session):
+    """Session for read-only work: statements go to its replica until the first write
+    (a flush or an INSERT/UPDATE/DELETE); from then on everything, reads included,
+    uses the primary so the session sees what it wrote."""
+
+    def __init__(self, *args, replica: Optional[Engine] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+
+    def get_bind(self, mapper=None, **kw):
+        if self.replica is not None and not self._flushing and not isinstance(kw.get("clause"), UpdateBase):
+            return self.replica
+        self.replica = None
+        return engine
+
+
+class ReplicaSet:
+    """Round-robin over the replica engines, skipping any that failed to connect in the
+    last `retry_seconds`. choose() returns None when there is no usable replica."""
+
+    def __init__(self, engines: List[Engine], *, retry_seconds: float):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._down: Dict[Engine, float] = {}
+        self._turn = itertools.count()
+        for replica in engines:
+            event.listen(replica, "handle_error", self._on_error)
+
+    def choose(self) -> Optional[Engine]:
+        if not self.engines:
+            return None
+        now = time.monotonic()
+        start = next(self._turn)
+        for i in range(len(self.engines)):
+            replica = self.engines[(start + i) % len(self.engines)]
+            if self._down.get(replica, 0.0) <= now:
+                return replica
+        return None
+
+    def mark_down(self, replica: Engine) -> None:
+        self._down[replica] = time.monotonic() + self.retry_seconds
+        logger.warning(
+            "replica %s unavailable; skipping it for %.0fs",
+            replica.url.render_as_string(hide_password=True), self.retry_seconds,
+        )
+
+    def _on_error(self, context) -> None:
+        # no connection means connecting failed; a disconnect means it went away
+        if context.connection is None or context.is_disconnect:
+            self.mark_down(context.engine)
+
+
+replicas = ReplicaSet(
+    [create_db_engine(url) for url in map(sync_url, settings.database_replica_urls_list)],
+    retry_seconds=settings.REPLICA_RETRY_SECONDS,
+)
+ReadSessionLocal = sessionmaker(bind=engine, class_=RoutingSession, expire_on_commit=False)
+
+
+def read_session(*, pin_primary: bool = False) -> Session:
+    """A session for read-only work: on a healthy replica when there is one, else (or when
+    pinned, e.g. right after the caller wrote) a plain primary session."""
+    replica = None if pin_primary else replicas.choose()
+    if replica is None:
+        return SessionLocal()
+    return ReadSessionLocal(replica=replica)
+
+
+# ---------------------------------------------------------------------------
+# Worker lifecycle
+# ---------------------------------------------------------------------------
+
+def warm_pool(connections: int) -> int:
+    """Open up to `connections` pooled connections per engine (primary and replicas) now,
+    so a new worker's first requests don't pay for connecting. Returns how many were
+    opened; failures are logged, not raised."""
+    opened = 0
+    for target in [engine, *replicas.engines]:
+        held = []
+        try:
+            for _ in range(max(0, connections)):
+                conn = target.connect()
+                held.append(conn)
+                conn.exec_driver_sql("SELECT 1")
+        except Exception:
+            logger.warning(
+                "pool warm-up for %s stopped after %d connection(s)",
+                target.url.render_as_string(hide_password=True), len(held), exc_info=True,
+            )
+        finally:
+            for conn in held:
+                conn.close()  # back to the pool, still open
+        opened += len(held)
+    return opened
+
+
+def after_fork() -> None:
+    """Forget pooled connections inherited from the parent process (without closing them,
+    they're still the parent's); call first thing in a forked worker."""
+    for target in [engine, *replicas.engines]:
+        target.dispose(close=False)
@@ -1,19 +1,173 @@
+import asyncio
+import inspect
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Callable, List
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from api.api_router import router
+from app.config.settings import settings
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.timing import TimingMiddleware
+from app.database import warm_pool
+from app.routes import include_all_routes
+from app.services import cache_service, leaderboard_service, profiling_service, subscription_service
+from app.services.stripe_service import client as stripe_client, processor as stripe_processor
+from app.utils.responses import FastJSONResponse
+from app.utils import query_profiler
+from app.utils.tracing import instrument_sqlalchemy
+
+logger = logging.getLogger("spreadsaver.startup")
+
+
+# ---------------------------------------------------------------------------
+# Startup hooks
+# ---------------------------------------------------------------------------
+# A hook runs once per app start, in registration order. It may be sync or async and
+# may return a cleanup callable (sync or async), run in reverse order at shutdown.
+
+_startup_hooks: List[Callable[[], Any]] = []
+
+
+def on_startup(fn: Callable[[], Any]) -> Callable[[], Any]:
+    _startup_hooks.append(fn)
+    return fn
+
+
+async def _maybe_await(value: Any) -> Any:
+    return await value if inspect.isawaitable(value) else value
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    cleanups = []
+    try:
+        for hook in _startup_hooks:
+            cleanup = await _maybe_await(hook())
+            if callable(cleanup):
+                cleanups.append(cleanup)
+        yield
+    finally:
+        for cleanup in reversed(cleanups):
+            try:
+                await _maybe_await(cleanup())
+            except Exception:
+                logger.exception("shutdown hook %r failed", cleanup)
+
+
+@on_startup
+async def _warm_connections():
+    # runs before the worker serves its first request (DB and cache connections ready)
+    await asyncio.to_thread(warm_pool, settings.DB_POOL_WARM)
+    try:
+        await asyncio.to_thread(cache_service.warm)
+    except Exception:
+        logger.warning("shared cache warm-up failed", exc_info=True)
+
+
+@on_startup
+def _stripe_processor():
+    stripe_processor.start()  # applies queued Stripe webhook events in the background
+
+    def stop():
+        stripe_processor.stop()
+        stripe_client.shutdown()
+
+    return stop
+
+
+@on_startup
+def _profiler_signal():
+    if settings.PROFILER_ENABLED:
+        profiling_service.install_signal_handler()
+
+
+@on_startup
+def _subscription_reconciler():
+    if not (settings.STRIPE_SECRET_KEY and settings.SUBSCRIPTION_RECONCILE_SECONDS > 0):
+        return None
+    reconciler = asyncio.create_task(subscription_service.run_reconciler())
+    return reconciler.cancel
+
+
+@on_startup
+def _leaderboards():
+    tasks = [asyncio.create_task(leaderboard_service.run_rules_listener())]
+    if settings.LEADERBOARD_FULL_REFRESH_SECONDS > 0:
+        tasks.append(asyncio.create_task(leaderboard_service.run_refresher()))
+
+    def stop():
+        for task in tasks:
+            task.cancel()
+
+    return stop
+
+
+def warm_imports() -> None:
+    from jose import jwt  # noqa: F401
+    import bcrypt  # noqa: F401
+
+    if settings.STRIPE_SECRET_KEY:
+        from app.services.stripe_client import sdk
+
+        sdk()
+
+
+@on_startup
+def _warm_deferred_imports():
+    # jose, bcrypt and the Stripe SDK are imported on first use to keep cold start short;
+    # once serving, load them off the event loop so the first login/checkout doesn't wait
+    if settings.WARM_DEFERRED_IMPORTS:
+        threading.Thread(target=warm_imports, name="warm-imports", daemon=True).start()
+
+
+# ---------------------------------------------------------------------------
+# App factory
+# ---------------------------------------------------------------------------
+
+def create_app() -> FastAPI:
+    instrument_sqlalchemy()  # per-query timing on every engine
+    query_profiler.install()  # slow-query log + N+1 detection
+
+    app = FastAPI(default_response_class=FastJSONResponse, lifespan=lifespan)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        threadpool_min_size=settings.COMPRESSION_THREADPOOL_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+    )
+
+    if settings.PROFILER_ENABLED:
+        app.add_middleware(ProfilingMiddleware, interval_ms=settings.PROFILER_INTERVAL_MS)
+
+    # Outermost, so timings include compression
+    app.add_middleware(
+        TimingMiddleware,
+        log_requests=settings.REQUEST_LOG_ENABLED,
+        slow_ms=settings.REQUEST_SLOW_MS,
+        server_timing=settings.SERVER_TIMING_HEADER,
+    )
+
+    include_all_routes(app)
 
-app = FastAPI()
+    @app.get("/")
+    def read_root():
+        return {"msg": "SpreadSaver API is running"}
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    return app
 
-app.include_router(router)
 
-@app.get("/")
-def read_root():
-    return {"msg": "SpreadSaver API is running"}
+app = create_app()
@@ -0,0 +1,263 @@
+# /backend/app/middleware/compression.py
+# SpreadSaver – Response compression (ASGI)
+# Negotiates zstd / br / gzip from Accept-Encoding, skips small or non-text payloads,
+# streams StreamingResponse bodies through an incremental compressor, and moves large
+# compress calls to a worker thread so the event loop stays responsive.
+
+from __future__ import annotations
+
+import zlib
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple
+
+import anyio
+
+try:  # pragma: no cover - optional dependency
+    import brotli  # type: ignore
+except Exception:  # pragma: no cover
+    brotli = None  # type: ignore
+
+try:  # pragma: no cover - optional dependency
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+Message = dict
+Send = Callable[[Message], Awaitable[None]]
+
+DEFAULT_CONTENT_TYPES: Tuple[str, ...] = (
+    "application/json",
+    "text/plain",
+    "text/csv",
+    "text/html",
+    "application/xml",
+    "application/problem+json",
+)
+
+
+# ---------------------------------------------------------------------------
+# Encoders (incremental: compress → flush per chunk → finish)
+# ---------------------------------------------------------------------------
+
+class _GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int):
+        self._obj = brotli.Compressor(quality=quality)  # type: ignore[union-attr]
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) + self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdEncoder:
+    name = "zstd"
+
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()  # type: ignore[union-attr]
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)  # type: ignore[union-attr]
+
+    def finish(self) -> bytes:
+        return self._obj.flush()
+
+
+def available_encodings() -> List[str]:
+    """Server preference order, limited to codecs installed in this environment."""
+    out = []
+    if zstandard is not None:
+        out.append("zstd")
+    if brotli is not None:
+        out.append("br")
+    out.append("gzip")
+    return out
+
+
+def negotiate(accept_encoding: str, offered: Iterable[str]) -> Optional[str]:
+    """Pick the best offered coding the client accepts (q > 0); server order breaks ties."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    best, best_q = None, 0.0
+    for coding in offered:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        *,
+        minimum_size: int = 1024,
+        threadpool_min_size: int = 256 * 1024,
+        content_types: Iterable[str] = DEFAULT_CONTENT_TYPES,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.threadpool_min_size = threadpool_min_size
+        self.content_types = tuple(ct.lower() for ct in content_types)
+        self.levels = {"gzip": gzip_level, "br": brotli_quality, "zstd": zstd_level}
+        self.offered = available_encodings()
+
+    def _encoder(self, coding: str):
+        level = self.levels[coding]
+        if coding == "zstd":
+            return _ZstdEncoder(level)
+        if coding == "br":
+            return _BrotliEncoder(level)
+        return _GzipEncoder(level)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        coding = negotiate(accept, self.offered) if accept else None
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressionResponder(self, coding, send).run(scope, receive)
+
+
+class _CompressionResponder:
+    """Per-request state machine: buffer the start message until the first body chunk
+    tells us whether (and how) to compress."""
+
+    def __init__(self, mw: CompressionMiddleware, coding: str, send: Send):
+        self.mw = mw
+        self.coding = coding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+
+    async def run(self, scope, receive) -> None:
+        await self.mw.app(scope, receive, self._send)
+
+    async def _compress(self, fn: Callable[[bytes], bytes], data: bytes) -> bytes:
+        if len(data) >= self.mw.threadpool_min_size:
+            return await anyio.to_thread.run_sync(fn, data)
+        return fn(data)
+
+    def _eligible(self, start: Message) -> bool:
+        if start.get("status") in (204, 304) or start.get("status", 200) < 200:
+            return False
+        content_type = ""
+        for key, value in start.get("headers", []):
+            if key == b"content-encoding":
+                return False
+            if key == b"content-type":
+                content_type = value.decode("latin-1").split(";", 1)[0].strip().lower()
+        return content_type in self.mw.content_types
+
+    def _rewrite_headers(self, length: Optional[int]) -> None:
+        headers = []
+        vary = None
+        for key, value in self.start["headers"]:  # type: ignore[index]
+            if key == b"content-length":
+                continue
+            if key == b"vary":
+                vary = value
+                continue
+            if key == b"etag" and not value.startswith(b"W/"):
+                # A strong validator can't be shared across codings; weak still matches If-None-Match.
+                value = b"W/" + value
+            headers.append((key, value))
+        headers.append((b"content-encoding", self.coding.encode("latin-1")))
+        if vary is None:
+            vary = b"Accept-Encoding"
+        elif b"accept-encoding" not in vary.lower() and vary.strip() != b"*":
+            vary = vary + b", Accept-Encoding"
+        headers.append((b"vary", vary))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode("latin-1")))
+        self.start["headers"] = headers  # type: ignore[index]
+
+    async def _send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = dict(message)
+            self.start["headers"] = list(message.get("headers", []))
+            self.passthrough = not self._eligible(self.start)
+            if self.passthrough:
+                await self.send(self.start)
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None and self.start is not None:
+            if not more_body:
+                # Whole body in one message (regular Response)
+                if len(body) < self.mw.minimum_size:
+                    self.passthrough = True
+                    await self.send(self.start)
+                    await self.send(message)
+                    return
+                encoder = self.mw._encoder(self.coding)
+                compressed = await self._compress(lambda b: encoder.compress(b) + encoder.finish(), body)
+                self._rewrite_headers(len(compressed))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            # Streaming: length unknown up front, compress chunk by chunk
+            self.encoder = self.mw._encoder(self.coding)
+            self._rewrite_headers(None)
+            await self.send(self.start)
+            self.start = None
+
+        chunk = await self._compress(self.encoder.compress, body) if body else b""
+        if not more_body:
+            chunk += self.encoder.finish()
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+__all__ = ["CompressionMiddleware", "available_encodings", "negotiate", "DEFAULT_CONTENT_TYPES"]
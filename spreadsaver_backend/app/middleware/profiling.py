@@ -0,0 +1,81 @@
+# /backend/app/middleware/profiling.py
+# SpreadSaver – Per-request profiling (ASGI)
+# A request sent with `X-Profile: 1` is sampled (utils/profiler.py) from start to
+# finish. The response carries `X-Profile-Id`; an admin downloads the collapsed stacks
+# from GET /admin/profile/{id}. The header is honoured only on requests authenticated
+# as an admin, and only one profile runs per worker at a time; otherwise it is ignored
+# and the request is served normally.
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from app.database import SessionLocal
+from app.services import profiling_service
+from app.utils import profiler as sampling
+
+Message = dict
+Send = Callable[[Message], Awaitable[None]]
+
+HEADER = b"x-profile"
+AUTHORIZATION = b"authorization"
+
+
+def _is_admin(authorization: bytes) -> bool:
+    from fastapi import HTTPException
+
+    from app.routes.auth import get_current_user  # deferred: routes load with the app
+
+    scheme, _, token = authorization.decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return False
+    with SessionLocal() as db:
+        try:
+            user = get_current_user(token=token.strip(), db=db)
+        except HTTPException:
+            return False
+        return bool(user.is_admin)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, *, interval_ms: float = 10.0):
+        self.app = app
+        self.interval = max(1.0, interval_ms) / 1000.0
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not await self._allowed(scope) or not sampling.try_acquire():
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode("ascii"))]
+            await send(message)
+
+        profiler = sampling.SamplingProfiler(interval=self.interval).start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            await asyncio.to_thread(profiler.stop)  # joins the sampler thread
+            sampling.release()
+            profiling_service.store_request_profile(profile_id, profiler)
+
+    @staticmethod
+    async def _allowed(scope) -> bool:
+        requested, authorization = False, None  # type: bool, Optional[bytes]
+        for key, value in scope.get("headers", []):
+            if key == HEADER:
+                requested = value.strip().lower() in (b"1", b"true", b"yes")
+            elif key == AUTHORIZATION:
+                authorization = value
+        if not requested or authorization is None:
+            return False
+        return await asyncio.to_thread(_is_admin, authorization)
+
+
+__all__ = ["ProfilingMiddleware"]
@@ -0,0 +1,119 @@
+# /backend/app/middleware/timing.py
+# SpreadSaver – Request timing (ASGI)
+# Opens a request trace (utils/tracing.py), then records latency, status and the
+# request's DB query count/time against the matched route template, so label sets stay
+# bounded. Optionally emits a Server-Timing header and one structured log line per
+# request (always for slow ones). Event streams (text/event-stream, e.g. /events/*) stay
+# open for minutes to hours: they are counted, but kept out of the latency and DB
+# histograms and never logged as slow.
+
+from __future__ import annotations
+
+import logging
+from time import perf_counter
+from typing import Awaitable, Callable, Optional
+
+from app.utils import tracing
+from app.utils.metrics import registry
+from app.utils.responses import dumps
+
+logger = logging.getLogger("spreadsaver.request")
+
+Message = dict
+Send = Callable[[Message], Awaitable[None]]
+
+EVENT_STREAM = b"text/event-stream"
+
+_in_flight = [0]  # only touched on the event loop
+registry.gauge("spreadsaver_requests_in_flight", "HTTP requests being served", collect=lambda: {(): float(_in_flight[0])})
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path else "unmatched"  # raw paths would explode label cardinality
+
+
+class TimingMiddleware:
+    def __init__(
+        self,
+        app,
+        *,
+        log_requests: bool = True,
+        slow_ms: float = 500.0,
+        server_timing: bool = False,
+    ):
+        self.app = app
+        self.log_requests = log_requests
+        self.slow_seconds = slow_ms / 1000.0
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = tracing.begin(scope.get("method", ""), scope.get("path", ""))
+        trace = tracing.current()
+        status: Optional[int] = None
+        streaming = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                streaming = any(
+                    key == b"content-type" and value.startswith(EVENT_STREAM)
+                    for key, value in message.get("headers", [])
+                )
+                if self.server_timing:
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", self._server_timing(trace).encode("latin-1"))
+                    ]
+            await send(message)
+
+        _in_flight[0] += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_flight[0] -= 1
+            tracing.end(token)
+            self._finish(scope, trace, status or 500, streaming)
+
+    @staticmethod
+    def _server_timing(trace) -> str:
+        return (
+            f"app;dur={trace.elapsed() * 1000:.1f}, "
+            f'db;dur={trace.db_seconds * 1000:.1f};desc="{trace.db_queries} queries"'
+        )
+
+    def _finish(self, scope, trace, status: int, streaming: bool = False) -> None:
+        elapsed = perf_counter() - trace.started
+        method = scope.get("method", "")
+        route = trace.route = _route_label(scope)
+        tracing.REQUESTS.inc((method, route, str(status)))
+        if not streaming:
+            tracing.REQUEST_SECONDS.observe((method, route), elapsed)
+            tracing.REQUEST_DB_QUERIES.observe((route,), trace.db_queries)
+            tracing.REQUEST_DB_SECONDS.observe((route,), trace.db_seconds)
+        tracing.request_finished(trace)
+
+        slow = not streaming and elapsed >= self.slow_seconds
+        level = logging.WARNING if slow else logging.INFO
+        if (slow or self.log_requests) and logger.isEnabledFor(level):
+            record = {
+                "event": "request",
+                "method": method,
+                "route": route,
+                "path": scope.get("path", ""),
+                "status": status,
+                "ms": round(elapsed * 1000, 3),
+                "slow": slow,
+                "stream": streaming,
+                **trace.as_dict(),
+            }
+            logger.log(level, dumps(record).decode("utf-8"))
+
+
+__all__ = ["TimingMiddleware"]
@@ -1,9 +1,9 @@
-from sqlalchemy import Boolean, Column, Integer, String, Numeric, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, Numeric, DateTime, ForeignKey, Index, PrimaryKeyConstraint, Text, func
+from sqlalchemy.orm import relationship, synonym
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from datetime import datetime
-from database import Base
+from app.database import Base
 
 class BudgetRule(Base):
     __tablename__ = 'budget_rules'
@@ -14,6 +14,9 @@ class BudgetRule(Base):
     discretionary_pct = Column(Numeric)
     savings_pct = Column(Numeric)
     created_at = Column(DateTime, default=datetime.utcnow)
+    change_seq = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_budget_rules_user_change_seq", "user_id", "change_seq"),)
 
 
 class Category(Base):
@@ -22,7 +25,15 @@ class Category(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'))
     name = Column(String)
     icon = Column(String)
+    color = Column(String, nullable=True)
     target_pct = Column(Numeric)
+    change_seq = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_categories_user_change_seq", "user_id", "change_seq"),
+        # One category per name and user, whatever the case (see budget_service.fold_category_name)
+        Index("uq_categories_user_lower_name", "user_id", func.lower(name), unique=True),
+    )
 
 
 class Purchase(Base):
@@ -31,8 +42,19 @@ class Purchase(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'))
     category_id = Column(UUID(as_uuid=True), ForeignKey('categories.id'))
     amount = Column(Numeric)
-    description = Column(String)
-    purchased_at = Column(DateTime, default=datetime.utcnow)
+    # Services say note/occurred_at; the columns keep their original names
+    note = Column("description", String)
+    occurred_at = Column("purchased_at", DateTime, default=datetime.utcnow)
+    change_seq = Column(BigInteger, nullable=False, default=0)
+
+    description = synonym("note")
+    purchased_at = synonym("occurred_at")
+
+    __table_args__ = (
+        Index("ix_purchases_user_change_seq", "user_id", "change_seq"),
+        # Month windows (summaries, listings, group dashboards, leaderboards)
+        Index("ix_purchases_user_purchased_at", "user_id", "purchased_at"),
+    )
 
 
 class BudgetSummary(Base):
@@ -45,13 +67,48 @@ class BudgetSummary(Base):
 
 
 class User(Base):
-    username = None
     __tablename__ = 'users'
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    username = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
+    is_admin = Column(Boolean, nullable=False, default=False)
     subscription_tier = Column(String, default='free')
+    stripe_customer_id = Column(String, unique=True, index=True, nullable=True)
+    # Per-user monotonic change cursor; bumped (row-locked) by every synced write
+    change_seq = Column(BigInteger, nullable=False, default=0)
+
+    tier = synonym("subscription_tier")
+    user_badges = relationship("UserBadge", back_populates="user", cascade="all, delete-orphan")
+
+
+class Group(Base):
+    __tablename__ = "groups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    members = relationship("GroupMember", back_populates="group", cascade="all, delete-orphan")
+
+
+class GroupMember(Base):
+    __tablename__ = "group_members"
+
+    group_id = Column(Integer, ForeignKey("groups.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    role = Column(String, nullable=False, default="member")  # "owner", "admin", "member"
+    joined_at = Column(DateTime, default=datetime.utcnow)
+
+    group = relationship("Group", back_populates="members")
+
+    __table_args__ = (
+        PrimaryKeyConstraint("group_id", "user_id"),
+        Index("ix_group_members_user_id", "user_id"),
+    )
 
 
 class Badge(Base):
@@ -70,17 +127,73 @@ class UserBadge(Base):
     __tablename__ = "user_badges"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     badge_id = Column(Integer, ForeignKey("badges.id", ondelete="CASCADE"), nullable=False)
+    unlocked_at = Column(DateTime, default=datetime.utcnow)
+    change_seq = Column(BigInteger, nullable=False, default=0)
 
     user = relationship("User", back_populates="user_badges")
     badge = relationship("Badge", back_populates="user_badges")
 
+    __table_args__ = (Index("ix_user_badges_user_change_seq", "user_id", "change_seq"),)
+
 
 class BadgeAssignRequest(Base):
     __tablename__ = "badge_assign_requests"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     badge_id = Column(Integer, ForeignKey("badges.id", ondelete="CASCADE"), nullable=False)
     note = Column(String, nullable=True)
+
+
+class SyncTombstone(Base):
+    """Deleted synced entity, kept so offline clients can drop their local copy."""
+    __tablename__ = "sync_tombstones"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    entity = Column(String, nullable=False)  # "purchase", "category", "rule", "badge"
+    entity_id = Column(String, nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_sync_tombstones_user_change_seq", "user_id", "change_seq"),)
+
+
+class StripeEvent(Base):
+    """Webhook inbox: one row per Stripe event id, applied later in order per customer."""
+    __tablename__ = "stripe_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    event_id = Column(String, unique=True, nullable=False)
+    type = Column(String, nullable=False)
+    # Ordering key: Stripe customer id, else the user id from metadata, else the event id
+    customer_id = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # "pending", "processing", "done", "ignored", "failed"
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    available_at = Column(DateTime, default=datetime.utcnow)  # retry backoff
+    claimed_at = Column(DateTime, nullable=True)
+    received_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (Index("ix_stripe_events_customer_status", "customer_id", "status", "id"),)
+
+
+class Subscription(Base):
+    """Local mirror of a Stripe subscription; kept current by webhooks and reconciliation
+    so tier checks never call Stripe."""
+    __tablename__ = "subscriptions"
+
+    id = Column(String, primary_key=True)  # Stripe subscription id
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
+    customer_id = Column(String, nullable=True, index=True)
+    status = Column(String, nullable=False)  # Stripe status: "active", "trialing", "past_due", "canceled", ...
+    price_id = Column(String, nullable=True)
+    tier = Column(String, nullable=True)
+    current_period_end = Column(DateTime, nullable=True)
+    # Stripe-side freshness (event `created` / reconcile time); older writes are ignored
+    stripe_updated = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
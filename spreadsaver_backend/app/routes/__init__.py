@@ -1,20 +1,29 @@
-from fastapi import APIRouter
+from fastapi import FastAPI
 
-api_router = APIRouter()
 
-def include_all_routes():
+def include_all_routes(target: FastAPI) -> None:
+    # Routers (and the services they pull in) are imported here rather than at package
+    # import, so `import app.routes` stays cheap and the app factory decides when to pay.
+    from .admin import router as admin_router
     from .auth import router as auth_router
     from .badge import router as badge_router
+    from .batch import router as batch_router
+    from .events import router as events_router
+    from .metrics import router as metrics_router
     from .service import router as service_router
     from .stripe import router as stripe_router
+    from .sync import router as sync_router
     from .tier_logic import router as tier_logic_router
     from .users import router as users_router
 
-    api_router.include_router(auth_router)
-    api_router.include_router(badge_router)
-    api_router.include_router(service_router)
-    api_router.include_router(stripe_router)
-    api_router.include_router(tier_logic_router)
-    api_router.include_router(users_router)
-
-include_all_routes()
+    target.include_router(admin_router)
+    target.include_router(auth_router)
+    target.include_router(badge_router)
+    target.include_router(batch_router)
+    target.include_router(events_router)
+    target.include_router(metrics_router)
+    target.include_router(service_router)
+    target.include_router(stripe_router)
+    target.include_router(sync_router)
+    target.include_router(tier_logic_router)
+    target.include_router(users_router)
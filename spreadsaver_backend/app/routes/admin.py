@@ -0,0 +1,59 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+from app.config.settings import settings
+from app.routes.auth import get_current_user
+from app.services import profiling_service
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"]
+)
+
+COLLAPSED_MEDIA_TYPE = "text/plain; charset=utf-8"
+
+
+def require_admin(current_user=Depends(get_current_user)):
+    if not getattr(current_user, "is_admin", False):
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return current_user
+
+
+def _collapsed(body: str, filename: str) -> Response:
+    return Response(
+        content=body,
+        media_type=COLLAPSED_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
+
+
+@router.get("/profile", status_code=status.HTTP_200_OK)
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0, le=settings.PROFILER_MAX_SECONDS),
+    interval_ms: Optional[float] = Query(None, ge=1, le=1000, description="Sampling interval"),
+    _admin=Depends(require_admin),
+):
+    """
+    Admin-only: sample every thread of the worker serving this request for `seconds`
+    and return the stacks in collapsed format (flamegraph.pl / speedscope input).
+    """
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler disabled")
+    profiler = await profiling_service.profile(seconds, interval_ms=interval_ms)
+    if profiler is None:
+        raise HTTPException(status_code=409, detail="A profile is already running on this worker")
+    return _collapsed(profiler.collapsed(), "profile.collapsed")
+
+
+@router.get("/profile/{profile_id}", status_code=status.HTTP_200_OK)
+def get_request_profile(profile_id: str, _admin=Depends(require_admin)):
+    """
+    Admin-only: collapsed stacks for a request sent with `X-Profile: 1` (its response
+    carried `X-Profile-Id`). Profiles are kept in the worker that served the request
+    for 10 minutes.
+    """
+    body = profiling_service.get_request_profile(profile_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Profile not found (expired, or served by another worker)")
+    return _collapsed(body, f"request-{profile_id}.collapsed")
@@ -6,12 +6,12 @@ from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Depends, status, Request
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlalchemy import func, or_
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import SessionLocal, get_db, read_session
 from app.models.models import User
+from app.services import auth_service, cache_service
 from app.utils.hash import get_password_hash, verify_password
 from app.schemas.schemas import (
     UserCreate,
@@ -50,6 +50,8 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 # ---------------------------------------------------------------------------
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    from jose import jwt  # deferred: python-jose (and its crypto backends) is slow to import
+
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (
         expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -59,6 +61,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def create_refresh_token(data: dict) -> str:
+    from jose import jwt
+
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire})
@@ -70,17 +74,7 @@ def create_refresh_token(data: dict) -> str:
 # ---------------------------------------------------------------------------
 
 def get_user_by_identifier(db: Session, identifier: str) -> Optional[User]:
-    ident = identifier.strip().lower()
-    return (
-        db.query(User)
-        .filter(
-            or_(
-                func.lower(User.username) == ident,
-                func.lower(User.email) == ident,
-            )
-        )
-        .first()
-    )
+    return auth_service.get_user_by_identifier(db, identifier)
 
 
 def authenticate_user(db: Session, identifier: str, password: str) -> Optional[User]:
@@ -115,7 +109,7 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         username=username_norm,
         email=email_norm,
         hashed_password=hashed_password,
-        tier="Free",
+        tier="free",
         is_admin=False,
     )
     db.add(new_user)
@@ -158,6 +152,8 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
 @router.post("/refresh", response_model=Token)
 def refresh_token(request: Request, db: Session = Depends(get_db)):
     """Refresh the access token using a valid refresh token in the Authorization header."""
+    from jose import JWTError, jwt
+
     token = request.headers.get("Authorization")
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token missing")
@@ -184,6 +180,8 @@ def refresh_token(request: Request, db: Session = Depends(get_db)):
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
     """Dependency to retrieve the current user from an access token."""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -197,6 +195,27 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         raise HTTPException(status_code=403, detail="Token is invalid or expired")
 
 
+def get_stream_user(token: str = Depends(oauth2_scheme)) -> User:
+    """`get_current_user` for long-lived responses (SSE): the user is loaded on a session
+    that is closed before the route returns, so an open stream holds no pooled connection.
+    The returned user is detached; only its already-loaded columns are usable."""
+    with SessionLocal() as db:
+        return get_current_user(token=token, db=db)
+
+
+def get_read_db(request: Request, current_user: User = Depends(get_current_user)):
+    """Dependency for read-only routes: a replica session, unless the caller (or the
+    group in the path) wrote within READ_YOUR_WRITES_SECONDS."""
+    pinned = cache_service.recently_written(
+        user_id=current_user.id, group_id=request.path_params.get("group_id")
+    )
+    db = read_session(pin_primary=pinned)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 @router.get("/me", response_model=UserRead)
 def read_users_me(current_user: User = Depends(get_current_user)):
     """Return the authenticated user's profile."""
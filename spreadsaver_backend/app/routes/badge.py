@@ -5,8 +5,10 @@ from typing import List
 from app.database import get_db
 from app.schemas.schemas import UserBadgeRead, BadgeAssignResult
 from app.services import badge_service
-from app.routes.auth import get_current_user
+from app.routes.auth import get_current_user, get_read_db
 from app.models.models import User
+from app.services.cache_service import SCOPE_BADGES
+from app.utils.etag import conditional_get
 
 router = APIRouter(
     prefix="/badges",
@@ -16,10 +18,12 @@ router = APIRouter(
 @router.get("/me", response_model=List[UserBadgeRead], status_code=status.HTTP_200_OK)
 def get_my_badges(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db),
+    _etag: str = Depends(conditional_get(SCOPE_BADGES)),
 ):
     """
     Return all badges (achieved + locked) for the current user.
+    Supports If-None-Match: unchanged badge sets are answered with 304.
     """
     return badge_service.get_user_badges(db, current_user.id)
 
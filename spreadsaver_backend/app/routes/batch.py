@@ -0,0 +1,212 @@
+# SpreadSaver – Batched operations
+# One authenticated round-trip for the app's launch burst (summary, categories, badges,
+# groups, profile). Sub-requests reuse the same service calls as the individual routes,
+# share the caller's user and DB session, and report per-operation status codes.
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy.orm import Session
+from starlette.routing import compile_path
+
+from app.database import get_db
+from app.routes.auth import get_current_user
+from app.schemas.schemas import UserBadgeRead, UserRead
+from app.services import badge_service, budget_service, group_service
+from app.utils.calculations import parse_month
+from app.utils.responses import trusted_json
+
+logger = logging.getLogger("spreadsaver.batch")
+
+router = APIRouter(prefix="/batch", tags=["Batch"])
+
+MAX_OPERATIONS = 20
+
+
+# ---------------------------------------------------------------------------
+# Models
+# ---------------------------------------------------------------------------
+class BatchOperation(BaseModel):
+    id: str = Field(..., description="Client-chosen id echoed back in the result")
+    method: Literal["GET", "POST"] = "GET"
+    path: str = Field(..., description="Path of the equivalent single request, e.g. /badges/me")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Query parameters")
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_length=1, max_length=MAX_OPERATIONS)
+
+
+class BatchResult(BaseModel):
+    id: str
+    status: int
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult] = Field(default_factory=list)
+
+
+# ---------------------------------------------------------------------------
+# Operation handlers: (db, current_user, path_params, query_params) -> body
+# ---------------------------------------------------------------------------
+Handler = Callable[[Session, Any, Dict[str, str], Dict[str, Any]], Any]
+
+
+def _int_param(params: Dict[str, Any], name: str, default: Optional[int] = None) -> Optional[int]:
+    value = params.get(name, default)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail=f"'{name}' must be an integer")
+
+
+def _uuid_param(params: Dict[str, Any], name: str) -> Optional[UUID]:
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return UUID(str(value))
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"'{name}' must be a UUID")
+
+
+def _month_param(params: Dict[str, Any], name: str = "month") -> Optional[str]:
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return parse_month(str(value))
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"'{name}' must be YYYY-MM")
+
+
+def _budget_summary(db: Session, user: Any, _: Dict[str, str], params: Dict[str, Any]) -> Any:
+    from app.routes.service import build_summary_payload  # local import: avoid router import cycle
+
+    month = _month_param(params)
+    if not month:
+        raise HTTPException(status_code=422, detail="'month' is required")
+    return json.loads(build_summary_payload(db, user_id=user.id, month=month))
+
+
+def _budget_categories(db: Session, user: Any, _: Dict[str, str], __: Dict[str, Any]) -> Any:
+    return budget_service.list_user_categories(db=db, user_id=user.id)
+
+
+def _budget_purchases(db: Session, user: Any, _: Dict[str, str], params: Dict[str, Any]) -> Any:
+    page = max(_int_param(params, "page", 1) or 1, 1)
+    size = min(max(_int_param(params, "size", 25) or 25, 1), 200)
+    items = budget_service.list_purchases(
+        db=db,
+        user_id=user.id,
+        month=_month_param(params),
+        category_id=_uuid_param(params, "category_id"),
+        limit=size,
+        offset=(page - 1) * size,
+    )
+    return {"page": page, "size": size, "items": items}
+
+
+def _my_groups(db: Session, user: Any, _: Dict[str, str], __: Dict[str, Any]) -> Any:
+    rows = group_service.list_user_groups(db=db, user_id=user.id)
+    return [{"id": r.id, "name": r.name, "role": getattr(r, "role", None)} for r in rows]
+
+
+def _my_badges(db: Session, user: Any, _: Dict[str, str], __: Dict[str, Any]) -> Any:
+    rows = badge_service.get_user_badges(db, user.id)
+    return [UserBadgeRead.model_validate(r).model_dump(mode="json") for r in rows]
+
+
+def _evaluate_badges(db: Session, user: Any, _: Dict[str, str], __: Dict[str, Any]) -> Any:
+    new_badges = badge_service.evaluate_and_assign_badges(db, user.id)
+    return {"new_badges": len(new_badges)}
+
+
+def _me(db: Session, user: Any, _: Dict[str, str], __: Dict[str, Any]) -> Any:
+    return UserRead.model_validate(user).model_dump(mode="json")
+
+
+def _user_by_username(db: Session, user: Any, path: Dict[str, str], __: Dict[str, Any]) -> Any:
+    from app.routes.users import get_user_by_username
+
+    return UserRead.model_validate(get_user_by_username(path["username"], db)).model_dump(mode="json")
+
+
+_OPERATIONS: List[Tuple[str, str, Handler]] = [
+    ("GET", "/service/budget/summary", _budget_summary),
+    ("GET", "/service/budget/categories", _budget_categories),
+    ("GET", "/service/budget/purchases", _budget_purchases),
+    ("GET", "/service/groups/my", _my_groups),
+    ("GET", "/badges/me", _my_badges),
+    ("POST", "/badges/evaluate", _evaluate_badges),
+    ("GET", "/auth/me", _me),
+    ("GET", "/users/{username}", _user_by_username),
+]
+
+# Compile path templates once at import
+_ROUTES = [(method, compile_path(template)[0], handler) for method, template, handler in _OPERATIONS]
+
+
+def _resolve(method: str, path: str) -> Tuple[Optional[Handler], Dict[str, str]]:
+    path = "/" + path.split("?", 1)[0].strip("/")
+    for route_method, regex, handler in _ROUTES:
+        match = regex.match(path)
+        if match and route_method == method:
+            return handler, match.groupdict()
+    return None, {}
+
+
+def _result(op: BatchOperation, status_code: int, body: Any) -> Dict[str, Any]:
+    """Plain-dict BatchResult (serialized directly, see run_batch)."""
+    return {"id": op.id, "status": status_code, "body": body}
+
+
+def _run_operation(db: Session, user: Any, op: BatchOperation) -> Dict[str, Any]:
+    handler, path_params = _resolve(op.method, op.path)
+    if handler is None:
+        return _result(op, status.HTTP_404_NOT_FOUND, {"detail": "Unsupported batch path"})
+    try:
+        return _result(op, status.HTTP_200_OK, handler(db, user, path_params, op.params))
+    except HTTPException as e:
+        return _result(op, e.status_code, {"detail": e.detail})
+    except ValidationError:
+        # a response that doesn't fit its schema is our bug, not the caller's
+        db.rollback()
+        logger.exception("batch operation %s %s produced an invalid response", op.method, op.path)
+        return _result(op, status.HTTP_500_INTERNAL_SERVER_ERROR, {"detail": "Internal server error"})
+    except ValueError as e:
+        db.rollback()
+        return _result(op, status.HTTP_400_BAD_REQUEST, {"detail": str(e)})
+    except Exception:  # pragma: no cover
+        db.rollback()
+        logger.exception("batch operation %s %s failed", op.method, op.path)
+        return _result(op, status.HTTP_500_INTERNAL_SERVER_ERROR, {"detail": "Internal server error"})
+
+
+# ---------------------------------------------------------------------------
+# Route
+# ---------------------------------------------------------------------------
+@router.post("", response_model=BatchResponse, status_code=status.HTTP_200_OK)
+def run_batch(
+    payload: BatchRequest,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Run up to MAX_OPERATIONS sub-requests with one auth check and one DB session.
+
+    Operations run in the order given (so a POST sees earlier results) on a single worker
+    thread; a failing operation reports its own status without aborting the rest.
+    """
+    return trusted_json({"results": [_run_operation(db, current_user, op) for op in payload.operations]})
+
+
+__all__ = ["router"]
@@ -0,0 +1,75 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.database import SessionLocal
+from app.models.models import User
+from app.routes.auth import get_stream_user
+from app.services import event_service
+from app.services.membership_index import has_group_role
+
+router = APIRouter(
+    prefix="/events",
+    tags=["Events"]
+)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # don't let a reverse proxy buffer the stream
+}
+
+# Streams live for minutes to hours: nothing here holds a DB session past the handler.
+# Auth and membership checks use short-lived sessions that are closed before streaming.
+
+
+def _sse(channel: str, revalidate: Optional[Callable[[bytes], Awaitable[bool]]] = None) -> StreamingResponse:
+    return StreamingResponse(
+        event_service.stream(channel, revalidate=revalidate),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+def _is_member(group_id: int, user_id: Any) -> bool:
+    with SessionLocal() as db:
+        return has_group_role(db, group_id=group_id, user_id=user_id)
+
+
+def _membership_guard(group_id: int, user_id: Any) -> Callable[[bytes], Awaitable[bool]]:
+    """Re-check membership whenever it may have changed: on `member.changed`, and on
+    `resync` (which may have replaced one). Other events are passed through unchecked."""
+    recheck = {event_service.EVENT_MEMBERSHIP, event_service.EVENT_RESYNC}
+
+    async def still_member(data: bytes) -> bool:
+        if event_service.event_name(data) not in recheck:
+            return True
+        return await asyncio.to_thread(_is_member, group_id, user_id)
+
+    return still_member
+
+
+@router.get("/me", status_code=status.HTTP_200_OK)
+def stream_my_events(current_user: User = Depends(get_stream_user)):
+    """
+    Server-sent events for the current user: `summary.delta` on purchase writes and
+    `badge.awarded` on new badges. Comment heartbeats keep idle connections open; a
+    `resync` event means the client fell behind and should refetch.
+    """
+    return _sse(event_service.user_channel(current_user.id))
+
+
+@router.get("/groups/{group_id}", status_code=status.HTTP_200_OK)
+def stream_group_events(
+    group_id: int,
+    current_user: User = Depends(get_stream_user),
+):
+    """
+    Server-sent events for a group (members only): `member.activity` when a member's
+    purchases change and `member.changed` on joins, leaves and role changes. The stream
+    ends after the `member.changed` event that removes the subscriber.
+    """
+    if not _is_member(group_id, current_user.id):
+        raise HTTPException(status_code=403, detail="Not a member of this group")
+    return _sse(event_service.group_channel(group_id), _membership_guard(group_id, current_user.id))
@@ -0,0 +1,24 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Response, status
+
+from app.config.settings import settings
+from app.utils.metrics import CONTENT_TYPE, registry
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics(authorization: Optional[str] = Header(None)):
+    """
+    Prometheus scrape endpoint: request latency/DB histograms per route, DB statement
+    latency, hot-path spans (bcrypt, serialization) and in-process cache hit ratios.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not authorization or not hmac.compare_digest(authorization, expected):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
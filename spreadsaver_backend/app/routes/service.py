@@ -4,19 +4,34 @@
 
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Literal
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.routes.auth import get_current_user  # reuse auth dependency
+from app.routes.auth import get_current_user, get_read_db  # reuse auth dependencies
 from app.schemas.schemas import (
     MessageResponse,
     BadgeAssignRequest,
 )
+from app.services import cache_service
+from app.services.cache_service import (
+    SCOPE_CATEGORIES,
+    SCOPE_GROUPS,
+    SCOPE_MONTH,
+    SCOPE_PURCHASES,
+    SCOPE_RULES,
+)
+from app.services.membership_index import has_group_role
+from app.services.stripe_client import CircuitOpenError
+from app.utils.calculations import parse_month
+from app.utils.etag import conditional_get
+from app.utils.responses import trusted_json
 
 # Optional imports of services (comment/uncomment as implementation lands)
 try:
@@ -54,6 +69,36 @@ class BudgetSummaryResponse(BaseModel):
     by_category: Dict[str, float] = Field(default_factory=dict)
 
 
+class CategoryItem(BaseModel):
+    id: Any = None
+    name: str
+    color: Optional[str] = None
+
+
+class PurchaseItem(BaseModel):
+    id: Any = None
+    user_id: Any = None
+    amount: float
+    category_id: Optional[Any] = None
+    occurred_at: Optional[datetime] = None
+    note: Optional[str] = None
+
+
+class PurchaseCreate(BaseModel):
+    amount: float = Field(..., gt=0)
+    category_id: Optional[UUID] = None
+    # alternative to category_id: matched by name (any case), created if missing
+    category: Optional[str] = Field(None, max_length=100)
+    occurred_at: Optional[datetime] = None
+    note: Optional[str] = Field(None, max_length=500)
+
+
+class PurchasePage(BaseModel):
+    page: int = 1
+    size: int = 25
+    items: List[PurchaseItem] = Field(default_factory=list)
+
+
 class CheckoutCreateRequest(BaseModel):
     price_id: str
     mode: str = Field(default="subscription", description="'subscription' or 'payment'")
@@ -73,6 +118,75 @@ class GroupSummary(BaseModel):
     role: Optional[str] = None
 
 
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: Any
+    value: float
+
+
+class GroupLeaderboardResponse(BaseModel):
+    group_id: int
+    month: str
+    metric: str
+    size: int
+    top: List[LeaderboardEntry] = Field(default_factory=list)
+    me: Optional[LeaderboardEntry] = None
+
+
+class BulkMemberOperation(BaseModel):
+    user_id: UUID
+    action: Literal["add", "remove", "set_role"] = "add"
+    role: str = "member"
+
+
+class BulkMembersRequest(BaseModel):
+    operations: List[BulkMemberOperation] = Field(..., min_length=1)
+
+
+class BulkMemberResult(BaseModel):
+    user_id: Any
+    action: str
+    role: Optional[str] = None
+    status: str  # added | updated | unchanged | removed | not_member | not_found | error
+    detail: Optional[str] = None
+
+
+class BulkMembersResponse(BaseModel):
+    group_id: int
+    results: List[BulkMemberResult] = Field(default_factory=list)
+
+
+class GroupMemberSpend(BaseModel):
+    user_id: Any
+    role: Optional[str] = None
+    total_spent: float = 0.0
+    by_category: Dict[str, float] = Field(default_factory=dict)
+
+
+class GroupDashboardResponse(BaseModel):
+    """Shared monthly view: group totals plus each member's spend."""
+    group_id: int
+    month: str
+    total_spent: float = 0.0
+    by_category: Dict[str, float] = Field(default_factory=dict)
+    members: List[GroupMemberSpend] = Field(default_factory=list)
+
+
+# ---------------------------------------------------------------------------
+# Query parameters
+# ---------------------------------------------------------------------------
+def month_query(month: str = Query(..., description="Target month in YYYY-MM format")) -> str:
+    """The `month` parameter in the YYYY-MM form writes invalidate ("2025-1" -> "2025-01")."""
+    try:
+        return parse_month(month)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="'month' must be YYYY-MM")
+
+
+def optional_month_query(month: Optional[str] = Query(None, description="Optional YYYY-MM filter")) -> Optional[str]:
+    return None if month is None else month_query(month)
+
+
 # ---------------------------------------------------------------------------
 # Health & meta
 # ---------------------------------------------------------------------------
@@ -86,7 +200,7 @@ async def service_health() -> Dict[str, Any]:
 # Badge service endpoints
 # ---------------------------------------------------------------------------
 @router.post("/badges/assign", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
-async def assign_badge(
+def assign_badge(
     payload: BadgeAssignRequest,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
@@ -115,7 +229,7 @@ async def assign_badge(
 
 
 @router.post("/badges/evaluate", response_model=MessageResponse)
-async def evaluate_my_badges(
+def evaluate_my_badges(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
@@ -135,61 +249,204 @@ async def evaluate_my_badges(
 # Budget service endpoints
 # ---------------------------------------------------------------------------
 @router.get("/budget/summary", response_model=BudgetSummaryResponse)
-async def get_budget_summary(
-    month: str = Query(..., description="Target month in YYYY-MM format"),
-    db: Session = Depends(get_db),
+def get_budget_summary(
+    month: str = Depends(month_query),
+    db: Session = Depends(get_read_db),
     current_user=Depends(get_current_user),
+    etag: str = Depends(conditional_get(SCOPE_RULES, SCOPE_CATEGORIES, (SCOPE_MONTH, "month"))),
 ):
-    """Return the dashboard summary for a given month."""
+    """Return the dashboard summary for a given month.
+
+    Serialized payloads are cached per (user, month, rules version); writes in
+    budget_service bump the relevant versions so stale entries are never served.
+    """
+    payload = build_summary_payload(db, user_id=current_user.id, month=month)
+    return Response(content=payload, media_type="application/json", headers={"ETag": etag})
+
+
+def build_summary_payload(db: Session, *, user_id: Any, month: str) -> bytes:
+    """Serialized BudgetSummaryResponse for (user, month), served from cache when fresh.
+    `month` must already be normalized (see month_query)."""
+    cache_key = cache_service.summary_key(user_id, month)
+    cached = cache_service.get_summary(cache_key)
+    if cached is not None:
+        return cached
+
     if budget_service and hasattr(budget_service, "get_month_summary"):
-        try:
-            summary = budget_service.get_month_summary(db=db, user_id=current_user.id, month=month)
-        except Exception as e:  # pragma: no cover
-            raise HTTPException(status_code=400, detail=str(e))
+        summary = budget_service.get_month_summary(db=db, user_id=user_id, month=month)
         # Expecting summary as dict-like. Coerce into schema shape.
-        return BudgetSummaryResponse(
+        body = BudgetSummaryResponse(
             month=summary.get("month", month),
             total_spent=float(summary.get("total_spent", 0.0)),
             total_income=summary.get("total_income"),
             by_category=summary.get("by_category", {}),
         )
     else:
-        # Basic placeholder until service exists
-        return BudgetSummaryResponse(month=month, total_spent=0.0, by_category={})
+        # Basic placeholder until service exists (not cached)
+        return BudgetSummaryResponse(month=month, total_spent=0.0, by_category={}).model_dump_json().encode("utf-8")
+
+    payload = body.model_dump_json().encode("utf-8")
+    cache_service.set_summary(cache_key, month, payload)
+    return payload
+
+
+@router.get("/budget/categories", response_model=List[CategoryItem])
+def list_my_categories(
+    db: Session = Depends(get_read_db),
+    current_user=Depends(get_current_user),
+    _etag: str = Depends(conditional_get(SCOPE_CATEGORIES)),
+):
+    """Return the current user's categories, alphabetically."""
+    if budget_service and hasattr(budget_service, "list_user_categories"):
+        return budget_service.list_user_categories(db=db, user_id=current_user.id)
+    return []
+
+
+@router.get("/budget/purchases", response_model=PurchasePage)
+def list_my_purchases(
+    month: Optional[str] = Depends(optional_month_query),
+    category_id: Optional[UUID] = Query(None),
+    page: int = Query(1, ge=1),
+    size: int = Query(25, ge=1, le=200),
+    db: Session = Depends(get_read_db),
+    current_user=Depends(get_current_user),
+    etag: str = Depends(conditional_get(SCOPE_PURCHASES)),
+):
+    """Return one page of the current user's purchases, newest first.
+
+    Rows come straight from budget_service, so the page skips PurchasePage re-validation.
+    """
+    if not budget_service or not hasattr(budget_service, "list_purchases"):
+        return PurchasePage(page=page, size=size)
+    rows = budget_service.list_purchases(
+        db=db,
+        user_id=current_user.id,
+        month=month,
+        category_id=category_id,
+        limit=size,
+        offset=(page - 1) * size,
+    )
+    return trusted_json({"page": page, "size": size, "items": rows}, headers={"ETag": etag})
+
+
+@router.post("/budget/purchases", response_model=PurchaseItem, status_code=status.HTTP_201_CREATED)
+def add_my_purchase(
+    payload: PurchaseCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Record a purchase for the current user."""
+    if not budget_service or not hasattr(budget_service, "add_purchase"):
+        raise HTTPException(status_code=501, detail="Budget service not implemented")
+    try:
+        return budget_service.add_purchase(
+            db=db,
+            user_id=current_user.id,
+            amount=payload.amount,
+            category_id=payload.category_id,
+            occurred_at=payload.occurred_at,
+            note=payload.note,
+            category_name=payload.category,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ---------------------------------------------------------------------------
 # Group service endpoints
 # ---------------------------------------------------------------------------
 @router.get("/groups/my", response_model=List[GroupSummary])
-async def list_my_groups(
-    db: Session = Depends(get_db),
+def list_my_groups(
+    db: Session = Depends(get_read_db),
     current_user=Depends(get_current_user),
+    _etag: str = Depends(conditional_get(SCOPE_GROUPS)),
 ):
     """Return groups for the current user."""
     if group_service and hasattr(group_service, "list_user_groups"):
-        try:
-            rows = group_service.list_user_groups(db=db, user_id=current_user.id)
-        except Exception as e:  # pragma: no cover
-            raise HTTPException(status_code=400, detail=str(e))
+        rows = group_service.list_user_groups(db=db, user_id=current_user.id)
         return [GroupSummary(id=r.id, name=r.name, role=getattr(r, "role", None)) for r in rows]
     # Placeholder empty list until implemented
     return []
 
 
+@router.get("/groups/{group_id}/dashboard", response_model=GroupDashboardResponse)
+def get_group_dashboard(
+    group_id: int,
+    month: str = Depends(month_query),
+    db: Session = Depends(get_read_db),
+    current_user=Depends(get_current_user),
+):
+    """Return the group's shared budget view for a month (members only)."""
+    if not group_service or not hasattr(group_service, "get_group_dashboard"):
+        raise HTTPException(status_code=501, detail="Group dashboard not implemented")
+    if group_service.get_member_role(db=db, group_id=group_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=403, detail="Not a member of this group")
+    try:
+        dashboard = group_service.get_group_dashboard(db=db, group_id=group_id, month=month)
+    except Exception as e:  # pragma: no cover
+        raise HTTPException(status_code=400, detail=str(e))
+    return trusted_json(dashboard)
+
+
+@router.get("/groups/{group_id}/leaderboard", response_model=GroupLeaderboardResponse)
+def get_group_leaderboard(
+    group_id: int,
+    month: str = Depends(month_query),
+    metric: Literal["savings_rate", "compliance_ratio", "no_spend_streak"] = Query("savings_rate"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    current_user=Depends(get_current_user),
+):
+    """Top members for a metric this month, plus the caller's own rank (members only)."""
+    if not group_service or not hasattr(group_service, "get_group_leaderboard"):
+        raise HTTPException(status_code=501, detail="Group leaderboard not implemented")
+    if group_service.get_member_role(db=db, group_id=group_id, user_id=current_user.id) is None:
+        raise HTTPException(status_code=403, detail="Not a member of this group")
+    try:
+        board = group_service.get_group_leaderboard(
+            db=db, group_id=group_id, month=month, metric=metric, limit=limit, user_id=current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return trusted_json(board)
+
+
+@router.post("/groups/{group_id}/members/bulk", response_model=BulkMembersResponse)
+def bulk_update_group_members(
+    group_id: int,
+    body: BulkMembersRequest,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Group admins: add, remove or re-role many members in one transaction."""
+    if not group_service or not hasattr(group_service, "bulk_update_members"):
+        raise HTTPException(status_code=501, detail="Bulk membership not implemented")
+    if not has_group_role(db, group_id=group_id, user_id=current_user.id, required="admin"):
+        raise HTTPException(status_code=403, detail="Group admin privileges required")
+    try:
+        results = group_service.bulk_update_members(
+            db=db,
+            group_id=group_id,
+            actor_id=current_user.id,
+            operations=[op.model_dump() for op in body.operations],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return trusted_json({"group_id": group_id, "results": results})
+
+
 # ---------------------------------------------------------------------------
 # Stripe service endpoints
 # ---------------------------------------------------------------------------
 @router.post("/stripe/checkout", response_model=CheckoutSessionResponse)
 async def create_checkout_session(
     body: CheckoutCreateRequest,
-    db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
     """Create a Stripe Checkout Session for subscriptions or one-time payments."""
-    if stripe_service and hasattr(stripe_service, "create_checkout_session"):
+    if stripe_service and hasattr(stripe_service, "create_checkout_session_async"):
         try:
-            session = stripe_service.create_checkout_session(
+            session = await stripe_service.create_checkout_session_async(
                 user_id=current_user.id,
                 price_id=body.price_id,
                 mode=body.mode,
@@ -198,6 +455,8 @@ async def create_checkout_session(
                 metadata=body.metadata,
             )
             return CheckoutSessionResponse(id=getattr(session, "id", None), url=getattr(session, "url", ""))
+        except CircuitOpenError as e:
+            raise HTTPException(status_code=503, detail=str(e))
         except Exception as e:  # pragma: no cover
             raise HTTPException(status_code=400, detail=str(e))
     else:
@@ -205,8 +464,8 @@ async def create_checkout_session(
 
 
 @router.post("/stripe/webhook", status_code=200)
-async def stripe_webhook(request: Request):
-    """Receive Stripe webhook events. Public endpoint (no auth)."""
+async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
+    """Receive Stripe webhook events. Public endpoint (no auth); events are queued."""
     if not stripe_service or not hasattr(stripe_service, "handle_webhook"):
         raise HTTPException(status_code=501, detail="Stripe webhook not implemented")
 
@@ -214,11 +473,12 @@ async def stripe_webhook(request: Request):
     payload = await request.body()
 
     try:
-        stripe_service.handle_webhook(payload=payload, signature=signature)
+        # signature check + inbox insert are blocking; keep them off the event loop
+        result = await asyncio.to_thread(stripe_service.handle_webhook, payload=payload, signature=signature, db=db)
     except Exception as e:  # pragma: no cover
         raise HTTPException(status_code=400, detail=str(e))
 
-    return {"received": True}
+    return {"received": True, "duplicate": result["duplicate"]}
 
 
-__all__ = ["router"]
+__all__ = ["router", "build_summary_payload", "month_query"]
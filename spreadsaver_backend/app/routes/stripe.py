@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Request, HTTPException
+import asyncio
+
+from fastapi import APIRouter, Depends, Request, HTTPException
 from pydantic import BaseModel
-import stripe
-from app.services.stripe_service import settings, create_checkout_session
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.services.stripe_client import CircuitOpenError, sdk
+from app.services.stripe_service import settings, create_checkout_session_async, handle_webhook
 
 router = APIRouter()
 
@@ -11,30 +15,26 @@ class CheckoutRequest(BaseModel):
     interval: str  # "monthly" or "yearly"
 
 @router.post("/webhook")
-async def stripe_webhook(request: Request):
+async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
     payload = await request.body()
     sig_header = request.headers.get('stripe-signature')
 
     try:
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
-        )
+        # Verified and stored in the inbox; tier updates are applied by background workers
+        result = await asyncio.to_thread(handle_webhook, payload=payload, signature=sig_header, db=db)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid payload")
-    except stripe.error.SignatureVerificationError:
+    except sdk().error.SignatureVerificationError:
         raise HTTPException(status_code=400, detail="Invalid signature")
 
-    if event['type'] == 'checkout.session.completed':
-        # session = event['data']['object']
-        # TODO: Update user tier in DB using event['data']['object']['metadata']
-        pass
-
-    return {"status": "success"}
+    return {"status": "success", "duplicate": result["duplicate"]}
 
 @router.post("/create-checkout-session")
 async def create_checkout(data: CheckoutRequest):
     try:
-        session = create_checkout_session(data.user_id, f"{data.tier}:{data.interval}")
+        session = await create_checkout_session_async(data.user_id, f"{data.tier}:{data.interval}")
         return {"checkout_url": session.url}
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.models import User
+from app.routes.auth import get_current_user
+from app.schemas.schemas import SyncResponse
+from app.services import sync_service
+from app.utils.responses import trusted_json
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["Sync"]
+)
+
+
+@router.get("", response_model=SyncResponse, status_code=status.HTTP_200_OK)
+def pull_changes(
+    cursor: int = Query(0, ge=0, description="Last cursor returned to this client (0 for a full sync)"),
+    limit: int = Query(sync_service.DEFAULT_LIMIT, ge=1, le=sync_service.MAX_LIMIT),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Return purchases, categories, rules and badges created/updated/deleted since `cursor`.
+    """
+    try:
+        changes = sync_service.changes_since(db, user_id=current_user.id, cursor=cursor, limit=limit)
+    except Exception as e:  # pragma: no cover
+        raise HTTPException(status_code=400, detail=str(e))
+    return trusted_json(changes)
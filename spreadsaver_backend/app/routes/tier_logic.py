@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
 from typing import Literal, Callable
 
+from app.database import get_db
 from app.routes.auth import get_current_user
 from app.models.models import User
+from app.services import subscription_service
 
 router = APIRouter(
     prefix="/features",
@@ -21,8 +24,9 @@ TIER_PRIORITY = {
 }
 
 def require_tier(required: TierLevel) -> Callable:
-    def tier_guard(current_user: User = Depends(get_current_user)):
-        user_tier = current_user.tier
+    def tier_guard(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+        # Local subscription mirror only; never a Stripe call on the request path
+        user_tier = subscription_service.effective_tier(db, current_user)
         user_level = TIER_PRIORITY.get(user_tier, 0)
         required_level = TIER_PRIORITY[required]
 
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
+from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field, AliasChoices
 
@@ -23,7 +24,7 @@ class UserCreate(BaseModel):
     password: str
 
 class UserRead(BaseModel):
-    id: int
+    id: UUID
     username: str
     email: EmailStr
     tier: Optional[str] = None
@@ -73,7 +74,7 @@ class BadgeRead(BadgeBase):
 
 
 class UserBadgeBase(ORMBase):
-    user_id: int
+    user_id: UUID
     badge_id: int
     notes: Optional[str] = None
     source: Optional[str] = None  # e.g., "system", "admin", or a job name
@@ -96,7 +97,7 @@ class UserBadgeUpdate(BaseModel):
 
 class BadgeAssignRequest(ORMBase):
     """Request body for assigning a badge to a user (admin/service action)."""
-    user_id: int
+    user_id: UUID
     badge_id: int
     reason: Optional[str] = None
 
@@ -106,6 +107,26 @@ class BadgeAssignResult(BaseModel):
 
     model_config = {"from_attributes": True}
 
+# ---------------------------------------------------------------------------
+# Sync Schemas (delta sync for offline-first clients)
+# ---------------------------------------------------------------------------
+class SyncTombstoneRead(BaseModel):
+    entity: str  # "purchase", "category", "rule", "badge"
+    id: str
+
+
+class SyncResponse(BaseModel):
+    """Changes after the client's cursor. Store `cursor` and send it back next time;
+    keep pulling while `has_more` is true."""
+    cursor: int
+    has_more: bool = False
+    purchases: List[Dict[str, Any]] = Field(default_factory=list)
+    categories: List[Dict[str, Any]] = Field(default_factory=list)
+    rules: List[Dict[str, Any]] = Field(default_factory=list)
+    badges: List[Dict[str, Any]] = Field(default_factory=list)
+    deleted: List[SyncTombstoneRead] = Field(default_factory=list)
+
+
 # ---------------------------------------------------------------------------
 # Common utility schemas
 # ---------------------------------------------------------------------------
@@ -139,6 +160,9 @@ __all__ = [
     # Requests
     "BadgeAssignRequest",
     "BadgeAssignResult",
+    # Sync
+    "SyncTombstoneRead",
+    "SyncResponse",
     # Utilities
     "MessageResponse",
     "Pagination",
@@ -0,0 +1,21 @@
+# SpreadSaver – change sequence backfill
+# Rows that predate per-user change sequences have change_seq 0, which a full sync
+# (cursor 0) never returns. This stamps each of them with a fresh sequence number of
+# its owner. Run it once after deploying change sequences onto an existing database
+# (after adding the change_seq columns); re-running it is harmless.
+#
+# Usage (from spreadsaver_backend/):
+#   python -m app.scripts.backfill_change_seqs
+
+from app.database import SessionLocal
+from app.services import sync_service
+
+
+def main() -> None:
+    with SessionLocal() as db:
+        stamped = sync_service.backfill_change_seqs(db)
+    print("Stamped " + ", ".join(f"{count} {entity}" for entity, count in stamped.items()) + ".")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+# SpreadSaver – Synthetic data generator
+# Deterministic, seedable data at any scale for load and scaling tests:
+# - users signing up over the period (skewed towards recent months), with a tier mix,
+#   a personal category set and, for most, a budget rule;
+# - purchases with realistic timing (rent/bills/subscriptions on their day each month,
+#   payday and weekend bumps, lunch/evening peaks, a December spike, some churn) and
+#   per-category lognormal amounts;
+# - groups with heavy-tailed sizes (mostly a handful of friends, a few hundreds-strong)
+#   and earned badges.
+# Every user is generated from its own seeded RNG, so the same --seed/--end-month give
+# the same rows regardless of --chunk-size. Rows stream through BulkLoader in chunks
+# using the fastest path the database offers: COPY on PostgreSQL, one executemany per
+# chunk with fsync off on SQLite, plain multi-row INSERTs elsewhere.
+#
+# Usage (from spreadsaver_backend/):
+#   python -m app.scripts.generate_data --users 100000 --months 12 --seed 7
+#   python -m app.scripts.generate_data --users 100000 --scale 10 --reset   # 10x volume
+
+from __future__ import annotations
+
+import argparse
+import calendar
+import csv
+import io
+import math
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+
+from app.database import Base
+from app.models.models import Badge, Group
+
+
+@dataclass(frozen=True)
+class Profile:
+    users: int = 10_000
+    months: int = 12
+    end_month: Optional[str] = None  # "YYYY-MM", default current month (pin it for reproducible runs)
+    purchases_per_month: float = 45.0  # median active user; activity is lognormal around it
+    rule_rate: float = 0.7
+    churn_rate: float = 0.15
+    group_rate: float = 0.08  # groups per user
+    max_group_size: int = 500
+    badge_count: int = 40
+    seed: int = 42
+    prefix: str = "gen"
+
+
+# ---------------------------------------------------------------------------
+# Distributions
+# ---------------------------------------------------------------------------
+
+# name, icon, share of discretionary purchases, median amount, lognormal sigma
+DISCRETIONARY = (
+    ("Groceries", "cart", 0.24, 45.0, 0.6),
+    ("Dining", "utensils", 0.15, 24.0, 0.6),
+    ("Transport", "car", 0.12, 16.0, 0.7),
+    ("Coffee", "coffee", 0.10, 5.0, 0.35),
+    ("Shopping", "bag", 0.09, 38.0, 0.9),
+    ("Fun", "ticket", 0.07, 30.0, 0.8),
+    ("Household", "home", 0.05, 26.0, 0.8),
+    ("Health", "heart", 0.04, 35.0, 0.9),
+    ("Pets", "paw", 0.03, 30.0, 0.7),
+    ("Gifts", "gift", 0.03, 40.0, 0.8),
+    ("Education", "book", 0.02, 60.0, 0.9),
+    ("Travel", "plane", 0.02, 180.0, 0.9),
+)
+# name, icon, probability a user has it, day of month, median amount, sigma
+RECURRING = (
+    ("Rent", "key", 0.85, 1, 1350.0, 0.35),
+    ("Utilities", "bolt", 0.9, 12, 140.0, 0.3),
+    ("Subscriptions", "tv", 0.7, 5, 16.0, 0.5),
+)
+NOTES = ("", "", "", "weekly shop", "with friends", "refund pending", "split", "online", "cash")
+TIERS = (("free", 0.78), ("plus", 0.12), ("pro", 0.07), ("elite", 0.03))
+RULE_PRESETS = (("50/30/20", 50, 30, 20), ("60/20/20", 60, 20, 20), ("70/20/10", 70, 20, 10), ("40/30/30", 40, 30, 30))
+WEEKDAY_WEIGHTS = (0.85, 0.9, 0.95, 1.0, 1.25, 1.4, 1.1)  # Mon..Sun
+HOUR_WEIGHTS = (
+    0.1, 0.05, 0.03, 0.02, 0.02, 0.05, 0.3, 0.8, 1.2, 0.9, 0.8, 1.1,
+    1.8, 1.6, 0.9, 0.8, 1.0, 1.5, 2.0, 1.9, 1.4, 0.9, 0.5, 0.25,
+)
+MONTH_WEIGHTS = (0.85, 0.9, 1.0, 1.0, 1.0, 1.05, 1.1, 1.05, 0.95, 1.0, 1.15, 1.35)  # Jan..Dec
+BADGE_TITLES = (
+    "First Log", "Receipt Ranger", "Category Explorer", "No-Spend Day", "No-Spend Streak", "Rule Runner",
+    "Under Budget", "Saver Spark", "Savings Streak", "Debt Chopper", "Group Buddy", "Badge Collector",
+)
+GROUP_WORDS = (
+    ("Frugal", "Thrifty", "Budget", "Savvy", "Penny", "Cozy", "Mighty", "Weekend"),
+    ("Squad", "Savers", "Crew", "Club", "Household", "Roommates", "Family", "Circle"),
+)
+
+
+def _month_starts(profile: Profile) -> List[datetime]:
+    end = profile.end_month or datetime.utcnow().strftime("%Y-%m")
+    year, month = (int(p) for p in end.split("-"))
+    starts = []
+    for _ in range(profile.months):
+        starts.append(datetime(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    starts.reverse()
+    return starts
+
+
+def _poisson(rng: random.Random, lam: float) -> int:
+    if lam <= 0:
+        return 0
+    if lam > 30:  # normal approximation is plenty for volumes
+        return max(0, int(round(rng.gauss(lam, math.sqrt(lam)))))
+    limit, k, p = math.exp(-lam), 0, rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+def _amount(rng: random.Random, median: float, sigma: float) -> float:
+    return round(max(0.5, rng.lognormvariate(math.log(median), sigma)), 2)
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def user_id(profile: Profile, index: int) -> uuid.UUID:
+    """Id of generated user `index`, computable without generating the user."""
+    return _uuid(random.Random(f"{profile.seed}:id:{index}"))
+
+
+def username(profile: Profile, index: int) -> str:
+    return f"{profile.prefix}{index:07d}"
+
+
+# ---------------------------------------------------------------------------
+# Rows
+# ---------------------------------------------------------------------------
+
+def user_rows(
+    profile: Profile,
+    index: int,
+    *,
+    hashed_password: str,
+    badge_ids: Sequence[int] = (),
+    purchases: Optional[int] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Rows (keyed by column name) for one user and everything they own, per table.
+    `purchases` pins the user's purchase count (spread over the same distributions)."""
+    rng = random.Random(f"{profile.seed}:user:{index}")
+    uid = user_id(profile, index)
+    months = _month_starts(profile)
+    period_start, period_end = months[0], _next_month(months[-1])
+    seq = 0
+
+    # signup: 40% predate the period, the rest skew towards recent months (growth)
+    span = (period_end - period_start).total_seconds()
+    joined = period_start if purchases is not None or rng.random() < 0.4 else period_start + timedelta(seconds=span * math.sqrt(rng.random()))
+    churned = period_end
+    if purchases is None and rng.random() < profile.churn_rate:
+        churned = joined + timedelta(seconds=(period_end - joined).total_seconds() * rng.random())
+
+    categories, weights, amounts, recurring = [], [], [], []
+    out: Dict[str, List[Dict[str, Any]]] = {"categories": [], "budget_rules": [], "purchases": [], "user_badges": []}
+
+    def category(name: str, icon: str) -> uuid.UUID:
+        nonlocal seq
+        seq += 1
+        cid = _uuid(rng)
+        out["categories"].append(
+            {"id": cid, "user_id": uid, "name": name, "icon": icon, "color": "#%06x" % rng.getrandbits(24),
+             "target_pct": None, "change_seq": seq}
+        )
+        return cid
+
+    for name, icon, share, day, median, sigma in RECURRING:
+        if purchases is not None or rng.random() < share:
+            recurring.append((category(name, icon), day, _amount(rng, median, sigma), sigma / 4))
+    picked = set()
+    for _ in range(rng.randint(4, len(DISCRETIONARY) - 2)):
+        picked.add(rng.choices(range(len(DISCRETIONARY)), [d[2] for d in DISCRETIONARY])[0])
+    for i in sorted(picked):
+        name, icon, share, median, sigma = DISCRETIONARY[i]
+        categories.append(category(name, icon))
+        weights.append(share * rng.lognormvariate(0, 0.5))  # personal taste
+        amounts.append((median * rng.lognormvariate(0, 0.3), sigma))
+
+    if purchases is not None or rng.random() < profile.rule_rate:
+        seq += 1
+        label, essential, discretionary, savings = rng.choice(RULE_PRESETS)
+        out["budget_rules"].append(
+            {"id": _uuid(rng), "user_id": uid, "label": label, "essential_pct": essential,
+             "discretionary_pct": discretionary, "savings_pct": savings, "created_at": joined, "change_seq": seq}
+        )
+
+    # purchases: per-month counts, then days/hours by weekday, payday and time-of-day weights
+    activity = rng.lognormvariate(math.log(profile.purchases_per_month), 0.6)
+    rows = out["purchases"]
+    for m, month_start in enumerate(months):
+        days = calendar.monthrange(month_start.year, month_start.month)[1]
+        active = [d for d in range(days) if joined <= month_start + timedelta(days=d + 1) and month_start + timedelta(days=d) < churned]
+        if not active:
+            continue
+        for cid, day, base, jitter in recurring:
+            if day - 1 in active:
+                rows.append(_purchase(rng, uid, cid, month_start + timedelta(days=day - 1, hours=rng.randint(6, 10)), round(base * rng.lognormvariate(0, jitter), 2)))
+        if purchases is not None:
+            count = purchases // len(months) + (1 if m < purchases % len(months) else 0)
+            count = max(0, count - len(recurring))
+        else:
+            count = _poisson(rng, activity * MONTH_WEIGHTS[month_start.month - 1] * len(active) / days)
+        if not count or not categories:
+            continue
+        day_weights = [
+            WEEKDAY_WEIGHTS[(month_start + timedelta(days=d)).weekday()] * (1.3 if d < 3 or 14 <= d < 17 else 1.0) for d in active
+        ]
+        picks = rng.choices(range(len(categories)), weights, k=count)
+        for d, hour, c in zip(rng.choices(active, day_weights, k=count), rng.choices(range(24), HOUR_WEIGHTS, k=count), picks):
+            median, sigma = amounts[c]
+            when = month_start + timedelta(days=d, hours=hour, minutes=rng.randrange(60), seconds=rng.randrange(60))
+            rows.append(_purchase(rng, uid, categories[c], when, _amount(rng, median, sigma)))
+    rows.sort(key=lambda r: r["purchased_at"])
+    for row in rows:
+        seq += 1
+        row["change_seq"] = seq
+
+    # badges: each successive catalogue badge is rarer
+    for rank, badge_id in enumerate(badge_ids):
+        if rng.random() < 0.6 * 0.85 ** rank:
+            seq += 1
+            unlocked = joined + timedelta(seconds=(min(churned, period_end) - joined).total_seconds() * rng.random())
+            out["user_badges"].append({"user_id": uid, "badge_id": badge_id, "unlocked_at": unlocked, "change_seq": seq})
+
+    name = username(profile, index)
+    tier = rng.choices([t for t, _ in TIERS], [w for _, w in TIERS])[0]
+    out["users"] = [
+        {"id": uid, "username": name, "email": f"{name}@example.com", "hashed_password": hashed_password,
+         "is_active": churned >= period_end, "is_admin": False, "subscription_tier": tier,
+         "stripe_customer_id": None if tier == "free" else f"cus_{uid.hex[:14]}", "change_seq": seq}
+    ]
+    return out
+
+
+def _next_month(dt: datetime) -> datetime:
+    return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
+
+
+def _purchase(rng: random.Random, uid: uuid.UUID, cid: uuid.UUID, when: datetime, amount: float) -> Dict[str, Any]:
+    return {"id": _uuid(rng), "user_id": uid, "category_id": cid, "amount": amount,
+            "description": rng.choice(NOTES) or None, "purchased_at": when}
+
+
+def badge_rows(profile: Profile, first_id: int) -> List[Dict[str, Any]]:
+    rows = []
+    for i in range(profile.badge_count):
+        title = BADGE_TITLES[i] if i < len(BADGE_TITLES) else f"Milestone {i - len(BADGE_TITLES) + 1}"
+        slug = title.lower().replace(" ", "_").replace("-", "_")
+        rows.append({"id": first_id + i, "title": title, "description": f"Earn the {title} badge.",
+                     "icon_uri": f"badges/{slug}.png", "achieved": False})
+    return rows
+
+
+def group_rows(profile: Profile, index: int, group_id: int) -> Dict[str, List[Dict[str, Any]]]:
+    rng = random.Random(f"{profile.seed}:group:{index}")
+    size = min(profile.users, profile.max_group_size, int(rng.paretovariate(1.6) * 3) + 1)
+    members = rng.sample(range(profile.users), size)
+    created = _month_starts(profile)[0] + timedelta(days=rng.randrange(28 * profile.months))
+    owner = user_id(profile, members[0])
+    return {
+        "groups": [{"id": group_id, "owner_id": owner, "name": f"{rng.choice(GROUP_WORDS[0])} {rng.choice(GROUP_WORDS[1])}",
+                    "description": None, "created_at": created}],
+        "group_members": [
+            {"group_id": group_id, "user_id": user_id(profile, m),
+             "role": "owner" if i == 0 else ("admin" if rng.random() < 0.1 else "member"),
+             "joined_at": created + timedelta(days=rng.randrange(30))}
+            for i, m in enumerate(members)
+        ],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Bulk loading
+# ---------------------------------------------------------------------------
+
+def _copy_value(value: Any) -> Any:
+    if value is None:
+        return None  # csv writes an unquoted empty field: NULL in COPY's csv format
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return value
+
+
+class BulkLoader:
+    """Buffers rows per table and writes full chunks in FK order (parents first)."""
+
+    def __init__(self, engine: Engine, *, chunk_size: int = 20_000, progress: Optional[Callable[[Counter], None]] = None):
+        self.engine = engine
+        self.dialect = engine.dialect.name
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.counts: Counter = Counter()
+        self._tables = {t.name: t for t in Base.metadata.sorted_tables}
+        self._order = [t.name for t in Base.metadata.sorted_tables]
+        self._buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self._pending = 0
+
+    def add(self, table: str, rows: Iterable[Dict[str, Any]]) -> None:
+        self._buffer(table, rows)
+        if self._pending >= self.chunk_size:
+            self.flush()
+
+    def add_all(self, tables: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Buffer related rows together: a chunk never holds children without their parent."""
+        for table, rows in tables.items():
+            self._buffer(table, rows)
+        if self._pending >= self.chunk_size:
+            self.flush()
+
+    def _buffer(self, table: str, rows: Iterable[Dict[str, Any]]) -> None:
+        buf = self._buffers.setdefault(table, [])
+        before = len(buf)
+        buf.extend(rows)
+        self._pending += len(buf) - before
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        with self.engine.begin() as conn:
+            if self.dialect == "sqlite":
+                conn.exec_driver_sql("PRAGMA synchronous = OFF")
+            for name in self._order:
+                rows = self._buffers.get(name)
+                if rows:
+                    self._write(conn, self._tables[name], rows)
+                    self.counts[name] += len(rows)
+                    rows.clear()
+        self._pending = 0
+        if self.progress:
+            self.progress(self.counts)
+
+    def _write(self, conn, table, rows: List[Dict[str, Any]]) -> None:
+        columns = list(rows[0])
+        if self.dialect == "postgresql":
+            cursor = conn.connection.cursor()
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            for row in rows:
+                writer.writerow([_copy_value(row[c]) for c in columns])
+            sql = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+            if hasattr(cursor, "copy_expert"):  # psycopg2
+                buf.seek(0)
+                cursor.copy_expert(sql, buf)
+                return
+            if hasattr(cursor, "copy"):  # psycopg 3
+                with cursor.copy(sql) as copy:
+                    copy.write(buf.getvalue())
+                return
+        conn.execute(table.insert(), rows)
+
+    def finish(self) -> Counter:
+        self.flush()
+        with self.engine.begin() as conn:
+            if self.dialect == "postgresql":
+                # explicit ids were loaded; move the serial sequences past them
+                for name in ("groups", "badges", "user_badges"):
+                    conn.exec_driver_sql(
+                        f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), COALESCE(MAX(id), 1)) FROM {name}"
+                    )
+            if self.dialect in ("postgresql", "sqlite"):
+                conn.exec_driver_sql("ANALYZE")
+        return self.counts
+
+
+def next_id(engine: Engine, model) -> int:
+    with engine.connect() as conn:
+        return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def existing_badge_ids(engine: Engine) -> List[int]:
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(select(Badge.id).order_by(Badge.id))]
+
+
+def generate(engine: Engine, profile: Profile, *, loader: Optional[BulkLoader] = None) -> Counter:
+    """Generate and load `profile` into `engine` (tables must exist)."""
+    from app.utils.hash import get_password_hash
+
+    loader = loader or BulkLoader(engine)
+    badge_ids = existing_badge_ids(engine)
+    if not badge_ids and profile.badge_count:
+        badges = badge_rows(profile, next_id(engine, Badge))
+        loader.add("badges", badges)
+        badge_ids = [b["id"] for b in badges]
+
+    hashed = get_password_hash("password")  # one bcrypt hash shared by every generated user
+    for i in range(profile.users):
+        loader.add_all(user_rows(profile, i, hashed_password=hashed, badge_ids=badge_ids))
+
+    first_group = next_id(engine, Group)
+    for g in range(int(profile.users * profile.group_rate)):
+        loader.add_all(group_rows(profile, g, first_group + g))
+    return loader.finish()
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic SpreadSaver data")
+    parser.add_argument("--users", type=int, default=Profile.users)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply --users (groups follow)")
+    parser.add_argument("--months", type=int, default=Profile.months)
+    parser.add_argument("--end-month", help="last month of data, YYYY-MM (default: current)")
+    parser.add_argument("--purchases-per-month", type=float, default=Profile.purchases_per_month)
+    parser.add_argument("--badges", type=int, default=Profile.badge_count)
+    parser.add_argument("--seed", type=int, default=Profile.seed)
+    parser.add_argument("--prefix", default=Profile.prefix, help="username prefix (use distinct ones to append)")
+    parser.add_argument("--chunk-size", type=int, default=20_000)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+
+    from app.database import engine
+    from app.models import models  # noqa: F401  (register tables)
+
+    profile = replace(
+        Profile(),
+        users=int(args.users * args.scale),
+        months=args.months,
+        end_month=args.end_month,
+        purchases_per_month=args.purchases_per_month,
+        badge_count=args.badges,
+        seed=args.seed,
+        prefix=args.prefix,
+    )
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    started = time.perf_counter()
+
+    def progress(counts: Counter) -> None:
+        rows = sum(counts.values())
+        print(f"  {rows:,} rows ({rows / (time.perf_counter() - started):,.0f}/s)  users={counts['users']:,}", file=sys.stderr)
+
+    counts = generate(engine, profile, loader=BulkLoader(engine, chunk_size=args.chunk_size, progress=progress))
+    elapsed = time.perf_counter() - started
+    print(f"Loaded {sum(counts.values()):,} rows in {elapsed:.1f}s ({engine.dialect.name}):")
+    for table, n in sorted(counts.items()):
+        print(f"  {table:15s} {n:,}")
+
+
+if __name__ == "__main__":
+    main()
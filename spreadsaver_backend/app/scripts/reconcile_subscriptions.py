@@ -0,0 +1,23 @@
+# SpreadSaver – one-off subscription reconciliation
+# Pages through every Stripe subscription, repairs the local mirror (subscriptions
+# table) and corrects users.subscription_tier where it drifted. The app runs the same
+# job every SUBSCRIPTION_RECONCILE_SECONDS; use this after an outage or a bulk change.
+#
+# Usage (from spreadsaver_backend/):
+#   python -m app.scripts.reconcile_subscriptions
+
+import asyncio
+
+from app.services import subscription_service
+
+
+def main() -> None:
+    stats = asyncio.run(subscription_service.reconcile())
+    print(
+        f"Reconciled {stats['subscriptions']} subscriptions over {stats['pages']} pages: "
+        f"{stats['drifted']} drifted, {stats['users_fixed']} user tiers corrected."
+    )
+
+
+if __name__ == "__main__":
+    main()
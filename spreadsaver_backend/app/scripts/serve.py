@@ -0,0 +1,275 @@
+# SpreadSaver – production server
+# Pre-fork launcher: the master binds the socket, builds the app once (routes, schemas,
+# ORM mappers, deferred imports) and forks WEB_WORKERS uvicorn workers (default: one per
+# CPU available to the process; several workers require CACHE_BACKEND=redis and
+# EVENTS_BROKER=redis) that share the socket and the preloaded memory. Each
+# worker drops inherited DB connections and warms its own pool and cache connections
+# before it accepts traffic (startup hooks in app/main.py).
+# SIGTERM / SIGINT: workers stop accepting, drain in-flight requests for up to
+# WEB_GRACEFUL_TIMEOUT_SECONDS and run their shutdown hooks; a second signal (or the
+# deadline) kills them. Workers that die are restarted; one that fails to start stops
+# the server.
+#
+# Usage (from spreadsaver_backend/):
+#   python -m app.scripts.serve [--host 0.0.0.0] [--port 8000] [--workers N] [--no-preload]
+# Development keeps using `uvicorn app.main:app --reload`.
+
+from __future__ import annotations
+
+import argparse
+import gc
+import logging
+import math
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from app.config.settings import settings
+
+try:
+    import uvicorn  # type: ignore
+except Exception:  # pragma: no cover
+    uvicorn = None
+
+logger = logging.getLogger("spreadsaver.server")
+
+STARTUP_FAILURE = 3  # worker exit code: the app never started (same as uvicorn's)
+
+
+# ---------------------------------------------------------------------------
+# Sizing
+# ---------------------------------------------------------------------------
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPU quota of the container (cgroup v2, then v1), or None when unlimited."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota_us = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period_us = int(f.read())
+        return None if quota_us <= 0 else quota_us / period_us
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not on Linux
+        cpus = os.cpu_count() or 1
+    quota = _cgroup_cpu_limit()
+    if quota:
+        cpus = min(cpus, math.ceil(quota))
+    return max(1, cpus)
+
+
+def unshared_state() -> List[str]:
+    """Backends that keep state per process, which several workers would split: each
+    worker would bump only its own version counters (stale summaries, ETags, dashboards
+    and membership checks in the others) and see only its own live events."""
+    problems = []
+    if (settings.CACHE_BACKEND or "memory").strip().lower() != "redis":
+        problems.append(f"CACHE_BACKEND={settings.CACHE_BACKEND}")
+    if (settings.EVENTS_BROKER or "local").strip().lower() != "redis":
+        problems.append(f"EVENTS_BROKER={settings.EVENTS_BROKER}")
+    return problems
+
+
+def worker_count(configured: int) -> int:
+    """Workers to fork: `configured`, or one per CPU when it is 0. Several workers need
+    the shared (redis) backends; without them an explicit count is an error and the
+    per-CPU default falls back to a single worker."""
+    workers = configured if configured > 0 else available_cpus()
+    problems = unshared_state() if workers > 1 else []
+    if not problems:
+        return workers
+    if configured > 0:
+        raise ValueError(
+            f"{workers} workers need shared state but {', '.join(problems)} keeps it per process; "
+            "set CACHE_BACKEND=redis and EVENTS_BROKER=redis (with CACHE_URL) or run one worker"
+        )
+    logger.warning("%s keeps state per process: running 1 worker instead of %d", ", ".join(problems), workers)
+    return 1
+
+
+# ---------------------------------------------------------------------------
+# Master
+# ---------------------------------------------------------------------------
+
+def bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload():
+    """Build the app in the master so workers inherit it copy-on-write."""
+    from sqlalchemy.orm import configure_mappers
+
+    from app import database, main as app_main
+
+    configure_mappers()
+    if settings.WARM_DEFERRED_IMPORTS:
+        app_main.warm_imports()
+    for target in [database.engine, *database.replicas.engines]:
+        target.dispose()  # no connection may be shared with the workers
+    gc.collect()
+    gc.freeze()  # keep the collector from touching (and so copying) inherited objects
+    return app_main.app
+
+
+class Master:
+    def __init__(self, sock: socket.socket, workers: int, *, app=None, graceful_timeout: float):
+        self.sock = sock
+        self.workers = workers
+        self.app = app
+        self.graceful_timeout = graceful_timeout
+        self.children: Dict[int, float] = {}  # pid -> start time
+        self.stopping = False
+        self.exit_code = 0
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._on_stop_signal)
+        signal.signal(signal.SIGINT, self._on_stop_signal)
+        signal.signal(signal.SIGALRM, lambda *_: self._kill_all())
+        for _ in range(self.workers):
+            self.spawn()
+        while self.children:
+            pid, status = os.wait()  # retried across signal handlers (PEP 475)
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code == STARTUP_FAILURE:
+                logger.error("worker %d failed to start; shutting down", pid)
+                self.exit_code = 1
+                self.stop()
+                continue
+            logger.warning("worker %d exited (%s); restarting", pid, code)
+            if time.monotonic() - started < 1.0:
+                time.sleep(1.0)  # don't spin on a worker that dies at once
+            self.spawn()
+        logger.info("all workers stopped")
+        return self.exit_code
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            self._worker()
+        self.children[pid] = time.monotonic()
+
+    def stop(self) -> None:
+        self.stopping = True
+        self.sock.close()  # workers close theirs as they stop accepting; then connects are refused
+        for pid in list(self.children):
+            _signal(pid, signal.SIGTERM)
+        signal.alarm(max(1, math.ceil(self.graceful_timeout) + 5))
+
+    def _on_stop_signal(self, signum, _frame) -> None:
+        if self.stopping:
+            logger.warning("%s again: killing workers", signal.Signals(signum).name)
+            self._kill_all()
+            return
+        logger.info("%s: draining %d worker(s)", signal.Signals(signum).name, len(self.children))
+        self.stop()
+
+    def _kill_all(self) -> None:
+        for pid in list(self.children):
+            _signal(pid, signal.SIGKILL)
+
+    def _worker(self) -> None:
+        code = 1
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGALRM):
+                signal.signal(signum, signal.SIG_DFL)
+            # own process group: a terminal Ctrl-C reaches only the master, which then
+            # asks each worker once to drain (a second signal would make uvicorn skip it)
+            os.setpgid(0, 0)
+            code = run_worker(self.sock, self.app, master_pid=os.getppid())
+        except BaseException:
+            logger.exception("worker crashed")
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+
+def _signal(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+def _watch_master(master_pid: int) -> None:
+    # stop (gracefully) if the master disappears, rather than serving on as an orphan
+    while os.getppid() == master_pid:
+        time.sleep(1.0)
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+def run_worker(sock: socket.socket, app=None, *, master_pid: int) -> int:
+    from app.database import after_fork
+
+    after_fork()
+    if app is None:
+        from app.main import app
+    threading.Thread(target=_watch_master, args=(master_pid,), name="master-watch", daemon=True).start()
+    server = uvicorn.Server(
+        uvicorn.Config(
+            app,
+            lifespan="on",
+            timeout_graceful_shutdown=settings.WEB_GRACEFUL_TIMEOUT_SECONDS,
+            timeout_keep_alive=settings.WEB_KEEPALIVE_SECONDS,
+            proxy_headers=True,
+            forwarded_allow_ips=settings.WEB_FORWARDED_ALLOW_IPS,
+            access_log=False,  # TimingMiddleware logs requests
+        )
+    )
+    server.run(sockets=[sock])
+    return 0 if server.started else STARTUP_FAILURE
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SpreadSaver production server")
+    parser.add_argument("--host", default=settings.WEB_HOST)
+    parser.add_argument("--port", type=int, default=settings.WEB_PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_WORKERS, help="0 = one per available CPU")
+    parser.add_argument("--no-preload", dest="preload", action="store_false", default=settings.WEB_PRELOAD)
+    args = parser.parse_args()
+
+    if uvicorn is None:
+        sys.exit("uvicorn is not installed (pip install -r requirements.txt)")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(name)s %(levelname)s %(message)s")
+
+    try:
+        workers = worker_count(args.workers)
+    except ValueError as e:
+        sys.exit(str(e))
+    sock = bind(args.host, args.port, settings.WEB_BACKLOG)
+    app = preload() if args.preload else None
+    logger.info(
+        "serving on %s:%d with %d worker(s)%s", args.host, args.port, workers, " (preloaded)" if app is not None else ""
+    )
+    sys.exit(Master(sock, workers, app=app, graceful_timeout=settings.WEB_GRACEFUL_TIMEOUT_SECONDS).run())
+
+
+if __name__ == "__main__":
+    main()
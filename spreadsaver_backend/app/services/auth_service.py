@@ -1,10 +1,10 @@
 from __future__ import annotations
 
+import functools
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple
 
-from jose import JWTError, jwt
-from sqlalchemy import func, or_
+from sqlalchemy import bindparam, func, or_, select
 from sqlalchemy.orm import Session
 
 from app.config.settings import settings
@@ -25,21 +25,19 @@ REFRESH_SECRET_KEY = settings.REFRESH_SECRET_KEY
 # User helpers
 # ---------------------------------------------------------------------------
 
+@functools.lru_cache(maxsize=None)
+def _user_by_identifier_stmt():
+    # runs on every authenticated request (get_current_user): built once, bound per call
+    ident = bindparam("ident")
+    return select(User).where(or_(func.lower(User.username) == ident, func.lower(User.email) == ident)).limit(1)
+
+
 def get_user_by_identifier(db: Session, identifier: str) -> Optional[User]:
     """Fetch a user by case-insensitive username or email."""
     ident = (identifier or "").strip().lower()
     if not ident:
         return None
-    return (
-        db.query(User)
-        .filter(
-            or_(
-                func.lower(User.username) == ident,
-                func.lower(User.email) == ident,
-            )
-        )
-        .first()
-    )
+    return db.execute(_user_by_identifier_stmt(), {"ident": ident}).scalars().first()
 
 
 def register_user(
@@ -48,7 +46,7 @@ def register_user(
     username: str,
     email: str,
     password: str,
-    tier: str = "Free",
+    tier: str = "free",
     is_admin: bool = False,
 ) -> User:
     """Register a new user with uniqueness checks and hashed password."""
@@ -93,6 +91,8 @@ def authenticate_user(db: Session, identifier: str, password: str) -> Optional[U
 # ---------------------------------------------------------------------------
 
 def _encode_jwt(payload: dict, *, key: str, expires_delta: timedelta) -> str:
+    from jose import jwt  # deferred: python-jose (and its crypto backends) is slow to import
+
     data = payload.copy()
     data.update({"exp": datetime.now(timezone.utc) + expires_delta})
     return jwt.encode(data, key, algorithm=ALGORITHM)
@@ -111,6 +111,8 @@ def create_refresh_token(*, subject: str, expires_days: Optional[int] = None) ->
 
 
 def decode_access_token(token: str) -> Optional[dict]:
+    from jose import JWTError, jwt
+
     try:
         return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
@@ -118,6 +120,8 @@ def decode_access_token(token: str) -> Optional[dict]:
 
 
 def decode_refresh_token(token: str) -> Optional[dict]:
+    from jose import JWTError, jwt
+
     try:
         return jwt.decode(token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
@@ -3,6 +3,8 @@ from app.models.models import Badge, UserBadge
 from app.models.models import User
 from datetime import datetime
 
+from app.services import cache_service, event_service, sync_service
+
 def get_user_badges(db: Session, user_id: int):
     return db.query(UserBadge).filter(UserBadge.user_id == user_id).all()
 
@@ -40,7 +42,15 @@ def evaluate_and_assign_badges(db: Session, user_id: int):
                 unlocked_at=datetime.utcnow()
             )
             db.add(new_entry)
+            sync_service.stamp(db, user_id=user.id, row=new_entry)
             assigned_badges.append(badge)
 
     db.commit()
+    if assigned_badges:
+        cache_service.invalidate_badges(user_id)
+        event_service.publish_user(
+            user_id,
+            event_service.EVENT_BADGE_AWARDED,
+            {"badges": [{"id": b.id, "title": b.title, "icon_uri": b.icon_uri} for b in assigned_badges]},
+        )
     return assigned_badges
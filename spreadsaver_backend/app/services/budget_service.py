@@ -1,17 +1,27 @@
 from __future__ import annotations
 
+import functools
+import uuid
 from datetime import date, datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterable, List, Mapping, Optional, Tuple, Union
 
-from sqlalchemy import func
+from sqlalchemy import bindparam, func, insert, select, update
 from sqlalchemy.orm import Session
 
+from app.services import cache_service, event_service, group_service, sync_service
+from app.utils.calculations import month_key
+
 try:  # pragma: no cover
     from app.models.models import Purchase, Category  # type: ignore
 except Exception:  # pragma: no cover
     Purchase = None  # type: ignore
     Category = None  # type: ignore
 
+try:  # pragma: no cover
+    from app.models.models import BudgetRule  # type: ignore
+except Exception:  # pragma: no cover
+    BudgetRule = None  # type: ignore
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -40,6 +50,221 @@ def _to_float(value: Optional[Any]) -> float:
         return 0.0
 
 
+def _publish_summary_delta(
+    user_id: Any, when: Optional[datetime], category_id: Any, amount_delta: float, purchase_id: Any
+) -> None:
+    """Push the change to the user's live stream so clients can patch their summary."""
+    event_service.publish_user(
+        user_id,
+        event_service.EVENT_SUMMARY_DELTA,
+        {
+            "month": month_key(when or datetime.utcnow()),
+            "category_id": category_id,
+            "amount_delta": round(amount_delta, 2),
+            "purchase_id": purchase_id,
+        },
+    )
+
+
+# ---------------------------------------------------------------------------
+# Hot-path statements
+# ---------------------------------------------------------------------------
+# Built once with bind parameters instead of a fresh db.query(...) chain per call: the
+# statement's cache key is memoized and its SQL stays in the engine's compiled cache,
+# so a call only binds values and executes. Rows are read as plain tuples (no ORM
+# entities, identity map or attribute instrumentation) since callers get dicts.
+
+@functools.lru_cache(maxsize=None)
+def _month_total_stmt():
+    return select(func.coalesce(func.sum(Purchase.amount), 0.0)).where(  # type: ignore[attr-defined]
+        Purchase.user_id == bindparam("user_id"),  # type: ignore[attr-defined]
+        Purchase.occurred_at >= bindparam("start"),  # type: ignore[attr-defined]
+        Purchase.occurred_at < bindparam("end"),  # type: ignore[attr-defined]
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _month_by_category_stmt():
+    return (
+        select(Category.name, func.coalesce(func.sum(Purchase.amount), 0.0))  # type: ignore[attr-defined]
+        .join(Category, Category.id == Purchase.category_id)  # type: ignore[attr-defined]
+        .where(
+            Purchase.user_id == bindparam("user_id"),  # type: ignore[attr-defined]
+            Purchase.occurred_at >= bindparam("start"),  # type: ignore[attr-defined]
+            Purchase.occurred_at < bindparam("end"),  # type: ignore[attr-defined]
+        )
+        .group_by(Category.name)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _categories_stmt():
+    return (
+        select(Category.id, Category.name, Category.color)  # type: ignore[attr-defined]
+        .where(Category.user_id == bindparam("user_id"))  # type: ignore[attr-defined]
+        .order_by(Category.name.asc())  # type: ignore[attr-defined]
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _purchases_stmt(by_month: bool, by_category: bool, limited: bool, offset: bool):
+    """One statement per filter/paging shape (at most 16)."""
+    stmt = select(
+        Purchase.id,  # type: ignore[attr-defined]
+        Purchase.user_id,  # type: ignore[attr-defined]
+        Purchase.amount,  # type: ignore[attr-defined]
+        Purchase.category_id,  # type: ignore[attr-defined]
+        Purchase.occurred_at,  # type: ignore[attr-defined]
+        Purchase.note,  # type: ignore[attr-defined]
+    ).where(Purchase.user_id == bindparam("user_id"))  # type: ignore[attr-defined]
+    if by_month:
+        stmt = stmt.where(
+            Purchase.occurred_at >= bindparam("start"),  # type: ignore[attr-defined]
+            Purchase.occurred_at < bindparam("end"),  # type: ignore[attr-defined]
+        )
+    if by_category:
+        stmt = stmt.where(Purchase.category_id == bindparam("category_id"))  # type: ignore[attr-defined]
+    stmt = stmt.order_by(Purchase.occurred_at.desc())  # type: ignore[attr-defined]
+    if limited:
+        stmt = stmt.limit(bindparam("limit"))
+    if offset:
+        stmt = stmt.offset(bindparam("offset"))
+    return stmt
+
+
+# ---------------------------------------------------------------------------
+# Category resolution
+# ---------------------------------------------------------------------------
+# Each user's categories are kept as an index {folded name: {"id", "name", "color"}},
+# cached per categories version (cache_service.category_index_key), so resolving a name
+# on purchase entry is a dict lookup. Writes bump the version after commit and store
+# the index they produced under the new key, so the next lookup is a hit as well.
+
+CategoryIndex = Dict[str, Dict[str, Any]]
+
+
+def fold_category_name(name: str) -> str:
+    """The form category names are matched by (case- and outer-whitespace-insensitive).
+
+    The unique index on categories folds case only (lower(name)); names are stored
+    stripped, so the two agree for every row written here.
+    """
+    return (name or "").strip().lower()
+
+
+def _load_category_index(db: Session, user_id: Any) -> CategoryIndex:
+    index: CategoryIndex = {}
+    for id_, name, color in db.execute(_categories_stmt(), {"user_id": user_id}):
+        # legacy duplicates differing only in case: the first by name wins, as in listings
+        index.setdefault(fold_category_name(name), {"id": id_, "name": name, "color": color})
+    return index
+
+
+def category_index(db: Session, *, user_id: int) -> CategoryIndex:
+    """The user's categories by folded name. Shared with the cache: don't mutate it."""
+    if Category is None:  # type: ignore
+        return {}
+    key = cache_service.category_index_key(user_id)
+    index = cache_service.get_category_index(key)
+    if index is None:
+        index = _load_category_index(db, user_id)
+        cache_service.set_category_index(key, index)
+    return index  # type: ignore[return-value]
+
+
+def resolve_category_id(db: Session, *, user_id: int, name: str) -> Optional[Any]:
+    """Id of the user's category called `name` (any case), or None if there is none."""
+    entry = category_index(db, user_id=user_id).get(fold_category_name(name))
+    return entry["id"] if entry else None
+
+
+def _stage_categories(
+    db: Session, *, user_id: Any, items: List[Tuple[str, Optional[str]]]
+) -> Tuple[List[Dict[str, Any]], Optional[CategoryIndex]]:
+    """Resolve (name, color) pairs to categories inside the caller's transaction.
+
+    Missing categories are created with one multi-row INSERT ... ON CONFLICT DO NOTHING
+    (a concurrent writer's row for the same name wins and is used instead) and changed
+    colors are set with one UPDATE by primary key; nothing is committed. Returns a
+    payload per item and the resulting index if anything was written (None if all
+    matched as they are).
+    """
+    wanted: Dict[str, Tuple[str, Optional[str]]] = {}
+    for name, color in items:
+        folded = fold_category_name(name)
+        if not folded:
+            raise ValueError("Category name is required")
+        first_name, prev_color = wanted.get(folded, (name.strip(), None))
+        wanted[folded] = (first_name, color if color is not None else prev_color)
+
+    key = cache_service.category_index_key(user_id)
+    index = cache_service.get_category_index(key)  # type: ignore[assignment]
+    if index is None or any(folded not in index for folded in wanted):
+        # a cached index may predate another worker's write: check misses against the database
+        index = _load_category_index(db, user_id)
+        cache_service.set_category_index(key, index)
+
+    created = [(folded, name, color) for folded, (name, color) in wanted.items() if folded not in index]
+    recolored = [
+        (folded, color)
+        for folded, (_, color) in wanted.items()
+        if folded in index and color is not None and color != index[folded]["color"]
+    ]
+    if created or recolored:
+        index = dict(index)
+        seqs = iter(sync_service.next_change_seqs(db, user_id=user_id, count=len(created) + len(recolored)))
+        if created:
+            rows = [
+                {"id": uuid.uuid4(), "user_id": user_id, "name": name, "color": color, "change_seq": next(seqs)}
+                for _, name, color in created
+            ]
+            inserted = _insert_categories(db, rows)
+            lost = []
+            for (folded, _, color), row in zip(created, rows):
+                if row["id"] in inserted:
+                    index[folded] = {"id": row["id"], "name": row["name"], "color": row["color"]}
+                else:
+                    lost.append((folded, color, row["change_seq"]))
+            if lost:
+                # another writer created these names since our index was loaded: use its rows,
+                # recoloring them (with the sequence numbers they left unused) if asked to
+                fresh = _load_category_index(db, user_id)
+                spare = []
+                for folded, color, seq in lost:
+                    index[folded] = fresh[folded]
+                    if color is not None and color != fresh[folded]["color"]:
+                        recolored.append((folded, color))
+                    spare.append(seq)
+                seqs = iter(list(seqs) + spare)
+        if recolored:
+            db.execute(
+                update(Category),  # type: ignore[arg-type]
+                [{"id": index[folded]["id"], "color": color, "change_seq": next(seqs)} for folded, color in recolored],
+            )
+            for folded, color in recolored:
+                index[folded] = {**index[folded], "color": color}
+        written: Optional[CategoryIndex] = index
+    else:
+        written = None
+    return [dict(index[fold_category_name(name)]) for name, _ in items], written
+
+
+def _insert_categories(db: Session, rows: List[Dict[str, Any]]) -> set:
+    """INSERT the rows, skipping names the user already has; returns the inserted ids."""
+    dialect_insert = group_service._dialect_insert(db)
+    if dialect_insert is None:  # pragma: no cover - dialects without ON CONFLICT
+        db.execute(insert(Category).values(rows))  # type: ignore[arg-type]
+        return {row["id"] for row in rows}
+    stmt = dialect_insert(Category).values(rows).on_conflict_do_nothing().returning(Category.id)  # type: ignore[attr-defined]
+    return set(db.execute(stmt).scalars())
+
+
+def _categories_written(user_id: Any, index: CategoryIndex) -> None:
+    """After commit: invalidate category-dependent caches and keep the fresh index."""
+    cache_service.invalidate_categories(user_id)
+    cache_service.set_category_index(cache_service.category_index_key(user_id), index)
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
@@ -60,25 +285,9 @@ def get_month_summary(db: Session, *, user_id: int, month: str) -> Dict[str, Any
             "by_category": {},
         }
 
-    # Total spent in window
-    total_q = (
-        db.query(func.coalesce(func.sum(Purchase.amount), 0.0))  # type: ignore[attr-defined]
-        .filter(Purchase.user_id == user_id)  # type: ignore[attr-defined]
-        .filter(Purchase.occurred_at >= start)  # type: ignore[attr-defined]
-        .filter(Purchase.occurred_at < end)  # type: ignore[attr-defined]
-    )
-    total_spent = _to_float(total_q.scalar())
-
-    # By-category breakdown
-    rows = (
-        db.query(Category.name, func.coalesce(func.sum(Purchase.amount), 0.0))  # type: ignore[attr-defined]
-        .join(Category, Category.id == Purchase.category_id)  # type: ignore[attr-defined]
-        .filter(Purchase.user_id == user_id)  # type: ignore[attr-defined]
-        .filter(Purchase.occurred_at >= start)  # type: ignore[attr-defined]
-        .filter(Purchase.occurred_at < end)  # type: ignore[attr-defined]
-        .group_by(Category.name)
-        .all()
-    )
+    params = {"user_id": user_id, "start": start, "end": end}
+    total_spent = _to_float(db.execute(_month_total_stmt(), params).scalar())
+    rows = db.execute(_month_by_category_stmt(), params).all()
 
     by_category: Dict[str, float] = {name: _to_float(total) for name, total in rows}
 
@@ -93,32 +302,38 @@ def list_user_categories(db: Session, *, user_id: int) -> List[Dict[str, Any]]:
     """Return basic category info for a user. Placeholder-friendly."""
     if Category is None:  # type: ignore
         return []
-    rows = db.query(Category).filter(Category.user_id == user_id).order_by(Category.name.asc()).all()  # type: ignore[attr-defined]
-    return [
-        {"id": r.id, "name": r.name, "color": getattr(r, "color", None)}
-        for r in rows
-    ]
+    rows = db.execute(_categories_stmt(), {"user_id": user_id}).all()
+    return [{"id": id_, "name": name, "color": color} for id_, name, color in rows]
 
 
 def upsert_category(db: Session, *, user_id: int, name: str, color: Optional[str] = None) -> Dict[str, Any]:
     """Create or update a category; returns a dict payload."""
+    return upsert_categories(db, user_id=user_id, categories=[{"name": name, "color": color}])[0]
+
+
+def upsert_categories(
+    db: Session, *, user_id: int, categories: Iterable[Union[str, Mapping[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """Resolve or create many categories at once (e.g. for an import).
+
+    `categories` are names or {"name", "color"} mappings; names match existing categories
+    case-insensitively and a given color replaces the stored one. All new categories are
+    inserted in a single statement and committed together. Returns one {"id", "name",
+    "color"} payload per input, in order (repeated names resolve to the same category).
+    """
+    items: List[Tuple[str, Optional[str]]] = [
+        (c, None) if isinstance(c, str) else (c.get("name") or "", c.get("color")) for c in categories
+    ]
     if Category is None:  # type: ignore
-        return {"id": None, "name": name, "color": color}
+        return [{"id": None, "name": name, "color": color} for name, color in items]
+    if not items:
+        return []
 
-    row = (
-        db.query(Category)  # type: ignore[attr-defined]
-        .filter(Category.user_id == user_id, func.lower(Category.name) == name.lower())  # type: ignore[attr-defined]
-        .first()
-    )
-    if row:
-        if color is not None:
-            setattr(row, "color", color)
-    else:
-        row = Category(user_id=user_id, name=name, color=color)  # type: ignore[call-arg]
-        db.add(row)
-    db.commit()
-    db.refresh(row)
-    return {"id": row.id, "name": row.name, "color": getattr(row, "color", None)}
+    payloads, written = _stage_categories(db, user_id=user_id, items=items)
+    if written is not None:
+        db.commit()
+        _categories_written(user_id, written)
+    return payloads
 
 
 def add_purchase(
@@ -129,8 +344,13 @@ def add_purchase(
     category_id: Optional[int],
     occurred_at: Optional[datetime] = None,
     note: Optional[str] = None,
+    category_name: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Insert a new purchase; returns a dict payload. Placeholder-friendly."""
+    """Insert a new purchase; returns a dict payload. Placeholder-friendly.
+
+    Without a `category_id`, `category_name` is resolved against the user's cached
+    category index; an unknown name creates the category in the same transaction.
+    """
     if Purchase is None:  # type: ignore
         return {
             "id": None,
@@ -141,6 +361,15 @@ def add_purchase(
             "note": note,
         }
 
+    categories_written: Optional[CategoryIndex] = None
+    if category_id is None and category_name and Category is not None:  # type: ignore
+        category_id = resolve_category_id(db, user_id=user_id, name=category_name)
+        if category_id is None:
+            (category,), categories_written = _stage_categories(
+                db, user_id=user_id, items=[(category_name, None)]
+            )
+            category_id = category["id"]
+
     row = Purchase(  # type: ignore[call-arg]
         user_id=user_id,
         amount=float(amount),
@@ -149,8 +378,16 @@ def add_purchase(
         note=note,
     )
     db.add(row)
+    sync_service.stamp(db, user_id=user_id, row=row)
     db.commit()
     db.refresh(row)
+    if categories_written is not None:
+        _categories_written(user_id, categories_written)
+    cache_service.invalidate_purchase_month(user_id, row.occurred_at)
+    _publish_summary_delta(user_id, row.occurred_at, row.category_id, float(row.amount), row.id)
+    group_service.on_member_purchases_changed(
+        db, user_id=user_id, when=row.occurred_at, amount_delta=float(row.amount)
+    )
     return {
         "id": row.id,
         "user_id": row.user_id,
@@ -161,46 +398,116 @@ def add_purchase(
     }
 
 
+def delete_purchase(db: Session, *, user_id: int, purchase_id: Any) -> bool:
+    """Delete one of the user's purchases. Returns True if a row was removed."""
+    if Purchase is None:  # type: ignore
+        return False
+
+    row = (
+        db.query(Purchase)  # type: ignore[attr-defined]
+        .filter(Purchase.id == purchase_id, Purchase.user_id == user_id)  # type: ignore[attr-defined]
+        .first()
+    )
+    if not row:
+        return False
+
+    occurred_at = getattr(row, "occurred_at", None)
+    category_id, amount = row.category_id, -_to_float(row.amount)
+    db.delete(row)
+    sync_service.record_delete(db, user_id=user_id, entity="purchase", entity_id=purchase_id)
+    db.commit()
+    cache_service.invalidate_purchase_month(user_id, occurred_at)
+    _publish_summary_delta(user_id, occurred_at, category_id, amount, purchase_id)
+    group_service.on_member_purchases_changed(db, user_id=user_id, when=occurred_at, amount_delta=amount)
+    return True
+
+
 def list_purchases(
     db: Session,
     *,
     user_id: int,
     month: Optional[str] = None,
-    category_id: Optional[int] = None,
+    category_id: Optional[Any] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
 ) -> List[Dict[str, Any]]:
-    """Return purchases for a user (optionally filtered by month/category)."""
+    """Return purchases for a user (optionally filtered by month/category, optionally paged)."""
     if Purchase is None:  # type: ignore
         return []
 
-    q = db.query(Purchase).filter(Purchase.user_id == user_id)  # type: ignore[attr-defined]
-
+    params: Dict[str, Any] = {"user_id": user_id}
     if month:
-        start, end = _month_bounds(month)
-        q = q.filter(Purchase.occurred_at >= start).filter(Purchase.occurred_at < end)  # type: ignore[attr-defined]
-
+        params["start"], params["end"] = _month_bounds(month)
     if category_id is not None:
-        q = q.filter(Purchase.category_id == category_id)  # type: ignore[attr-defined]
-
-    q = q.order_by(Purchase.occurred_at.desc())  # type: ignore[attr-defined]
-    rows = q.all()
+        params["category_id"] = category_id
+    if limit is not None:
+        params["limit"] = limit
+    if offset:
+        params["offset"] = offset
+    stmt = _purchases_stmt(bool(month), category_id is not None, limit is not None, bool(offset))
     return [
         {
-            "id": r.id,
-            "user_id": r.user_id,
-            "amount": float(r.amount),
-            "category_id": r.category_id,
-            "occurred_at": getattr(r, "occurred_at", None),
-            "note": getattr(r, "note", None),
+            "id": id_,
+            "user_id": owner_id,
+            "amount": float(amount),
+            "category_id": cat_id,
+            "occurred_at": occurred_at,
+            "note": note,
         }
-        for r in rows
+        for id_, owner_id, amount, cat_id, occurred_at, note in db.execute(stmt, params)
     ]
 
 
+def upsert_budget_rule(
+    db: Session,
+    *,
+    user_id: int,
+    label: str,
+    essential_pct: float,
+    discretionary_pct: float,
+    savings_pct: float,
+) -> Dict[str, Any]:
+    """Create or update a user's allocation rule (matched by label); returns a dict payload."""
+    payload = {
+        "label": label,
+        "essential_pct": float(essential_pct),
+        "discretionary_pct": float(discretionary_pct),
+        "savings_pct": float(savings_pct),
+    }
+    if BudgetRule is None:  # type: ignore
+        return {"id": None, **payload}
+
+    row = (
+        db.query(BudgetRule)  # type: ignore[attr-defined]
+        .filter(BudgetRule.user_id == user_id, func.lower(BudgetRule.label) == label.lower())  # type: ignore[attr-defined]
+        .first()
+    )
+    if row:
+        row.essential_pct = payload["essential_pct"]
+        row.discretionary_pct = payload["discretionary_pct"]
+        row.savings_pct = payload["savings_pct"]
+    else:
+        row = BudgetRule(user_id=user_id, **payload)  # type: ignore[call-arg]
+        db.add(row)
+    sync_service.stamp(db, user_id=user_id, row=row)
+    db.commit()
+    db.refresh(row)
+    cache_service.invalidate_rules(user_id)
+    group_service.on_member_rules_changed(db, user_id=user_id)
+    return {"id": row.id, **payload}
+
+
 __all__ = [
     "get_month_summary",
     "list_user_categories",
     "upsert_category",
+    "upsert_categories",
+    "fold_category_name",
+    "category_index",
+    "resolve_category_id",
     "add_purchase",
+    "delete_purchase",
     "list_purchases",
+    "upsert_budget_rule",
 ]
 
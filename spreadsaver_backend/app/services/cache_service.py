@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import secrets
+from datetime import date, datetime
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+from app.config.settings import settings
+from app.utils.cache import LRUCache, LocalCacheBackend, build_shared_backend
+from app.utils.calculations import month_key
+
+# ---------------------------------------------------------------------------
+# Backends
+# ---------------------------------------------------------------------------
+# Payloads live in a bounded per-process LRU, optionally backed by a shared store.
+# Per-user data versions live in the shared store when configured (so every worker
+# sees a write), otherwise in a process-local stand-in with identical semantics.
+
+_local = LRUCache(
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    max_bytes=settings.CACHE_MAX_BYTES,
+    name="summary",
+)
+# Group dashboards are dicts, kept per-process; their versions are shared like the rest.
+_group_dashboards = LRUCache(
+    max_entries=settings.GROUP_DASHBOARD_CACHE_MAX_ENTRIES,
+    name="group_dashboard",
+)
+# Category indexes (folded name -> category) are small dicts, also per-process.
+_category_indexes = LRUCache(
+    max_entries=settings.CATEGORY_CACHE_MAX_ENTRIES,
+    name="category_index",
+)
+_shared = build_shared_backend(settings.CACHE_BACKEND, settings.CACHE_URL)
+_versions = _shared or LocalCacheBackend()
+
+# Version scopes (bumped by writes in the services; also feed ETags in utils/etag.py)
+SCOPE_RULES = "rules"
+SCOPE_CATEGORIES = "categories"
+SCOPE_MONTH = "month"
+SCOPE_PURCHASES = "purchases"
+SCOPE_BADGES = "badges"
+SCOPE_GROUPS = "groups"
+SCOPE_MEMBERS = "members"
+SCOPE_SUBSCRIPTION = "subscription"
+
+
+# ---------------------------------------------------------------------------
+# Data versions
+# ---------------------------------------------------------------------------
+
+_EPOCH_KEY = "v:epoch"
+
+
+def _version_key(user_id: Any, scope: str, sub: Optional[str] = None) -> str:
+    return f"v:{user_id}:{scope}:{sub}" if sub else f"v:{user_id}:{scope}"
+
+
+def _group_version_key(group_id: Any, scope: str, sub: Optional[str] = None) -> str:
+    return f"gv:{group_id}:{scope}:{sub}" if sub else f"gv:{group_id}:{scope}"
+
+
+def data_version(user_id: Any, scope: str, sub: Optional[str] = None) -> int:
+    """Current version counter for a user's data scope (0 if never written)."""
+    return _versions.get_int(_version_key(user_id, scope, sub))
+
+
+def bump_data_version(user_id: Any, scope: str, sub: Optional[str] = None) -> int:
+    """Advance a user's data version; entries keyed on the old version become unreachable."""
+    _note_write(_write_key("u", user_id))
+    return _versions.incr(_version_key(user_id, scope, sub))
+
+
+def versions_epoch() -> int:
+    """Identity of the version store. Versions restart at 0 whenever the store does (a
+    new process for the in-process store, a flushed Redis), so anything derived from
+    versions alone, like ETags, must include the epoch to never match older data."""
+    epoch = _versions.get_int(_EPOCH_KEY)
+    if not epoch:
+        _versions.add(_EPOCH_KEY, str(secrets.randbits(62) | 1).encode())
+        epoch = _versions.get_int(_EPOCH_KEY)
+    return epoch
+
+
+def group_data_version(group_id: Any, scope: str, sub: Optional[str] = None) -> int:
+    """Current version counter for a group-level scope (membership, month dashboards)."""
+    return _versions.get_int(_group_version_key(group_id, scope, sub))
+
+
+def _bump_group_version(group_id: Any, scope: str, sub: Optional[str] = None) -> int:
+    _note_write(_write_key("g", group_id))
+    return _versions.incr(_group_version_key(group_id, scope, sub))
+
+
+# ---------------------------------------------------------------------------
+# Recent writes (read-your-writes for replica routing)
+# ---------------------------------------------------------------------------
+# Every write already bumps a data version above, so the same calls mark the user (or
+# group) as recently written; read-only routes keep their reads on the primary for
+# READ_YOUR_WRITES_SECONDS afterwards (see app.database.read_session).
+
+_track_writes = bool(settings.database_replica_urls_list) and settings.READ_YOUR_WRITES_SECONDS > 0
+
+
+def _write_key(kind: str, entity_id: Any) -> str:
+    return f"w:{kind}:{entity_id}"
+
+
+def _note_write(key: str) -> None:
+    if _track_writes:
+        _versions.set(key, b"1", ttl=settings.READ_YOUR_WRITES_SECONDS)
+
+
+def recently_written(*, user_id: Any = None, group_id: Any = None) -> bool:
+    """True if the user or group had a write within READ_YOUR_WRITES_SECONDS."""
+    if not _track_writes:
+        return False
+    keys = [_write_key("u", user_id)] if user_id is not None else []
+    if group_id is not None:
+        keys.append(_write_key("g", group_id))
+    return any(_versions.get_ints(keys))
+
+
+# ---------------------------------------------------------------------------
+# Month summaries
+# ---------------------------------------------------------------------------
+
+def _current_month() -> str:
+    return month_key(date.today())
+
+
+def summary_ttl(month: str) -> Optional[int]:
+    """Past months are immutable enough to keep until evicted; anything else is short-lived."""
+    try:
+        month = month_key(datetime.strptime(month, "%Y-%m"))
+    except ValueError:
+        return settings.SUMMARY_CACHE_TTL_SECONDS
+    return None if month < _current_month() else settings.SUMMARY_CACHE_TTL_SECONDS
+
+
+def shared_summary_ttl(month: str) -> int:
+    """TTL in the shared store, which every worker fills and nothing evicts by recency:
+    past months get SUMMARY_CACHE_SHARED_TTL_SECONDS instead of living forever."""
+    return summary_ttl(month) or settings.SUMMARY_CACHE_SHARED_TTL_SECONDS
+
+
+def summary_key(user_id: Any, month: str) -> str:
+    """Cache key for (user, month, rules version). Compute it *before* running the
+    query so a write landing mid-computation leaves the result under a stale key."""
+    rules_v, cats_v, month_v = _versions.get_ints(
+        [
+            _version_key(user_id, SCOPE_RULES),
+            _version_key(user_id, SCOPE_CATEGORIES),
+            _version_key(user_id, SCOPE_MONTH, month),
+        ]
+    )
+    return f"summary:{user_id}:{month}:r{rules_v}:c{cats_v}:m{month_v}"
+
+
+def get_summary(key: str) -> Optional[bytes]:
+    """Return a serialized BudgetSummaryResponse payload, or None on miss."""
+    payload = _local.get(key)
+    if payload is not None:
+        return payload  # type: ignore[return-value]
+    if _shared is None:
+        return None
+    payload = _shared.get(key)
+    if payload is not None:
+        _local.set(key, payload, ttl=summary_ttl(key.split(":")[2]))
+    return payload
+
+
+def set_summary(key: str, month: str, payload: bytes) -> None:
+    _local.set(key, payload, ttl=summary_ttl(month))
+    if _shared is not None:
+        _shared.set(key, payload, ttl=shared_summary_ttl(month))
+
+
+# ---------------------------------------------------------------------------
+# Group dashboards
+# ---------------------------------------------------------------------------
+
+def group_dashboard_key(group_id: Any, month: str) -> Tuple[Any, ...]:
+    """Key for (group, month, membership version, month version); compute before querying."""
+    members_v, month_v = _versions.get_ints(
+        [
+            _group_version_key(group_id, SCOPE_MEMBERS),
+            _group_version_key(group_id, SCOPE_MONTH, month),
+        ]
+    )
+    return ("group_dashboard", group_id, month, members_v, month_v)
+
+
+def group_versions(group_id: Any, *months: str) -> Tuple[int, ...]:
+    """(membership version, *month versions) for a group in one round trip."""
+    return _versions.get_ints(
+        [_group_version_key(group_id, SCOPE_MEMBERS)]
+        + [_group_version_key(group_id, SCOPE_MONTH, month) for month in months]
+    )
+
+
+def get_group_dashboard(key: Tuple[Any, ...]) -> Optional[dict]:
+    return _group_dashboards.get(key)  # type: ignore[return-value]
+
+
+def set_group_dashboard(key: Tuple[Any, ...], month: str, value: dict) -> None:
+    _group_dashboards.set(key, value, ttl=summary_ttl(month))
+
+
+# ---------------------------------------------------------------------------
+# Category indexes
+# ---------------------------------------------------------------------------
+
+def category_index_key(user_id: Any) -> Tuple[Any, ...]:
+    """Key for (user, categories version); compute before querying."""
+    return ("category_index", user_id, data_version(user_id, SCOPE_CATEGORIES))
+
+
+def get_category_index(key: Tuple[Any, ...]) -> Optional[dict]:
+    return _category_indexes.get(key)  # type: ignore[return-value]
+
+
+def set_category_index(key: Tuple[Any, ...], value: dict) -> None:
+    _category_indexes.set(key, value)
+
+
+# ---------------------------------------------------------------------------
+# Invalidation hooks (called by services after a successful commit)
+# ---------------------------------------------------------------------------
+
+def invalidate_purchase_month(user_id: Any, when: Union[date, datetime, str, None]) -> None:
+    """A purchase changed: only the month it falls in (and purchase listings) is affected."""
+    bump_data_version(user_id, SCOPE_MONTH, month_key(when or datetime.utcnow()))
+    bump_data_version(user_id, SCOPE_PURCHASES)
+
+
+def invalidate_categories(user_id: Any) -> None:
+    """Category rows feed every month's by-category breakdown for this user."""
+    bump_data_version(user_id, SCOPE_CATEGORIES)
+
+
+def invalidate_rules(user_id: Any) -> None:
+    bump_data_version(user_id, SCOPE_RULES)
+
+
+def invalidate_badges(user_id: Any) -> None:
+    bump_data_version(user_id, SCOPE_BADGES)
+
+
+def invalidate_subscription(*user_ids: Any) -> None:
+    """A user's subscription rows (or tier) changed: cached tier state is stale."""
+    for user_id in user_ids:
+        bump_data_version(user_id, SCOPE_SUBSCRIPTION)
+
+
+def invalidate_groups(*user_ids: Any) -> List[int]:
+    """Group membership changed for these users (their group listings are stale).
+    Returns the new version for each user, in order."""
+    return [bump_data_version(user_id, SCOPE_GROUPS) for user_id in user_ids]
+
+
+def invalidate_group_month(group_ids: Iterable[Any], when: Union[date, datetime, str, None]) -> List[int]:
+    """A member's purchases changed: each of their groups' dashboards for that month is stale.
+    Returns the new month version for each group, in order."""
+    month = month_key(when or datetime.utcnow())
+    return [_bump_group_version(group_id, SCOPE_MONTH, month) for group_id in group_ids]
+
+
+def invalidate_group_members(group_id: Any) -> int:
+    """Membership or roles changed: every month's dashboard for the group is stale.
+    Returns the new membership version."""
+    return _bump_group_version(group_id, SCOPE_MEMBERS)
+
+
+def stats() -> dict:
+    return _local.stats()
+
+
+def warm() -> None:
+    """Connect to the shared backend (if any) before traffic arrives; new workers call this."""
+    _versions.get_int("warm")
+
+
+def reset() -> None:
+    """Drop all cached payloads and versions (tests / admin use)."""
+    _local.clear()
+    _group_dashboards.clear()
+    _category_indexes.clear()
+    if hasattr(_versions, "clear"):
+        _versions.clear()  # type: ignore[attr-defined]
+
+
+__all__ = [
+    "data_version",
+    "bump_data_version",
+    "versions_epoch",
+    "group_data_version",
+    "recently_written",
+    "summary_ttl",
+    "shared_summary_ttl",
+    "summary_key",
+    "get_summary",
+    "set_summary",
+    "invalidate_purchase_month",
+    "invalidate_categories",
+    "invalidate_rules",
+    "invalidate_badges",
+    "invalidate_subscription",
+    "invalidate_groups",
+    "group_dashboard_key",
+    "group_versions",
+    "get_group_dashboard",
+    "set_group_dashboard",
+    "category_index_key",
+    "get_category_index",
+    "set_category_index",
+    "invalidate_group_month",
+    "invalidate_group_members",
+    "stats",
+    "warm",
+    "reset",
+]
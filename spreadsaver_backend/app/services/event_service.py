@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from app.config.settings import settings
+from app.utils.broker import Broker, Subscription, build_broker
+from app.utils.responses import dumps
+
+# ---------------------------------------------------------------------------
+# Broker & channels
+# ---------------------------------------------------------------------------
+# Services publish after commit; every worker's hub holds at most one upstream
+# subscription per channel and fans each message out to its connected SSE clients.
+
+logger = logging.getLogger("spreadsaver.events")
+
+broker: Broker = build_broker(settings.EVENTS_BROKER, settings.EVENTS_BROKER_URL or settings.CACHE_URL)
+
+EVENT_SUMMARY_DELTA = "summary.delta"
+EVENT_BADGE_AWARDED = "badge.awarded"
+EVENT_MEMBER_ACTIVITY = "member.activity"
+EVENT_MEMBERSHIP = "member.changed"
+EVENT_RESYNC = "resync"
+
+
+def user_channel(user_id: Any) -> str:
+    return f"events:user:{user_id}"
+
+
+def group_channel(group_id: Any) -> str:
+    return f"events:group:{group_id}"
+
+
+def format_event(event: str, payload: Any) -> bytes:
+    """Frame one server-sent event (done once at publish time, not per client)."""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + dumps(payload) + b"\n\n"
+
+
+def event_name(data: bytes) -> Optional[str]:
+    """The event name of a framed message (None for comments such as heartbeats)."""
+    if not data.startswith(b"event: "):
+        return None
+    return data[7:data.index(b"\n")].decode("utf-8")
+
+
+HEARTBEAT = b": ping\n\n"
+RESYNC = format_event(EVENT_RESYNC, {"reason": "client fell behind; refetch current state"})
+
+
+# ---------------------------------------------------------------------------
+# Publishing (sync; safe from request threads)
+# ---------------------------------------------------------------------------
+
+def publish_user(user_id: Any, event: str, payload: Dict[str, Any]) -> None:
+    broker.publish(user_channel(user_id), format_event(event, payload))
+
+
+def publish_group(group_id: Any, event: str, payload: Dict[str, Any]) -> None:
+    broker.publish(group_channel(group_id), format_event(event, payload))
+
+
+# ---------------------------------------------------------------------------
+# Fan-out hub
+# ---------------------------------------------------------------------------
+
+class Client:
+    """A connected SSE stream with a bounded backlog.
+
+    A client that can't keep up loses its backlog and gets a single `resync` event
+    instead, so one slow consumer never holds messages (or memory) for everyone else.
+    """
+
+    def __init__(self, maxsize: int):
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, data: bytes) -> None:
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+                self.dropped += 1
+            self.dropped += 1
+            self.queue.put_nowait(RESYNC)
+
+
+class EventHub:
+    """Fans each upstream channel subscription out to this worker's SSE clients.
+
+    If an upstream subscription fails (e.g. the Redis connection dropped), its pump
+    logs it, sends every client on the channel a `resync` (messages may have been
+    missed) and resubscribes, retrying every RESUBSCRIBE_SECONDS.
+    """
+
+    RESUBSCRIBE_SECONDS = 1.0
+
+    def __init__(self, source: Broker, *, queue_size: int):
+        self._broker = source
+        self._queue_size = queue_size
+        self._lock = asyncio.Lock()
+        self._channels: Dict[str, Set[Client]] = {}
+        self._upstream: Dict[str, Subscription] = {}
+        self._pumps: Dict[str, "asyncio.Task[None]"] = {}
+
+    async def connect(self, channel: str) -> Client:
+        client = Client(self._queue_size)
+        async with self._lock:
+            clients = self._channels.get(channel)
+            if clients is None:
+                subscription = await self._broker.subscribe(channel)
+                clients = self._channels[channel] = set()
+                self._upstream[channel] = subscription
+                self._pumps[channel] = asyncio.create_task(self._pump(channel, clients, subscription))
+            clients.add(client)
+        return client
+
+    async def disconnect(self, channel: str, client: Client) -> None:
+        async with self._lock:
+            clients = self._channels.get(channel)
+            if clients is None:
+                return
+            clients.discard(client)
+            if clients:
+                return
+            del self._channels[channel]
+            self._pumps.pop(channel).cancel()
+            await self._upstream.pop(channel).close()
+
+    async def _pump(self, channel: str, clients: Set[Client], subscription: Subscription) -> None:
+        while True:
+            try:
+                async for data in subscription:
+                    for client in list(clients):
+                        client.offer(data)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("events: subscription to %s failed; resubscribing", channel, exc_info=True)
+            for client in list(clients):
+                client.offer(RESYNC)
+            subscription = await self._resubscribe(channel)
+
+    async def _resubscribe(self, channel: str) -> Subscription:
+        while True:
+            await asyncio.sleep(self.RESUBSCRIBE_SECONDS)
+            try:
+                subscription = await self._broker.subscribe(channel)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("events: resubscribing to %s failed", channel, exc_info=True)
+                continue
+            self._upstream[channel] = subscription  # closed by disconnect() from now on
+            return subscription
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "channels": len(self._channels),
+            "clients": sum(len(c) for c in self._channels.values()),
+        }
+
+
+_hub: Optional[EventHub] = None
+_hub_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_hub() -> EventHub:
+    """The hub for the running event loop (one per worker process)."""
+    global _hub, _hub_loop
+    loop = asyncio.get_running_loop()
+    if _hub is None or _hub_loop is not loop:
+        _hub = EventHub(broker, queue_size=settings.SSE_CLIENT_QUEUE_SIZE)
+        _hub_loop = loop
+    return _hub
+
+
+async def stream(
+    channel: str,
+    *,
+    heartbeat: Optional[float] = None,
+    revalidate: Optional[Callable[[bytes], Awaitable[bool]]] = None,
+) -> AsyncIterator[bytes]:
+    """SSE body for one client: a `ready` event, then messages, with comment
+    heartbeats while idle. Unsubscribes when the client goes away.
+
+    `revalidate` is awaited after each message is sent; when it returns False the
+    stream ends (e.g. the subscriber has just been removed from the group)."""
+    hub = get_hub()
+    interval = heartbeat or settings.SSE_HEARTBEAT_SECONDS
+    client = await hub.connect(channel)
+    try:
+        yield b"retry: 5000\n" + format_event("ready", {"channel": channel})
+        while True:
+            try:
+                data = await asyncio.wait_for(client.queue.get(), timeout=interval)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            yield data
+            if revalidate is not None and not await revalidate(data):
+                return
+    finally:
+        await hub.disconnect(channel, client)
+
+
+__all__ = [
+    "broker",
+    "EVENT_SUMMARY_DELTA",
+    "EVENT_BADGE_AWARDED",
+    "EVENT_MEMBER_ACTIVITY",
+    "EVENT_MEMBERSHIP",
+    "EVENT_RESYNC",
+    "user_channel",
+    "group_channel",
+    "format_event",
+    "event_name",
+    "publish_user",
+    "publish_group",
+    "Client",
+    "EventHub",
+    "get_hub",
+    "stream",
+]
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+from datetime import date, datetime
 from types import SimpleNamespace
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
-from sqlalchemy import and_, func
+from sqlalchemy import and_, delete, func, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.services import cache_service, event_service, leaderboard_service
+from app.services.membership_index import ROLE_PRIORITY, index as membership_index
+from app.utils.calculations import month_key
+
 # Optional model imports (tolerate missing during early scaffolding)
 try:  # pragma: no cover
     from app.models.models import Group, GroupMember, User  # type: ignore
@@ -14,6 +20,16 @@ except Exception:  # pragma: no cover
     GroupMember = None  # type: ignore
     User = None  # type: ignore
 
+try:  # pragma: no cover
+    from app.models.models import Category, Purchase  # type: ignore
+except Exception:  # pragma: no cover
+    Category = None  # type: ignore
+    Purchase = None  # type: ignore
+
+UNCATEGORIZED = "Uncategorized"
+MAX_BULK_MEMBERS = 1000
+BULK_ACTIONS = ("add", "remove", "set_role")
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -28,6 +44,38 @@ def _ensure_models_available() -> bool:
     return all([Group is not None, GroupMember is not None])  # type: ignore
 
 
+def _dialect_insert(db: Session):
+    """Return the dialect's INSERT construct if it supports ON CONFLICT, else None."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:  # pragma: no cover
+        return None
+    return insert
+
+
+def _check_role(role: str) -> None:
+    if role not in ROLE_PRIORITY:
+        raise ValueError(f"Invalid role '{role}'")
+
+
+def _missing_entity(db: Session, user_id: Any) -> str:
+    """Name the side of a group_members FK violation (error path only: one extra lookup)."""
+    if User is not None and db.get(User, user_id) is None:  # type: ignore[arg-type]
+        return "User not found"
+    return "Group not found"
+
+
+def _membership_changed(group_id: Any, user_id: Any, role: Optional[str], group_name: Optional[str] = None) -> None:
+    """After commit: update the membership index and tell the group's live streams."""
+    membership_index.apply(group_id, user_id, role, group_name=group_name)
+    event_service.publish_group(
+        group_id, event_service.EVENT_MEMBERSHIP, {"group_id": group_id, "user_id": user_id, "role": role}
+    )
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
@@ -40,15 +88,10 @@ def list_user_groups(db: Session, *, user_id: int) -> List[Any]:
     if not _ensure_models_available():
         return []
 
-    # Join membership → group to get role and name
-    rows = (
-        db.query(Group.id, Group.name, GroupMember.role)  # type: ignore[attr-defined]
-        .join(GroupMember, GroupMember.group_id == Group.id)  # type: ignore[attr-defined]
-        .filter(GroupMember.user_id == user_id)  # type: ignore[attr-defined]
-        .order_by(Group.name.asc())
-        .all()
-    )
-    return [_make_row(id=g_id, name=g_name, role=role) for (g_id, g_name, role) in rows]
+    # Served from the in-process membership index (reloaded only when stale)
+    groups = membership_index.user_groups(db, user_id)
+    rows = sorted(groups.items(), key=lambda item: (item[1][0] or "").lower())
+    return [_make_row(id=g_id, name=g_name, role=role) for g_id, (g_name, role) in rows]
 
 
 def create_group(
@@ -79,6 +122,7 @@ def create_group(
     db.add(member)
     db.commit()
     db.refresh(grp)
+    _membership_changed(grp.id, owner_id, "owner", group_name=grp.name)
 
     return {"id": grp.id, "name": grp.name, "description": getattr(grp, "description", None)}
 
@@ -91,25 +135,33 @@ def add_member(
     role: str = "member",
 ) -> Dict[str, Any]:
     """Add a user to a group with a role (default 'member')."""
+    _check_role(role)
     if not _ensure_models_available():
         return {"group_id": group_id, "user_id": target_user_id, "role": role}
 
-    # Ensure group exists
-    grp = db.query(Group).filter(Group.id == group_id).first()  # type: ignore[attr-defined]
-    if not grp:
-        raise ValueError("Group not found")
-
-    existing = (
-        db.query(GroupMember)  # type: ignore[attr-defined]
-        .filter(and_(GroupMember.group_id == group_id, GroupMember.user_id == target_user_id))  # type: ignore[attr-defined]
-        .first()
-    )
-    if existing:
-        existing.role = role
-    else:
-        db.add(GroupMember(group_id=group_id, user_id=target_user_id, role=role))  # type: ignore[call-arg]
+    insert = _dialect_insert(db)
+    if insert is None:  # pragma: no cover - dialects without ON CONFLICT
+        db.merge(GroupMember(group_id=group_id, user_id=target_user_id, role=role))  # type: ignore[call-arg]
+        db.commit()
+        _membership_changed(group_id, target_user_id, role)
+        return {"group_id": group_id, "user_id": target_user_id, "role": role}
 
-    db.commit()
+    # One conditional UPSERT: inserts, or updates only when the role actually changes
+    stmt = insert(GroupMember).values(group_id=group_id, user_id=target_user_id, role=role)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GroupMember.group_id, GroupMember.user_id],  # type: ignore[attr-defined]
+        set_={"role": stmt.excluded.role},
+        where=GroupMember.role != stmt.excluded.role,  # type: ignore[attr-defined]
+    ).returning(GroupMember.role)  # type: ignore[attr-defined]
+    try:
+        changed = db.execute(stmt).first() is not None
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError(_missing_entity(db, target_user_id))
+
+    if changed:
+        _membership_changed(group_id, target_user_id, role)
     return {"group_id": group_id, "user_id": target_user_id, "role": role}
 
 
@@ -118,56 +170,314 @@ def remove_member(db: Session, *, group_id: int, target_user_id: int) -> bool:
     if not _ensure_models_available():
         return True
 
-    row = (
-        db.query(GroupMember)  # type: ignore[attr-defined]
-        .filter(and_(GroupMember.group_id == group_id, GroupMember.user_id == target_user_id))  # type: ignore[attr-defined]
-        .first()
-    )
-    if not row:
-        return True
-
-    db.delete(row)
+    removed = db.execute(
+        delete(GroupMember)  # type: ignore[arg-type]
+        .where(and_(GroupMember.group_id == group_id, GroupMember.user_id == target_user_id))  # type: ignore[attr-defined]
+        .returning(GroupMember.role)  # type: ignore[attr-defined]
+    ).first()
     db.commit()
+    if removed is not None:
+        _membership_changed(group_id, target_user_id, None)
     return True
 
 
 def set_member_role(db: Session, *, group_id: int, target_user_id: int, role: str) -> Dict[str, Any]:
     """Update a member's role within a group."""
+    _check_role(role)
     if not _ensure_models_available():
         return {"group_id": group_id, "user_id": target_user_id, "role": role}
 
-    row = (
-        db.query(GroupMember)  # type: ignore[attr-defined]
-        .filter(and_(GroupMember.group_id == group_id, GroupMember.user_id == target_user_id))  # type: ignore[attr-defined]
-        .first()
-    )
-    if not row:
+    updated = db.execute(
+        update(GroupMember)  # type: ignore[arg-type]
+        .where(and_(GroupMember.group_id == group_id, GroupMember.user_id == target_user_id))  # type: ignore[attr-defined]
+        .values(role=role)
+        .returning(GroupMember.role)  # type: ignore[attr-defined]
+    ).first()
+    if updated is None:
+        db.rollback()
         raise ValueError("Membership not found")
 
-    row.role = role
     db.commit()
+    _membership_changed(group_id, target_user_id, role)
     return {"group_id": group_id, "user_id": target_user_id, "role": role}
 
 
+def bulk_update_members(
+    db: Session,
+    *,
+    group_id: int,
+    actor_id: Any,
+    operations: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """Add, remove or re-role many members in one transaction, on behalf of `actor_id`.
+
+    `operations` items: {"user_id", "action": "add"|"remove"|"set_role", "role"}.
+    Nobody can touch the owner's membership, and only the owner can change admins
+    (promote, demote, re-role or remove them). Users new to the group are looked up
+    in one SELECT; adds and role changes go out as one multi-row conditional UPSERT,
+    removals as one DELETE ... RETURNING; the whole batch commits (or fails) together.
+    Returns one outcome per operation: added, updated, unchanged, removed, not_member,
+    not_found (no such user), or error.
+    """
+    if len(operations) > MAX_BULK_MEMBERS:
+        raise ValueError(f"At most {MAX_BULK_MEMBERS} members per request")
+
+    results: List[Dict[str, Any]] = []
+    upserts: Dict[Any, str] = {}
+    removals: List[Any] = []
+    seen = set()
+
+    # Pre-images come from the membership index (no per-member queries)
+    prior = dict(membership_index.group_roles(db, group_id)) if _ensure_models_available() else {}
+    actor_is_owner = prior.get(actor_id) == "owner"
+
+    for op in operations:
+        user_id = op.get("user_id")
+        action = op.get("action", "add")
+        role = op.get("role") or "member"
+        result = {"user_id": user_id, "action": action, "role": role if action != "remove" else None}
+        results.append(result)
+        if user_id in seen:
+            result.update(status="error", detail="Duplicate user in request")
+            continue
+        seen.add(user_id)
+        if action not in BULK_ACTIONS:
+            result.update(status="error", detail=f"Unknown action '{action}'")
+        elif action != "remove" and (role not in ROLE_PRIORITY or role == "owner"):
+            result.update(status="error", detail=f"Invalid role '{role}'")
+        elif prior.get(user_id) == "owner":
+            result.update(status="error", detail="The group owner's membership cannot be changed")
+        elif not actor_is_owner and (prior.get(user_id) == "admin" or (action != "remove" and role == "admin")):
+            result.update(status="error", detail="Only the group owner can change admins")
+        elif action == "set_role" and user_id not in prior:
+            result.update(status="not_member")
+        elif action == "remove":
+            removals.append(user_id)
+        else:
+            upserts[user_id] = role
+
+    if not _ensure_models_available():
+        for result in results:
+            result.setdefault("status", "unchanged")
+        return results
+
+    # Unknown users are reported per member instead of failing the batch on the FK
+    newcomers = [user_id for user_id in upserts if user_id not in prior]
+    if newcomers and User is not None:
+        known = {u for (u,) in db.query(User.id).filter(User.id.in_(newcomers))}  # type: ignore[attr-defined]
+        missing = set(newcomers) - known
+        for result in results:
+            if "status" not in result and result["user_id"] in missing:
+                result.update(status="not_found", detail="User not found")
+                del upserts[result["user_id"]]
+
+    changed_roles: Dict[Any, str] = {}
+    removed = set()
+    try:
+        if upserts:
+            insert = _dialect_insert(db)
+            if insert is None:  # pragma: no cover - dialects without ON CONFLICT
+                for user_id, role in upserts.items():
+                    if prior.get(user_id) != role:
+                        db.merge(GroupMember(group_id=group_id, user_id=user_id, role=role))  # type: ignore[call-arg]
+                        changed_roles[user_id] = role
+            else:
+                stmt = insert(GroupMember).values(
+                    [{"group_id": group_id, "user_id": u, "role": r} for u, r in upserts.items()]
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[GroupMember.group_id, GroupMember.user_id],  # type: ignore[attr-defined]
+                    set_={"role": stmt.excluded.role},
+                    where=GroupMember.role != stmt.excluded.role,  # type: ignore[attr-defined]
+                ).returning(GroupMember.user_id, GroupMember.role)  # type: ignore[attr-defined]
+                changed_roles = {u: r for u, r in db.execute(stmt)}
+        if removals:
+            removed = {
+                u
+                for (u,) in db.execute(
+                    delete(GroupMember)  # type: ignore[arg-type]
+                    .where(GroupMember.group_id == group_id, GroupMember.user_id.in_(removals))  # type: ignore[attr-defined]
+                    .returning(GroupMember.user_id)  # type: ignore[attr-defined]
+                )
+            }
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("Group not found")
+
+    for result in results:
+        if "status" in result:
+            continue
+        user_id = result["user_id"]
+        if result["action"] == "remove":
+            result["status"] = "removed" if user_id in removed else "not_member"
+        elif user_id in changed_roles:
+            result["status"] = "updated" if user_id in prior else "added"
+        else:
+            result["status"] = "unchanged"
+
+    for user_id, role in changed_roles.items():
+        _membership_changed(group_id, user_id, role)
+    for user_id in removed:
+        _membership_changed(group_id, user_id, None)
+    return results
+
+
 def list_group_members(db: Session, *, group_id: int) -> List[Dict[str, Any]]:
     """List members for a given group with their roles."""
     if not _ensure_models_available():
         return []
 
-    q = db.query(GroupMember).filter(GroupMember.group_id == group_id)  # type: ignore[attr-defined]
-    rows = q.all()
     return [
-        {"user_id": r.user_id, "role": r.role}
-        for r in rows
+        {"user_id": user_id, "role": role}
+        for user_id, role in membership_index.group_roles(db, group_id).items()
     ]
 
 
+def get_member_role(db: Session, *, group_id: int, user_id: Any) -> Optional[str]:
+    """Return the user's role in the group, or None if not a member."""
+    if not _ensure_models_available():
+        return None
+    return membership_index.role_of(db, group_id, user_id)
+
+
+def group_ids_for_user(db: Session, *, user_id: Any) -> List[int]:
+    if not _ensure_models_available():
+        return []
+    return list(membership_index.user_groups(db, user_id).keys())
+
+
+def on_member_purchases_changed(
+    db: Session,
+    *,
+    user_id: Any,
+    when: Union[date, datetime, str, None],
+    amount_delta: Optional[float] = None,
+) -> None:
+    """Invalidate the month's dashboard of every group the user belongs to, queue the
+    member for a leaderboard update and announce the activity on the groups' streams."""
+    group_ids = group_ids_for_user(db, user_id=user_id)
+    if group_ids:
+        versions = cache_service.invalidate_group_month(group_ids, when)
+        leaderboard_service.mark_member_dirty(dict(zip(group_ids, versions)), user_id, when)
+        month = month_key(when or datetime.utcnow())
+        for group_id in group_ids:
+            event_service.publish_group(
+                group_id,
+                event_service.EVENT_MEMBER_ACTIVITY,
+                {"group_id": group_id, "user_id": user_id, "month": month, "amount_delta": amount_delta},
+            )
+
+
+def on_member_rules_changed(db: Session, *, user_id: Any) -> None:
+    """A member's budget rule feeds their compliance ratio on every group leaderboard."""
+    group_ids = group_ids_for_user(db, user_id=user_id)
+    if group_ids:
+        leaderboard_service.mark_rules_changed(group_ids, user_id)
+        leaderboard_service.publish_rules_changed(group_ids, user_id)  # other workers
+
+
+def get_group_leaderboard(
+    db: Session,
+    *,
+    group_id: int,
+    month: str,
+    metric: str,
+    limit: int = leaderboard_service.DEFAULT_LIMIT,
+    user_id: Any = None,
+) -> Dict[str, Any]:
+    """Top members of a group for a metric (see leaderboard_service.METRICS), plus the
+    caller's rank when `user_id` is given."""
+    if not _ensure_models_available():
+        return {"group_id": group_id, "month": month, "metric": metric, "size": 0, "top": [], "me": None}
+    return leaderboard_service.get_leaderboard(
+        db, group_id=group_id, month=month, metric=metric, limit=limit, user_id=user_id
+    )
+
+
+def get_group_dashboard(db: Session, *, group_id: int, month: str) -> Dict[str, Any]:
+    """Per-member and group-total spend for a month, with per-category breakdowns.
+
+    One grouped query over group_members ⟕ purchases ⟕ categories yields a row per
+    (member, category); everything else is folded in Python, so cost does not grow
+    with a query per member. Results are cached per (group, month) and invalidated
+    by membership changes or any member's purchase writes for that month.
+    """
+    month = month_key(month) if isinstance(month, (date, datetime)) else month
+    empty = {"group_id": group_id, "month": month, "total_spent": 0.0, "by_category": {}, "members": []}
+    if not _ensure_models_available() or Purchase is None or Category is None:  # type: ignore
+        return empty
+
+    cache_key = cache_service.group_dashboard_key(group_id, month)
+    cached = cache_service.get_group_dashboard(cache_key)
+    if cached is not None:
+        return cached
+
+    from app.services.budget_service import _month_bounds  # shared month parsing
+
+    start, end = _month_bounds(month)
+    rows = (
+        db.query(
+            GroupMember.user_id,  # type: ignore[attr-defined]
+            GroupMember.role,  # type: ignore[attr-defined]
+            Category.name,  # type: ignore[attr-defined]
+            func.sum(Purchase.amount),  # type: ignore[attr-defined]
+        )
+        .select_from(GroupMember)
+        .outerjoin(
+            Purchase,
+            and_(
+                Purchase.user_id == GroupMember.user_id,  # type: ignore[attr-defined]
+                Purchase.occurred_at >= start,  # type: ignore[attr-defined]
+                Purchase.occurred_at < end,  # type: ignore[attr-defined]
+            ),
+        )
+        .outerjoin(Category, Category.id == Purchase.category_id)  # type: ignore[attr-defined]
+        .filter(GroupMember.group_id == group_id)  # type: ignore[attr-defined]
+        .group_by(GroupMember.user_id, GroupMember.role, Category.name)  # type: ignore[attr-defined]
+        .all()
+    )
+
+    members: Dict[Any, Dict[str, Any]] = {}
+    group_by_category: Dict[str, float] = {}
+    group_total = 0.0
+    for user_id, role, cat_name, total in rows:
+        member = members.setdefault(
+            user_id, {"user_id": user_id, "role": role, "total_spent": 0.0, "by_category": {}}
+        )
+        if total is None:
+            continue  # member with no purchases this month
+        amount = float(total)
+        name = cat_name or UNCATEGORIZED
+        member["by_category"][name] = round(member["by_category"].get(name, 0.0) + amount, 2)
+        member["total_spent"] = round(member["total_spent"] + amount, 2)
+        group_by_category[name] = round(group_by_category.get(name, 0.0) + amount, 2)
+        group_total += amount
+
+    result = {
+        "group_id": group_id,
+        "month": month,
+        "total_spent": round(group_total, 2),
+        "by_category": group_by_category,
+        "members": sorted(members.values(), key=lambda m: m["total_spent"], reverse=True),
+    }
+    cache_service.set_group_dashboard(cache_key, month, result)
+    return result
+
+
 __all__ = [
     "list_user_groups",
     "create_group",
     "add_member",
     "remove_member",
     "set_member_role",
+    "bulk_update_members",
     "list_group_members",
+    "get_member_role",
+    "group_ids_for_user",
+    "on_member_purchases_changed",
+    "on_member_rules_changed",
+    "get_group_leaderboard",
+    "get_group_dashboard",
 ]
 
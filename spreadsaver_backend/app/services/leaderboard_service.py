@@ -0,0 +1,429 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.services import cache_service, event_service
+from app.services.membership_index import index as membership_index
+from app.utils.cache import LRUCache
+from app.utils.calculations import compliance_report, longest_no_spend_streak, month_key, normalize_rules
+from app.utils.ranking import IndexableSkipList
+
+logger = logging.getLogger(__name__)
+
+# Optional model imports (tolerate missing during early scaffolding)
+try:  # pragma: no cover
+    from app.models.models import BudgetRule, Purchase  # type: ignore
+except Exception:  # pragma: no cover
+    BudgetRule = None  # type: ignore
+    Purchase = None  # type: ignore
+
+# metric → True if higher is better
+METRICS: Dict[str, bool] = {
+    "savings_rate": True,
+    "compliance_ratio": False,
+    "no_spend_streak": True,
+}
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+# Budget rules carry no group version: rule changes reach other workers' boards here
+RULES_CHANNEL = "internal:leaderboard:rules"
+
+
+# ---------------------------------------------------------------------------
+# Metric computation (monthly rollups → member metrics)
+# ---------------------------------------------------------------------------
+
+def _month_start(month: str) -> date:
+    from app.services.budget_service import _month_bounds  # shared month parsing
+
+    return _month_bounds(month)[0].date()
+
+
+def _shift_month(month: str, delta: int) -> str:
+    start = _month_start(month)
+    index = start.year * 12 + start.month - 1 + delta
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _as_date(value: Union[date, datetime, str]) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])  # SQLite's date() yields text
+
+
+def _daily_rollups(db: Session, user_ids: List[Any], month: str) -> Dict[Any, Dict[date, float]]:
+    """user → {day: spend} over the previous and target month, in one grouped query."""
+    out: Dict[Any, Dict[date, float]] = {user_id: {} for user_id in user_ids}
+    if not user_ids or Purchase is None:  # type: ignore
+        return out
+    start = datetime.combine(_month_start(_shift_month(month, -1)), datetime.min.time())
+    end = datetime.combine(_month_start(_shift_month(month, 1)), datetime.min.time())
+    day = func.date(Purchase.occurred_at)  # type: ignore[attr-defined]
+    rows = (
+        db.query(Purchase.user_id, day, func.sum(Purchase.amount))  # type: ignore[attr-defined]
+        .filter(Purchase.user_id.in_(user_ids))  # type: ignore[attr-defined]
+        .filter(Purchase.occurred_at >= start)  # type: ignore[attr-defined]
+        .filter(Purchase.occurred_at < end)  # type: ignore[attr-defined]
+        .group_by(Purchase.user_id, day)  # type: ignore[attr-defined]
+        .all()
+    )
+    for user_id, day_value, total in rows:
+        out[user_id][_as_date(day_value)] = float(total or 0.0)
+    return out
+
+
+def _latest_rules(db: Session, user_ids: List[Any]) -> Dict[Any, Dict[str, float]]:
+    """user → normalized Needs/Wants/Savings fractions from their newest budget rule."""
+    if not user_ids or BudgetRule is None:  # type: ignore
+        return {}
+    rows = (
+        db.query(
+            BudgetRule.user_id,  # type: ignore[attr-defined]
+            BudgetRule.essential_pct,  # type: ignore[attr-defined]
+            BudgetRule.discretionary_pct,  # type: ignore[attr-defined]
+            BudgetRule.savings_pct,  # type: ignore[attr-defined]
+        )
+        .filter(BudgetRule.user_id.in_(user_ids))  # type: ignore[attr-defined]
+        .order_by(BudgetRule.created_at)  # type: ignore[attr-defined]
+        .all()
+    )
+    rules: Dict[Any, Dict[str, float]] = {}
+    for user_id, essential, discretionary, savings in rows:  # later rows win
+        rules[user_id] = normalize_rules({"Needs": essential, "Wants": discretionary, "Savings": savings})
+    return rules
+
+
+def member_metrics(
+    days: Dict[date, float],
+    month: str,
+    rule: Optional[Dict[str, float]] = None,
+    *,
+    today: Optional[date] = None,
+) -> Dict[str, float]:
+    """Leaderboard metrics for one member's month, from their daily spend.
+
+    - savings_rate: spend reduction vs. the previous month (0 without a baseline)
+    - compliance_ratio: spend / planned spend, where the plan is last month's spend
+      scaled by the Needs+Wants share of the member's rule (50/30/20 by default)
+    - no_spend_streak: longest run of purchase-free days in the month so far
+    """
+    start = _month_start(month)
+    prev_start = _month_start(_shift_month(month, -1))
+    last = min(today or date.today(), _month_start(_shift_month(month, 1)) - timedelta(days=1))
+
+    spent = sum(v for d, v in days.items() if d >= start)
+    baseline = sum(v for d, v in days.items() if prev_start <= d < start)
+    savings_rate = round((baseline - spent) / baseline, 4) if baseline > 0 else 0.0
+
+    fracs = rule or normalize_rules()
+    planned = baseline * (fracs.get("Needs", 0.0) + fracs.get("Wants", 0.0))
+    compliance = compliance_report({"spend": planned}, {"spend": spent})["compliance_ratio"]
+
+    if last < start:
+        streak = 0
+    else:
+        spend_days = [d for d, v in days.items() if start <= d <= last and v > 0]
+        # Bracket the month so leading/trailing purchase-free days count as gaps too
+        streak = longest_no_spend_streak(spend_days + [start - timedelta(days=1), last + timedelta(days=1)])
+
+    return {
+        "savings_rate": savings_rate,
+        "compliance_ratio": float(compliance),  # type: ignore[arg-type]
+        "no_spend_streak": float(streak),
+    }
+
+
+def _compute(db: Session, user_ids: List[Any], month: str) -> Dict[Any, Dict[str, float]]:
+    rollups = _daily_rollups(db, user_ids, month)
+    rules = _latest_rules(db, user_ids)
+    return {user_id: member_metrics(rollups.get(user_id, {}), month, rules.get(user_id)) for user_id in user_ids}
+
+
+# ---------------------------------------------------------------------------
+# Boards
+# ---------------------------------------------------------------------------
+
+class Leaderboard:
+    """All metrics for one (group, month): member values plus one skiplist per metric.
+
+    Entries are (sort_key, str(user_id)) so ties break deterministically and every
+    entry is unique; sort_key is negated for higher-is-better metrics.
+    """
+
+    def __init__(self, group_id: Any, month: str):
+        self.group_id = group_id
+        self.month = month
+        self.values: Dict[Any, Dict[str, float]] = {}
+        self.ranked: Dict[str, IndexableSkipList] = {metric: IndexableSkipList() for metric in METRICS}
+        self.by_key: Dict[str, Any] = {}  # str(user_id) → user_id
+        self.versions: Tuple[int, ...] = ()  # (members, month, previous month) at last sync
+        self.dirty: Set[Any] = set()
+        self.built_at = 0.0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _entry(metric: str, value: float, user_id: Any) -> Tuple[float, str]:
+        return (-value if METRICS[metric] else value, str(user_id))
+
+    def put(self, user_id: Any, metrics: Dict[str, float]) -> None:
+        self.drop(user_id)
+        self.values[user_id] = metrics
+        self.by_key[str(user_id)] = user_id
+        for metric, ranked in self.ranked.items():
+            ranked.insert(self._entry(metric, metrics[metric], user_id))
+
+    def drop(self, user_id: Any) -> None:
+        old = self.values.pop(user_id, None)
+        if old is None:
+            return
+        self.by_key.pop(str(user_id), None)
+        for metric, ranked in self.ranked.items():
+            ranked.remove(self._entry(metric, old[metric], user_id))
+
+    def top(self, metric: str, limit: int) -> List[Dict[str, Any]]:
+        out = []
+        for rank, (_, key) in enumerate(self.ranked[metric].islice(0, limit), start=1):
+            user_id = self.by_key[key]
+            out.append({"rank": rank, "user_id": user_id, "value": self.values[user_id][metric]})
+        return out
+
+    def rank_of(self, metric: str, user_id: Any) -> Optional[Dict[str, Any]]:
+        metrics = self.values.get(user_id)
+        if metrics is None:
+            return None
+        position = self.ranked[metric].rank(self._entry(metric, metrics[metric], user_id))
+        return {"rank": position + 1, "user_id": user_id, "value": metrics[metric]}
+
+
+_boards = LRUCache(max_entries=settings.LEADERBOARD_MAX_BOARDS, name="leaderboard")
+
+
+def _versions(group_id: Any, month: str) -> Tuple[int, ...]:
+    return cache_service.group_versions(group_id, month, _shift_month(month, -1))
+
+
+def _rebuild(db: Session, board: Leaderboard, versions: Tuple[int, ...]) -> int:
+    """Recompute every member from scratch; returns how many members' values drifted."""
+    members = list(membership_index.group_roles(db, board.group_id))
+    fresh = _compute(db, members, board.month)
+    drift = sum(1 for user_id, metrics in fresh.items() if board.values.get(user_id) != metrics)
+    drift += sum(1 for user_id in board.values if user_id not in fresh)
+    for ranked in board.ranked.values():
+        ranked.clear()
+    board.values.clear()
+    board.by_key.clear()
+    for user_id, metrics in fresh.items():
+        board.put(user_id, metrics)
+    board.versions = versions
+    board.dirty.clear()
+    board.built_at = time.monotonic()
+    return drift
+
+
+def _sync(db: Session, board: Leaderboard) -> None:
+    """Bring a board up to date: patch dirty/joined/left members, or rebuild if we
+    can't account for a change (another worker's write, or the refresh period lapsed)."""
+    versions = _versions(board.group_id, board.month)
+    age = time.monotonic() - board.built_at
+    if not board.built_at or versions[1:] != board.versions[1:]:
+        _rebuild(db, board, versions)
+        return
+    if age >= settings.LEADERBOARD_FULL_REFRESH_SECONDS:
+        drift = _rebuild(db, board, versions)
+        if drift:
+            logger.warning(
+                "leaderboard group=%s month=%s: %d member(s) drifted before full refresh",
+                board.group_id, board.month, drift,
+            )
+        return
+
+    changed = set(board.dirty)
+    if versions[0] != board.versions[0]:
+        members = set(membership_index.group_roles(db, board.group_id))
+        for user_id in set(board.values) - members:
+            board.drop(user_id)
+        changed |= members - set(board.values)
+        changed &= members
+    if changed:
+        for user_id, metrics in _compute(db, list(changed), board.month).items():
+            board.put(user_id, metrics)
+    board.dirty.clear()
+    board.versions = versions
+
+
+def _board(db: Session, group_id: Any, month: str) -> Leaderboard:
+    key = (group_id, month)
+    board = _boards.get(key)
+    if board is None:
+        board = Leaderboard(group_id, month)
+        _boards.set(key, board)
+    with board.lock:  # type: ignore[union-attr]
+        _sync(db, board)  # type: ignore[arg-type]
+    return board  # type: ignore[return-value]
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def get_leaderboard(
+    db: Session,
+    *,
+    group_id: int,
+    month: str,
+    metric: str,
+    limit: int = DEFAULT_LIMIT,
+    user_id: Any = None,
+) -> Dict[str, Any]:
+    """Top-N members for a metric plus (optionally) the caller's own rank."""
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}'")
+    month = month_key(month) if isinstance(month, (date, datetime)) else month
+    limit = max(1, min(limit, MAX_LIMIT))
+    board = _board(db, group_id, month)
+    with board.lock:
+        return {
+            "group_id": group_id,
+            "month": month,
+            "metric": metric,
+            "size": len(board.values),
+            "top": board.top(metric, limit),
+            "me": board.rank_of(metric, user_id) if user_id is not None else None,
+        }
+
+
+def mark_member_dirty(
+    group_versions: Dict[Any, int],
+    user_id: Any,
+    when: Union[date, datetime, str, None],
+) -> None:
+    """A member's purchases in `when`'s month changed (after commit). `group_versions`
+    maps each of their groups to the month version our write produced; boards that saw
+    the previous version just queue the member, anything else rebuilds on next read."""
+    month = month_key(when or datetime.utcnow())
+    for group_id, new_version in group_versions.items():
+        # The month is the target of its own board and the baseline of next month's
+        for board_month, slot in ((month, 1), (_shift_month(month, 1), 2)):
+            board = _boards.get((group_id, board_month))
+            if board is None:
+                continue
+            with board.lock:  # type: ignore[union-attr]
+                board.dirty.add(user_id)  # type: ignore[union-attr]
+                versions = list(board.versions)  # type: ignore[union-attr]
+                if versions and versions[slot] == new_version - 1:
+                    versions[slot] = new_version
+                    board.versions = tuple(versions)  # type: ignore[union-attr]
+
+
+def mark_rules_changed(group_ids: Iterable[Any], user_id: Any) -> None:
+    """A member's budget rule changed: queue them on every cached board of their groups
+    where they are ranked (`user_id` may be the id or its string form)."""
+    wanted = set(group_ids)
+    for key in _boards.keys():
+        if key[0] in wanted:
+            board = _boards.get(key)
+            if board is None:
+                continue
+            with board.lock:  # type: ignore[union-attr]
+                member = board.by_key.get(str(user_id))  # type: ignore[union-attr]
+                if member is not None:
+                    board.dirty.add(member)  # type: ignore[union-attr]
+
+
+def publish_rules_changed(group_ids: Iterable[Any], user_id: Any) -> None:
+    """Tell every worker (this one included) to requeue the member on its boards."""
+    payload = {"group_ids": list(group_ids), "user_id": str(user_id)}
+    event_service.broker.publish(RULES_CHANNEL, json.dumps(payload).encode("utf-8"))
+
+
+def refresh_leaderboards(db: Session) -> Dict[str, int]:
+    """Full recompute of every cached board (for a periodic job); reports drift."""
+    boards = drifted = 0
+    for key in _boards.keys():
+        board = _boards.get(key)
+        if board is None:
+            continue
+        with board.lock:  # type: ignore[union-attr]
+            drift = _rebuild(db, board, _versions(board.group_id, board.month))  # type: ignore[union-attr]
+        boards += 1
+        drifted += drift
+    return {"boards": boards, "drifted_members": drifted}
+
+
+# ---------------------------------------------------------------------------
+# Background (app lifespan)
+# ---------------------------------------------------------------------------
+
+async def run_rules_listener(retry_seconds: float = 1.0) -> None:
+    """Apply rule changes published by any worker to this worker's boards. If the
+    subscription fails, resubscribe; the periodic refresh covers anything missed."""
+    while True:
+        try:
+            subscription = await event_service.broker.subscribe(RULES_CHANNEL)
+        except Exception:
+            logger.warning("leaderboard: subscribing to rule changes failed", exc_info=True)
+            await asyncio.sleep(retry_seconds)
+            continue
+        try:
+            async for data in subscription:
+                try:
+                    message = json.loads(data)
+                    mark_rules_changed(message["group_ids"], message["user_id"])
+                except Exception:
+                    logger.exception("leaderboard: bad rules-changed message %r", data)
+        except Exception:
+            logger.warning("leaderboard: rule-change subscription lost; resubscribing", exc_info=True)
+        finally:
+            await subscription.close()
+        await asyncio.sleep(retry_seconds)
+
+
+def _refresh_all() -> Dict[str, int]:
+    from app.database import SessionLocal  # resolved lazily; the app wires the engine
+
+    with SessionLocal() as db:
+        return refresh_leaderboards(db)
+
+
+async def run_refresher(interval: float = settings.LEADERBOARD_FULL_REFRESH_SECONDS) -> None:
+    """Background loop for the app lifespan: rebuild every cached board each `interval`
+    seconds, so boards nobody reads don't wait for a request to catch up."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            stats = await asyncio.to_thread(_refresh_all)
+            log = logger.warning if stats["drifted_members"] else logger.info
+            log("leaderboard refresh: %s", stats)
+        except Exception:  # pragma: no cover - keep the loop alive
+            logger.exception("leaderboard refresh failed")
+
+
+def reset() -> None:
+    _boards.clear()
+
+
+__all__ = [
+    "METRICS",
+    "Leaderboard",
+    "member_metrics",
+    "get_leaderboard",
+    "mark_member_dirty",
+    "mark_rules_changed",
+    "publish_rules_changed",
+    "refresh_leaderboards",
+    "run_rules_listener",
+    "run_refresher",
+    "reset",
+]
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.services import cache_service
+from app.services.cache_service import SCOPE_GROUPS, SCOPE_MEMBERS
+from app.utils.cache import LRUCache
+
+# Optional model imports (tolerate missing during early scaffolding)
+try:  # pragma: no cover
+    from app.models.models import Group, GroupMember  # type: ignore
+except Exception:  # pragma: no cover
+    Group = None  # type: ignore
+    GroupMember = None  # type: ignore
+
+# Define priority order for group roles (mirrors TIER_PRIORITY in routes/tier_logic.py)
+ROLE_PRIORITY = {
+    "member": 1,
+    "admin": 2,
+    "owner": 3,
+}
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+class MembershipIndex:
+    """In-process group → {user: role} and user → {group: (name, role)} maps.
+
+    Entries are loaded lazily and tagged with the data version they were read at
+    (group SCOPE_MEMBERS / user SCOPE_GROUPS from cache_service). Membership writes
+    bump those versions, so another worker's write makes our copy stale and the next
+    lookup reloads it; our own writes are applied in place. Each map keeps at most
+    `max_entries` groups/users, least recently used first out.
+    """
+
+    def __init__(self, *, max_entries: int = 10_000) -> None:
+        self._lock = threading.Lock()  # serialises read-modify-write in apply()
+        # group_id -> (version, {user: role}); user_id -> (version, {group: (name, role)})
+        self._by_group = LRUCache(max_entries=max_entries, name="membership_groups")
+        self._by_user = LRUCache(max_entries=max_entries, name="membership_users")
+
+    # -- reads -------------------------------------------------------------
+
+    def group_roles(self, db: Session, group_id: Any) -> Dict[Any, str]:
+        version = cache_service.group_data_version(group_id, SCOPE_MEMBERS)
+        entry = self._by_group.get(group_id)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        roles = {
+            user_id: role
+            for user_id, role in db.query(GroupMember.user_id, GroupMember.role)  # type: ignore[attr-defined]
+            .filter(GroupMember.group_id == group_id)  # type: ignore[attr-defined]
+        }
+        with self._lock:
+            self._by_group.set(group_id, (version, roles))
+        return roles
+
+    def user_groups(self, db: Session, user_id: Any) -> Dict[Any, Tuple[str, str]]:
+        version = cache_service.data_version(user_id, SCOPE_GROUPS)
+        entry = self._by_user.get(user_id)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        groups = {
+            g_id: (g_name, role)
+            for g_id, g_name, role in db.query(Group.id, Group.name, GroupMember.role)  # type: ignore[attr-defined]
+            .join(GroupMember, GroupMember.group_id == Group.id)  # type: ignore[attr-defined]
+            .filter(GroupMember.user_id == user_id)  # type: ignore[attr-defined]
+        }
+        with self._lock:
+            self._by_user.set(user_id, (version, groups))
+        return groups
+
+    def role_of(self, db: Session, group_id: Any, user_id: Any) -> Optional[str]:
+        return self.group_roles(db, group_id).get(user_id)
+
+    # -- writes (call after commit) ----------------------------------------
+
+    def apply(self, group_id: Any, user_id: Any, role: Optional[str], group_name: Optional[str] = None) -> None:
+        """Record a committed membership change (role=None means removed) and bump versions."""
+        group_v = cache_service.invalidate_group_members(group_id)
+        user_v = cache_service.invalidate_groups(user_id)[0]
+        with self._lock:
+            entry = self._by_group.get(group_id)
+            if entry is not None and entry[0] == group_v - 1:
+                roles = dict(entry[1])
+                if role is None:
+                    roles.pop(user_id, None)
+                else:
+                    roles[user_id] = role
+                self._by_group.set(group_id, (group_v, roles))
+            else:
+                self._by_group.delete(group_id)
+
+            entry_u = self._by_user.get(user_id)
+            name = group_name
+            if name is None and entry_u is not None and group_id in entry_u[1]:
+                name = entry_u[1][group_id][0]
+            if entry_u is not None and entry_u[0] == user_v - 1 and (role is None or name is not None):
+                groups = dict(entry_u[1])
+                if role is None:
+                    groups.pop(group_id, None)
+                else:
+                    groups[group_id] = (name, role)  # type: ignore[assignment]
+                self._by_user.set(user_id, (user_v, groups))
+            else:
+                self._by_user.delete(user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_group.clear()
+            self._by_user.clear()
+
+
+index = MembershipIndex(max_entries=settings.MEMBERSHIP_INDEX_MAX_ENTRIES)
+
+
+# ---------------------------------------------------------------------------
+# Permission checks
+# ---------------------------------------------------------------------------
+
+def has_group_role(db: Session, *, group_id: Any, user_id: Any, required: str = "member") -> bool:
+    """True if the user is a member of the group with at least `required` role."""
+    role = index.role_of(db, group_id, user_id)
+    if role is None:
+        return False
+    return ROLE_PRIORITY.get(role, 0) >= ROLE_PRIORITY[required]
+
+
+__all__ = ["ROLE_PRIORITY", "MembershipIndex", "index", "has_group_role"]
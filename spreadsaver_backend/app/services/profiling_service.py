@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from app.config.settings import settings
+from app.utils import profiler as sampling
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Per-request profiles (X-Profile header), kept briefly for an admin to download
+_request_profiles = LRUCache(max_entries=32, name="request_profiles")
+REQUEST_PROFILE_TTL_SECONDS = 600
+
+
+def _interval(interval_ms: Optional[float] = None) -> float:
+    return max(1.0, interval_ms or settings.PROFILER_INTERVAL_MS) / 1000.0
+
+
+# ---------------------------------------------------------------------------
+# On demand (admin endpoint)
+# ---------------------------------------------------------------------------
+
+async def profile(seconds: float, *, interval_ms: Optional[float] = None) -> Optional[sampling.SamplingProfiler]:
+    """Sample this worker for `seconds` without blocking the event loop (the loop
+    itself is among the sampled threads). None if a profile is already running."""
+    seconds = min(max(seconds, 0.1), settings.PROFILER_MAX_SECONDS)
+    return await asyncio.to_thread(sampling.profile_for, seconds, interval=_interval(interval_ms))
+
+
+# ---------------------------------------------------------------------------
+# Single request (see middleware/profiling.py)
+# ---------------------------------------------------------------------------
+
+def store_request_profile(profile_id: str, profiler: sampling.SamplingProfiler) -> None:
+    _request_profiles.set(profile_id, profiler.collapsed(), ttl=REQUEST_PROFILE_TTL_SECONDS)
+
+
+def get_request_profile(profile_id: str) -> Optional[str]:
+    return _request_profiles.get(profile_id)  # type: ignore[return-value]
+
+
+# ---------------------------------------------------------------------------
+# Signal (kill -USR2 <worker pid>): profile for a while, write a file, log its path
+# ---------------------------------------------------------------------------
+
+def _profile_to_file(seconds: float) -> None:
+    profiler = sampling.profile_for(seconds, interval=_interval())
+    if profiler is None:
+        logger.warning("profiler: signal ignored, a profile is already running")
+        return
+    directory = settings.PROFILER_OUTPUT_DIR or tempfile.gettempdir()
+    path = os.path.join(directory, f"spreadsaver-{os.getpid()}-{int(time.time())}.collapsed")
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(profiler.collapsed())
+    logger.warning("profiler: %d samples over %.1fs written to %s", profiler.samples, profiler.duration, path)
+
+
+def _on_signal(signum, _frame) -> None:
+    # Signal handlers run on the main thread between bytecodes: hand off immediately
+    threading.Thread(
+        target=_profile_to_file, args=(settings.PROFILER_SIGNAL_SECONDS,), name="profiler-signal", daemon=True
+    ).start()
+
+
+def install_signal_handler() -> bool:
+    """Bind PROFILER_SIGNAL (default SIGUSR2) in this worker. Must run on the main thread."""
+    name = settings.PROFILER_SIGNAL
+    signum = getattr(signal, name, None) if name else None
+    if signum is None:
+        return False
+    try:
+        signal.signal(signum, _on_signal)
+    except ValueError:  # not the main thread (e.g. some test runners)
+        return False
+    return True
+
+
+__all__ = [
+    "profile",
+    "store_request_profile",
+    "get_request_profile",
+    "install_signal_handler",
+]
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from app.config.settings import settings
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_sdk_ready = False
+
+
+def sdk():
+    """The stripe-python module, imported and keyed on first use. It drags in `requests`
+    and the SDK's resource tree (~100ms), which worker startup shouldn't pay for."""
+    global _sdk_ready
+    import stripe
+
+    if not _sdk_ready:
+        _sdk_ready = True
+        stripe.api_key = stripe.api_key or settings.STRIPE_SECRET_KEY  # keep a key set by stripe_local
+    return stripe
+
+
+@functools.lru_cache(maxsize=None)
+def transient_errors() -> Tuple[type, ...]:
+    """Network-level failures worth retrying (4xx request errors are not)."""
+    errors = sdk().error
+    return (errors.APIConnectionError, errors.RateLimitError, errors.APIError, asyncio.TimeoutError)
+
+
+class CircuitOpenError(RuntimeError):
+    """Stripe has been failing; calls are short-circuited until the breaker resets."""
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------------------------
+
+class CircuitBreaker:
+    """closed → (N consecutive transient failures) → open → (reset_seconds) → half-open.
+
+    Half-open lets a single trial call through: success closes the breaker, failure
+    re-opens it for another reset period.
+    """
+
+    def __init__(self, *, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_seconds or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """The trial call was abandoned (e.g. cancelled) without an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class StripeClient:
+    """Runs blocking stripe-python calls off the event loop.
+
+    - a bounded thread pool (and matching semaphore, so waiters queue on the loop)
+    - a per-attempt timeout, also applied to the HTTP client itself
+    - jittered exponential retries, only for calls marked idempotent (GETs, or POSTs
+      carrying an Idempotency-Key)
+    - a circuit breaker fed by transient failures
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = settings.STRIPE_MAX_CONCURRENCY,
+        timeout: float = settings.STRIPE_TIMEOUT_SECONDS,
+        max_retries: int = settings.STRIPE_MAX_RETRIES,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=settings.STRIPE_BREAKER_FAILURES,
+            reset_seconds=settings.STRIPE_BREAKER_RESET_SECONDS,
+        )
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stripe")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._prices = LRUCache(max_entries=256, name="stripe_prices")
+        self._configured = False
+
+    def _configure(self) -> None:
+        if self._configured:
+            return
+        stripe = sdk()
+        # We own retries and timeouts; don't let the SDK stack its own on top
+        stripe.max_network_retries = 0
+        stripe.default_http_client = stripe.new_default_http_client(timeout=self.timeout)
+        self._configured = True
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self._max_workers)
+            self._slots_loop = loop
+        return self._slots
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def call(self, fn: Callable[..., Any], *args: Any, idempotent: bool = False, **kwargs: Any) -> Any:
+        """Await `fn(*args, **kwargs)` (a stripe-python call) under the client's policies."""
+        self._configure()
+        loop = asyncio.get_running_loop()
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError("Stripe is unavailable; try again shortly")
+            try:
+                async with self._semaphore():
+                    result = await asyncio.wait_for(
+                        loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs)),
+                        timeout=self.timeout,
+                    )
+            except transient_errors() as e:
+                self.breaker.record_failure()
+                if attempt + 1 >= attempts:
+                    raise
+                logger.warning("stripe: %s failed (attempt %d): %s", getattr(fn, "__qualname__", fn), attempt + 1, e)
+                await asyncio.sleep(self._delay(attempt))
+                continue
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception:
+                self.breaker.record_success()  # Stripe answered; the request itself was bad
+                raise
+            self.breaker.record_success()
+            return result
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    # -- cached lookups ----------------------------------------------------
+
+    async def get_price(self, price_id: str) -> Dict[str, Any]:
+        """Price summary ({id, active, product, exists}), cached for STRIPE_PRICE_CACHE_TTL_SECONDS."""
+        cached = self._prices.get(price_id)
+        if cached is not None:
+            return cached  # type: ignore[return-value]
+        stripe = sdk()
+        try:
+            price = await self.call(stripe.Price.retrieve, price_id, idempotent=True)
+            product = price["product"]
+            info = {
+                "id": price_id,
+                "exists": True,
+                "active": bool(price["active"]),
+                "product": getattr(product, "id", product),
+            }
+        except stripe.error.InvalidRequestError:
+            info = {"id": price_id, "exists": False, "active": False, "product": None}
+        self._prices.set(price_id, info, ttl=settings.STRIPE_PRICE_CACHE_TTL_SECONDS)
+        return info
+
+    async def validate_prices(self, price_ids: Iterable[Optional[str]]) -> Dict[str, bool]:
+        """price id → usable (exists and active), looked up concurrently."""
+        ids = sorted({p for p in price_ids if p})
+        infos = await asyncio.gather(*(self.get_price(p) for p in ids))
+        return {info["id"]: info["active"] for info in infos}
+
+    def clear_cache(self) -> None:
+        self._prices.clear()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+__all__ = ["sdk", "transient_errors", "CircuitOpenError", "CircuitBreaker", "StripeClient"]
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import threading
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Optional model imports (tolerate missing during early scaffolding)
+try:  # pragma: no cover
+    from app.models.models import StripeEvent  # type: ignore
+except Exception:  # pragma: no cover
+    StripeEvent = None  # type: ignore
+
+# apply(db, event_type, event) -> "done" | "ignored"; must not commit, may raise to retry
+ApplyFn = Callable[[Session, str, Dict[str, Any]], str]
+
+UNFINISHED = ("pending", "processing")
+MAX_BACKOFF_SECONDS = 300
+
+
+def _default_session_factory() -> Session:
+    from app.database import SessionLocal  # resolved lazily; the app wires the engine
+
+    return SessionLocal()
+
+
+# ---------------------------------------------------------------------------
+# Inbox rows
+# ---------------------------------------------------------------------------
+
+def store_event(
+    db: Session,
+    *,
+    event_id: str,
+    event_type: str,
+    customer_id: str,
+    payload: str,
+) -> bool:
+    """Persist a verified event once. Returns False if this event id was already stored."""
+    from app.services.group_service import _dialect_insert  # shared ON CONFLICT helper
+
+    insert = _dialect_insert(db)
+    values = {"event_id": event_id, "type": event_type, "customer_id": customer_id, "payload": payload}
+    if insert is None:  # pragma: no cover - dialects without ON CONFLICT
+        if db.query(StripeEvent.id).filter(StripeEvent.event_id == event_id).first():  # type: ignore[union-attr]
+            return False
+        db.add(StripeEvent(**values))  # type: ignore[misc]
+        db.commit()
+        return True
+    stmt = (
+        insert(StripeEvent)
+        .values(status="pending", attempts=0, available_at=datetime.utcnow(), received_at=datetime.utcnow(), **values)
+        .on_conflict_do_nothing(index_elements=[StripeEvent.event_id])  # type: ignore[union-attr]
+        .returning(StripeEvent.id)  # type: ignore[union-attr]
+    )
+    created = db.execute(stmt).first() is not None
+    db.commit()
+    return created
+
+
+def claim_next(db: Session, customer_id: str) -> Optional[Any]:
+    """Claim the customer's oldest unfinished event if it is pending and due.
+
+    One statement: if the oldest unfinished row is already being processed (by this or
+    another process) or is backing off, nothing is claimed, so a customer's events are
+    applied strictly in arrival order.
+    """
+    now = datetime.utcnow()
+    oldest = (
+        select(func.min(StripeEvent.id))  # type: ignore[union-attr]
+        .where(StripeEvent.customer_id == customer_id, StripeEvent.status.in_(UNFINISHED))  # type: ignore[union-attr]
+        .scalar_subquery()
+    )
+    stmt = (
+        update(StripeEvent)  # type: ignore[arg-type]
+        .where(
+            StripeEvent.id == oldest,  # type: ignore[union-attr]
+            StripeEvent.status == "pending",  # type: ignore[union-attr]
+            StripeEvent.available_at <= now,  # type: ignore[union-attr]
+        )
+        .values(status="processing", claimed_at=now, attempts=StripeEvent.attempts + 1)  # type: ignore[union-attr]
+        .returning(StripeEvent.id, StripeEvent.type, StripeEvent.payload, StripeEvent.attempts)  # type: ignore[union-attr]
+    )
+    row = db.execute(stmt).first()
+    db.commit()
+    return row
+
+
+def _finish(db: Session, event_pk: int, **values: Any) -> None:
+    db.execute(update(StripeEvent).where(StripeEvent.id == event_pk).values(**values))  # type: ignore[arg-type, union-attr]
+
+
+# ---------------------------------------------------------------------------
+# Worker pool
+# ---------------------------------------------------------------------------
+
+class StripeEventProcessor:
+    """Applies inbox events on background threads, serialized per customer.
+
+    Customers are sharded onto workers by a stable hash, so one customer's events never
+    run concurrently in this process; `claim_next` extends that across processes. A
+    sweeper re-submits customers whose events are due (retries, missed notifications,
+    rows orphaned by a crash).
+    """
+
+    def __init__(
+        self,
+        apply: ApplyFn,
+        *,
+        workers: int = settings.STRIPE_WEBHOOK_WORKERS,
+        session_factory: Optional[Callable[[], Session]] = None,
+        max_attempts: int = settings.STRIPE_WEBHOOK_MAX_ATTEMPTS,
+        sweep_seconds: float = settings.STRIPE_INBOX_SWEEP_SECONDS,
+        stale_seconds: float = settings.STRIPE_INBOX_STALE_SECONDS,
+    ):
+        self.apply = apply
+        self.workers = max(0, workers)
+        self.session_factory = session_factory or _default_session_factory
+        self.max_attempts = max_attempts
+        self.sweep_seconds = sweep_seconds
+        self.stale_seconds = stale_seconds
+        self._queues: List["queue.Queue[Optional[str]]"] = []
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+
+    # -- lifecycle ---------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def start(self) -> None:
+        if self.running or not self.workers or StripeEvent is None:
+            return
+        self._stop.clear()
+        self._queues = [queue.Queue() for _ in range(self.workers)]
+        for n, shard in enumerate(self._queues):
+            self._threads.append(threading.Thread(target=self._work, args=(shard,), name=f"stripe-inbox-{n}", daemon=True))
+        self._threads.append(threading.Thread(target=self._sweep_loop, name="stripe-inbox-sweeper", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        for shard in self._queues:
+            shard.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._queues = []
+
+    def submit(self, customer_id: str) -> None:
+        """Ask the customer's worker to drain its pending events (no-op when stopped;
+        the next sweep or `process_pending` call picks them up)."""
+        if self._queues:
+            self._queues[zlib.crc32(customer_id.encode("utf-8")) % len(self._queues)].put(customer_id)
+
+    def _work(self, shard: "queue.Queue[Optional[str]]") -> None:
+        while True:
+            customer_id = shard.get()
+            if customer_id is None:
+                return
+            try:
+                self.drain(customer_id)
+            except Exception:  # pragma: no cover - keep the worker alive
+                logger.exception("stripe inbox: draining customer %s failed", customer_id)
+
+    def _sweep_loop(self) -> None:
+        while not self._stop.wait(self.sweep_seconds):
+            try:
+                for customer_id in self.sweep():
+                    self.submit(customer_id)
+            except Exception:  # pragma: no cover
+                logger.exception("stripe inbox: sweep failed")
+
+    # -- processing --------------------------------------------------------
+
+    def drain(self, customer_id: str) -> int:
+        """Apply the customer's due events in order; returns how many were attempted."""
+        db = self.session_factory()
+        count = 0
+        try:
+            while True:
+                row = claim_next(db, customer_id)
+                if row is None:
+                    return count
+                count += 1
+                self._run(db, row)
+        finally:
+            db.close()
+
+    def _run(self, db: Session, row: Any) -> None:
+        event_pk, event_type, payload, attempts = row
+        try:
+            outcome = self.apply(db, event_type, json.loads(payload))
+            _finish(db, event_pk, status=outcome, processed_at=datetime.utcnow(), last_error=None)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            failed = attempts >= self.max_attempts
+            backoff = min(2 ** attempts, MAX_BACKOFF_SECONDS)
+            _finish(
+                db,
+                event_pk,
+                status="failed" if failed else "pending",
+                last_error=str(e)[:500],
+                available_at=datetime.utcnow() + timedelta(seconds=backoff),
+            )
+            db.commit()
+            log = logger.error if failed else logger.warning
+            log("stripe inbox: %s (attempt %d) failed: %s", event_type, attempts, e)
+
+    def sweep(self) -> List[str]:
+        """Release orphaned claims and return customers with due pending events."""
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            db.execute(
+                update(StripeEvent)  # type: ignore[arg-type]
+                .where(
+                    StripeEvent.status == "processing",  # type: ignore[union-attr]
+                    StripeEvent.claimed_at < now - timedelta(seconds=self.stale_seconds),  # type: ignore[union-attr]
+                )
+                .values(status="pending")
+            )
+            db.commit()
+            rows = db.execute(
+                select(StripeEvent.customer_id)  # type: ignore[union-attr]
+                .where(StripeEvent.status == "pending", StripeEvent.available_at <= now)  # type: ignore[union-attr]
+                .distinct()
+            ).all()
+            return [customer_id for (customer_id,) in rows]
+        finally:
+            db.close()
+
+    def process_pending(self) -> int:
+        """Synchronously drain everything that is due (tests, scripts, workers=0)."""
+        return sum(self.drain(customer_id) for customer_id in self.sweep())
+
+
+__all__ = ["store_event", "claim_next", "StripeEventProcessor"]
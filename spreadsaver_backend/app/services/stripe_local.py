@@ -0,0 +1,255 @@
+# /backend/app/services/stripe_local.py
+# SpreadSaver – Local Stripe stand-in
+# Builds Stripe-shaped webhook events and signs them with Stripe's scheme
+# (Stripe-Signature: t=<ts>,v1=HMAC-SHA256(secret, "<ts>.<payload>")), so the real
+# verification and inbox path run in tests and local dev without a network.
+# FakeStripeServer serves the handful of API endpoints we call, over real HTTP, with
+# injectable latency and failures for tests and benchmarks.
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+import stripe
+
+
+def _id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+
+def make_event(event_type: str, obj: Dict[str, Any], *, event_id: Optional[str] = None, created: Optional[int] = None) -> Dict[str, Any]:
+    return {
+        "id": event_id or _id("evt"),
+        "object": "event",
+        "type": event_type,
+        "created": created or int(time.time()),
+        "livemode": False,
+        "data": {"object": obj},
+    }
+
+
+def checkout_completed(
+    *,
+    user_id: Any,
+    tier: str,
+    interval: str = "monthly",
+    customer_id: Optional[str] = None,
+    subscription_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """`checkout.session.completed` as produced by stripe_service.create_checkout_session."""
+    return make_event(
+        "checkout.session.completed",
+        {
+            "id": _id("cs"),
+            "object": "checkout.session",
+            "mode": "subscription",
+            "customer": customer_id or _id("cus"),
+            "subscription": subscription_id or _id("sub"),
+            "metadata": {"user_id": str(user_id), "tier": tier, "interval": interval},
+        },
+    )
+
+
+def subscription_event(
+    event_type: str,
+    *,
+    customer_id: str,
+    price_id: Optional[str],
+    status: str = "active",
+    subscription_id: Optional[str] = None,
+    current_period_end: Optional[int] = None,
+) -> Dict[str, Any]:
+    """`customer.subscription.created|updated|deleted` with a single price item."""
+    return make_event(
+        event_type,
+        {
+            "id": subscription_id or _id("sub"),
+            "object": "subscription",
+            "customer": customer_id,
+            "status": status,
+            "current_period_end": current_period_end or int(time.time()) + 30 * 86400,
+            "items": {"object": "list", "data": [{"price": {"id": price_id}}]},
+        },
+    )
+
+
+def sign(payload: bytes, secret: str, *, timestamp: Optional[int] = None) -> str:
+    """Stripe-Signature header value for `payload`."""
+    ts = timestamp or int(time.time())
+    digest = hmac.new(secret.encode("utf-8"), f"{ts}.".encode("utf-8") + payload, hashlib.sha256).hexdigest()
+    return f"t={ts},v1={digest}"
+
+
+def signed(event: Dict[str, Any], secret: str) -> Tuple[bytes, str]:
+    """(raw body, Stripe-Signature header) ready to POST at the webhook."""
+    payload = json.dumps(event, separators=(",", ":")).encode("utf-8")
+    return payload, sign(payload, secret)
+
+
+# ---------------------------------------------------------------------------
+# Fake API server
+# ---------------------------------------------------------------------------
+
+def _nested(form: Dict[str, str], prefix: str) -> Dict[str, str]:
+    """metadata[user_id]=… style form fields → {"user_id": …}."""
+    start = prefix + "["
+    return {k[len(start):-1]: v for k, v in form.items() if k.startswith(start) and k.endswith("]")}
+
+
+class FakeStripeServer:
+    """Serves /v1/prices/{id}, /v1/checkout/sessions and /v1/subscriptions on 127.0.0.1.
+
+    Use as a context manager: it points stripe-python's api_base at itself on enter and
+    restores it on exit. `latency` delays every response; `fail_next(n)` makes the next
+    n requests return a 5xx so retries and the circuit breaker can be exercised.
+    """
+
+    def __init__(self, *, latency: float = 0.0):
+        self.latency = latency
+        self.prices: Dict[str, Dict[str, Any]] = {}
+        self.subscriptions: List[Dict[str, Any]] = []
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.requests = 0
+        self._idempotent: Dict[str, Dict[str, Any]] = {}
+        self._failures = 0
+        self._failure_status = 500
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._saved: Tuple[Any, Any] = (None, None)
+
+    # -- fixtures ----------------------------------------------------------
+
+    def add_price(self, price_id: str, *, active: bool = True, product: Optional[str] = None) -> None:
+        self.prices[price_id] = {"id": price_id, "object": "price", "active": active, "product": product or _id("prod")}
+
+    def add_subscription(self, obj: Dict[str, Any]) -> None:
+        """Register a subscription object (e.g. subscription_event(...)["data"]["object"])."""
+        self.subscriptions.append(obj)
+
+    def fail_next(self, count: int = 1, *, status: int = 500) -> None:
+        with self._lock:
+            self._failures = count
+            self._failure_status = status
+
+    # -- lifecycle ---------------------------------------------------------
+
+    @property
+    def url(self) -> str:
+        assert self._httpd is not None, "server not started"
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeStripeServer":
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-stripe", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "FakeStripeServer":
+        self.start()
+        self._saved = (stripe.api_base, stripe.api_key)
+        stripe.api_base = self.url
+        stripe.api_key = stripe.api_key or "sk_test_local"
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        stripe.api_base, stripe.api_key = self._saved
+        self.stop()
+
+    # -- request handling --------------------------------------------------
+
+    def _respond(self, method: str, path: str, query: Dict[str, str], form: Dict[str, str], headers) -> Tuple[int, Dict[str, Any]]:
+        with self._lock:
+            self.requests += 1
+            if self._failures > 0:
+                self._failures -= 1
+                return self._failure_status, {"error": {"type": "api_error", "message": "Injected failure"}}
+
+        if method == "GET" and path.startswith("/v1/prices/"):
+            price = self.prices.get(path.rsplit("/", 1)[-1])
+            if price is None:
+                return 404, {"error": {"type": "invalid_request_error", "code": "resource_missing", "message": "No such price", "param": "id"}}
+            return 200, price
+
+        if method == "POST" and path == "/v1/checkout/sessions":
+            key = headers.get("Idempotency-Key")
+            with self._lock:
+                if key and key in self._idempotent:
+                    return 200, self._idempotent[key]
+            session_id = _id("cs")
+            session = {
+                "id": session_id,
+                "object": "checkout.session",
+                "mode": form.get("mode"),
+                "url": f"{self.url}/pay/{session_id}",
+                "metadata": _nested(form, "metadata"),
+                "line_items_price": form.get("line_items[0][price]"),
+            }
+            with self._lock:
+                self.sessions[session_id] = session
+                if key:
+                    self._idempotent[key] = session
+            return 200, session
+
+        if method == "GET" and path == "/v1/subscriptions":
+            limit = int(query.get("limit", 10))
+            after = query.get("starting_after")
+            subs = self.subscriptions
+            if after:
+                ids = [s["id"] for s in subs]
+                subs = subs[ids.index(after) + 1:] if after in ids else []
+            page = subs[:limit]
+            return 200, {"object": "list", "url": "/v1/subscriptions", "data": page, "has_more": len(subs) > limit}
+
+        return 404, {"error": {"type": "invalid_request_error", "message": f"Unrecognized request URL ({method}: {path})"}}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _serve(self, method: str) -> None:
+                parsed = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode("utf-8") if length else ""
+                if server.latency:
+                    time.sleep(server.latency)
+                status, payload = server._respond(
+                    method, parsed.path, dict(parse_qsl(parsed.query)), dict(parse_qsl(body)), self.headers
+                )
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Request-Id", _id("req"))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:  # noqa: N802
+                self._serve("GET")
+
+            def do_POST(self) -> None:  # noqa: N802
+                self._serve("POST")
+
+            def log_message(self, *args: Any) -> None:  # keep test output quiet
+                pass
+
+        return Handler
+
+
+__all__ = ["make_event", "checkout_completed", "subscription_event", "sign", "signed", "FakeStripeServer"]
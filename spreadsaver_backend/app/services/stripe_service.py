@@ -1,8 +1,19 @@
+import json
 import logging
-import stripe
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
 from app.config.settings import settings
+from app.services import stripe_inbox, subscription_service
+from app.services.stripe_client import StripeClient, sdk
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+# Optional model imports (tolerate missing during early scaffolding)
+try:  # pragma: no cover
+    from app.models.models import User  # type: ignore
+except Exception:  # pragma: no cover
+    User = None  # type: ignore
 
 # Map (tier, interval) -> price id. "free" has no interval.
 PRICE_LOOKUP = {
@@ -62,7 +73,7 @@ def create_checkout_session(user_id: str, tier_with_interval: str):
     price_id = _resolve_price_id(tier, interval)
 
     try:
-        session = stripe.checkout.Session.create(
+        session = sdk().checkout.Session.create(
             mode="subscription",
             payment_method_types=["card"],
             line_items=[{"price": price_id, "quantity": 1}],
@@ -74,3 +85,201 @@ def create_checkout_session(user_id: str, tier_with_interval: str):
     except Exception as e:
         logging.error(f"Stripe session creation failed: {e}")
         raise
+
+
+# ---------------------------------------------------------------------------
+# Non-blocking API access (use these from async routes)
+# ---------------------------------------------------------------------------
+
+client = StripeClient()
+
+
+async def create_checkout_session_async(
+    user_id: Any,
+    tier_with_interval: Optional[str] = None,
+    *,
+    price_id: Optional[str] = None,
+    mode: str = "subscription",
+    success_url: Optional[str] = None,
+    cancel_url: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+):
+    """create_checkout_session without blocking the event loop.
+
+    Takes a tier ('pro:monthly') or an explicit price id. The price is checked against
+    the cached lookup first; the create call carries an idempotency key so timeouts and
+    connection errors can be retried without creating duplicate sessions.
+
+    The metadata tier always reflects the price: a caller-supplied "tier" is dropped,
+    and tier prices can only be bought as subscriptions.
+    """
+    if price_id is None:
+        tier, interval = _parse_tier_interval(tier_with_interval or "")
+        if tier == "free":
+            raise ValueError("Free tier does not require Stripe Checkout.")
+        price_id = _resolve_price_id(tier, interval)
+        meta = {"user_id": str(user_id), "tier": tier, "interval": interval or ""}
+    else:
+        tier = _tier_for_price(price_id)
+        meta = {k: v for k, v in (metadata or {}).items() if k != "tier"}
+        meta["user_id"] = str(user_id)
+        if tier:
+            meta["tier"] = tier
+    if tier and mode != "subscription":
+        raise ValueError(f"Price '{price_id}' is a subscription tier; use mode 'subscription'.")
+
+    price = await client.get_price(price_id)
+    if not price["active"]:
+        raise ValueError(f"Price '{price_id}' is not available.")
+
+    try:
+        return await client.call(
+            sdk().checkout.Session.create,
+            idempotent=True,
+            idempotency_key=uuid.uuid4().hex,
+            mode=mode,
+            payment_method_types=["card"],
+            line_items=[{"price": price_id, "quantity": 1}],
+            success_url=success_url or SUCCESS_URL,
+            cancel_url=cancel_url or CANCEL_URL,
+            metadata=meta,
+        )
+    except Exception as e:
+        logging.error(f"Stripe session creation failed: {e}")
+        raise
+
+
+async def validate_price_lookup() -> Dict[Tuple[str, Optional[str]], bool]:
+    """Which configured PRICE_LOOKUP entries are live in Stripe (each price cached)."""
+    usable = await client.validate_prices(PRICE_LOOKUP.values())
+    return {key: usable.get(price_id, False) for key, price_id in PRICE_LOOKUP.items() if price_id}
+
+
+# ---------------------------------------------------------------------------
+# Webhooks: verify → inbox → background apply
+# ---------------------------------------------------------------------------
+
+PAID_TIERS = tuple(subscription_service.PAID_TIER_RANK)
+SUBSCRIPTION_EVENTS = (
+    "customer.subscription.created",
+    "customer.subscription.updated",
+    "customer.subscription.deleted",
+)
+
+
+def _ordering_key(event) -> str:
+    """Events are applied in arrival order per key: the customer, else the user, else itself."""
+    obj = event["data"]["object"]
+    customer = obj.get("customer")
+    if customer:
+        return str(customer)
+    user_id = (obj.get("metadata") or {}).get("user_id")
+    return f"user:{user_id}" if user_id else f"event:{event['id']}"
+
+
+def _tier_for_price(price_id: Optional[str]) -> Optional[str]:
+    for (tier, _interval), configured in PRICE_LOOKUP.items():
+        if configured and configured == price_id:
+            return tier
+    return None
+
+
+def _checkout_price_id(session: Dict[str, Any]) -> Optional[str]:
+    items = (session.get("line_items") or {}).get("data") or []
+    return ((items[0].get("price") or {}).get("id")) if items else None
+
+
+def _find_user(db: Session, *, user_id: Any = None, customer_id: Optional[str] = None):
+    if customer_id:
+        user = db.query(User).filter(User.stripe_customer_id == customer_id).first()
+        if user is not None:
+            return user
+    if user_id:
+        try:
+            user_id = uuid.UUID(str(user_id))
+        except ValueError:
+            return None
+        return db.query(User).filter(User.id == user_id).first()
+    return None
+
+
+def apply_event(db: Session, event_type: str, event: Dict[str, Any]) -> str:
+    """Apply one stored event to the subscription mirror and the user's tier (no commit).
+    Re-applying is harmless and out-of-date subscription snapshots are ignored, which is
+    what makes retries and redelivered events safe. Returns the inbox status."""
+    obj = event["data"]["object"]
+    metadata = obj.get("metadata") or {}
+
+    if event_type == "checkout.session.completed":
+        user = _find_user(db, user_id=metadata.get("user_id"), customer_id=obj.get("customer"))
+        if user is None:
+            return "ignored"
+        if obj.get("customer"):
+            user.stripe_customer_id = obj["customer"]
+        subscription_id = obj.get("subscription")
+        if not subscription_id:
+            return "done"  # one-off payment: never grants a (recurring) tier
+        # The tier comes from the purchased price, never from session metadata (which the
+        # client can influence). Line items are only present when the payload expands them.
+        price_id = _checkout_price_id(obj)
+        tier = _tier_for_price(price_id)
+        if tier in PAID_TIERS:
+            # Provisional row (oldest possible stamp): the subscription's own events win
+            subscription_service.record_subscription(
+                db,
+                {
+                    "id": subscription_id,
+                    "customer": obj.get("customer"),
+                    "status": "active",
+                    "items": {"data": [{"price": {"id": price_id}}]},
+                },
+                tier=tier,
+                user_id=user.id,
+                stripe_updated=0,
+            )
+        else:
+            # Tier unknown here: claim the mirror row if customer.subscription.* got here
+            # first; otherwise those events set the tier once they arrive
+            subscription_service.link_subscription(db, subscription_id, user_id=user.id)
+        db.flush()
+        subscription_service.sync_user_tier(db, user)
+        return "done"
+
+    if event_type in SUBSCRIPTION_EVENTS:
+        user = _find_user(db, user_id=metadata.get("user_id"), customer_id=obj.get("customer"))
+        if event_type == "customer.subscription.deleted":
+            obj = {**obj, "status": "canceled"}
+        subscription_service.record_subscription(
+            db,
+            obj,
+            tier=_tier_for_price(subscription_service._price_id(obj)),
+            user_id=user.id if user is not None else None,
+            stripe_updated=event.get("created") or 0,
+        )
+        if user is None:
+            return "ignored"  # mirrored; reconciliation links it once the customer is known
+        db.flush()
+        subscription_service.sync_user_tier(db, user)
+        return "done"
+
+    return "ignored"
+
+
+processor = stripe_inbox.StripeEventProcessor(apply_event)
+
+
+def handle_webhook(*, payload: bytes, signature: Optional[str], db: Session) -> Dict[str, Any]:
+    """Verify a webhook, store it in the inbox (once per event id) and hand it to the
+    worker pool. Nothing is applied inline, so Stripe gets its 2xx in milliseconds."""
+    if not settings.STRIPE_WEBHOOK_SECRET:
+        raise ValueError("STRIPE_WEBHOOK_SECRET is not configured")
+    sdk().Webhook.construct_event(payload, signature, settings.STRIPE_WEBHOOK_SECRET)  # verify only
+    raw = payload.decode("utf-8") if isinstance(payload, bytes) else payload
+    event = json.loads(raw)  # plain dicts: what the workers will see too
+    key = _ordering_key(event)
+    stored = stripe_inbox.store_event(
+        db, event_id=event["id"], event_type=event["type"], customer_id=key, payload=raw
+    )
+    if stored:
+        processor.submit(key)
+    return {"event_id": event["id"], "duplicate": not stored}
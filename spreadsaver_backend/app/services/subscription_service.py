@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, func, update
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.services import cache_service
+from app.services.cache_service import SCOPE_SUBSCRIPTION
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Optional model imports (tolerate missing during early scaffolding)
+try:  # pragma: no cover
+    from app.models.models import Subscription, User  # type: ignore
+except Exception:  # pragma: no cover
+    Subscription = None  # type: ignore
+    User = None  # type: ignore
+
+# Paid tiers, ranked (mirrors TIER_PRIORITY in routes/tier_logic.py)
+PAID_TIER_RANK = {
+    "plus": 2,
+    "pro": 3,
+    "elite": 4,
+}
+# Subscription statuses that keep paid access (past_due: Stripe is still retrying the card)
+ACTIVE_STATUSES = ("active", "trialing", "past_due")
+
+# (user_id, subscription version) → {"mirrored", "tier", "expires_at"}
+_states = LRUCache(max_entries=settings.CACHE_MAX_ENTRIES, name="subscription_state")
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _ts(value: Any) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(int(value)) if value else None
+
+
+def _price_id(obj: Dict[str, Any]) -> Optional[str]:
+    items = (obj.get("items") or {}).get("data") or []
+    return ((items[0].get("price") or {}).get("id")) if items else None
+
+
+def _row(obj: Dict[str, Any], *, tier: Optional[str], user_id: Any, stripe_updated: int) -> Dict[str, Any]:
+    return {
+        "id": obj["id"],
+        "user_id": user_id,
+        "customer_id": obj.get("customer"),
+        "status": obj.get("status") or "active",
+        "price_id": _price_id(obj),
+        "tier": tier,
+        "current_period_end": _ts(obj.get("current_period_end")),
+        "stripe_updated": int(stripe_updated or 0),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def _upsert(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """One multi-row UPSERT; a row only overwrites data that is not newer on Stripe's clock."""
+    if not rows:
+        return
+    from app.services.group_service import _dialect_insert  # shared ON CONFLICT helper
+
+    insert = _dialect_insert(db)
+    if insert is None:  # pragma: no cover - dialects without ON CONFLICT
+        for values in rows:
+            current = db.get(Subscription, values["id"])
+            if current is None or (current.stripe_updated or 0) <= values["stripe_updated"]:
+                db.merge(Subscription(**values))  # type: ignore[misc]
+        return
+    stmt = insert(Subscription).values(rows)
+    columns = ("customer_id", "status", "price_id", "tier", "current_period_end", "stripe_updated", "updated_at")
+    set_ = {c: getattr(stmt.excluded, c) for c in columns}
+    # Keep a known owner if this write doesn't know it (e.g. customer not linked yet)
+    set_["user_id"] = func.coalesce(stmt.excluded.user_id, Subscription.user_id)  # type: ignore[union-attr]
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Subscription.id],  # type: ignore[union-attr]
+            set_=set_,
+            where=Subscription.stripe_updated <= stmt.excluded.stripe_updated,  # type: ignore[union-attr]
+        )
+    )
+
+
+def _derive(rows: Iterable[Tuple[str, Optional[str], Optional[datetime]]]) -> Tuple[Optional[str], Optional[datetime]]:
+    """Best tier among active subscriptions, and when that access runs out."""
+    best, expires = None, None
+    for status, tier, period_end in rows:
+        if status not in ACTIVE_STATUSES or tier not in PAID_TIER_RANK:
+            continue
+        if best is None or PAID_TIER_RANK[tier] > PAID_TIER_RANK[best]:
+            best, expires = tier, period_end
+    return best, expires
+
+
+def _invalidate_after_commit(db: Session, user_ids: Iterable[Any]) -> None:
+    """Bump cached state once the transaction is visible (bumping earlier would let a
+    reader re-cache the old rows under the new version)."""
+    ids = [u for u in set(user_ids) if u is not None]
+    if ids:
+        event.listen(db, "after_commit", lambda _session: cache_service.invalidate_subscription(*ids), once=True)
+
+
+def _tiers_for(db: Session, user_ids: List[Any]) -> Dict[Any, Tuple[Optional[str], Optional[datetime]]]:
+    rows: Dict[Any, list] = {u: [] for u in user_ids}
+    for user_id, status, tier, period_end in (
+        db.query(Subscription.user_id, Subscription.status, Subscription.tier, Subscription.current_period_end)  # type: ignore[union-attr]
+        .filter(Subscription.user_id.in_(user_ids))  # type: ignore[union-attr]
+    ):
+        rows[user_id].append((status, tier, period_end))
+    return {u: _derive(r) for u, r in rows.items() if r}
+
+
+# ---------------------------------------------------------------------------
+# Webhook path (called inside the inbox worker's transaction; no commit here)
+# ---------------------------------------------------------------------------
+
+def record_subscription(
+    db: Session,
+    obj: Dict[str, Any],
+    *,
+    tier: Optional[str],
+    user_id: Any = None,
+    stripe_updated: int = 0,
+) -> None:
+    """Mirror one Stripe subscription object (stale versions are ignored)."""
+    if Subscription is None:  # type: ignore
+        return
+    _upsert(db, [_row(obj, tier=tier, user_id=user_id, stripe_updated=stripe_updated)])
+    _invalidate_after_commit(db, [user_id])
+
+
+def link_subscription(db: Session, subscription_id: str, *, user_id: Any) -> None:
+    """Attach a mirrored subscription that has no owner yet (it was mirrored before the
+    customer was linked to a user)."""
+    if Subscription is None:  # type: ignore
+        return
+    db.execute(
+        update(Subscription)  # type: ignore[arg-type]
+        .where(Subscription.id == subscription_id, Subscription.user_id.is_(None))  # type: ignore[union-attr]
+        .values(user_id=user_id)
+    )
+    _invalidate_after_commit(db, [user_id])
+
+
+def sync_user_tier(db: Session, user) -> str:
+    """Set User.subscription_tier from the user's mirrored subscriptions and return it.
+    Admins and users without any mirrored subscription are left alone."""
+    if Subscription is None or user.subscription_tier == "admin":  # type: ignore
+        return user.subscription_tier
+    derived = _tiers_for(db, [user.id]).get(user.id)
+    if derived is not None:
+        user.subscription_tier = derived[0] or "free"
+        _invalidate_after_commit(db, [user.id])
+    return user.subscription_tier
+
+
+# ---------------------------------------------------------------------------
+# Request path (no network)
+# ---------------------------------------------------------------------------
+
+def _state(db: Session, user_id: Any) -> Dict[str, Any]:
+    key = (user_id, cache_service.data_version(user_id, SCOPE_SUBSCRIPTION))
+    cached = _states.get(key)
+    if cached is not None:
+        return cached  # type: ignore[return-value]
+    derived = _tiers_for(db, [user_id]).get(user_id)
+    state = {
+        "mirrored": derived is not None,
+        "tier": derived[0] if derived else None,
+        "expires_at": derived[1] if derived else None,
+    }
+    _states.set(key, state)
+    return state
+
+
+def effective_tier(db: Session, user) -> str:
+    """Tier to gate on: the stored tier, downgraded to free if the mirrored paid
+    subscription lapsed (period end + grace) without a renewal reaching us."""
+    tier = getattr(user, "subscription_tier", None) or "free"
+    if tier not in PAID_TIER_RANK or Subscription is None:  # type: ignore
+        return tier  # free, admin
+    state = _state(db, user.id)
+    if not state["mirrored"]:
+        return tier  # paid tier granted outside Stripe
+    expires_at = state["expires_at"]
+    grace = timedelta(seconds=settings.SUBSCRIPTION_GRACE_SECONDS)
+    if state["tier"] is None or (expires_at is not None and datetime.utcnow() > expires_at + grace):
+        return "free"
+    return state["tier"]
+
+
+# ---------------------------------------------------------------------------
+# Reconciliation (Stripe → mirror → users.subscription_tier)
+# ---------------------------------------------------------------------------
+
+def _apply_page(db: Session, subs: List[Dict[str, Any]], stamp: int, tier_for_price: Callable[[Optional[str]], Optional[str]]) -> Tuple[int, int]:
+    """Upsert one page and fix its users' tiers with a few set-based statements.
+    Returns (subscriptions that drifted, users whose tier was corrected)."""
+    customers = {s.get("customer") for s in subs if s.get("customer")}
+    owners = dict(
+        db.query(User.stripe_customer_id, User.id).filter(User.stripe_customer_id.in_(customers))  # type: ignore[union-attr]
+    ) if customers else {}
+    existing = {
+        sid: (status, tier, period_end)
+        for sid, status, tier, period_end in db.query(
+            Subscription.id, Subscription.status, Subscription.tier, Subscription.current_period_end  # type: ignore[union-attr]
+        ).filter(Subscription.id.in_([s["id"] for s in subs]))  # type: ignore[union-attr]
+    }
+
+    rows = [
+        _row(s, tier=tier_for_price(_price_id(s)), user_id=owners.get(s.get("customer")), stripe_updated=stamp)
+        for s in subs
+    ]
+    drifted = sum(
+        1 for r in rows if existing.get(r["id"]) != (r["status"], r["tier"], r["current_period_end"])
+    )
+    _upsert(db, rows)
+
+    user_ids = [u for u in {r["user_id"] for r in rows} if u is not None]
+    fixed = 0
+    if user_ids:
+        wanted = {u: (t or "free") for u, (t, _) in _tiers_for(db, user_ids).items()}
+        current = dict(db.query(User.id, User.subscription_tier).filter(User.id.in_(user_ids)))  # type: ignore[union-attr]
+        by_tier: Dict[str, List[Any]] = {}
+        for user_id, tier in wanted.items():
+            if current.get(user_id) not in (tier, "admin"):
+                by_tier.setdefault(tier, []).append(user_id)
+        for tier, ids in by_tier.items():
+            db.execute(update(User).where(User.id.in_(ids)).values(subscription_tier=tier))  # type: ignore[arg-type, union-attr]
+            fixed += len(ids)
+    db.commit()
+    cache_service.invalidate_subscription(*user_ids)
+    return drifted, fixed
+
+
+async def reconcile(
+    session_factory: Optional[Callable[[], Session]] = None,
+    *,
+    page_size: int = settings.SUBSCRIPTION_RECONCILE_PAGE_SIZE,
+) -> Dict[str, int]:
+    """Page through every Stripe subscription and repair the mirror and user tiers.
+
+    Pages are fetched through the non-blocking Stripe client and applied in a worker
+    thread, one set-based batch per page.
+    """
+    from app.services import stripe_service
+    from app.services.stripe_client import sdk
+    from app.services.stripe_inbox import _default_session_factory
+
+    factory = session_factory or _default_session_factory
+    stats = {"pages": 0, "subscriptions": 0, "drifted": 0, "users_fixed": 0}
+    cursor: Optional[str] = None
+    while True:
+        params: Dict[str, Any] = {"limit": page_size, "status": "all"}
+        if cursor:
+            params["starting_after"] = cursor
+        stamp = int(time.time())
+        page = await stripe_service.client.call(sdk().Subscription.list, idempotent=True, **params)
+        subs = [s.to_dict() if hasattr(s, "to_dict") else dict(s) for s in page["data"]]
+        if subs:
+            def apply() -> Tuple[int, int]:
+                db = factory()
+                try:
+                    return _apply_page(db, subs, stamp, stripe_service._tier_for_price)
+                finally:
+                    db.close()
+
+            drifted, fixed = await asyncio.to_thread(apply)
+            stats["drifted"] += drifted
+            stats["users_fixed"] += fixed
+        stats["pages"] += 1
+        stats["subscriptions"] += len(subs)
+        if not page["has_more"] or not subs:
+            return stats
+        cursor = subs[-1]["id"]
+
+
+async def run_reconciler(interval: float = settings.SUBSCRIPTION_RECONCILE_SECONDS) -> None:
+    """Background loop for the app lifespan: reconcile every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            stats = await reconcile()
+            log = logger.warning if stats["drifted"] or stats["users_fixed"] else logger.info
+            log("subscription reconcile: %s", stats)
+        except Exception:  # pragma: no cover - keep the loop alive
+            logger.exception("subscription reconcile failed")
+
+
+def reset() -> None:
+    _states.clear()
+
+
+__all__ = [
+    "PAID_TIER_RANK",
+    "ACTIVE_STATUSES",
+    "record_subscription",
+    "link_subscription",
+    "sync_user_tier",
+    "effective_tier",
+    "reconcile",
+    "run_reconciler",
+    "reset",
+]
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+# Optional model imports (tolerate missing during early scaffolding)
+try:  # pragma: no cover
+    from app.models.models import (  # type: ignore
+        BudgetRule,
+        Category,
+        Purchase,
+        SyncTombstone,
+        User,
+        UserBadge,
+    )
+except Exception:  # pragma: no cover
+    BudgetRule = Category = Purchase = SyncTombstone = User = UserBadge = None  # type: ignore
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _ensure_models_available() -> bool:
+    return all(m is not None for m in (User, Purchase, Category, BudgetRule, UserBadge, SyncTombstone))
+
+
+def _purchase_payload(r: Any) -> Dict[str, Any]:
+    return {
+        "id": r.id,
+        "amount": float(r.amount or 0.0),
+        "category_id": r.category_id,
+        "occurred_at": getattr(r, "occurred_at", None),
+        "note": getattr(r, "note", None),
+    }
+
+
+def _category_payload(r: Any) -> Dict[str, Any]:
+    return {"id": r.id, "name": r.name, "color": getattr(r, "color", None)}
+
+
+def _rule_payload(r: Any) -> Dict[str, Any]:
+    return {
+        "id": r.id,
+        "label": r.label,
+        "essential_pct": float(r.essential_pct or 0.0),
+        "discretionary_pct": float(r.discretionary_pct or 0.0),
+        "savings_pct": float(r.savings_pct or 0.0),
+    }
+
+
+def _badge_payload(r: Any) -> Dict[str, Any]:
+    return {"id": r.id, "badge_id": r.badge_id, "unlocked_at": getattr(r, "unlocked_at", None)}
+
+
+def _synced_entities() -> List[Tuple[str, Any, Callable[[Any], Dict[str, Any]]]]:
+    return [
+        ("purchases", Purchase, _purchase_payload),
+        ("categories", Category, _category_payload),
+        ("rules", BudgetRule, _rule_payload),
+        ("badges", UserBadge, _badge_payload),
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Write-side API (call inside the writer's transaction, before commit)
+# ---------------------------------------------------------------------------
+
+def next_change_seq(db: Session, *, user_id: Any) -> int:
+    """Atomically advance the user's change cursor and return the new value.
+
+    The UPDATE row-locks the user until the caller commits, so concurrent writers for
+    the same user are serialized and sequence numbers become visible in order — a
+    client can never skip a lower sequence that commits later.
+    """
+    if not _ensure_models_available():
+        return 0
+    return db.execute(
+        update(User)  # type: ignore[arg-type]
+        .where(User.id == user_id)  # type: ignore[attr-defined]
+        .values(change_seq=User.change_seq + 1)  # type: ignore[attr-defined]
+        .returning(User.change_seq)  # type: ignore[attr-defined]
+    ).scalar_one()
+
+
+def next_change_seqs(db: Session, *, user_id: Any, count: int) -> range:
+    """Advance the user's change cursor by `count` in one statement and return the new
+    sequence numbers, oldest first. For batch writes: every row gets its own sequence,
+    so a sync page cut at `limit` never splits rows that share one."""
+    if count <= 0 or not _ensure_models_available():
+        return range(0)
+    last = db.execute(
+        update(User)  # type: ignore[arg-type]
+        .where(User.id == user_id)  # type: ignore[attr-defined]
+        .values(change_seq=User.change_seq + count)  # type: ignore[attr-defined]
+        .returning(User.change_seq)  # type: ignore[attr-defined]
+    ).scalar_one()
+    return range(last - count + 1, last + 1)
+
+
+def stamp(db: Session, *, user_id: Any, row: Any) -> None:
+    """Mark `row` as changed at the user's next sequence number."""
+    if not _ensure_models_available():
+        return
+    row.change_seq = next_change_seq(db, user_id=user_id)
+
+
+def record_delete(db: Session, *, user_id: Any, entity: str, entity_id: Any) -> None:
+    """Write a tombstone for a deleted entity ("purchase", "category", "rule", "badge")."""
+    if not _ensure_models_available():
+        return
+    db.add(
+        SyncTombstone(  # type: ignore[call-arg]
+            user_id=user_id,
+            entity=entity,
+            entity_id=str(entity_id),
+            change_seq=next_change_seq(db, user_id=user_id),
+        )
+    )
+
+
+# ---------------------------------------------------------------------------
+# Read-side API
+# ---------------------------------------------------------------------------
+
+def changes_since(db: Session, *, user_id: Any, cursor: int = 0, limit: int = DEFAULT_LIMIT) -> Dict[str, Any]:
+    """Return everything that changed for `user_id` after `cursor`, oldest first.
+
+    Each table is read via its (user_id, change_seq) index with `limit` rows at most;
+    the merged batch is cut at `limit` and the returned cursor is the last sequence
+    included, so paging through a long backlog never skips or repeats a change.
+    """
+    limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+    result: Dict[str, Any] = {
+        "cursor": cursor,
+        "has_more": False,
+        "purchases": [],
+        "categories": [],
+        "rules": [],
+        "badges": [],
+        "deleted": [],
+    }
+    if not _ensure_models_available():
+        return result
+
+    merged: List[Tuple[int, str, Dict[str, Any]]] = []
+    for key, model, to_payload in _synced_entities():
+        rows = (
+            db.query(model)
+            .filter(model.user_id == user_id, model.change_seq > cursor)
+            .order_by(model.change_seq.asc())
+            .limit(limit + 1)
+            .all()
+        )
+        merged.extend((r.change_seq, key, to_payload(r)) for r in rows)
+
+    tombstones = (
+        db.query(SyncTombstone)  # type: ignore[attr-defined]
+        .filter(SyncTombstone.user_id == user_id, SyncTombstone.change_seq > cursor)  # type: ignore[attr-defined]
+        .order_by(SyncTombstone.change_seq.asc())  # type: ignore[attr-defined]
+        .limit(limit + 1)
+        .all()
+    )
+    merged.extend(
+        (t.change_seq, "deleted", {"entity": t.entity, "id": t.entity_id}) for t in tombstones
+    )
+
+    merged.sort(key=lambda item: item[0])
+    batch = merged[:limit]
+    for _, key, payload in batch:
+        result[key].append(payload)
+    if batch:
+        result["cursor"] = batch[-1][0]
+    result["has_more"] = len(merged) > limit
+    return result
+
+
+def current_cursor(db: Session, *, user_id: Any) -> Optional[int]:
+    """Latest sequence number issued for the user (None if unknown)."""
+    if not _ensure_models_available():
+        return None
+    return db.query(User.change_seq).filter(User.id == user_id).scalar()  # type: ignore[attr-defined]
+
+
+
+# ---------------------------------------------------------------------------
+# Maintenance
+# ---------------------------------------------------------------------------
+
+def backfill_change_seqs(db: Session) -> Dict[str, int]:
+    """Give rows written before change sequences existed (change_seq 0) sequence numbers
+    of their own, so a full sync (cursor 0) includes them. Commits per user and is safe
+    to re-run; returns the number of rows stamped per entity."""
+    stamped = {key: 0 for key, _, _ in _synced_entities()}
+    if not _ensure_models_available():
+        return stamped
+    for key, model, _ in _synced_entities():
+        user_ids = [
+            user_id
+            for (user_id,) in db.query(model.user_id)
+            .filter(model.change_seq == 0, model.user_id.isnot(None))
+            .distinct()
+        ]
+        for user_id in user_ids:
+            ids = [
+                row_id
+                for (row_id,) in db.query(model.id)
+                .filter(model.user_id == user_id, model.change_seq == 0)
+                .order_by(model.id)
+            ]
+            seqs = next_change_seqs(db, user_id=user_id, count=len(ids))
+            db.execute(update(model), [{"id": row_id, "change_seq": seq} for row_id, seq in zip(ids, seqs)])
+            db.commit()
+            stamped[key] += len(ids)
+    return stamped
+
+
+__all__ = [
+    "next_change_seq",
+    "next_change_seqs",
+    "stamp",
+    "record_delete",
+    "changes_since",
+    "current_cursor",
+    "backfill_change_seqs",
+]
@@ -0,0 +1,245 @@
+# /backend/app/utils/broker.py
+# SpreadSaver – Pub/sub brokers for live events
+# `publish` is synchronous and thread-safe (services run in worker threads and on the
+# event loop alike); subscriptions are async iterators of raw message bytes.
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from typing import AsyncIterator, Dict, Optional, Set
+
+try:  # pragma: no cover - optional dependency
+    import redis  # type: ignore
+    import redis.asyncio as redis_async  # type: ignore
+except Exception:  # pragma: no cover
+    redis = None  # type: ignore
+    redis_async = None  # type: ignore
+
+logger = logging.getLogger("spreadsaver.events")
+
+
+class Subscription:
+    """One upstream subscription to a channel."""
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self
+
+    async def __anext__(self) -> bytes:
+        return await self.get()
+
+    async def get(self) -> bytes:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    async def close(self) -> None:  # pragma: no cover - interface
+        raise NotImplementedError
+
+
+class Broker:
+    """Minimal pub/sub interface implemented by the in-memory and Redis brokers."""
+
+    def publish(self, channel: str, data: bytes) -> None:  # pragma: no cover - interface
+        raise NotImplementedError
+
+    async def subscribe(self, channel: str) -> Subscription:  # pragma: no cover - interface
+        raise NotImplementedError
+
+
+# ---------------------------------------------------------------------------
+# In-memory (single process; also the test double)
+# ---------------------------------------------------------------------------
+
+class _LocalSubscription(Subscription):
+    def __init__(self, broker: "LocalBroker", channel: str):
+        self._broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue()
+
+    async def get(self) -> bytes:
+        return await self.queue.get()
+
+    async def close(self) -> None:
+        self._broker._unsubscribe(self)
+
+
+class LocalBroker(Broker):
+    """Delivers to subscribers in this process only."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[str, Set[_LocalSubscription]] = {}
+
+    def publish(self, channel: str, data: bytes) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for sub in subscriptions:
+            try:
+                sub.loop.call_soon_threadsafe(sub.queue.put_nowait, data)
+            except RuntimeError:  # pragma: no cover - subscriber's loop already closed
+                self._unsubscribe(sub)
+
+    async def subscribe(self, channel: str) -> Subscription:
+        sub = _LocalSubscription(self, channel)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(sub)
+        return sub
+
+    def _unsubscribe(self, sub: _LocalSubscription) -> None:
+        with self._lock:
+            subs = self._subscriptions.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscriptions[sub.channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        with self._lock:
+            return len(self._subscriptions.get(channel, ()))
+
+
+# ---------------------------------------------------------------------------
+# Redis (fan-out across workers)
+# ---------------------------------------------------------------------------
+
+class _RedisSubscription(Subscription):
+    def __init__(self, broker: "RedisBroker", channel: str):
+        self._broker = broker
+        self.channel = channel
+        self.queue: "asyncio.Queue[object]" = asyncio.Queue()
+
+    async def get(self) -> bytes:
+        item = await self.queue.get()
+        if isinstance(item, BaseException):
+            raise item  # the shared connection dropped; subscribe again
+        return item  # type: ignore[return-value]
+
+    async def close(self) -> None:
+        await self._broker._unsubscribe(self)
+
+
+class RedisBroker(Broker):
+    """Redis PUBLISH/SUBSCRIBE. Requires the optional `redis` package.
+
+    All subscriptions in a process share one PubSub connection: each channel is
+    subscribed once and a reader task routes messages to per-subscription queues. If
+    that connection drops, every open subscription raises ConnectionError so its
+    owner can resubscribe (on a fresh connection) and account for the gap.
+    """
+
+    def __init__(self, url: str):
+        if redis is None:  # pragma: no cover
+            raise RuntimeError("EVENTS_BROKER=redis requires the 'redis' package")
+        self._url = url
+        self._client = redis.Redis.from_url(url)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._async_client = None
+        self._pubsub = None
+        self._reader: Optional["asyncio.Task[None]"] = None
+        self._subscriptions: Dict[str, Set[_RedisSubscription]] = {}
+
+    def publish(self, channel: str, data: bytes) -> None:
+        # Best effort: callers publish after their write has committed
+        try:
+            self._client.publish(channel, data)
+        except Exception:
+            logger.warning("events: publish to %s failed", channel, exc_info=True)
+
+    async def subscribe(self, channel: str) -> Subscription:
+        self._bind_loop()
+        sub = _RedisSubscription(self, channel)
+        async with self._lock:  # type: ignore[union-attr]
+            if self._pubsub is None:
+                self._pubsub = self._async_client.pubsub()  # type: ignore[union-attr]
+            subs = self._subscriptions.get(channel)
+            if subs is None:
+                await self._pubsub.subscribe(channel)
+                subs = self._subscriptions[channel] = set()
+            subs.add(sub)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+        return sub
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._subscriptions.get(channel, ()))
+
+    def _bind_loop(self) -> None:
+        """Async connections belong to one event loop (one per worker; tests start several)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._async_client = redis_async.from_url(self._url)  # type: ignore[union-attr]
+            self._pubsub = None
+            self._reader = None
+            self._subscriptions = {}
+
+    async def _unsubscribe(self, sub: _RedisSubscription) -> None:
+        async with self._lock:  # type: ignore[union-attr]
+            subs = self._subscriptions.get(sub.channel)
+            if subs is None or sub not in subs:
+                return
+            subs.discard(sub)
+            if subs:
+                return
+            del self._subscriptions[sub.channel]
+            if self._subscriptions:
+                try:
+                    await self._pubsub.unsubscribe(sub.channel)  # type: ignore[union-attr]
+                except Exception:
+                    logger.debug("events: unsubscribe from %s failed", sub.channel, exc_info=True)
+                return
+            await self._disconnect()  # last one out closes the connection
+
+    async def _disconnect(self) -> None:
+        reader, pubsub = self._reader, self._pubsub
+        self._reader = self._pubsub = None
+        if reader is not None and reader is not asyncio.current_task():
+            reader.cancel()
+        if pubsub is not None:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                logger.debug("events: closing the pubsub connection failed", exc_info=True)
+
+    async def _read(self) -> None:
+        pubsub = self._pubsub
+        try:
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)  # type: ignore[union-attr]
+                if message is None or message.get("type") != "message":
+                    continue
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode("utf-8")
+                for sub in list(self._subscriptions.get(channel, ())):
+                    sub.queue.put_nowait(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("events: Redis subscription connection lost", exc_info=True)
+            async with self._lock:  # type: ignore[union-attr]
+                if self._pubsub is not pubsub:
+                    return
+                lost = ConnectionError(f"Redis subscription connection lost: {exc}")
+                for subs in self._subscriptions.values():
+                    for sub in subs:
+                        sub.queue.put_nowait(lost)
+                self._subscriptions = {}
+                await self._disconnect()
+
+
+def build_broker(kind: Optional[str], url: Optional[str] = None) -> Broker:
+    kind = (kind or "local").strip().lower()
+    if kind in ("local", "memory"):
+        return LocalBroker()
+    if kind == "redis":
+        if not url:
+            raise ValueError("EVENTS_BROKER_URL (or CACHE_URL) is required when EVENTS_BROKER=redis")
+        return RedisBroker(url)
+    raise ValueError(f"Unknown events broker '{kind}'")
+
+
+__all__ = ["Broker", "Subscription", "LocalBroker", "RedisBroker", "build_broker"]
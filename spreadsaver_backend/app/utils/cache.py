@@ -0,0 +1,279 @@
+# /backend/app/utils/cache.py
+# SpreadSaver – Cache primitives
+# A bounded in-process LRU (entries + bytes, optional per-entry TTL) and a small
+# backend interface for an optional shared cache (Redis) with an in-memory stand-in.
+
+from __future__ import annotations
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+try:  # pragma: no cover - optional dependency
+    import redis  # type: ignore
+except Exception:  # pragma: no cover
+    redis = None  # type: ignore
+
+
+# ---------------------------------------------------------------------------
+# In-process LRU
+# ---------------------------------------------------------------------------
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and total payload bytes.
+
+    Values are expected to be bytes (serialized payloads) so that size accounting
+    is exact; other values are counted as 1 byte each.
+    """
+
+    _instances: "weakref.WeakSet[LRUCache]" = weakref.WeakSet()
+
+    def __init__(self, *, max_entries: int = 1024, max_bytes: Optional[int] = None, name: str = "cache"):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be > 0")
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, Tuple[object, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        LRUCache._instances.add(self)
+
+    @classmethod
+    def instances(cls) -> List["LRUCache"]:
+        """Live caches, for metrics export."""
+        return list(cls._instances)
+
+    @staticmethod
+    def _sizeof(value: object) -> int:
+        return len(value) if isinstance(value, (bytes, bytearray, str)) else 1
+
+    def get(self, key: Hashable) -> Optional[object]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires_at, size = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self._bytes -= size
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: object, *, ttl: Optional[float] = None) -> None:
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # never cache a single payload larger than the whole budget
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            self._evict_locked()
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+
+    def delete_where(self, predicate) -> int:
+        """Drop every entry whose key satisfies `predicate`; returns count removed."""
+        with self._lock:
+            doomed = [k for k in self._data if predicate(k)]
+            for k in doomed:
+                self._bytes -= self._data.pop(k)[2]
+            return len(doomed)
+
+    def keys(self) -> List[Hashable]:
+        """Snapshot of current keys, oldest first (entries may expire or be evicted after)."""
+        with self._lock:
+            return list(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _evict_locked(self) -> None:
+        while len(self._data) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            _, (_, _, size) = self._data.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": float(len(self._data)),
+            "bytes": float(self._bytes),
+            "hits": float(self.hits),
+            "misses": float(self.misses),
+            "evictions": float(self.evictions),
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Shared backends
+# ---------------------------------------------------------------------------
+
+class CacheBackend:
+    """Minimal key/value interface shared by workers (string keys, bytes values)."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, *, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    def add(self, key: str, value: bytes) -> bool:
+        """Set `key` only if it is absent; True if this call set it."""
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def get_int(self, key: str) -> int:
+        raise NotImplementedError
+
+    def get_ints(self, keys: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self.get_int(k) for k in keys)
+
+
+class LocalCacheBackend(CacheBackend):
+    """In-memory stand-in for a shared cache. Mirrors Redis semantics closely enough
+    for tests and single-process dev runs (TTL expiry, atomic INCR)."""
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[object, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> Optional[object]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._live(key)
+        return value if isinstance(value, bytes) else None
+
+    def set(self, key: str, value: bytes, *, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for k in keys:
+                self._data.pop(k, None)
+
+    def add(self, key: str, value: bytes) -> bool:
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._data[key] = (value, None)
+            return True
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._live(key) or 0) + 1
+            self._data[key] = (value, None)
+            return value
+
+    def get_int(self, key: str) -> int:
+        with self._lock:
+            return int(self._live(key) or 0)
+
+    def get_ints(self, keys: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(int(self._live(k) or 0) for k in keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared cache on Redis. Requires the optional `redis` package."""
+
+    def __init__(self, url: str):
+        if redis is None:  # pragma: no cover
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package")
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(key)
+
+    def set(self, key: str, value: bytes, *, ttl: Optional[float] = None) -> None:
+        if ttl:
+            self._client.set(key, value, px=int(ttl * 1000))
+        else:
+            self._client.set(key, value)
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self._client.delete(*keys)
+
+    def add(self, key: str, value: bytes) -> bool:
+        return bool(self._client.set(key, value, nx=True))
+
+    def incr(self, key: str) -> int:
+        return int(self._client.incr(key))
+
+    def get_int(self, key: str) -> int:
+        return int(self._client.get(key) or 0)
+
+    def get_ints(self, keys: Iterable[str]) -> Tuple[int, ...]:
+        keys = list(keys)
+        return tuple(int(v or 0) for v in self._client.mget(keys)) if keys else ()
+
+
+def build_shared_backend(kind: Optional[str], url: Optional[str] = None) -> Optional[CacheBackend]:
+    """Return the configured shared backend, or None for purely in-process caching."""
+    kind = (kind or "memory").strip().lower()
+    if kind == "memory":
+        return None
+    if kind == "local":
+        return LocalCacheBackend()
+    if kind == "redis":
+        if not url:
+            raise ValueError("CACHE_URL is required when CACHE_BACKEND=redis")
+        return RedisCacheBackend(url)
+    raise ValueError(f"Unknown cache backend '{kind}'")
+
+
+__all__ = [
+    "LRUCache",
+    "CacheBackend",
+    "LocalCacheBackend",
+    "RedisCacheBackend",
+    "build_shared_backend",
+]
@@ -34,6 +34,11 @@ def month_key(dt: Union[date, datetime, str]) -> str:
     raise ValueError("Unsupported type for month_key")
 
 
+def parse_month(value: str) -> str:
+    """Canonical YYYY-MM for a month string ("2025-1" -> "2025-01"); ValueError otherwise."""
+    return month_key(datetime.strptime(value.strip(), "%Y-%m"))
+
+
 # ---------------------------------------------------------------------------
 # Allocation rules & compliance
 # ---------------------------------------------------------------------------
@@ -269,6 +274,7 @@ __all__ = [
     # helpers
     "to_float",
     "month_key",
+    "parse_month",
     # allocations
     "normalize_rules",
     "allocate_budget",
@@ -0,0 +1,92 @@
+# /backend/app/utils/etag.py
+# SpreadSaver – Conditional GET helpers
+# ETags are derived from per-user data version counters (see services/cache_service.py),
+# so a matching If-None-Match is answered with 304 before any query runs. The counters
+# restart with their store, so the store's epoch is part of every ETag.
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Callable, Optional, Sequence, Tuple, Union
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from app.services import cache_service
+from app.utils.calculations import parse_month
+
+# A scope is either a plain version scope ("badges") or (scope, query_param) when the
+# counter is further split by a request parameter, e.g. (SCOPE_MONTH, "month"). Month
+# parameters are normalized the way writes key them ("2025-1" -> "2025-01").
+ScopeSpec = Union[str, Tuple[str, str]]
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def make_etag(*parts: Any) -> str:
+    """Return a strong ETag (quoted) for the given identity parts."""
+    digest = hashlib.blake2b("|".join(str(p) for p in parts).encode("utf-8"), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 If-None-Match evaluation (weak comparison, '*' matches anything)."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    return any(c[2:] == etag if c.startswith("W/") else c == etag for c in candidates)
+
+
+def _versions_for(request: Request, user_id: Any, scopes: Sequence[ScopeSpec]) -> list:
+    versions = []
+    for spec in scopes:
+        if isinstance(spec, tuple):
+            scope, param = spec
+            value = request.query_params.get(param)
+            if scope == cache_service.SCOPE_MONTH and value is not None:
+                try:
+                    value = parse_month(value)
+                except ValueError:
+                    raise HTTPException(status_code=422, detail=f"'{param}' must be YYYY-MM")
+            versions.append(cache_service.data_version(user_id, scope, value))
+        else:
+            versions.append(cache_service.data_version(user_id, spec))
+    return versions
+
+
+# ---------------------------------------------------------------------------
+# Dependency
+# ---------------------------------------------------------------------------
+
+def conditional_get(*scopes: ScopeSpec) -> Callable:
+    """Dependency factory: compute the ETag for the caller's data and short-circuit with 304.
+
+    The ETag is also set on the injected response; routes that return a raw `Response`
+    should copy the returned value into their own headers.
+    """
+    from app.routes.auth import get_current_user  # local import: routes import this module
+
+    def etag_guard(
+        request: Request,
+        response: Response,
+        current_user=Depends(get_current_user),
+    ) -> str:
+        etag = make_etag(
+            request.url.path,
+            request.url.query,
+            current_user.id,
+            cache_service.versions_epoch(),
+            *_versions_for(request, current_user.id, scopes),
+        )
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        return etag
+
+    return etag_guard
+
+
+__all__ = ["make_etag", "etag_matches", "conditional_get"]
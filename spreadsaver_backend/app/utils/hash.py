@@ -1,8 +1,15 @@
-import bcrypt
+from app.utils.tracing import span
+
+# bcrypt is imported on first use: only auth routes need it, not worker startup
 
 def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    import bcrypt
+
+    with span("bcrypt.hash"):
+        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    import bcrypt
 
+    with span("bcrypt.verify"):
+        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
@@ -0,0 +1,117 @@
+# /backend/app/utils/profiler.py
+# SpreadSaver – Sampling profiler
+# A background thread snapshots every other thread's Python stack with
+# sys._current_frames() every few milliseconds and counts identical stacks. Nothing is
+# hooked into the interpreter, so overhead is one stack walk per thread per tick and
+# the profiler can be attached to a live worker. Output is the "collapsed" format
+# (`thread;outer;…;leaf count` per line) read by flamegraph.pl, speedscope, etc.
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+_busy = threading.Lock()  # one profile at a time per worker
+
+
+def _label(code) -> str:
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class SamplingProfiler:
+    def __init__(self, *, interval: float = 0.01, max_depth: int = 128, exclude: Iterable[int] = ()):
+        self.interval = interval
+        self.exclude = set(exclude)  # thread idents not worth sampling (e.g. the one waiting on us)
+        self.max_depth = max_depth
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+        self._counts: Counter = Counter()
+        self._labels: Dict[object, str] = {}  # code object → label (stable while sampling)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.started_at is not None:
+            self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # -- sampling ----------------------------------------------------------
+
+    def _run(self) -> None:
+        skip = self.exclude | {threading.get_ident()}
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident in skip:
+                    continue
+                stack = []
+                depth = 0
+                while frame is not None and depth < self.max_depth:
+                    code = frame.f_code
+                    label = self._labels.get(code)
+                    if label is None:
+                        label = self._labels[code] = _label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                    depth += 1
+                stack.append(names.get(ident, f"thread-{ident}"))
+                stack.reverse()
+                self._counts[tuple(stack)] += 1
+            self.samples += 1
+
+    # -- output ------------------------------------------------------------
+
+    def stacks(self) -> Dict[Tuple[str, ...], int]:
+        return dict(self._counts)
+
+    def collapsed(self) -> str:
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self._counts.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+
+def try_acquire() -> bool:
+    """Claim the worker's profiling slot (False if a profile is already running)."""
+    return _busy.acquire(blocking=False)
+
+
+def release() -> None:
+    _busy.release()
+
+
+def profile_for(seconds: float, *, interval: float = 0.01) -> Optional[SamplingProfiler]:
+    """Sample the whole process for `seconds` (blocking); None if already profiling."""
+    if not try_acquire():
+        return None
+    try:
+        with SamplingProfiler(interval=interval, exclude=(threading.get_ident(),)) as profiler:
+            time.sleep(seconds)
+        return profiler
+    finally:
+        release()
+
+
+__all__ = ["SamplingProfiler", "try_acquire", "release", "profile_for"]
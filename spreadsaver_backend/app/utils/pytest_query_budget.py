@@ -0,0 +1,83 @@
+# /backend/app/utils/pytest_query_budget.py
+# SpreadSaver – Query budgets for tests (pytest plugin)
+# Enable with `pytest -p app.utils.pytest_query_budget` or
+# `pytest_plugins = ["app.utils.pytest_query_budget"]` in a conftest, then:
+#
+#     @pytest.mark.query_budget(3)
+#     def test_badges_me(client): ...
+#
+# Every HTTP request served during the test must stay within the budget (or, if the
+# test made no requests, all statements it ran), and no statement may repeat
+# N_PLUS_ONE_THRESHOLD+ times in one request unless `n_plus_one=False`. Tests that
+# need finer checks can take the `query_recorder` fixture instead.
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+import pytest
+
+from app.config.settings import settings
+from app.utils.query_profiler import QueryRecorder, repeated_statements
+
+
+def pytest_configure(config) -> None:
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries, *, per_request=True, n_plus_one=None): fail the test if an "
+        "endpoint it calls runs more than max_queries statements or repeats one statement "
+        "n_plus_one (default N_PLUS_ONE_THRESHOLD) times; n_plus_one=False disables that check",
+    )
+
+
+def _short(sql: str, limit: int = 160) -> str:
+    text = " ".join(sql.split())
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def budget_problems(
+    recorder: QueryRecorder,
+    max_queries: int,
+    *,
+    per_request: bool = True,
+    n_plus_one: Optional[int] = None,
+) -> List[str]:
+    """Human-readable budget violations (empty when within budget)."""
+    problems: List[str] = []
+    threshold = settings.N_PLUS_ONE_THRESHOLD if n_plus_one is None else n_plus_one
+    scopes = recorder.requests if (per_request and recorder.requests) else [recorder]
+    for scope in scopes:
+        label = f"{scope.method} {scope.path}" if scope is not recorder else "test"
+        count = scope.db_queries if scope is not recorder else recorder.total
+        if count > max_queries:
+            problems.append(f"{label}: {count} queries (budget {max_queries})")
+        if threshold:
+            for sql, repeats, _ in repeated_statements(scope, threshold):
+                problems.append(f"{label}: N+1 – {repeats}x {_short(sql)}")
+    return problems
+
+
+@pytest.fixture
+def query_recorder():
+    with QueryRecorder() as recorder:
+        yield recorder
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+    if not marker.args:
+        raise pytest.UsageError("query_budget needs a max query count, e.g. @pytest.mark.query_budget(3)")
+    with QueryRecorder() as recorder:
+        result = yield
+    problems = budget_problems(
+        recorder,
+        int(marker.args[0]),
+        per_request=marker.kwargs.get("per_request", True),
+        n_plus_one=0 if marker.kwargs.get("n_plus_one") is False else marker.kwargs.get("n_plus_one"),
+    )
+    if problems:
+        pytest.fail("query budget exceeded:\n  " + "\n  ".join(problems), pytrace=False)
+    return result
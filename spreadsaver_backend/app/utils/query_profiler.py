@@ -0,0 +1,208 @@
+# /backend/app/utils/query_profiler.py
+# SpreadSaver – Slow-query log and N+1 detection
+# Rides on the SQLAlchemy hooks in utils/tracing.py:
+# - statements slower than SLOW_QUERY_MS are logged with their EXPLAIN plan. The plan
+#   is fetched on a separate pooled connection in a background thread (never inside the
+#   caller's transaction, where a failing EXPLAIN would poison it), at most once per
+#   statement per SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS;
+# - when a request finishes, any statement it ran N_PLUS_ONE_THRESHOLD+ times (same
+#   SQL, different parameters: the loop-of-lookups shape) is logged and counted.
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.utils import tracing
+from app.utils.cache import LRUCache
+from app.utils.metrics import registry
+from app.utils.responses import dumps
+
+logger = logging.getLogger("spreadsaver.query")
+
+SLOW_QUERIES = registry.counter("spreadsaver_slow_queries_total", "Statements over SLOW_QUERY_MS", ("route",))
+N_PLUS_ONE = registry.counter("spreadsaver_n_plus_one_total", "Requests with a repeated-statement (N+1) pattern", ("route",))
+
+MAX_SQL_CHARS = 2000
+_EXPLAIN_PREFIX = {
+    "postgresql": "EXPLAIN ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "mysql": "EXPLAIN ",
+}
+
+# statement → True while its plan was logged recently
+_explained = LRUCache(max_entries=1000, name="slow_query_explain")
+_explainer: Optional[ThreadPoolExecutor] = None
+
+
+def _sql(statement: str) -> str:
+    text = " ".join(statement.split())
+    return text if len(text) <= MAX_SQL_CHARS else text[:MAX_SQL_CHARS] + "…"
+
+
+def _explainable(statement: str) -> bool:
+    head = statement.lstrip()[:6].upper()
+    return head.startswith("SELECT") or head.startswith("WITH")
+
+
+# ---------------------------------------------------------------------------
+# EXPLAIN
+# ---------------------------------------------------------------------------
+
+def explain(engine, statement: str, parameters: Any = None) -> Optional[List[str]]:
+    """Plan lines for `statement` on a fresh connection from `engine`, or None if the
+    dialect has no EXPLAIN we know or the statement can't be explained out of context."""
+    prefix = _EXPLAIN_PREFIX.get(engine.dialect.name)
+    if prefix is None or not _explainable(statement):
+        return None
+    try:
+        with engine.connect() as conn:
+            rows = conn.exec_driver_sql(prefix + statement, parameters if parameters else ()).fetchall()
+    except Exception as e:  # temp tables, uncommitted rows, in-memory sqlite, ...
+        logger.debug("explain failed: %s", e)
+        return None
+    return [" | ".join(str(v) for v in row) for row in rows]
+
+
+def _log_slow(engine, statement: str, parameters: Any, seconds: float, route: str, path: str) -> None:
+    record: Dict[str, Any] = {
+        "event": "slow_query",
+        "ms": round(seconds * 1000, 3),
+        "route": route,
+        "path": path,
+        "sql": _sql(statement),
+    }
+    if settings.SLOW_QUERY_EXPLAIN and _explained.get(statement) is None:
+        _explained.set(statement, True, ttl=settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS)
+        record["plan"] = explain(engine, statement, parameters)
+    logger.warning(dumps(record).decode("utf-8"))
+
+
+def _submit(*args: Any) -> None:
+    global _explainer
+    if _explainer is None:
+        _explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query")
+    _explainer.submit(_log_slow, *args)
+
+
+# ---------------------------------------------------------------------------
+# Observers
+# ---------------------------------------------------------------------------
+
+def _on_query(conn, statement: str, parameters: Any, executemany: bool, seconds: float, trace) -> None:
+    if seconds * 1000 < settings.SLOW_QUERY_MS or statement.lstrip()[:7].upper() == "EXPLAIN":
+        return
+    route = (trace.route or trace.path) if trace is not None else "background"
+    SLOW_QUERIES.inc((route,))
+    _submit(conn.engine, statement, None if executemany else parameters, seconds, route, trace.path if trace else "")
+
+
+def repeated_statements(trace, threshold: Optional[int] = None) -> List[Tuple[str, int, float]]:
+    """(sql, count, seconds) for statements run at least `threshold` times by `trace`
+    (anything with a `statements` mapping: a RequestTrace, RequestQueries, QueryRecorder)."""
+    limit = threshold or settings.N_PLUS_ONE_THRESHOLD
+    out = [(sql, int(count), total) for sql, (count, total) in trace.statements.items() if count >= limit]
+    out.sort(key=lambda item: -item[1])
+    return out
+
+
+def _on_request(trace) -> None:
+    repeats = repeated_statements(trace)
+    if not repeats:
+        return
+    N_PLUS_ONE.inc((trace.route,))
+    logger.warning(
+        dumps(
+            {
+                "event": "n_plus_one",
+                "method": trace.method,
+                "route": trace.route,
+                "path": trace.path,
+                "db_queries": trace.db_queries,
+                "repeated": [
+                    {"sql": _sql(sql), "count": count, "ms": round(total * 1000, 3)} for sql, count, total in repeats
+                ],
+            }
+        ).decode("utf-8")
+    )
+
+
+# ---------------------------------------------------------------------------
+# Recorder (tests, benchmarks)
+# ---------------------------------------------------------------------------
+
+class RequestQueries:
+    __slots__ = ("method", "route", "path", "db_queries", "statements")
+
+    def __init__(self, trace):
+        self.method = trace.method
+        self.route = trace.route
+        self.path = trace.path
+        self.db_queries = trace.db_queries
+        self.statements = {sql: list(totals) for sql, totals in trace.statements.items()}
+
+
+class QueryRecorder:
+    """Collects every statement (any thread) and every finished request while active.
+
+        with QueryRecorder() as rec:
+            client.get("/badges/me")
+        assert rec.requests[0].db_queries <= 3
+    """
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.statements: Dict[str, List[float]] = {}
+        self.requests: List[RequestQueries] = []
+        self._lock = threading.Lock()
+
+    def _on_query(self, conn, statement: str, parameters: Any, executemany: bool, seconds: float, trace) -> None:
+        with self._lock:
+            self.total += 1
+            totals = self.statements.setdefault(statement, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    def _on_request(self, trace) -> None:
+        with self._lock:
+            self.requests.append(RequestQueries(trace))
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int, float]]:
+        return repeated_statements(self, threshold)
+
+    def __enter__(self) -> "QueryRecorder":
+        tracing.instrument_sqlalchemy()
+        tracing.add_query_observer(self._on_query)
+        tracing.add_request_observer(self._on_request)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        tracing.remove_query_observer(self._on_query)
+        tracing.remove_request_observer(self._on_request)
+
+
+def install() -> None:
+    """Enable the slow-query log and N+1 detection (idempotent)."""
+    tracing.instrument_sqlalchemy()
+    tracing.add_query_observer(_on_query)
+    tracing.add_request_observer(_on_request)
+
+
+def uninstall() -> None:
+    tracing.remove_query_observer(_on_query)
+    tracing.remove_request_observer(_on_request)
+
+
+__all__ = [
+    "SLOW_QUERIES",
+    "N_PLUS_ONE",
+    "explain",
+    "repeated_statements",
+    "RequestQueries",
+    "QueryRecorder",
+    "install",
+    "uninstall",
+]
@@ -0,0 +1,138 @@
+# /backend/app/utils/ranking.py
+# SpreadSaver – Ordered containers for leaderboards
+# An indexable skiplist: a sorted collection where insert, remove, "item at rank k"
+# and "rank of item" are all O(log n) expected, and top-N is O(log n + N).
+
+from __future__ import annotations
+
+import random
+from typing import Any, Iterator, List, Optional
+
+
+class _Node:
+    __slots__ = ("value", "next", "width")
+
+    def __init__(self, value: Any, levels: int):
+        self.value = value
+        self.next: List[Optional["_Node"]] = [None] * levels
+        # width[i] = bottom-level steps from this node to next[i]
+        self.width: List[int] = [1] * levels
+
+
+class IndexableSkipList:
+    """Sorted set of mutually comparable, unique values (e.g. (score, member_id) tuples).
+
+    Each link records how many elements it skips, so positional lookups descend the
+    levels the same way searches do.
+    """
+
+    def __init__(self, max_levels: int = 24, *, seed: Optional[int] = None):
+        self.max_levels = max_levels
+        self._random = random.Random(seed)
+        self._tail = _Node(None, 0)
+        self._head = _Node(None, max_levels)
+        self._head.next = [self._tail] * max_levels
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _levels(self) -> int:
+        levels = 1
+        while levels < self.max_levels and self._random.random() < 0.5:
+            levels += 1
+        return levels
+
+    def insert(self, value: Any) -> None:
+        chain: List[_Node] = [self._head] * self.max_levels
+        steps_at_level = [0] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level] is not self._tail and node.next[level].value < value:  # type: ignore[union-attr]
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]  # type: ignore[assignment]
+            chain[level] = node
+
+        new = _Node(value, self._levels())
+        steps = 0
+        for level in range(len(new.next)):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(len(new.next), self.max_levels):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, value: Any) -> None:
+        """Remove `value`; raises KeyError if absent."""
+        chain: List[_Node] = [self._head] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level] is not self._tail and node.next[level].value < value:  # type: ignore[union-attr]
+                node = node.next[level]  # type: ignore[assignment]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is self._tail or target.value != value:  # type: ignore[union-attr]
+            raise KeyError(value)
+        levels = len(target.next)  # type: ignore[union-attr]
+        for level in range(levels):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1  # type: ignore[union-attr]
+            prev.next[level] = target.next[level]  # type: ignore[union-attr]
+        for level in range(levels, self.max_levels):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def _node_at(self, index: int) -> _Node:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("skiplist index out of range")
+        node = self._head
+        remaining = index + 1
+        for level in reversed(range(self.max_levels)):
+            while node.width[level] <= remaining and node.next[level] is not self._tail:
+                remaining -= node.width[level]
+                node = node.next[level]  # type: ignore[assignment]
+        return node
+
+    def __getitem__(self, index: int) -> Any:
+        return self._node_at(index).value
+
+    def rank(self, value: Any) -> int:
+        """0-based position of `value`; raises KeyError if absent."""
+        node = self._head
+        position = 0
+        for level in reversed(range(self.max_levels)):
+            while node.next[level] is not self._tail and node.next[level].value < value:  # type: ignore[union-attr]
+                position += node.width[level]
+                node = node.next[level]  # type: ignore[assignment]
+        target = node.next[0]
+        if target is self._tail or target.value != value:  # type: ignore[union-attr]
+            raise KeyError(value)
+        return position
+
+    def islice(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Any]:
+        """Yield values in [start, stop) order: O(log n) seek, then a linked walk."""
+        stop = self._size if stop is None else min(stop, self._size)
+        if start >= stop:
+            return
+        node = self._node_at(start)
+        for _ in range(stop - start):
+            yield node.value
+            node = node.next[0]  # type: ignore[assignment]
+
+    def __iter__(self) -> Iterator[Any]:
+        return self.islice()
+
+    def clear(self) -> None:
+        self._head.next = [self._tail] * self.max_levels
+        self._head.width = [1] * self.max_levels
+        self._size = 0
+
+
+__all__ = ["IndexableSkipList"]
@@ -0,0 +1,78 @@
+# /backend/app/utils/responses.py
+# SpreadSaver – Fast JSON responses
+# orjson (when installed) serializes dicts, lists, UUIDs, datetimes and Decimals natively,
+# so data we read from our own DB can skip response_model re-validation entirely.
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Mapping, Optional
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+from app.utils.tracing import span
+
+try:  # pragma: no cover - optional dependency
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+# ---------------------------------------------------------------------------
+# Encoding
+# ---------------------------------------------------------------------------
+
+def _default(value: Any) -> Any:
+    """Fallback encoder for types our services return but json/orjson can't handle."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes (orjson fast path, stdlib fallback)."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Response classes
+# ---------------------------------------------------------------------------
+
+class FastJSONResponse(JSONResponse):
+    """Default response class for the app (see main.py)."""
+
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            return dumps(content)
+
+
+def trusted_json(
+    content: Any,
+    *,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+) -> FastJSONResponse:
+    """Return service output as-is, bypassing response_model validation.
+
+    Only for payloads built from our own ORM rows whose shape already matches the
+    declared response_model (kept on the route for OpenAPI docs).
+    """
+    return FastJSONResponse(content, status_code=status_code, headers=dict(headers) if headers else None)
+
+
+__all__ = ["dumps", "FastJSONResponse", "trusted_json"]
@@ -0,0 +1,296 @@
+# /backend/app/utils/tracing.py
+# SpreadSaver – Request tracing
+# A per-request trace lives in a contextvar (it follows the request into FastAPI's
+# threadpool), and hot paths wrap themselves in `span(name)`. Each span feeds a global
+# histogram and the current request's totals; SQLAlchemy engine hooks do the same for
+# every query. A span is a slotted object and two perf_counter() calls, so the whole
+# thing stays on in production.
+
+from __future__ import annotations
+
+import functools
+import inspect
+import threading
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils.cache import LRUCache
+from app.utils.metrics import COUNT_BUCKETS, registry
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+REQUESTS = registry.counter("spreadsaver_requests_total", "HTTP requests", ("method", "route", "status"))
+REQUEST_SECONDS = registry.histogram("spreadsaver_request_seconds", "HTTP request latency", ("method", "route"))
+REQUEST_DB_QUERIES = registry.histogram(
+    "spreadsaver_request_db_queries", "DB queries per HTTP request", ("route",), buckets=COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = registry.histogram("spreadsaver_request_db_seconds", "DB time per HTTP request", ("route",))
+DB_QUERY_SECONDS = registry.histogram("spreadsaver_db_query_seconds", "DB statement latency", ("operation",))
+SPAN_SECONDS = registry.histogram("spreadsaver_span_seconds", "Time in instrumented hot paths", ("span",))
+
+
+def _cache_stats() -> Dict[str, Dict[str, float]]:
+    out: Dict[str, Dict[str, float]] = {}
+    for cache in LRUCache.instances():
+        totals = out.setdefault(cache.name, {})
+        for key, value in cache.stats().items():
+            totals[key] = totals.get(key, 0.0) + value
+    return out
+
+
+def _cache_series(field: str) -> Callable[[], Dict[tuple, float]]:
+    return lambda: {(name,): stats[field] for name, stats in _cache_stats().items()}
+
+
+def _cache_hit_ratio() -> Dict[tuple, float]:
+    out = {}
+    for name, stats in _cache_stats().items():
+        lookups = stats["hits"] + stats["misses"]
+        out[(name,)] = stats["hits"] / lookups if lookups else 0.0
+    return out
+
+
+registry.counter_func("spreadsaver_cache_hits_total", "In-process cache hits", ("cache",), collect=_cache_series("hits"))
+registry.counter_func("spreadsaver_cache_misses_total", "In-process cache misses", ("cache",), collect=_cache_series("misses"))
+registry.counter_func("spreadsaver_cache_evictions_total", "In-process cache evictions", ("cache",), collect=_cache_series("evictions"))
+registry.gauge("spreadsaver_cache_entries", "In-process cache entries", ("cache",), collect=_cache_series("entries"))
+registry.gauge("spreadsaver_cache_bytes", "In-process cache payload bytes", ("cache",), collect=_cache_series("bytes"))
+registry.gauge("spreadsaver_cache_hit_ratio", "In-process cache hit ratio since start", ("cache",), collect=_cache_hit_ratio)
+
+
+# ---------------------------------------------------------------------------
+# Request trace
+# ---------------------------------------------------------------------------
+
+class RequestTrace:
+    """Totals for one request. Mutated from the loop and the threadpool; the fields are
+    only ever incremented, so a lost update costs one sample, never correctness."""
+
+    __slots__ = ("method", "path", "route", "started", "db_queries", "db_seconds", "spans", "statements")
+
+    def __init__(self, method: str = "", path: str = ""):
+        self.method = method
+        self.path = path
+        self.route = ""  # route template, filled in once the request has been routed
+        self.started = perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.spans: Dict[str, List[float]] = {}  # name → [count, seconds]
+        # SQL text (bound parameters are placeholders) → [count, seconds]; repeats of one
+        # statement inside a request are how N+1 loops show up
+        self.statements: Dict[str, List[float]] = {}
+
+    def add_span(self, name: str, seconds: float) -> None:
+        totals = self.spans.get(name)
+        if totals is None:
+            self.spans[name] = [1, seconds]
+        else:
+            totals[0] += 1
+            totals[1] += seconds
+
+    def elapsed(self) -> float:
+        return perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "db_queries": self.db_queries,
+            "db_ms": round(self.db_seconds * 1000, 3),
+            "spans": {name: {"count": int(c), "ms": round(s * 1000, 3)} for name, (c, s) in self.spans.items()},
+        }
+
+
+_current: ContextVar[Optional[RequestTrace]] = ContextVar("spreadsaver_trace", default=None)
+
+
+def current() -> Optional[RequestTrace]:
+    return _current.get()
+
+
+def begin(method: str = "", path: str = ""):
+    """Start a request trace in this context; returns the token for `end()`."""
+    return _current.set(RequestTrace(method, path))
+
+
+def end(token) -> None:
+    _current.reset(token)
+
+
+# ---------------------------------------------------------------------------
+# Spans
+# ---------------------------------------------------------------------------
+
+def record(name: str, seconds: float) -> None:
+    SPAN_SECONDS.observe((name,), seconds)
+    trace = _current.get()
+    if trace is not None:
+        trace.add_span(name, seconds)
+
+
+class span:
+    """`with span("bcrypt.verify"): ...` – times the block into SPAN_SECONDS and the
+    current request. A class rather than @contextmanager: no generator per use."""
+
+    __slots__ = ("name", "_t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "span":
+        self._t0 = perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        record(self.name, perf_counter() - self._t0)
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Decorator form of `span` for sync and async functions."""
+
+    def decorate(fn: Callable) -> Callable:
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                t0 = perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    record(label, perf_counter() - t0)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            t0 = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(label, perf_counter() - t0)
+
+        return wrapper
+
+    return decorate
+
+
+# ---------------------------------------------------------------------------
+# Observers (query profiler, test recorders)
+# ---------------------------------------------------------------------------
+
+# fn(conn, statement, parameters, executemany, seconds, trace_or_None), after every statement
+_query_observers: List[Callable[..., None]] = []
+# fn(trace), once per finished HTTP request (trace.route is set)
+_request_observers: List[Callable[[RequestTrace], None]] = []
+
+
+def add_query_observer(fn: Callable[..., None]) -> None:
+    if fn not in _query_observers:
+        _query_observers.append(fn)
+
+
+def remove_query_observer(fn: Callable[..., None]) -> None:
+    if fn in _query_observers:
+        _query_observers.remove(fn)
+
+
+def add_request_observer(fn: Callable[[RequestTrace], None]) -> None:
+    if fn not in _request_observers:
+        _request_observers.append(fn)
+
+
+def remove_request_observer(fn: Callable[[RequestTrace], None]) -> None:
+    if fn in _request_observers:
+        _request_observers.remove(fn)
+
+
+def request_finished(trace: RequestTrace) -> None:
+    for observer in list(_request_observers):
+        observer(trace)
+
+
+# ---------------------------------------------------------------------------
+# SQLAlchemy hooks
+# ---------------------------------------------------------------------------
+
+_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def _operation(statement: str) -> str:
+    head = statement.lstrip()[:6].upper()
+    for op in _OPERATIONS:
+        if head.startswith(op):
+            return op.lower()
+    return "other"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("spreadsaver_query_start", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    starts = conn.info.get("spreadsaver_query_start")
+    if not starts:
+        return
+    seconds = perf_counter() - starts.pop()
+    DB_QUERY_SECONDS.observe((_operation(statement),), seconds)
+    trace = _current.get()
+    if trace is not None:
+        trace.db_queries += 1
+        trace.db_seconds += seconds
+        totals = trace.statements.get(statement)
+        if totals is None:
+            trace.statements[statement] = [1, seconds]
+        else:
+            totals[0] += 1
+            totals[1] += seconds
+    for observer in _query_observers:
+        observer(conn, statement, parameters, executemany, seconds, trace)
+
+
+def _handle_error(context) -> None:
+    starts = context.connection.info.get("spreadsaver_query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+_instrumented = threading.Lock()
+_installed = [False]
+
+
+def instrument_sqlalchemy() -> None:
+    """Time every statement on every Engine (primary and any others). Idempotent."""
+    with _instrumented:
+        if _installed[0]:
+            return
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _installed[0] = True
+
+
+__all__ = [
+    "REQUESTS",
+    "REQUEST_SECONDS",
+    "REQUEST_DB_QUERIES",
+    "REQUEST_DB_SECONDS",
+    "DB_QUERY_SECONDS",
+    "SPAN_SECONDS",
+    "RequestTrace",
+    "current",
+    "begin",
+    "end",
+    "record",
+    "span",
+    "timed",
+    "add_query_observer",
+    "remove_query_observer",
+    "add_request_observer",
+    "remove_request_observer",
+    "request_finished",
+    "instrument_sqlalchemy",
+]
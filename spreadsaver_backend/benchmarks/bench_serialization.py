@@ -0,0 +1,72 @@
+# SpreadSaver – Response serialization micro-benchmark
+# Compares the default FastAPI path for a purchase page (response_model validation →
+# jsonable dump → stdlib json) against the trusted fast path (utils/responses.py).
+#
+# Usage (from spreadsaver_backend/):
+#   python -m benchmarks.bench_serialization [--rows 1000] [--repeat 20]
+
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from app.routes.service import PurchasePage
+from app.utils.responses import FastJSONResponse, orjson
+
+
+def make_rows(n: int) -> List[Dict[str, Any]]:
+    """Rows shaped exactly like budget_service.list_purchases output."""
+    user_id = uuid.uuid4()
+    categories = [uuid.uuid4() for _ in range(12)]
+    start = datetime(2025, 10, 31, 23, 0, 0)
+    return [
+        {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "amount": round(3.5 + (i * 7.31) % 250, 2),
+            "category_id": categories[i % len(categories)],
+            "occurred_at": start - timedelta(minutes=37 * i),
+            "note": f"purchase #{i}",
+        }
+        for i in range(n)
+    ]
+
+
+def default_path(payload: Dict[str, Any]) -> bytes:
+    """What FastAPI does for `return PurchasePage(...)` with response_model + JSONResponse."""
+    model = PurchasePage.model_validate(payload)  # route builds the model from service dicts
+    content = model.model_dump(mode="json")  # response_model serialization
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(payload: Dict[str, Any]) -> bytes:
+    return FastJSONResponse(payload).body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = {"page": 1, "size": args.rows, "items": make_rows(args.rows)}
+    assert json.loads(default_path(payload)) == json.loads(fast_path(payload))
+
+    results = {}
+    for name, fn in (("default", default_path), ("fast", fast_path)):
+        best = min(timeit.repeat(lambda: fn(payload), number=1, repeat=args.repeat))
+        results[name] = best * 1000.0 * (1000.0 / args.rows)  # ms per 1k purchases
+
+    print(f"encoder: {'orjson' if orjson is not None else 'stdlib json (install orjson for the fast path)'}")
+    print(f"rows={args.rows} repeat={args.repeat}")
+    print(f"default path : {results['default']:8.3f} ms / 1k purchases")
+    print(f"fast path    : {results['fast']:8.3f} ms / 1k purchases")
+    print(f"speedup      : {results['default'] / results['fast']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# SpreadSaver – Cold-start benchmark
+# Each sample is a fresh interpreter (what an autoscaled container pays): time to
+# `import app.main` (module import + app factory), then to a served first request
+# (lifespan startup + GET /service/health over httpx.ASGITransport). --importtime adds
+# the slowest modules by cumulative import time from `python -X importtime`, and
+# --max-ms turns the median import time into a pass/fail budget.
+#
+# Usage (from spreadsaver_backend/):
+#   python -m benchmarks.bench_startup [--runs 9] [--importtime 25] [--max-ms 900]
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+_PROBE = r"""
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+
+async def first_request():
+    import httpx
+    app = app_module.app
+    async with app.router.lifespan_context(app):
+        t = time.perf_counter()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            status = (await client.get("/service/health")).status_code
+        return status, time.perf_counter()
+
+app_module = app.main
+status, t2 = asyncio.run(first_request())
+heavy = [m for m in ("stripe", "requests", "jose", "bcrypt") if m in sys.modules]
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "first_request_ms": (t2 - t0) * 1000, "status": status, "loaded": heavy}))
+"""
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    # the background warm-up would race the probe's "what got imported" check
+    env.setdefault("WARM_DEFERRED_IMPORTS", "false")
+    return env
+
+
+def sample() -> Dict[str, object]:
+    out = subprocess.run([sys.executable, "-c", _PROBE], env=_env(), capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def importtime(top: int) -> List[Tuple[int, int, str]]:
+    """(cumulative µs, self µs, module) for the slowest imports of app.main."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"], env=_env(), capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            rows.append((int(parts[1]), int(parts[0]), parts[2].rstrip()))
+        except ValueError:
+            continue  # header
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=9)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="show the N slowest imports")
+    parser.add_argument("--max-ms", type=float, help="fail if the median import time exceeds this")
+    args = parser.parse_args()
+
+    sample()  # warm the filesystem / bytecode caches
+    runs = [sample() for _ in range(args.runs)]
+    imports = [r["import_ms"] for r in runs]
+    firsts = [r["first_request_ms"] for r in runs]
+    print(f"import app.main      median {statistics.median(imports):7.1f} ms   min {min(imports):7.1f} ms")
+    print(f"first response       median {statistics.median(firsts):7.1f} ms   min {min(firsts):7.1f} ms")
+    print(f"heavy modules loaded at first response: {', '.join(runs[-1]['loaded']) or 'none'}")
+
+    if args.importtime:
+        print(f"\n{'cumulative ms':>14s} {'self ms':>9s}  module")
+        for cumulative, own, module in importtime(args.importtime):
+            print(f"{cumulative / 1000:14.1f} {own / 1000:9.1f}  {module}")
+
+    if args.max_ms is not None and statistics.median(imports) > args.max_ms:
+        print(f"FAIL: median import {statistics.median(imports):.1f} ms > budget {args.max_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
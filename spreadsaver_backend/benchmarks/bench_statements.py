@@ -0,0 +1,187 @@
+# SpreadSaver – Hot-statement benchmark
+# Per-call cost of the hot queries (user lookup, month summary, purchase page, category
+# list) measured three ways on the same data:
+# - legacy:  the db.query(...) chain the services used to rebuild on every call;
+# - service: the current service function (statements built once, rows read as tuples);
+# - driver:  the exact SQL and parameters the service sends, replayed on a raw DB-API
+#            cursor, i.e. what the database and driver cost on their own.
+# "overhead" is the time above the driver floor: the per-request Python work on top of
+# the database, which is what prebuilt statements are meant to remove.
+#
+# Usage (from spreadsaver_backend/):
+#   python -m benchmarks.bench_statements [--db sqlite|postgres] [--size 1000] [--save NAME]
+
+from __future__ import annotations
+
+import argparse
+import os
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks import harness
+from benchmarks.databases import database
+
+
+def _legacy_cases(db, data, month: str) -> Dict[str, Callable[[], Any]]:
+    """The query chains as written before the hot statements were prebuilt."""
+    from sqlalchemy import func, or_
+
+    from app.models.models import Category, Purchase, User
+    from app.services.budget_service import _month_bounds
+
+    def user_lookup():
+        ident = data.username.lower()
+        return (
+            db.query(User)
+            .filter(or_(func.lower(User.username) == ident, func.lower(User.email) == ident))
+            .first()
+        )
+
+    def month_summary():
+        start, end = _month_bounds(month)
+        total = (
+            db.query(func.coalesce(func.sum(Purchase.amount), 0.0))
+            .filter(Purchase.user_id == data.user_id)
+            .filter(Purchase.occurred_at >= start)
+            .filter(Purchase.occurred_at < end)
+        ).scalar()
+        rows = (
+            db.query(Category.name, func.coalesce(func.sum(Purchase.amount), 0.0))
+            .join(Category, Category.id == Purchase.category_id)
+            .filter(Purchase.user_id == data.user_id)
+            .filter(Purchase.occurred_at >= start)
+            .filter(Purchase.occurred_at < end)
+            .group_by(Category.name)
+            .all()
+        )
+        return {"month": month, "total_spent": float(total or 0.0), "by_category": {n: float(t) for n, t in rows}}
+
+    def purchase_page():
+        rows = (
+            db.query(Purchase)
+            .filter(Purchase.user_id == data.user_id)
+            .order_by(Purchase.occurred_at.desc())
+            .limit(25)
+            .all()
+        )
+        return [
+            {"id": r.id, "user_id": r.user_id, "amount": float(r.amount), "category_id": r.category_id,
+             "occurred_at": r.occurred_at, "note": r.note}
+            for r in rows
+        ]
+
+    def category_list():
+        rows = db.query(Category).filter(Category.user_id == data.user_id).order_by(Category.name.asc()).all()
+        return [{"id": r.id, "name": r.name, "color": r.color} for r in rows]
+
+    return {
+        "user_lookup": user_lookup,
+        "month_summary": month_summary,
+        "purchase_page": purchase_page,
+        "category_list": category_list,
+    }
+
+
+def _service_cases(db, data, month: str) -> Dict[str, Callable[[], Any]]:
+    from app.services import auth_service, budget_service
+
+    return {
+        "user_lookup": lambda: auth_service.get_user_by_identifier(db, data.username),
+        "month_summary": lambda: budget_service.get_month_summary(db, user_id=data.user_id, month=month),
+        "purchase_page": lambda: budget_service.list_purchases(db, user_id=data.user_id, limit=25),
+        "category_list": lambda: budget_service.list_user_categories(db, user_id=data.user_id),
+    }
+
+
+def _captured_sql(engine, fn: Callable[[], Any]) -> List[Tuple[str, Any]]:
+    """(statement, parameters) exactly as handed to the driver during one call of fn."""
+    from sqlalchemy import event
+
+    calls: List[Tuple[str, Any]] = []
+
+    def capture(_conn, _cursor, statement, parameters, _context, _executemany):
+        calls.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return calls
+
+
+def _driver_case(engine, calls: List[Tuple[str, Any]]) -> Callable[[], Any]:
+    raw = engine.raw_connection()
+    cursor = raw.cursor()
+
+    def replay():
+        for statement, parameters in calls:
+            cursor.execute(statement, parameters)
+            cursor.fetchall()
+
+    return replay
+
+
+def run(url: str, size: int, *, repeat: int, min_time: float) -> List[harness.Result]:
+    os.environ["DATABASE_URL"] = url
+    from app.database import Base, SessionLocal, engine
+    from app.models import models  # noqa: F401  (register tables)
+    from benchmarks import dataset
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    dialect = engine.dialect.name
+    results: List[harness.Result] = []
+    try:
+        data = dataset.build(engine, size)
+        month = dataset.BENCH_MONTH
+        with SessionLocal() as db:
+            legacy = _legacy_cases(db, data, month)
+            service = _service_cases(db, data, month)
+            for name in service:
+                assert legacy[name]() == service[name](), f"{name}: legacy and service results differ"
+                driver = _driver_case(engine, _captured_sql(engine, service[name]))
+                for variant, fn in (("legacy", legacy[name]), ("service", service[name]), ("driver", driver)):
+                    results.append(harness.measure(
+                        f"{name}.{variant}", fn, size=size, db=dialect,
+                        repeat=repeat, min_time=min_time, count_queries=False,
+                    ))
+                db.rollback()
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+    return results
+
+
+def report(results: List[harness.Result]) -> None:
+    by_key = {r.name: r for r in results}
+    print(f"{'query':16s} {'legacy µs':>10s} {'service µs':>11s} {'driver µs':>10s} "
+          f"{'overhead before':>16s} {'after':>8s} {'removed':>8s}")
+    for name in dict.fromkeys(r.name.split(".")[0] for r in results):
+        legacy, service, driver = (by_key[f"{name}.{v}"].median_ms * 1000 for v in ("legacy", "service", "driver"))
+        before, after = legacy - driver, service - driver
+        removed = (1 - after / before) * 100 if before > 0 else 0.0
+        print(f"{name:16s} {legacy:10.1f} {service:11.1f} {driver:10.1f} {before:16.1f} {after:8.1f} {removed:7.0f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SpreadSaver hot-statement benchmark")
+    parser.add_argument("--db", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--database-url", help="use this database instead of a disposable one (tables are dropped!)")
+    parser.add_argument("--size", type=int, default=1000, help="purchases for the benchmark user")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing round")
+    parser.add_argument("--save", metavar="NAME", help="write results to benchmarks/baselines/NAME.json (or a .json path)")
+    args = parser.parse_args()
+
+    with database(args.db, args.database_url) as url:
+        results = run(url, args.size, repeat=args.repeat, min_time=args.min_time)
+    report(results)
+    if args.save:
+        path = harness.save_baseline(
+            args.save, results, params={"size": args.size, "repeat": args.repeat, "min_time": args.min_time}
+        )
+        print(f"saved baseline: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# SpreadSaver – Stripe client event-loop benchmark
+# Runs N concurrent checkout-session creations against the local fake Stripe server
+# (services/stripe_local.py) and compares calling stripe-python inline (what the async
+# routes used to do) with services/stripe_client.py. Reports wall time and the worst
+# event-loop stall seen by a 5 ms ticker, i.e. how long every other request would wait.
+#
+# Usage (from spreadsaver_backend/):
+#   python -m benchmarks.bench_stripe_client [--calls 32] [--latency 0.1]
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable
+
+import stripe
+
+from app.services import stripe_service
+from app.services.stripe_local import FakeStripeServer
+
+PRICE_ID = "price_bench_pro_monthly"
+
+
+async def _ticker(stop: asyncio.Event, stalls: list) -> None:
+    interval = 0.005
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        stalls.append(now - last - interval)
+        last = now
+
+
+async def _measure(calls: int, make_call: Callable[[], Awaitable[object]]) -> tuple:
+    stop, stalls = asyncio.Event(), []
+    ticker = asyncio.create_task(_ticker(stop, stalls))
+    await asyncio.sleep(0.02)
+    start = time.perf_counter()
+    await asyncio.gather(*(make_call() for _ in range(calls)))
+    wall = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return wall, max(stalls or [0.0])
+
+
+async def inline_call() -> object:
+    # Blocking SDK call straight from a coroutine
+    return stripe.checkout.Session.create(
+        mode="subscription",
+        line_items=[{"price": PRICE_ID, "quantity": 1}],
+        success_url=stripe_service.SUCCESS_URL,
+        cancel_url=stripe_service.CANCEL_URL,
+        idempotency_key=uuid.uuid4().hex,
+    )
+
+
+async def client_call() -> object:
+    return await stripe_service.create_checkout_session_async("bench-user", price_id=PRICE_ID)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.1, help="fake Stripe response delay (s)")
+    args = parser.parse_args()
+
+    with FakeStripeServer(latency=args.latency) as server:
+        server.add_price(PRICE_ID)
+        print(f"calls={args.calls} stripe latency={args.latency * 1000:.0f} ms "
+              f"pool={stripe_service.client._max_workers}")
+        for name, fn in (("inline (blocking)", inline_call), ("stripe_client", client_call)):
+            wall, stall = asyncio.run(_measure(args.calls, fn))
+            print(f"{name:18s}: wall {wall * 1000:8.1f} ms   worst loop stall {stall * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
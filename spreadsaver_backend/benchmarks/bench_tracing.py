@@ -0,0 +1,58 @@
+# SpreadSaver – Tracing overhead micro-benchmark
+# Cost of one `span()` (outside and inside a request trace), one DB-hook pair and one
+# histogram observation (utils/tracing.py, utils/metrics.py). The budget is a few
+# microseconds per span so instrumentation can stay on in production.
+#
+# Usage (from spreadsaver_backend/):
+#   python -m benchmarks.bench_tracing [--n 200000]
+
+from __future__ import annotations
+
+import argparse
+import timeit
+
+from app.utils import tracing
+from app.utils.metrics import Histogram
+
+
+class _Conn:
+    def __init__(self) -> None:
+        self.info: dict = {}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=200_000)
+    args = parser.parse_args()
+
+    def bare_span() -> None:
+        with tracing.span("bench"):
+            pass
+
+    conn = _Conn()
+
+    def db_hooks() -> None:
+        tracing._before_cursor_execute(conn, None, "SELECT 1", (), None, False)
+        tracing._after_cursor_execute(conn, None, "SELECT 1", (), None, False)
+
+    hist = Histogram("bench_seconds", "bench", ("route",))
+
+    def observe() -> None:
+        hist.observe(("/bench",), 0.0123)
+
+    def measure(fn) -> float:
+        return min(timeit.repeat(fn, number=args.n, repeat=3)) / args.n
+
+    results = [("span (no request)", measure(bare_span))]
+    token = tracing.begin("GET", "/bench")
+    try:
+        for name, fn in (("span (in request)", bare_span), ("db hook pair", db_hooks), ("histogram.observe", observe)):
+            results.append((name, measure(fn)))
+    finally:
+        tracing.end(token)
+    for name, seconds in results:
+        print(f"{name:20s}: {seconds * 1e6:6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# SpreadSaver – Benchmark dataset
+# Deterministic data for one suite size N, built with the synthetic data generator
+# (app/scripts/generate_data.py) and bulk-loaded through its BulkLoader:
+# - a primary user with exactly N purchases over the three months ending BENCH_MONTH,
+#   with the generator's category, timing and amount distributions, plus a budget rule;
+# - min(N // 10, 500) other generated users (~20 purchases a month each), all in one
+#   group owned by the primary user;
+# - a catalogue of 50 badges.
+# Returns ids the cases need; the same N always produces the same rows.
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, List
+
+from sqlalchemy.engine import Engine
+
+from app.models.models import Badge, Group
+from app.scripts import generate_data as gen
+
+BENCH_MONTH = "2024-03"
+PASSWORD = "bench-password"
+BADGE_COUNT = 50
+
+
+@dataclass
+class Dataset:
+    size: int
+    user_id: Any
+    username: str
+    group_id: int
+    member_ids: List[Any] = field(default_factory=list)
+    category_ids: List[Any] = field(default_factory=list)
+    purchase_rows: List[dict] = field(default_factory=list)  # plain dicts for calculations.py cases
+
+
+def build(engine: Engine, size: int, *, seed: int = 1234) -> Dataset:
+    from app.utils.hash import get_password_hash
+
+    members = min(size // 10, 500)
+    profile = gen.Profile(
+        users=members + 1,
+        months=3,
+        end_month=BENCH_MONTH,
+        purchases_per_month=20.0,
+        group_rate=0.0,
+        badge_count=BADGE_COUNT,
+        seed=seed + size,
+        prefix=f"bench{size}_",
+    )
+    loader = gen.BulkLoader(engine)
+    hashed = get_password_hash(PASSWORD)  # one bcrypt hash shared by every seeded user
+
+    badge_ids = gen.existing_badge_ids(engine)
+    if not badge_ids:
+        badges = gen.badge_rows(profile, gen.next_id(engine, Badge))
+        loader.add("badges", badges)
+        badge_ids = [b["id"] for b in badges]
+
+    primary = gen.user_rows(profile, 0, hashed_password=hashed, purchases=size)
+    loader.add_all(primary)
+    for i in range(1, members + 1):
+        loader.add_all(gen.user_rows(profile, i, hashed_password=hashed, badge_ids=badge_ids))
+
+    owner_id = gen.user_id(profile, 0)
+    member_ids = [gen.user_id(profile, i) for i in range(1, members + 1)]
+    group_id = gen.next_id(engine, Group)
+    loader.add("groups", [{"id": group_id, "owner_id": owner_id, "name": f"Bench group {size}", "description": None}])
+    loader.add(
+        "group_members",
+        [{"group_id": group_id, "user_id": owner_id, "role": "owner"}]
+        + [
+            {"group_id": group_id, "user_id": uid, "role": "admin" if i % 25 == 0 else "member"}
+            for i, uid in enumerate(member_ids)
+        ],
+    )
+    loader.finish()
+
+    names = {c["id"]: c["name"] for c in primary["categories"]}
+    return Dataset(
+        size=size,
+        user_id=owner_id,
+        username=gen.username(profile, 0),
+        group_id=group_id,
+        member_ids=member_ids,
+        category_ids=list(names),
+        purchase_rows=[
+            {"category": names[p["category_id"]], "amount": p["amount"], "occurred_at": p["purchased_at"]}
+            for p in primary["purchases"]
+        ],
+    )
+
+
+__all__ = ["BENCH_MONTH", "PASSWORD", "Dataset", "build"]
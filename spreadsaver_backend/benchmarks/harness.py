@@ -0,0 +1,197 @@
+# SpreadSaver – Benchmark harness
+# Timing, query counting and JSON baselines shared by benchmarks/suite.py.
+# A case is timed with timeit-style autoranging (enough calls per round to run for
+# ~min_time), then `repeat` rounds; the per-call median is what baselines compare.
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+@dataclass
+class Result:
+    name: str
+    size: int
+    db: str
+    median_ms: float
+    min_ms: float
+    p95_ms: float
+    stdev_ms: float
+    calls: int
+    queries: Optional[int] = None  # DB statements per call (None for pure-Python cases)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return f"{self.db}:{self.name}[{self.size}]"
+
+
+def _autorange(fn: Callable[[], Any], min_time: float) -> int:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_time or number >= 1_000_000:
+            return number
+        number *= 2 if number < 8 else 5
+
+
+def measure(
+    name: str,
+    fn: Callable[[], Any],
+    *,
+    size: int,
+    db: str,
+    repeat: int = 5,
+    min_time: float = 0.1,
+    count_queries: bool = True,
+) -> Result:
+    """Time `fn` (already set up; may be called many times)."""
+    queries = None
+    if count_queries:
+        from app.utils.query_profiler import QueryRecorder
+
+        with QueryRecorder() as recorder:
+            fn()
+        queries = recorder.total
+    else:
+        fn()  # warm-up
+
+    number = _autorange(fn, min_time)
+    per_call: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - start) / number * 1000)
+    per_call.sort()
+    p95_index = min(len(per_call) - 1, int(round(0.95 * (len(per_call) - 1))))
+    return Result(
+        name=name,
+        size=size,
+        db=db,
+        median_ms=round(statistics.median(per_call), 4),
+        min_ms=round(per_call[0], 4),
+        p95_ms=round(per_call[p95_index], 4),
+        stdev_ms=round(statistics.pstdev(per_call), 4),
+        calls=number * repeat,
+        queries=queries,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Baselines
+# ---------------------------------------------------------------------------
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def baseline_path(name: str) -> str:
+    return name if name.endswith(".json") else os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save_baseline(name: str, results: List[Result], *, params: Dict[str, Any]) -> str:
+    path = baseline_path(name)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    doc = {"environment": environment(), "params": params, "results": [asdict(r) for r in results]}
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(doc, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+    return path
+
+
+def load_baseline(name: str) -> Dict[str, Dict[str, Any]]:
+    with open(baseline_path(name), encoding="utf-8") as fh:
+        doc = json.load(fh)
+    return {f"{r['db']}:{r['name']}[{r['size']}]": r for r in doc["results"]}
+
+
+@dataclass
+class Comparison:
+    key: str
+    baseline_ms: float
+    current_ms: float
+    ratio: float
+    baseline_queries: Optional[int]
+    current_queries: Optional[int]
+    regressed: bool
+
+
+def compare(
+    results: List[Result],
+    baseline: Dict[str, Dict[str, Any]],
+    *,
+    threshold: float = 1.25,
+    min_delta_ms: float = 0.05,
+) -> List[Comparison]:
+    """A case regresses when its median is `threshold`x the baseline (and slower by at
+    least `min_delta_ms`, so microsecond noise doesn't trip it) or it runs more queries."""
+    out = []
+    for r in results:
+        base = baseline.get(r.key)
+        if base is None:
+            continue
+        ratio = r.median_ms / base["median_ms"] if base["median_ms"] else 1.0
+        more_queries = (
+            r.queries is not None and base.get("queries") is not None and r.queries > base["queries"]
+        )
+        slower = ratio >= threshold and (r.median_ms - base["median_ms"]) >= min_delta_ms
+        out.append(
+            Comparison(r.key, base["median_ms"], r.median_ms, round(ratio, 3), base.get("queries"), r.queries, slower or more_queries)
+        )
+    return out
+
+
+def print_results(results: List[Result], comparisons: Optional[List[Comparison]] = None) -> None:
+    by_key = {c.key: c for c in comparisons or []}
+    print(f"{'case':52s} {'median ms':>10s} {'p95 ms':>10s} {'queries':>8s} {'vs base':>9s}")
+    for r in results:
+        c = by_key.get(r.key)
+        vs = f"{c.ratio:8.2f}x" + ("!" if c.regressed else " ") if c else ""
+        q = "" if r.queries is None else str(r.queries)
+        print(f"{r.key:52s} {r.median_ms:10.3f} {r.p95_ms:10.3f} {q:>8s} {vs:>9s}")
+
+
+__all__ = [
+    "BASELINE_DIR",
+    "Result",
+    "measure",
+    "environment",
+    "save_baseline",
+    "load_baseline",
+    "Comparison",
+    "compare",
+    "print_results",
+]
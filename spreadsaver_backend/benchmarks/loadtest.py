@@ -0,0 +1,422 @@
+# SpreadSaver – Load test with latency SLOs
+# Virtual users replay a mobile session (login → dashboard summary → categories →
+# purchases page → sometimes add purchases and re-read the summary → sometimes
+# evaluate badges) with think time between steps. Concurrency ramps through --stages;
+# each stage reports per-route p50/p95/p99 latency, throughput and error rate, and every
+# stage is checked against the --slo rules. Exit status is 1 when any SLO is missed, so
+# a release can be gated on the capacity of one worker.
+#
+# Targets: the ASGI app in-process (default; httpx.ASGITransport, no sockets), a
+# uvicorn it launches (--uvicorn [--workers N]) or any running server (--url).
+# Accounts are the generator's (app/scripts/generate_data.py: gen0000000…, password
+# "password"); --generate N loads N of them first.
+#
+# Usage (from spreadsaver_backend/):
+#   DATABASE_URL=sqlite:////tmp/load.db python -m benchmarks.loadtest --generate 500 \
+#       --stages 10:30,25:30,50:30 --slo "*:p95<250" --slo "*:error_rate<0.01"
+#   python -m benchmarks.loadtest --uvicorn --workers 1 --stages 20:60 --report load.json
+#   python -m benchmarks.loadtest --url http://staging:8000 --stages 50:120
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+LOGIN = "POST /auth/login"
+SUMMARY = "GET /service/budget/summary"
+CATEGORIES = "GET /service/budget/categories"
+PURCHASES = "GET /service/budget/purchases"
+ADD_PURCHASE = "POST /service/budget/purchases"
+EVALUATE = "POST /badges/evaluate"
+ALL = "*"  # SLO rules for every route; stage totals are reported under this label
+
+
+# ---------------------------------------------------------------------------
+# SLOs
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Slo:
+    route: str  # a route label above, or "*"
+    metric: str  # p50 / p95 / p99 (ms), error_rate (0..1), rps
+    op: str  # "<" or ">"
+    limit: float
+
+    _SPEC = re.compile(r"^\s*(?P<route>.+?)\s*:\s*(?P<metric>p50|p95|p99|error_rate|rps)\s*(?P<op>[<>])\s*(?P<limit>[0-9.]+)\s*$")
+
+    @classmethod
+    def parse(cls, spec: str) -> "Slo":
+        """"GET /service/budget/summary:p95<200", "*:error_rate<0.01", "*:rps>50"."""
+        m = cls._SPEC.match(spec)
+        if not m:
+            raise ValueError(f"bad SLO {spec!r}; expected ROUTE:METRIC<LIMIT (metric p50|p95|p99|error_rate|rps)")
+        return cls(m["route"], m["metric"], m["op"], float(m["limit"]))
+
+    def check(self, stats: Dict[str, Any], route: str) -> Optional[str]:
+        value = stats.get(self.metric)
+        if value is None:
+            return None
+        ok = value < self.limit if self.op == "<" else value > self.limit
+        return None if ok else f"{route} {self.metric}={value:g} (want {self.op}{self.limit:g})"
+
+    def __str__(self) -> str:
+        return f"{self.route}:{self.metric}{self.op}{self.limit:g}"
+
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]  # nearest rank
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.stage = 0
+        self.samples: Dict[Tuple[int, str], List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.statuses: Dict[Tuple[int, str], Counter] = defaultdict(Counter)
+
+    def record(self, route: str, seconds: float, status: Optional[int]) -> None:
+        key = (self.stage, route)
+        self.samples[key].append(seconds)
+        self.statuses[key][status or "error"] += 1
+        if status is None or status >= 400:
+            self.errors[key] += 1
+
+    def stats(self, stage: int, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        every: List[float] = []
+        errors = 0
+        for (s, route), samples in sorted(self.samples.items()):
+            if s != stage:
+                continue
+            every.extend(samples)
+            errors += self.errors[(s, route)]
+            out[route] = self._summarize(samples, self.errors[(s, route)], elapsed)
+            out[route]["statuses"] = {str(k): v for k, v in self.statuses[(s, route)].items()}
+        out[ALL] = self._summarize(every, errors, elapsed)
+        return out
+
+    @staticmethod
+    def _summarize(samples: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+        ordered = sorted(samples)
+        count = len(ordered)
+        return {
+            "count": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "rps": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+            "p50": round(_percentile(ordered, 0.50) * 1000, 2),
+            "p95": round(_percentile(ordered, 0.95) * 1000, 2),
+            "p99": round(_percentile(ordered, 0.99) * 1000, 2),
+            "max": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Session flow
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Flow:
+    accounts: int
+    prefix: str = "gen"
+    password: str = "password"
+    think: float = 0.2  # mean seconds between steps (exponential)
+    add_rate: float = 0.4  # sessions that add purchases
+    evaluate_rate: float = 0.2  # sessions that evaluate badges
+    month: str = ""
+
+
+async def _call(client: httpx.AsyncClient, rec: Recorder, route: str, path: str, **kwargs: Any) -> Optional[httpx.Response]:
+    method = route.split(" ", 1)[0]
+    start = time.perf_counter()
+    try:
+        resp = await client.request(method, path, **kwargs)
+    except httpx.HTTPError:
+        rec.record(route, time.perf_counter() - start, None)
+        return None
+    rec.record(route, time.perf_counter() - start, resp.status_code)
+    return resp if resp.status_code < 400 else None
+
+
+async def _think(rng: random.Random, flow: Flow, stop: asyncio.Event) -> None:
+    if flow.think > 0:
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(stop.wait(), rng.expovariate(1 / flow.think))
+
+
+async def session(client: httpx.AsyncClient, rec: Recorder, flow: Flow, rng: random.Random, stop: asyncio.Event) -> None:
+    name = f"{flow.prefix}{rng.randrange(flow.accounts):07d}"
+    resp = await _call(client, rec, LOGIN, "/auth/login", json={"username": name, "password": flow.password})
+    if resp is None:
+        await _think(rng, flow, stop)
+        return
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    steps: List[Tuple[str, str, Dict[str, Any]]] = [
+        (SUMMARY, "/service/budget/summary", {"params": {"month": flow.month}}),
+        (CATEGORIES, "/service/budget/categories", {}),
+        (PURCHASES, "/service/budget/purchases", {"params": {"page": 1, "size": 25}}),
+    ]
+    categories: List[Any] = []
+    for route, path, kwargs in steps:
+        await _think(rng, flow, stop)
+        if stop.is_set():
+            return
+        resp = await _call(client, rec, route, path, headers=headers, **kwargs)
+        if route == CATEGORIES and resp is not None:
+            categories = [c["id"] for c in resp.json()]
+
+    if rng.random() < flow.add_rate:
+        for _ in range(rng.randint(1, 3)):
+            await _think(rng, flow, stop)
+            body = {
+                "amount": round(rng.lognormvariate(3.2, 0.8), 2),
+                "category_id": rng.choice(categories) if categories else None,
+            }
+            await _call(client, rec, ADD_PURCHASE, "/service/budget/purchases", headers=headers, json=body)
+        await _call(client, rec, SUMMARY, "/service/budget/summary", headers=headers, params={"month": flow.month})
+
+    if rng.random() < flow.evaluate_rate:
+        await _think(rng, flow, stop)
+        await _call(client, rec, EVALUATE, "/badges/evaluate", headers=headers)
+
+
+async def virtual_user(client: httpx.AsyncClient, rec: Recorder, flow: Flow, seed: int, stop: asyncio.Event) -> None:
+    rng = random.Random(seed)
+    while not stop.is_set():
+        await session(client, rec, flow, rng, stop)
+
+
+async def run_stages(
+    client: httpx.AsyncClient, flow: Flow, stages: List[Tuple[int, float]], *, seed: int
+) -> List[Dict[str, Any]]:
+    rec = Recorder()
+    users: List[Tuple[asyncio.Task, asyncio.Event]] = []
+    results = []
+    try:
+        for index, (concurrency, seconds) in enumerate(stages):
+            rec.stage = index
+            while len(users) < concurrency:
+                stop = asyncio.Event()
+                task = asyncio.create_task(virtual_user(client, rec, flow, seed + len(users), stop))
+                users.append((task, stop))
+            while len(users) > concurrency:
+                _, stop = users.pop()
+                stop.set()
+            started = time.perf_counter()
+            await asyncio.sleep(seconds)
+            elapsed = time.perf_counter() - started
+            results.append({"stage": index, "concurrency": concurrency, "seconds": round(elapsed, 2), "routes": rec.stats(index, elapsed)})
+            print(f"  stage {index}: {concurrency} users, {results[-1]['routes'][ALL]['rps']:.1f} req/s", file=sys.stderr)
+    finally:
+        for _, stop in users:
+            stop.set()
+        for task, _ in users:
+            task.cancel()
+        await asyncio.gather(*(t for t, _ in users), return_exceptions=True)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Targets
+# ---------------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def in_process() -> AsyncIterator[httpx.AsyncClient]:
+    from app.main import app
+
+    # under deliberate overload every request is "slow"; the report covers it
+    logging.getLogger("spreadsaver.request").setLevel(logging.ERROR)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=30) as client:
+            yield client
+
+
+@contextlib.asynccontextmanager
+async def remote(url: str, concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        yield client
+
+
+@contextlib.asynccontextmanager
+async def with_uvicorn(workers: int, concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env={**os.environ, "REQUEST_LOG_ENABLED": os.environ.get("REQUEST_LOG_ENABLED", "false")},
+    )
+    try:
+        url = f"http://127.0.0.1:{port}"
+        async with remote(url, concurrency) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                with contextlib.suppress(httpx.HTTPError):
+                    if (await client.get("/service/health")).status_code == 200:
+                        break
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not become healthy")
+                await asyncio.sleep(0.2)
+            yield client
+    finally:
+        proc.terminate()
+        with contextlib.suppress(subprocess.TimeoutExpired):
+            proc.wait(timeout=10)
+        if proc.poll() is None:
+            proc.kill()
+
+
+def generate_accounts(count: int, prefix: str) -> None:
+    """Load `count` generator accounts (three months of data) unless already there."""
+    from app.database import Base, engine
+    from app.models.models import User
+    from app.scripts import generate_data as gen
+    from sqlalchemy import select
+
+    Base.metadata.create_all(engine)
+    profile = gen.Profile(users=count, months=3, prefix=prefix)
+    with engine.connect() as conn:
+        if conn.execute(select(User.id).where(User.username == gen.username(profile, count - 1))).first():
+            return
+    print(f"generating {count} accounts…", file=sys.stderr)
+    gen.generate(engine, profile)
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def evaluate_slos(results: List[Dict[str, Any]], slos: List[Slo]) -> List[Tuple[int, str]]:
+    failures = []
+    for stage in results:
+        for slo in slos:
+            # "*" latency/error rules hold for each route; "*:rps" is the stage total
+            routes = [r for r in stage["routes"] if r != ALL] if slo.route == ALL and slo.metric != "rps" else [slo.route]
+            for route in routes:
+                problem = slo.check(stage["routes"].get(route, {}), route)
+                if problem:
+                    failures.append((stage["stage"], problem))
+    return failures
+
+
+def print_report(results: List[Dict[str, Any]], failures: List[Tuple[int, str]]) -> None:
+    failed_stages = {s for s, _ in failures}
+    for stage in results:
+        mark = "FAIL" if stage["stage"] in failed_stages else "ok"
+        print(f"\nstage {stage['stage']}: {stage['concurrency']} users for {stage['seconds']}s [{mark}]")
+        print(f"  {'route':36s} {'count':>7s} {'rps':>8s} {'err%':>6s} {'p50':>8s} {'p95':>8s} {'p99':>8s}")
+        for route, s in sorted(stage["routes"].items(), key=lambda kv: (kv[0] == ALL, kv[0])):
+            label = "all routes" if route == ALL else route
+            print(
+                f"  {label:36s} {s['count']:7d} {s['rps']:8.1f} {s['error_rate'] * 100:6.2f} "
+                f"{s['p50']:8.1f} {s['p95']:8.1f} {s['p99']:8.1f}"
+            )
+    passing = [s for s in results if s["stage"] not in failed_stages]
+    if passing:
+        best = max(passing, key=lambda s: s["routes"][ALL]["rps"])
+        print(f"\nhighest passing stage: {best['concurrency']} users at {best['routes'][ALL]['rps']:.1f} req/s")
+    for stage, problem in failures:
+        print(f"SLO MISSED (stage {stage}): {problem}")
+
+
+def _parse_stages(spec: str) -> List[Tuple[int, float]]:
+    stages = []
+    for part in spec.split(","):
+        users, _, seconds = part.partition(":")
+        stages.append((int(users), float(seconds or 30)))
+    return stages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SpreadSaver load test")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="load a running server instead of the in-process app")
+    target.add_argument("--uvicorn", action="store_true", help="launch uvicorn on a free port and load it")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (with --uvicorn)")
+    parser.add_argument("--stages", default="10:30,25:30,50:30", help="USERS:SECONDS,... concurrency ramp")
+    parser.add_argument("--accounts", type=int, default=1000, help="generated accounts to log in as")
+    parser.add_argument("--generate", type=int, metavar="N", help="load N generated accounts first (local database)")
+    parser.add_argument("--prefix", default="gen")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--think-ms", type=float, default=200.0, help="mean think time between steps")
+    parser.add_argument("--add-rate", type=float, default=0.4)
+    parser.add_argument("--evaluate-rate", type=float, default=0.2)
+    parser.add_argument("--month", help="dashboard month, YYYY-MM (default: current)")
+    parser.add_argument("--slo", action="append", default=[], help='e.g. "*:p95<250", "POST /auth/login:p99<800", "*:rps>40"')
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--report", help="write the full results as JSON")
+    args = parser.parse_args()
+
+    slos = [Slo.parse(s) for s in args.slo]
+    stages = _parse_stages(args.stages)
+    if args.generate:
+        generate_accounts(args.generate, args.prefix)
+    flow = Flow(
+        accounts=args.generate or args.accounts,
+        prefix=args.prefix,
+        password=args.password,
+        think=args.think_ms / 1000,
+        add_rate=args.add_rate,
+        evaluate_rate=args.evaluate_rate,
+        month=args.month or datetime.now(timezone.utc).strftime("%Y-%m"),
+    )
+    peak = max(c for c, _ in stages)
+
+    async def go() -> List[Dict[str, Any]]:
+        if args.url:
+            target_cm = remote(args.url, peak)
+        elif args.uvicorn:
+            target_cm = with_uvicorn(args.workers, peak)
+        else:
+            target_cm = in_process()
+        async with target_cm as client:
+            return await run_stages(client, flow, stages, seed=args.seed)
+
+    results = asyncio.run(go())
+    failures = evaluate_slos(results, slos)
+    print_report(results, failures)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fh:
+            json.dump(
+                {"target": args.url or ("uvicorn" if args.uvicorn else "in-process"), "workers": args.workers,
+                 "slos": [str(s) for s in slos], "stages": results,
+                 "failures": [{"stage": s, "problem": p} for s, p in failures]},
+                fh, indent=2,
+            )
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
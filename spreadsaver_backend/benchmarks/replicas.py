@@ -0,0 +1,213 @@
+# SpreadSaver – Read-replica harness
+# Simulates a primary and replicas with separate local SQLite files and drives the app
+# in-process to check the session router in app/database.py. "Replication" is an explicit
+# copy of the primary into every replica (SQLite backup API), so the replicas are exactly
+# as stale as the script makes them. Checks:
+# - reads of a user with no recent writes run on the replicas, round-robin;
+# - right after a write, the writer's reads run on the primary and include it;
+# - once READ_YOUR_WRITES_SECONDS has passed, reads go back to the (still stale)
+#   replicas, and show the write after the next replication;
+# - a member's write pins reads of the group's dashboard to the primary for everyone;
+# - an unreachable replica is skipped after its first failure.
+# Prints one line per check and exits 1 if any fails.
+#
+# Usage (from spreadsaver_backend/):
+#   python -m benchmarks.replicas [--replicas 2] [--window 1.0] [--keep DIR]
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List
+
+import httpx
+
+
+@dataclass
+class Check:
+    name: str
+    ok: bool
+    detail: str
+
+
+class StatementCounter:
+    """Statements executed per engine, by label."""
+
+    def __init__(self, engines: Dict[str, object]):
+        from sqlalchemy import event
+
+        self.counts: Counter = Counter()
+        for label, engine in engines.items():
+            event.listen(engine, "before_cursor_execute", self._hook(label))
+
+    def _hook(self, label: str):
+        def count(*_args, **_kwargs):
+            self.counts[label] += 1
+
+        return count
+
+    def snapshot(self) -> Counter:
+        return Counter(self.counts)
+
+    def since(self, before: Counter) -> Dict[str, int]:
+        return {label: n for label, n in (self.counts - before).items() if n}
+
+
+def replicate(primary: str, replicas: List[str]) -> None:
+    src = sqlite3.connect(primary)
+    try:
+        for path in replicas:
+            dst = sqlite3.connect(path)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+    finally:
+        src.close()
+
+
+async def run(workdir: str, replica_count: int, window: float) -> List[Check]:
+    primary = os.path.join(workdir, "primary.db")
+    replica_paths = [os.path.join(workdir, f"replica{i}.db") for i in range(1, replica_count + 1)]
+    os.environ["DATABASE_URL"] = f"sqlite:///{primary}"
+    os.environ["DATABASE_REPLICA_URLS"] = ",".join(f"sqlite:///{p}" for p in replica_paths)
+    os.environ["READ_YOUR_WRITES_SECONDS"] = str(window)
+    os.environ.setdefault("WARM_DEFERRED_IMPORTS", "false")
+
+    # app imports are deferred until the environment points at the simulated databases
+    from sqlalchemy import create_engine
+
+    from app import database
+    from app.database import Base, ReplicaSet, SessionLocal, engine
+    from app.main import app
+    from app.models import models  # noqa: F401  (register tables)
+    from app.services import budget_service
+    from benchmarks import dataset
+
+    Base.metadata.create_all(engine)
+    data = dataset.build(engine, 100)
+    replicate(primary, replica_paths)
+    labels = [f"replica{i}" for i in range(1, replica_count + 1)]
+    counter = StatementCounter({"primary": engine, **dict(zip(labels, database.replicas.engines))})
+    month = date.today().strftime("%Y-%m")
+    checks: List[Check] = []
+    logging.getLogger("spreadsaver.request").setLevel(logging.ERROR)  # bcrypt makes login "slow"
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replicas", timeout=30) as client:
+            login = await client.post("/auth/login", json={"username": data.username, "password": dataset.PASSWORD})
+            login.raise_for_status()
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+            async def purchase_ids() -> List[Any]:
+                resp = await client.get("/service/budget/purchases", headers=headers, params={"size": 5})
+                resp.raise_for_status()
+                return [p["id"] for p in resp.json()["items"]]
+
+            # 1. no recent writes: reads spread over the replicas
+            before = counter.snapshot()
+            for _ in range(2):
+                for path, params in (
+                    ("/service/budget/summary", {"month": dataset.BENCH_MONTH}),
+                    ("/service/budget/categories", {}),
+                    ("/service/budget/purchases", {"size": 25}),
+                    ("/badges/me", {}),
+                ):
+                    (await client.get(path, headers=headers, params=params)).raise_for_status()
+            used = counter.since(before)
+            checks.append(Check(
+                "reads run on the replicas",
+                all(used.get(label) for label in labels),
+                f"statements {used} (the primary only looks up the caller)",
+            ))
+
+            # 2. the writer reads its own write from the primary
+            created = await client.post("/service/budget/purchases", headers=headers, json={"amount": 12.5})
+            created.raise_for_status()
+            new_id = created.json()["id"]
+            before = counter.snapshot()
+            ids = await purchase_ids()
+            used = counter.since(before)
+            checks.append(Check(
+                "reads right after a write are pinned to the primary",
+                new_id in ids and not any(used.get(label) for label in labels),
+                f"purchase {new_id} {'listed' if new_id in ids else 'missing'}, statements {used}",
+            ))
+
+            # 3. after the window the replicas serve again (stale until replicated)
+            await asyncio.sleep(window + 0.2)
+            before = counter.snapshot()
+            stale = new_id not in await purchase_ids()
+            used = counter.since(before)
+            replicate(primary, replica_paths)
+            caught_up = new_id in await purchase_ids()
+            checks.append(Check(
+                "after the window reads return to the replicas",
+                stale and caught_up and any(used.get(label) for label in labels),
+                f"before replication {'stale' if stale else 'fresh'}, after {'fresh' if caught_up else 'stale'}, statements {used}",
+            ))
+
+            # 4. a member's write pins the group's reads for every member
+            with SessionLocal() as db:
+                budget_service.add_purchase(db=db, user_id=data.member_ids[0], amount=3.0, category_id=None)
+            before = counter.snapshot()
+            dashboard = await client.get(f"/service/groups/{data.group_id}/dashboard", headers=headers, params={"month": month})
+            used = counter.since(before)
+            checks.append(Check(
+                "group reads after a member's write are pinned to the primary",
+                dashboard.status_code == 200 and not any(used.get(label) for label in labels),
+                f"status {dashboard.status_code}, statements {used}",
+            ))
+
+            # 5. an unreachable replica fails once, then is skipped
+            await asyncio.sleep(window + 0.2)
+            down = create_engine(f"sqlite:///{os.path.join(workdir, 'missing', 'replica.db')}")
+            healthy = database.replicas
+            database.replicas = ReplicaSet([down, *healthy.engines], retry_seconds=60)
+            try:
+                statuses = [
+                    (await client.get("/service/budget/categories", headers=headers)).status_code for _ in range(6)
+                ]
+            finally:
+                database.replicas = healthy
+                down.dispose()
+            failures = sum(1 for s in statuses if s != 200)
+            checks.append(Check(
+                "an unreachable replica is skipped after its first failure",
+                failures <= 1 and statuses[-1] == 200,
+                f"statuses {statuses}",
+            ))
+    return checks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SpreadSaver read-replica harness")
+    parser.add_argument("--replicas", type=int, default=2)
+    parser.add_argument("--window", type=float, default=1.0, help="READ_YOUR_WRITES_SECONDS for the run")
+    parser.add_argument("--keep", metavar="DIR", help="keep the databases in DIR instead of a temporary directory")
+    args = parser.parse_args()
+
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+        checks = asyncio.run(run(args.keep, args.replicas, args.window))
+    else:
+        with tempfile.TemporaryDirectory(prefix="spreadsaver-replicas-") as workdir:
+            checks = asyncio.run(run(workdir, args.replicas, args.window))
+
+    for check in checks:
+        print(f"{'PASS' if check.ok else 'FAIL'}  {check.name}: {check.detail}")
+    if not all(check.ok for check in checks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# SpreadSaver – Benchmark suite
+# Services and calculation helpers against a real database, per data size:
+# calculations.py helpers, budget summaries/listings, register/login (bcrypt), badge
+# evaluation and group queries (dashboard cold/warm, members, roles, user groups).
+# Each case reports per-call median/p95 and its DB statement count; results can be
+# saved as a JSON baseline and later runs compared against it (exit 1 on regression).
+#
+# Usage (from spreadsaver_backend/):
+#   python -m benchmarks.suite --db sqlite --sizes 100,1000,10000 --save sqlite-main
+#   python -m benchmarks.suite --db sqlite --compare sqlite-main [--threshold 1.25]
+#   python -m benchmarks.suite --db postgres          # disposable local cluster or docker
+#   python -m benchmarks.suite --database-url postgresql://... --sizes 1000
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import os
+import sys
+from typing import Callable, Dict, List, Optional
+
+from benchmarks import harness
+from benchmarks.databases import database
+
+
+def _cases(db, data, month: str) -> Dict[str, Callable[[], object]]:
+    # app imports are deferred until DATABASE_URL points at the benchmark database
+    from app.services import auth_service, badge_service, budget_service, cache_service, group_service
+    from app.services.membership_index import index as membership_index
+    from app.utils import calculations
+    from benchmarks.dataset import PASSWORD
+
+    rows = data.purchase_rows
+    actual = calculations.aggregate_by_category(rows)
+    planned = calculations.allocate_budget(5000, {cat: 100 / len(actual) for cat in actual})
+    dates = [r["occurred_at"].date() for r in rows]
+    daily = list(calculations.aggregate_by_month(rows).values()) * max(1, len(rows) // 3)
+    counter = itertools.count()
+
+    def register():
+        n = next(counter)
+        auth_service.register_user(db, username=f"reg{data.size}_{n}", email=f"reg{data.size}_{n}@bench.local", password=PASSWORD)
+
+    def dashboard_cold():
+        cache_service.reset()
+        membership_index.clear()
+        group_service.get_group_dashboard(db, group_id=data.group_id, month=month)
+
+    def members_cold():
+        membership_index.clear()
+        group_service.list_group_members(db, group_id=data.group_id)
+
+    return {
+        "calc.normalize_rules": lambda: calculations.normalize_rules({"Needs": 50, "Wants": 30, "Savings": 20}),
+        "calc.allocate_budget": lambda: calculations.allocate_budget(5000, {"Needs": 50, "Wants": 30, "Savings": 20}),
+        "calc.compliance_report": lambda: calculations.compliance_report(planned, actual),
+        "calc.aggregate_by_category": lambda: calculations.aggregate_by_category(rows),
+        "calc.aggregate_by_month": lambda: calculations.aggregate_by_month(rows),
+        "calc.longest_no_spend_streak": lambda: calculations.longest_no_spend_streak(dates),
+        "calc.moving_average": lambda: calculations.moving_average(daily, window=7),
+        "budget.get_month_summary": lambda: budget_service.get_month_summary(db, user_id=data.user_id, month=month),
+        "budget.list_purchases": lambda: budget_service.list_purchases(db, user_id=data.user_id, month=month),
+        "budget.list_purchases_page": lambda: budget_service.list_purchases(db, user_id=data.user_id, limit=50, offset=50),
+        "auth.register_user": register,
+        "auth.authenticate_user": lambda: auth_service.authenticate_user(db, data.username, PASSWORD),
+        "badges.evaluate_and_assign": lambda: badge_service.evaluate_and_assign_badges(db, data.user_id),
+        "groups.dashboard_cold": dashboard_cold,
+        "groups.dashboard_warm": lambda: group_service.get_group_dashboard(db, group_id=data.group_id, month=month),
+        "groups.list_members_cold": members_cold,
+        "groups.get_member_role": lambda: group_service.get_member_role(db, group_id=data.group_id, user_id=data.user_id),
+        "groups.list_user_groups": lambda: group_service.list_user_groups(db, user_id=data.user_id),
+    }
+
+
+def run(url: str, sizes: List[int], *, pattern: Optional[str], repeat: int, min_time: float) -> List[harness.Result]:
+    os.environ["DATABASE_URL"] = url
+    from app.database import Base, SessionLocal, engine
+    from app.models import models  # noqa: F401  (register tables)
+    from benchmarks import dataset
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    dialect = engine.dialect.name
+    results = []
+    try:
+        for size in sizes:
+            data = dataset.build(engine, size)
+            with SessionLocal() as db:
+                for name, fn in _cases(db, data, dataset.BENCH_MONTH).items():
+                    if pattern and pattern not in name:
+                        continue
+                    # bcrypt dominates the auth cases; a few calls are plenty
+                    slow = name.startswith("auth.")
+                    result = harness.measure(
+                        name, fn, size=size, db=dialect,
+                        repeat=3 if slow else repeat, min_time=0.0 if slow else min_time,
+                        count_queries=not name.startswith("calc."),
+                    )
+                    results.append(result)
+                    print(f"  {result.key:52s} {result.median_ms:10.3f} ms", file=sys.stderr)
+                    db.rollback()
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SpreadSaver benchmark suite")
+    parser.add_argument("--db", choices=("sqlite", "postgres"), default="sqlite")
+    parser.add_argument("--database-url", help="use this database instead of a disposable one (tables are dropped!)")
+    parser.add_argument("--sizes", default="100,1000,10000", help="comma-separated purchase counts")
+    parser.add_argument("-k", dest="pattern", help="only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per timing round")
+    parser.add_argument("--save", metavar="NAME", help="write results to benchmarks/baselines/NAME.json (or a .json path)")
+    parser.add_argument("--compare", metavar="NAME", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="median ratio counted as a regression")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    with database(args.db, args.database_url) as url:
+        results = run(url, sizes, pattern=args.pattern, repeat=args.repeat, min_time=args.min_time)
+
+    comparisons = None
+    if args.compare:
+        comparisons = harness.compare(results, harness.load_baseline(args.compare), threshold=args.threshold)
+    harness.print_results(results, comparisons)
+
+    if args.save:
+        path = harness.save_baseline(
+            args.save, results, params={"sizes": sizes, "repeat": args.repeat, "min_time": args.min_time}
+        )
+        print(f"saved baseline: {path}")
+    if comparisons is not None:
+        regressed = [c for c in comparisons if c.regressed]
+        for c in regressed:
+            print(
+                f"REGRESSION {c.key}: {c.baseline_ms:.3f} → {c.current_ms:.3f} ms ({c.ratio:.2f}x), "
+                f"queries {c.baseline_queries} → {c.current_queries}"
+            )
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
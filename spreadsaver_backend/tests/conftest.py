@@ -0,0 +1,111 @@
+# SpreadSaver – Test fixtures
+# The app runs against a throwaway SQLite file with process-local caches; every test
+# starts from empty tables and empty caches.
+#
+# Usage (from spreadsaver_backend/):
+#   python -m pytest -q
+
+from __future__ import annotations
+
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+import pytest
+
+# Settings are read at import time: point the app at a test database before importing it
+_workdir = tempfile.mkdtemp(prefix="spreadsaver-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ.setdefault("CACHE_BACKEND", "memory")
+os.environ.setdefault("STRIPE_SECRET_KEY", "")
+os.environ.setdefault("PROFILER_ENABLED", "true")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app as fastapi_app  # noqa: E402
+from app.models import models  # noqa: E402
+from app.routes.auth import create_access_token  # noqa: E402
+from app.services import cache_service, leaderboard_service, membership_index, subscription_service  # noqa: E402
+
+pytest_plugins = ["app.utils.pytest_query_budget", "pytester"]
+
+Base.metadata.create_all(engine)
+
+
+@pytest.fixture(autouse=True)
+def _clean_state():
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    cache_service.reset()
+    membership_index.index.clear()
+    leaderboard_service.reset()
+    subscription_service.reset()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    """Create users directly (no bcrypt, no HTTP)."""
+
+    def make(username: str = None, *, tier: str = "free", is_admin: bool = False):
+        username = username or f"user{uuid.uuid4().hex[:8]}"
+        user = models.User(
+            username=username,
+            email=f"{username}@example.com",
+            hashed_password="x",
+            subscription_tier=tier,
+            is_admin=is_admin,
+        )
+        db.add(user)
+        db.commit()
+        return user
+
+    return make
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user()
+
+
+@pytest.fixture
+def client():
+    return TestClient(fastapi_app)
+
+
+@pytest.fixture
+def api(user):
+    """A client signed in as `user`."""
+    return TestClient(fastapi_app, headers=auth_headers(user))
+
+
+def auth_headers(user) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.username})}"}
+
+
+@contextmanager
+def count_statements():
+    """Collect the SQL statements executed inside the block."""
+    statements = []
+
+    def before(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
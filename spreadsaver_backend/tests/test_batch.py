@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from app.services import budget_service
+
+
+def _batch(api, *operations):
+    ops = [{"id": str(i), **op} for i, op in enumerate(operations)]
+    response = api.post("/batch", json={"operations": ops})
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+def test_operations_match_the_single_routes(api, db, user):
+    food = budget_service.upsert_category(db, user_id=user.id, name="Food")
+    budget_service.add_purchase(db, user_id=user.id, amount=7, category_id=food["id"], occurred_at=datetime(2025, 6, 2))
+
+    summary, categories, purchases, badges = _batch(
+        api,
+        {"path": "/service/budget/summary", "params": {"month": "2025-06"}},
+        {"path": "/service/budget/categories"},
+        {"path": "/service/budget/purchases"},
+        {"path": "/badges/me"},
+    )
+    single = api.get("/service/budget/summary", params={"month": "2025-06"}).json()
+    assert summary == {"id": "0", "status": 200, "body": single}
+    assert [c["name"] for c in categories["body"]] == ["Food"]
+    assert [p["amount"] for p in purchases["body"]["items"]] == [7.0]
+    assert badges == {"id": "3", "status": 200, "body": []}
+
+
+def test_profile_operations(api, db, user, make_user):
+    other = make_user("alice")
+    me, by_name, missing = _batch(
+        api,
+        {"path": "/auth/me"},
+        {"path": "/users/alice"},
+        {"path": "/users/nobody"},
+    )
+    assert me["status"] == 200 and me["body"]["id"] == str(user.id)
+    assert by_name["status"] == 200 and by_name["body"]["id"] == str(other.id)
+    assert missing["status"] == 404
+
+
+def test_category_filter_is_parsed_as_a_uuid(api, db, user):
+    food = budget_service.upsert_category(db, user_id=user.id, name="Food")
+    budget_service.add_purchase(db, user_id=user.id, amount=7, category_id=food["id"], occurred_at=datetime(2025, 6, 2))
+    budget_service.add_purchase(db, user_id=user.id, amount=1, category_id=None, occurred_at=datetime(2025, 6, 3))
+
+    filtered, malformed = _batch(
+        api,
+        {"path": "/service/budget/purchases", "params": {"category_id": str(food["id"])}},
+        {"path": "/service/budget/purchases", "params": {"category_id": "1"}},
+    )
+    assert [p["amount"] for p in filtered["body"]["items"]] == [7.0]
+    assert malformed == {"id": "1", "status": 422, "body": {"detail": "'category_id' must be a UUID"}}
+
+
+def test_failures_are_reported_per_operation(api):
+    missing_month, unknown, wrong_method, ok = _batch(
+        api,
+        {"path": "/service/budget/summary"},
+        {"path": "/admin/anything"},
+        {"method": "POST", "path": "/badges/me"},
+        {"path": "/service/budget/categories"},
+    )
+    assert missing_month["status"] == 422
+    assert unknown["status"] == 404
+    assert wrong_method["status"] == 404
+    assert ok["status"] == 200
+
+
+def test_batches_are_bounded_and_authenticated(api, client):
+    too_many = [{"id": str(i), "path": "/badges/me"} for i in range(21)]
+    assert api.post("/batch", json={"operations": too_many}).status_code == 422
+    assert client.post("/batch", json={"operations": [{"id": "1", "path": "/badges/me"}]}).status_code == 401
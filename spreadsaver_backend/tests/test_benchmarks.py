@@ -0,0 +1,64 @@
+import pytest
+
+from app.database import engine
+from app.services import budget_service
+from benchmarks import dataset, harness
+
+
+def _result(name="case", *, median_ms=1.0, queries=1):
+    return harness.Result(
+        name=name, size=10, db="sqlite", median_ms=median_ms, min_ms=median_ms,
+        p95_ms=median_ms, stdev_ms=0.0, calls=1, queries=queries,
+    )
+
+
+def test_measure_counts_statements_per_call(db):
+    data = dataset.build(engine, 20)
+    result = harness.measure(
+        "budget.get_month_summary",
+        lambda: budget_service.get_month_summary(db, user_id=data.user_id, month=dataset.BENCH_MONTH),
+        size=20, db="sqlite", repeat=2, min_time=0.0,
+    )
+    assert result.key == "sqlite:budget.get_month_summary[20]"
+    assert result.queries >= 1
+    assert result.calls == 2
+    assert result.min_ms <= result.median_ms <= result.p95_ms
+
+
+def test_pure_python_cases_have_no_query_count():
+    result = harness.measure("calc", lambda: sum(range(10)), size=1, db="sqlite", repeat=3, min_time=0.0, count_queries=False)
+    assert result.queries is None
+
+
+def test_dataset_shape(db):
+    data = dataset.build(engine, 30)
+    assert len(data.purchase_rows) == 30
+    assert len(data.member_ids) == 3
+    assert len(data.category_ids) >= 3  # rent, utilities and subscriptions at least
+    assert all(row["occurred_at"].strftime("%Y-%m") <= dataset.BENCH_MONTH for row in data.purchase_rows)
+
+
+def test_baseline_round_trip(tmp_path):
+    path = harness.save_baseline(str(tmp_path / "base.json"), [_result()], params={"sizes": [10]})
+    assert harness.load_baseline(path)["sqlite:case[10]"]["median_ms"] == 1.0
+
+
+@pytest.mark.parametrize(
+    "median_ms, queries, regressed",
+    [
+        (1.1, 1, False),   # within the threshold
+        (1.3, 1, True),    # 1.3x slower
+        (1.0, 2, True),    # one more query per call
+        (0.5, 1, False),   # faster
+    ],
+)
+def test_compare_flags_regressions(median_ms, queries, regressed):
+    baseline = {"sqlite:case[10]": {"median_ms": 1.0, "queries": 1}}
+    [comparison] = harness.compare([_result(median_ms=median_ms, queries=queries)], baseline)
+    assert comparison.regressed is regressed
+
+
+def test_compare_ignores_microsecond_noise_and_new_cases():
+    baseline = {"sqlite:case[10]": {"median_ms": 0.01, "queries": None}}
+    comparisons = harness.compare([_result(median_ms=0.03, queries=None), _result("new")], baseline)
+    assert [(c.key, c.ratio, c.regressed) for c in comparisons] == [("sqlite:case[10]", 3.0, False)]
@@ -0,0 +1,119 @@
+from datetime import date, datetime
+
+from app.config.settings import settings
+from app.services import budget_service, cache_service
+from app.utils.cache import LRUCache, LocalCacheBackend
+
+
+def _summary(api, month):
+    response = api.get("/service/budget/summary", params={"month": month})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_summary_is_cached_until_a_write_in_that_month(api, db, user):
+    budget_service.add_purchase(db, user_id=user.id, amount=10, category_id=None, occurred_at=datetime(2025, 1, 5))
+    assert _summary(api, "2025-01")["total_spent"] == 10.0
+    key = cache_service.summary_key(user.id, "2025-01")
+    assert cache_service.get_summary(key) is not None
+
+    # a write in another month leaves this one's entry reachable
+    budget_service.add_purchase(db, user_id=user.id, amount=1, category_id=None, occurred_at=datetime(2025, 3, 1))
+    assert cache_service.summary_key(user.id, "2025-01") == key
+
+    budget_service.add_purchase(db, user_id=user.id, amount=5, category_id=None, occurred_at=datetime(2025, 1, 20))
+    assert cache_service.summary_key(user.id, "2025-01") != key
+    assert _summary(api, "2025-01")["total_spent"] == 15.0
+
+
+def test_category_and_rule_writes_invalidate_every_month(db, user):
+    keys = {cache_service.summary_key(user.id, m) for m in ("2025-01", "2025-02")}
+
+    budget_service.upsert_category(db, user_id=user.id, name="Food")
+    after_category = {cache_service.summary_key(user.id, m) for m in ("2025-01", "2025-02")}
+    assert not keys & after_category
+
+    budget_service.upsert_budget_rule(
+        db, user_id=user.id, label="50/30/20", essential_pct=50, discretionary_pct=30, savings_pct=20
+    )
+    after_rule = {cache_service.summary_key(user.id, m) for m in ("2025-01", "2025-02")}
+    assert not after_category & after_rule
+
+
+def test_versions_are_per_user(make_user, db):
+    alice, bob = make_user(), make_user()
+    key = cache_service.summary_key(bob.id, "2025-01")
+    budget_service.add_purchase(db, user_id=alice.id, amount=1, category_id=None, occurred_at=datetime(2025, 1, 2))
+    assert cache_service.summary_key(bob.id, "2025-01") == key
+
+
+def test_only_past_months_are_kept_without_a_ttl():
+    this_month = date.today().strftime("%Y-%m")
+    assert cache_service.summary_ttl("2001-01") is None
+    assert cache_service.summary_ttl(this_month) == settings.SUMMARY_CACHE_TTL_SECONDS
+    assert cache_service.summary_ttl("2999-01") == settings.SUMMARY_CACHE_TTL_SECONDS
+
+
+def test_past_months_expire_from_the_shared_cache(monkeypatch):
+    ttls = {}
+    shared = LocalCacheBackend()
+    monkeypatch.setattr(shared, "set", lambda key, value, *, ttl=None: ttls.__setitem__(key, ttl))
+    monkeypatch.setattr(cache_service, "_shared", shared)
+
+    this_month = date.today().strftime("%Y-%m")
+    cache_service.set_summary("summary:u:2001-01", "2001-01", b"{}")
+    cache_service.set_summary(f"summary:u:{this_month}", this_month, b"{}")
+    assert ttls == {
+        "summary:u:2001-01": settings.SUMMARY_CACHE_SHARED_TTL_SECONDS,
+        f"summary:u:{this_month}": settings.SUMMARY_CACHE_TTL_SECONDS,
+    }
+    assert settings.SUMMARY_CACHE_SHARED_TTL_SECONDS >= 24 * 3600
+
+
+def test_lru_is_bounded_by_entries_and_bytes():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    cache.get("a")
+    cache.set("c", b"3")
+    assert cache.get("b") is None and cache.get("a") == b"1"
+
+    sized = LRUCache(max_entries=10, max_bytes=10)
+    sized.set("a", b"x" * 6)
+    sized.set("b", b"y" * 6)
+    assert sized.get("a") is None and sized.size_bytes == 6
+    sized.set("huge", b"z" * 11)
+    assert sized.get("huge") is None and sized.get("b") is not None
+
+
+def test_local_backend_counts_and_expires(monkeypatch):
+    backend = LocalCacheBackend()
+    assert backend.get_ints(["v:a", "v:b"]) == (0, 0)
+    assert [backend.incr("v:a") for _ in range(3)] == [1, 2, 3]
+
+    clock = [100.0]
+    monkeypatch.setattr("app.utils.cache.time.monotonic", lambda: clock[0])
+    backend.set("k", b"v", ttl=5)
+    assert backend.get("k") == b"v"
+    clock[0] += 6
+    assert backend.get("k") is None
+
+
+def test_unpadded_month_sees_backdated_writes(api, db, user):
+    budget_service.add_purchase(db, user_id=user.id, amount=10, category_id=None, occurred_at=datetime(2025, 1, 5))
+    before = api.get("/service/budget/summary", params={"month": "2025-1"})
+    assert before.json() == _summary(api, "2025-01")
+    assert before.json()["month"] == "2025-01"
+
+    budget_service.add_purchase(db, user_id=user.id, amount=5, category_id=None, occurred_at=datetime(2025, 1, 20))
+    after = api.get(
+        "/service/budget/summary", params={"month": "2025-1"}, headers={"If-None-Match": before.headers["ETag"]}
+    )
+    assert after.status_code == 200
+    assert after.json()["total_spent"] == 15.0
+    assert after.headers["ETag"] != before.headers["ETag"]
+
+
+def test_malformed_month_is_rejected(api):
+    for month in ("2025-13", "January", "2025/01"):
+        assert api.get("/service/budget/summary", params={"month": month}).status_code == 422, month
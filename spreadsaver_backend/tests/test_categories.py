@@ -0,0 +1,118 @@
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.database import engine
+from app.models.models import Category, User
+from app.services import budget_service, cache_service
+from tests.conftest import count_statements
+
+
+def _rows(db, user):
+    db.expire_all()
+    return sorted((c.name, c.color, c.change_seq) for c in db.scalars(select(Category).where(Category.user_id == user.id)))
+
+
+def test_upsert_categories_creates_missing_in_one_insert(db, user):
+    budget_service.upsert_category(db, user_id=user.id, name="Rent")
+    with count_statements() as statements:
+        out = budget_service.upsert_categories(
+            db, user_id=user.id, categories=["rent", {"name": " Groceries ", "color": "#0f0"}, "Fun", "GROCERIES"]
+        )
+    assert [c["name"] for c in out] == ["Rent", "Groceries", "Fun", "Groceries"]
+    assert out[1]["id"] == out[3]["id"]
+    assert out[1]["color"] == "#0f0"
+    inserts = [s for s in statements if s.startswith("INSERT INTO categories")]
+    assert len(inserts) == 1
+    # one change sequence per new row, contiguous, after the first category's
+    assert _rows(db, user) == [("Fun", None, 3), ("Groceries", "#0f0", 2), ("Rent", None, 1)]
+    assert db.get(User, user.id).change_seq == 3
+
+
+def test_matching_categories_write_nothing(db, user):
+    budget_service.upsert_categories(db, user_id=user.id, categories=[{"name": "Rent", "color": "#f00"}])
+    version = cache_service.data_version(user.id, cache_service.SCOPE_CATEGORIES)
+    with count_statements() as statements:
+        out = budget_service.upsert_categories(db, user_id=user.id, categories=["RENT", {"name": "rent", "color": "#f00"}])
+    assert [c["color"] for c in out] == ["#f00", "#f00"]
+    assert statements == []  # answered from the cached index
+    assert cache_service.data_version(user.id, cache_service.SCOPE_CATEGORIES) == version
+
+
+def test_color_changes_are_one_update(db, user):
+    budget_service.upsert_categories(db, user_id=user.id, categories=["Rent", "Fun"])
+    with count_statements() as statements:
+        budget_service.upsert_categories(
+            db, user_id=user.id, categories=[{"name": "rent", "color": "#111"}, {"name": "fun", "color": "#222"}]
+        )
+    assert len([s for s in statements if s.startswith("UPDATE categories")]) == 1
+    assert _rows(db, user) == [("Fun", "#222", 4), ("Rent", "#111", 3)]
+
+
+def test_blank_names_are_rejected(db, user):
+    with pytest.raises(ValueError, match="Category name is required"):
+        budget_service.upsert_categories(db, user_id=user.id, categories=["Rent", "  "])
+    assert _rows(db, user) == []
+
+
+def test_category_index_is_cached_per_version(db, user):
+    rent = budget_service.upsert_category(db, user_id=user.id, name="Rent")
+    with count_statements() as statements:
+        assert budget_service.resolve_category_id(db, user_id=user.id, name=" RENT ") == rent["id"]
+        assert budget_service.resolve_category_id(db, user_id=user.id, name="Fun") is None
+    assert statements == []  # the write stored the index it produced
+
+    cache_service.invalidate_categories(user.id)  # e.g. another worker's write
+    with count_statements() as statements:
+        budget_service.category_index(db, user_id=user.id)
+        budget_service.category_index(db, user_id=user.id)
+    assert len(statements) == 1
+
+
+def test_stale_index_is_rechecked_before_inserting(db, user):
+    budget_service.category_index(db, user_id=user.id)  # cache the empty index
+    db.add(Category(user_id=user.id, name="Rent"))  # written without bumping the version
+    db.commit()
+
+    [rent] = budget_service.upsert_categories(db, user_id=user.id, categories=["rent"])
+    assert rent["name"] == "Rent"
+    assert [name for name, _, _ in _rows(db, user)] == ["Rent"]
+
+
+def test_names_are_unique_per_user_whatever_the_case(db, make_user):
+    alice, bob = make_user(), make_user()
+    budget_service.upsert_category(db, user_id=alice.id, name="Rent")
+    budget_service.upsert_category(db, user_id=bob.id, name="rent")  # other users are unaffected
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(insert(Category).values(user_id=alice.id, name="RENT"))
+
+
+def test_a_concurrently_created_name_is_reused(db, user, monkeypatch):
+    load = budget_service._load_category_index
+
+    def load_then_race(db, user_id):
+        index = load(db, user_id)
+        with engine.begin() as conn:  # another worker creates "Rent" right after we looked
+            conn.execute(insert(Category).values(user_id=user_id, name="Rent", change_seq=99))
+        monkeypatch.setattr(budget_service, "_load_category_index", load)
+        return index
+
+    monkeypatch.setattr(budget_service, "_load_category_index", load_then_race)
+    rent, fun = budget_service.upsert_categories(db, user_id=user.id, categories=[{"name": "rent", "color": "#111"}, "Fun"])
+
+    assert rent["name"] == "Rent" and rent["color"] == "#111"
+    assert budget_service.resolve_category_id(db, user_id=user.id, name="RENT") == rent["id"]
+    rows = _rows(db, user)
+    assert [(name, color) for name, color, _ in rows] == [("Fun", None), ("Rent", "#111")]
+    assert sorted(seq for _, _, seq in rows) == [1, 2]  # the lost insert's sequence recolors Rent
+
+
+def test_purchase_by_category_name(api, db, user):
+    created = api.post("/service/budget/purchases", json={"amount": 9.5, "category": "coffee", "occurred_at": "2025-03-01T08:00:00"})
+    assert created.status_code == 201
+    again = api.post("/service/budget/purchases", json={"amount": 3, "category": "COFFEE", "occurred_at": "2025-03-02T08:00:00"})
+    assert again.json()["category_id"] == created.json()["category_id"]
+    assert [c["name"] for c in api.get("/service/budget/categories").json()] == ["coffee"]
+    summary = api.get("/service/budget/summary", params={"month": "2025-03"}).json()
+    assert summary["by_category"] == {"coffee": 12.5}
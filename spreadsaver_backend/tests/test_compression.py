@@ -0,0 +1,176 @@
+import asyncio
+import gzip
+import zlib
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import compression
+from app.middleware.compression import CompressionMiddleware, available_encodings, negotiate
+from app.services import budget_service
+
+BIG = "spreadsaver " * 200  # ~2.4 KB, compresses well
+
+
+def _app(**options):
+    app = FastAPI()
+
+    @app.get("/text")
+    def text():
+        return PlainTextResponse(BIG, headers={"ETag": '"v1"', "Vary": "Authorization"})
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/image")
+    def image():
+        return Response(BIG.encode(), media_type="image/png")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((BIG for _ in range(3)), media_type="text/plain")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter(["data: x\n\n" * 200]), media_type="text/event-stream")
+
+    app.add_middleware(CompressionMiddleware, **{"minimum_size": 1024, **options})
+    return TestClient(app)
+
+
+def _get(client, path, accept="gzip"):
+    return client.get(path, headers={"Accept-Encoding": accept})
+
+
+# ---------------------------------------------------------------------------
+# Negotiation
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("gzip", "gzip"),
+        ("gzip, br, zstd", "zstd"),  # server preference breaks ties
+        ("zstd;q=0.5, br;q=0.8, gzip;q=0.1", "br"),
+        ("br;q=0, gzip", "gzip"),
+        ("*", "zstd"),
+        ("*;q=0.5, gzip;q=0", "zstd"),
+        ("identity", None),
+        ("gzip;q=0", None),
+        ("gzip;q=oops", None),
+        ("", None),
+    ],
+)
+def test_negotiate_honours_q_values_and_server_order(accept, expected):
+    assert negotiate(accept, ["zstd", "br", "gzip"]) == expected
+
+
+def test_missing_optional_codecs_fall_back_to_gzip(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    monkeypatch.setattr(compression, "zstandard", None)
+    assert available_encodings() == ["gzip"]
+
+    client = _app()
+    response = _get(client, "/text", "zstd, br, gzip;q=0.5")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == BIG
+
+    assert "content-encoding" not in _get(client, "/text", "zstd, br").headers
+
+
+@pytest.mark.parametrize("coding, module", [("br", "brotli"), ("zstd", "zstandard")])
+def test_optional_codecs_are_used_when_installed(coding, module):
+    pytest.importorskip(module)
+    response = _get(_app(), "/text", coding)
+    assert response.headers["content-encoding"] == coding
+
+
+# ---------------------------------------------------------------------------
+# What gets compressed
+# ---------------------------------------------------------------------------
+
+def test_compressed_response_headers():
+    response = _get(_app(), "/text")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Authorization, Accept-Encoding"
+    assert response.headers["etag"] == 'W/"v1"'
+    assert int(response.headers["content-length"]) < len(BIG)
+    assert response.text == BIG
+
+
+def test_identity_requests_are_untouched():
+    response = _get(_app(), "/text", "identity")
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"v1"'
+    assert response.headers["vary"] == "Authorization"
+
+
+@pytest.mark.parametrize("path", ["/small", "/image", "/events"])
+def test_small_and_non_text_bodies_are_untouched(path):
+    response = _get(_app(), path)
+    assert "content-encoding" not in response.headers
+
+
+def test_minimum_size_is_configurable():
+    response = _get(_app(minimum_size=1), "/small")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == "tiny"
+
+
+def test_large_bodies_compress_in_a_worker_thread():
+    response = _get(_app(threadpool_min_size=1), "/text")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == BIG
+
+
+# ---------------------------------------------------------------------------
+# Streaming
+# ---------------------------------------------------------------------------
+
+def test_streaming_body_is_compressed_without_a_length():
+    response = _get(_app(), "/stream")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == BIG * 3
+
+
+def test_each_streamed_chunk_is_flushed():
+    chunks = [b"a" * 100, b"b" * 100, b""]
+
+    async def inner(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(inner, minimum_size=1)(scope, None, send))
+
+    bodies = [m["body"] for m in sent if m["type"] == "http.response.body"]
+    decoder = zlib.decompressobj(31)
+    # every chunk decodes on arrival; the client never waits for the end of the stream
+    assert decoder.decompress(bodies[0]) == chunks[0]
+    assert decoder.decompress(bodies[1]) == chunks[1]
+    assert gzip.decompress(b"".join(bodies)) == b"".join(chunks)
+    assert sent[-1]["more_body"] is False
+
+
+def test_weakened_etag_still_revalidates(api, db, user):
+    food = budget_service.upsert_category(db, user_id=user.id, name="Food")
+    for day in range(1, 21):
+        budget_service.add_purchase(db, user_id=user.id, amount=day, category_id=food["id"], occurred_at=datetime(2025, 6, day))
+
+    first = _get(api, "/service/budget/purchases")
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["etag"].startswith("W/")
+
+    again = api.get("/service/budget/purchases", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
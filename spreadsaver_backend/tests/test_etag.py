@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from app.services import budget_service, cache_service
+from app.utils.etag import etag_matches, make_etag
+from tests.conftest import auth_headers
+
+
+def _get(api, path, etag=None, **params):
+    return api.get(path, params=params, headers={"If-None-Match": etag} if etag else {})
+
+
+def test_matching_etag_is_not_modified_until_a_write(api, db, user):
+    first = _get(api, "/service/budget/purchases")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = _get(api, "/service/budget/purchases", etag)
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+
+    budget_service.add_purchase(db, user_id=user.id, amount=3, category_id=None, occurred_at=datetime(2025, 2, 1))
+    changed = _get(api, "/service/budget/purchases", etag)
+    assert changed.status_code == 200
+    assert len(changed.json()["items"]) == 1
+
+
+def test_summary_etag_follows_its_month_only(api, db, user):
+    etag = _get(api, "/service/budget/summary", month="2025-01").headers["ETag"]
+
+    budget_service.add_purchase(db, user_id=user.id, amount=1, category_id=None, occurred_at=datetime(2025, 2, 1))
+    assert _get(api, "/service/budget/summary", etag, month="2025-01").status_code == 304
+
+    budget_service.add_purchase(db, user_id=user.id, amount=1, category_id=None, occurred_at=datetime(2025, 1, 9))
+    assert _get(api, "/service/budget/summary", etag, month="2025-01").status_code == 200
+
+
+def test_etag_does_not_survive_a_fresh_version_store(api):
+    etag = _get(api, "/service/budget/purchases").headers["ETag"]
+    cache_service.reset()  # what a restart does to the in-process version counters
+    assert _get(api, "/service/budget/purchases", etag).status_code == 200
+
+
+def test_etag_differs_per_user(api, client, make_user):
+    etag = _get(api, "/service/budget/purchases").headers["ETag"]
+    other = make_user()
+    response = client.get("/service/budget/purchases", headers={**auth_headers(other), "If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_purchases_filter_by_category_uuid(api, db, user):
+    food = budget_service.upsert_category(db, user_id=user.id, name="Food")
+    budget_service.add_purchase(db, user_id=user.id, amount=4, category_id=food["id"])
+    budget_service.add_purchase(db, user_id=user.id, amount=6, category_id=None)
+
+    items = _get(api, "/service/budget/purchases", category_id=str(food["id"])).json()["items"]
+    assert [i["amount"] for i in items] == [4.0]
+
+    bad = _get(api, "/service/budget/purchases", category_id="1")
+    assert bad.status_code == 422
+    assert "SELECT" not in bad.text and "AttributeError" not in bad.text
+
+
+def test_badges_answer_304_while_unchanged(api):
+    etag = _get(api, "/badges/me").headers["ETag"]
+    assert _get(api, "/badges/me", etag).status_code == 304
+
+
+def test_if_none_match_parsing():
+    etag = make_etag("a", 1)
+    assert etag.startswith('"') and etag == make_etag("a", 1) != make_etag("a", 2)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"other"', etag)
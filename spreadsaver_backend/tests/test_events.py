@@ -0,0 +1,292 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.database import engine
+from app.services import budget_service, event_service, group_service
+from app.utils import broker as broker_module
+from app.utils.broker import Broker, LocalBroker, RedisBroker, build_broker
+from tests.conftest import auth_headers
+
+
+class RecordingBroker(Broker):
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, data):
+        event, payload = data.decode().split("\n")[:2]
+        self.published.append((channel, event[len("event: "):], json.loads(payload[len("data: "):])))
+
+
+@pytest.fixture
+def published(monkeypatch):
+    recorder = RecordingBroker()
+    monkeypatch.setattr(event_service, "broker", recorder)
+    return recorder.published
+
+
+@pytest.fixture
+def group(db, make_user):
+    owner = make_user("owner")
+    created = group_service.create_group(db, owner_id=owner.id, name="Flat")
+    return {"id": created["id"], "owner": owner}
+
+
+# ---------------------------------------------------------------------------
+# Publishing
+# ---------------------------------------------------------------------------
+
+def test_purchase_writes_publish_deltas(db, group, published):
+    owner = group["owner"]
+    food = budget_service.upsert_category(db, user_id=owner.id, name="Food")
+    purchase = budget_service.add_purchase(
+        db, user_id=owner.id, amount=12.5, category_id=food["id"], occurred_at=datetime(2025, 6, 2)
+    )
+    budget_service.delete_purchase(db, user_id=owner.id, purchase_id=purchase["id"])
+
+    user_channel, group_channel = event_service.user_channel(owner.id), event_service.group_channel(group["id"])
+    deltas = [(p["month"], p["amount_delta"]) for c, e, p in published if (c, e) == (user_channel, "summary.delta")]
+    activity = [p["amount_delta"] for c, e, p in published if (c, e) == (group_channel, "member.activity")]
+    assert deltas == [("2025-06", 12.5), ("2025-06", -12.5)]
+    assert activity == [12.5, -12.5]
+
+
+def test_membership_writes_publish_to_the_group(db, make_user, group, published):
+    member = make_user()
+    group_service.add_member(db, group_id=group["id"], target_user_id=member.id)
+    group_service.set_member_role(db, group_id=group["id"], target_user_id=member.id, role="admin")
+    group_service.remove_member(db, group_id=group["id"], target_user_id=member.id)
+
+    changes = [p["role"] for c, e, p in published if e == "member.changed"]
+    assert changes == ["member", "admin", None]
+    assert {c for c, e, p in published} == {event_service.group_channel(group["id"])}
+
+
+# ---------------------------------------------------------------------------
+# Hub
+# ---------------------------------------------------------------------------
+
+def test_hub_shares_one_upstream_subscription_per_channel():
+    broker = LocalBroker()
+
+    async def scenario():
+        hub = event_service.EventHub(broker, queue_size=10)
+        first, second = await hub.connect("c"), await hub.connect("c")
+        assert broker.subscriber_count("c") == 1
+        assert hub.stats() == {"channels": 1, "clients": 2}
+
+        broker.publish("c", b"hello")
+        assert await asyncio.wait_for(first.queue.get(), 1) == b"hello"
+        assert await asyncio.wait_for(second.queue.get(), 1) == b"hello"
+
+        await hub.disconnect("c", first)
+        assert broker.subscriber_count("c") == 1
+        await hub.disconnect("c", second)
+        assert broker.subscriber_count("c") == 0
+        assert hub.stats() == {"channels": 0, "clients": 0}
+
+    asyncio.run(scenario())
+
+
+def test_slow_client_gets_a_single_resync():
+    async def scenario():
+        client = event_service.Client(maxsize=2)
+        for data in (b"1", b"2", b"3"):
+            client.offer(data)
+        assert client.dropped == 3
+        assert client.queue.qsize() == 1
+        assert client.queue.get_nowait() == event_service.RESYNC
+
+    asyncio.run(scenario())
+
+
+def test_stream_sends_ready_heartbeats_and_events(monkeypatch):
+    broker = LocalBroker()
+    monkeypatch.setattr(event_service, "broker", broker)
+    monkeypatch.setattr(event_service, "_hub", None)
+
+    async def scenario():
+        body = event_service.stream("c", heartbeat=0.01)
+        assert b"event: ready" in await body.__anext__()
+        assert await body.__anext__() == event_service.HEARTBEAT
+        broker.publish("c", event_service.format_event("x", {"n": 1}))
+        chunk = await body.__anext__()
+        while chunk == event_service.HEARTBEAT:
+            chunk = await body.__anext__()
+        assert chunk == b'event: x\ndata: {"n":1}\n\n'
+        await body.aclose()
+        assert broker.subscriber_count("c") == 0
+
+    asyncio.run(scenario())
+
+
+def _open_stream(client, path, user):
+    """Run a stream request in the background; the test client returns once it ends."""
+    result = {}
+    thread = threading.Thread(
+        target=lambda: result.update(response=client.get(path, headers=auth_headers(user))),
+        daemon=True,
+    )
+    thread.start()
+    return thread, result
+
+
+def _wait_for_subscriber(channel):
+    deadline = time.monotonic() + 5
+    while event_service.broker.subscriber_count(channel) == 0:
+        assert time.monotonic() < deadline, "stream never subscribed"
+        time.sleep(0.01)
+
+
+def test_group_stream_holds_no_connection_and_ends_on_removal(client, db, make_user, group):
+    member = make_user()
+    group_service.add_member(db, group_id=group["id"], target_user_id=member.id)
+    db.close()  # the fixture session's own connection isn't part of what's measured
+    channel = event_service.group_channel(group["id"])
+
+    thread, result = _open_stream(client, f"/events/groups/{group['id']}", member)
+    _wait_for_subscriber(channel)
+    assert engine.pool.checkedout() == 0
+
+    # activity and other members' changes pass through; the stream stays open
+    other = make_user()
+    group_service.add_member(db, group_id=group["id"], target_user_id=other.id)
+    db.close()
+    event_service.publish_group(group["id"], event_service.EVENT_MEMBER_ACTIVITY, {"user_id": str(other.id)})
+    thread.join(0.3)
+    assert thread.is_alive()
+
+    group_service.remove_member(db, group_id=group["id"], target_user_id=member.id)
+    thread.join(5)
+    assert not thread.is_alive(), "stream stayed open after the subscriber was removed"
+
+    body = result["response"].text
+    assert body.count("event: member.changed") == 2
+    assert "event: member.activity" in body
+    assert event_service.broker.subscriber_count(channel) == 0
+
+
+def test_group_stream_requires_membership(client, make_user, group):
+    response = client.get(f"/events/groups/{group['id']}", headers=auth_headers(make_user()))
+    assert response.status_code == 403
+    assert engine.pool.checkedout() == 0
+
+
+def test_build_broker():
+    assert isinstance(build_broker(None), LocalBroker)
+    with pytest.raises(ValueError, match="EVENTS_BROKER_URL"):
+        build_broker("redis")
+    with pytest.raises(ValueError, match="Unknown"):
+        build_broker("kafka")
+
+
+# ---------------------------------------------------------------------------
+# Redis broker (against a minimal in-memory stand-in for redis-py)
+# ---------------------------------------------------------------------------
+
+class _FakePubSub:
+    def __init__(self, server):
+        self.server = server
+        self.channels = set()
+        self.inbox = asyncio.Queue()
+        self.closed = False
+
+    async def subscribe(self, channel):
+        self.channels.add(channel)
+
+    async def unsubscribe(self, channel):
+        self.channels.discard(channel)
+
+    async def get_message(self, ignore_subscribe_messages, timeout):
+        try:
+            item = await asyncio.wait_for(self.inbox.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    async def aclose(self):
+        self.closed = True
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.pubsubs = []
+        self.down = False
+
+    def pubsub(self):
+        self.pubsubs.append(_FakePubSub(self))
+        return self.pubsubs[-1]
+
+    def publish(self, channel, data):
+        if self.down:
+            raise ConnectionError("redis is down")
+        for pubsub in self.pubsubs:
+            if channel in pubsub.channels and not pubsub.closed:
+                pubsub.inbox.put_nowait({"type": "message", "channel": channel.encode(), "data": data})
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    server = _FakeRedis()
+    monkeypatch.setattr(broker_module, "redis", SimpleNamespace(Redis=SimpleNamespace(from_url=lambda url: server)))
+    monkeypatch.setattr(broker_module, "redis_async", SimpleNamespace(from_url=lambda url: server))
+    return server
+
+
+def test_redis_subscriptions_share_one_connection(redis_server):
+    broker = RedisBroker("redis://test")
+
+    async def scenario():
+        first, second, other = [await broker.subscribe(c) for c in ("a", "a", "b")]
+        assert len(redis_server.pubsubs) == 1
+        assert redis_server.pubsubs[0].channels == {"a", "b"}
+
+        broker.publish("a", b"1")
+        broker.publish("b", b"2")
+        assert await asyncio.wait_for(first.get(), 1) == b"1"
+        assert await asyncio.wait_for(second.get(), 1) == b"1"
+        assert await asyncio.wait_for(other.get(), 1) == b"2"
+
+        await first.close()
+        assert redis_server.pubsubs[0].channels == {"a", "b"}
+        await second.close()
+        assert redis_server.pubsubs[0].channels == {"b"}
+        await other.close()
+        assert redis_server.pubsubs[0].closed
+
+    asyncio.run(scenario())
+
+
+def test_redis_publish_is_best_effort(redis_server, caplog):
+    redis_server.down = True
+    RedisBroker("redis://test").publish("a", b"1")
+    assert "publish to a failed" in caplog.text
+
+
+def test_hub_resubscribes_and_resyncs_after_a_lost_connection(redis_server, monkeypatch):
+    broker = RedisBroker("redis://test")
+    monkeypatch.setattr(event_service.EventHub, "RESUBSCRIBE_SECONDS", 0.01)
+
+    async def scenario():
+        hub = event_service.EventHub(broker, queue_size=10)
+        client = await hub.connect("a")
+        redis_server.pubsubs[0].inbox.put_nowait(ConnectionError("connection reset"))
+        assert await asyncio.wait_for(client.queue.get(), 1) == event_service.RESYNC
+
+        while broker.subscriber_count("a") == 0:
+            await asyncio.sleep(0.01)
+        assert len(redis_server.pubsubs) == 2 and redis_server.pubsubs[0].closed
+        broker.publish("a", b"after")
+        assert await asyncio.wait_for(client.queue.get(), 1) == b"after"
+
+        await hub.disconnect("a", client)
+        assert broker.subscriber_count("a") == 0
+
+    asyncio.run(scenario())
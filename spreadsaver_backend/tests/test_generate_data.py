@@ -0,0 +1,78 @@
+from collections import Counter
+
+from sqlalchemy import func, select
+
+from app.database import Base, engine
+from app.models.models import Group, GroupMember, Purchase, User
+from app.scripts import generate_data as gen
+
+PROFILE = gen.Profile(users=12, months=2, end_month="2024-02", purchases_per_month=15, group_rate=0.25, badge_count=5, seed=7)
+
+
+def _dump():
+    """Every loaded row, per table, in a stable order (bcrypt salts differ per run)."""
+    out = {}
+    with engine.connect() as conn:
+        for table in Base.metadata.sorted_tables:
+            rows = conn.execute(table.select()).mappings().all()
+            out[table.name] = sorted(tuple(sorted((k, str(v)) for k, v in row.items() if k != "hashed_password")) for row in rows)
+    return out
+
+
+def _wipe():
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+
+def test_user_rows_are_deterministic_per_user():
+    first = gen.user_rows(PROFILE, 3, hashed_password="x", badge_ids=[1, 2, 3])
+    again = gen.user_rows(PROFILE, 3, hashed_password="x", badge_ids=[1, 2, 3])
+    other_seed = gen.user_rows(gen.Profile(**{**PROFILE.__dict__, "seed": 8}), 3, hashed_password="x")
+    assert first == again
+    assert first["users"][0]["id"] == gen.user_id(PROFILE, 3)
+    assert first["users"][0]["username"] == "gen0000003"
+    assert other_seed["users"][0]["id"] != first["users"][0]["id"]
+
+
+def test_chunk_size_does_not_change_the_data():
+    counts = gen.generate(engine, PROFILE, loader=gen.BulkLoader(engine, chunk_size=7))
+    small_chunks = _dump()
+    _wipe()
+    gen.generate(engine, PROFILE, loader=gen.BulkLoader(engine, chunk_size=100_000))
+    assert _dump() == small_chunks
+    assert counts["users"] == 12
+    assert counts["groups"] == 3
+    assert counts["badges"] == 5
+
+
+def test_pinned_purchase_count_and_recurring_days():
+    rows = gen.user_rows(PROFILE, 0, hashed_password="x", purchases=40)
+    purchases = rows["purchases"]
+    assert len(purchases) == 40
+    assert all("2024-01" <= p["purchased_at"].strftime("%Y-%m") <= "2024-02" for p in purchases)
+    rent = next(c["id"] for c in rows["categories"] if c["name"] == "Rent")
+    assert sorted(p["purchased_at"].day for p in purchases if p["category_id"] == rent) == [1, 1]
+    # change_seq follows purchase time and the user row carries the latest value
+    seqs = [p["change_seq"] for p in purchases]
+    assert seqs == sorted(seqs)
+    assert rows["users"][0]["change_seq"] >= seqs[-1]
+
+
+def test_groups_reference_generated_users(db):
+    gen.generate(engine, PROFILE)
+    user_ids = set(db.scalars(select(User.id)))
+    members = db.execute(select(GroupMember.group_id, GroupMember.user_id, GroupMember.role)).all()
+    assert {m.user_id for m in members} <= user_ids
+    owners = Counter(m.group_id for m in members if m.role == "owner")
+    assert owners == Counter({g: 1 for g in db.scalars(select(Group.id))})
+    assert all(count <= PROFILE.max_group_size for count in Counter(m.group_id for m in members).values())
+    assert db.scalar(select(func.count()).select_from(Purchase)) > 0
+
+
+def test_appending_with_another_prefix_continues_group_ids(db):
+    gen.generate(engine, PROFILE)
+    first = gen.next_id(engine, Group)
+    gen.generate(engine, gen.Profile(**{**PROFILE.__dict__, "seed": 9, "prefix": "more"}))
+    assert min(db.scalars(select(Group.id).where(Group.id >= first))) == first
+    assert gen.existing_badge_ids(engine) == list(range(1, 6))  # the catalogue is reused, not duplicated
@@ -0,0 +1,86 @@
+from datetime import datetime
+
+import pytest
+
+from app.services import budget_service, group_service
+from tests.conftest import auth_headers, count_statements
+
+JUNE = "2025-06"
+
+
+@pytest.fixture
+def flat(db, make_user):
+    owner, member, idle = make_user("owner"), make_user("member"), make_user("idle")
+    group = group_service.create_group(db, owner_id=owner.id, name="Flat")
+    group_service.add_member(db, group_id=group["id"], target_user_id=member.id)
+    group_service.add_member(db, group_id=group["id"], target_user_id=idle.id)
+    return group["id"], owner, member, idle
+
+
+def _buy(db, user, amount, category, when=datetime(2025, 6, 2)):
+    cat = budget_service.upsert_category(db, user_id=user.id, name=category)
+    return budget_service.add_purchase(db, user_id=user.id, amount=amount, category_id=cat["id"], occurred_at=when)
+
+
+def test_dashboard_folds_members_and_categories(db, flat):
+    group_id, owner, member, idle = flat
+    _buy(db, owner, 10, "Food")
+    _buy(db, owner, 5, "Rent")
+    _buy(db, member, 7.5, "Food")
+    _buy(db, member, 99, "Food", datetime(2025, 7, 1))  # other months don't count
+
+    dashboard = group_service.get_group_dashboard(db, group_id=group_id, month=JUNE)
+    assert dashboard["total_spent"] == 22.5
+    assert dashboard["by_category"] == {"Food": 17.5, "Rent": 5.0}
+    assert [(m["user_id"], m["role"], m["total_spent"]) for m in dashboard["members"]] == [
+        (owner.id, "owner", 15.0),
+        (member.id, "member", 7.5),
+        (idle.id, "member", 0.0),
+    ]
+    assert dashboard["members"][0]["by_category"] == {"Food": 10.0, "Rent": 5.0}
+
+
+def test_dashboard_is_one_query_regardless_of_members(db, make_user, flat):
+    group_id, owner, *_ = flat
+    for i in range(5):
+        extra = make_user()
+        group_service.add_member(db, group_id=group_id, target_user_id=extra.id)
+        _buy(db, extra, i + 1, "Food")
+
+    with count_statements() as statements:
+        group_service.get_group_dashboard(db, group_id=group_id, month=JUNE)
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 1
+
+    with count_statements() as statements:
+        group_service.get_group_dashboard(db, group_id=group_id, month=JUNE)
+    assert statements == []  # cached
+
+
+def test_cache_follows_member_purchases_and_membership(db, make_user, flat):
+    group_id, owner, member, _ = flat
+    assert group_service.get_group_dashboard(db, group_id=group_id, month=JUNE)["total_spent"] == 0.0
+
+    _buy(db, member, 4, "Food")
+    assert group_service.get_group_dashboard(db, group_id=group_id, month=JUNE)["total_spent"] == 4.0
+
+    newcomer = make_user()
+    _buy(db, newcomer, 6, "Food")
+    assert group_service.get_group_dashboard(db, group_id=group_id, month=JUNE)["total_spent"] == 4.0
+    group_service.add_member(db, group_id=group_id, target_user_id=newcomer.id)
+    assert group_service.get_group_dashboard(db, group_id=group_id, month=JUNE)["total_spent"] == 10.0
+
+    group_service.remove_member(db, group_id=group_id, target_user_id=member.id)
+    assert group_service.get_group_dashboard(db, group_id=group_id, month=JUNE)["total_spent"] == 6.0
+
+
+def test_dashboard_route_is_for_members_only(client, db, make_user, flat):
+    group_id, owner, *_ = flat
+    _buy(db, owner, 3, "Food")
+
+    response = client.get(f"/service/groups/{group_id}/dashboard", params={"month": JUNE}, headers=auth_headers(owner))
+    assert response.status_code == 200
+    assert response.json()["total_spent"] == 3.0
+
+    outsider = make_user()
+    response = client.get(f"/service/groups/{group_id}/dashboard", params={"month": JUNE}, headers=auth_headers(outsider))
+    assert response.status_code == 403
@@ -0,0 +1,245 @@
+import uuid
+
+import pytest
+
+from app.models.models import GroupMember
+from app.services import cache_service, group_service
+from app.services.membership_index import MembershipIndex, has_group_role
+from tests.conftest import auth_headers, count_statements
+
+
+@pytest.fixture
+def group(db, make_user):
+    owner = make_user("owner")
+    created = group_service.create_group(db, owner_id=owner.id, name="Flat")
+    return {"id": created["id"], "owner": owner}
+
+
+def test_membership_reads_are_served_from_the_index(db, make_user, group):
+    member = make_user()
+    group_service.add_member(db, group_id=group["id"], target_user_id=member.id)
+
+    group_service.list_group_members(db, group_id=group["id"])
+    group_service.list_user_groups(db, user_id=member.id)
+    with count_statements() as statements:
+        assert group_service.get_member_role(db, group_id=group["id"], user_id=member.id) == "member"
+        assert group_service.group_ids_for_user(db, user_id=member.id) == [group["id"]]
+        assert {m["user_id"] for m in group_service.list_group_members(db, group_id=group["id"])} == {
+            group["owner"].id,
+            member.id,
+        }
+    assert statements == []
+
+
+def test_own_writes_update_the_index_in_place(db, make_user, group):
+    member = make_user()
+    group_service.list_group_members(db, group_id=group["id"])
+
+    group_service.add_member(db, group_id=group["id"], target_user_id=member.id)
+    group_service.set_member_role(db, group_id=group["id"], target_user_id=member.id, role="admin")
+    with count_statements() as statements:
+        assert group_service.get_member_role(db, group_id=group["id"], user_id=member.id) == "admin"
+    assert statements == []
+
+    group_service.remove_member(db, group_id=group["id"], target_user_id=member.id)
+    assert group_service.get_member_role(db, group_id=group["id"], user_id=member.id) is None
+
+
+def test_another_workers_write_makes_the_entry_stale(db, make_user, group):
+    member = make_user()
+    assert group_service.get_member_role(db, group_id=group["id"], user_id=member.id) is None
+
+    # a write from another process: the row changes and the shared version moves on
+    db.add(GroupMember(group_id=group["id"], user_id=member.id, role="member"))
+    db.commit()
+    assert group_service.get_member_role(db, group_id=group["id"], user_id=member.id) is None
+    cache_service.invalidate_group_members(group["id"])
+    assert group_service.get_member_role(db, group_id=group["id"], user_id=member.id) == "member"
+
+
+def test_index_keeps_the_most_recently_used_groups(db, make_user):
+    owner = make_user()
+    first, second, third = (group_service.create_group(db, owner_id=owner.id, name=n)["id"] for n in "abc")
+    small = MembershipIndex(max_entries=2)
+    for group_id in (first, second, first, third):  # `second` is the least recently used
+        small.group_roles(db, group_id)
+
+    with count_statements() as statements:
+        assert small.role_of(db, first, owner.id) == "owner"
+        assert small.role_of(db, third, owner.id) == "owner"
+    assert statements == []
+    with count_statements() as statements:
+        assert small.role_of(db, second, owner.id) == "owner"
+    assert len(statements) == 1
+
+
+def test_add_member_is_one_upsert_and_skips_unchanged_roles(db, make_user, group):
+    member = make_user()
+    with count_statements() as statements:
+        group_service.add_member(db, group_id=group["id"], target_user_id=member.id)
+    assert [s.lstrip().split()[0].upper() for s in statements] == ["INSERT"]
+
+    version = cache_service.group_data_version(group["id"], cache_service.SCOPE_MEMBERS)
+    group_service.add_member(db, group_id=group["id"], target_user_id=member.id)
+    assert cache_service.group_data_version(group["id"], cache_service.SCOPE_MEMBERS) == version
+
+    group_service.add_member(db, group_id=group["id"], target_user_id=member.id, role="admin")
+    assert group_service.get_member_role(db, group_id=group["id"], user_id=member.id) == "admin"
+
+
+def test_role_changes_require_a_membership(db, make_user, group):
+    with pytest.raises(ValueError, match="Membership not found"):
+        group_service.set_member_role(db, group_id=group["id"], target_user_id=make_user().id, role="admin")
+    assert group_service.remove_member(db, group_id=group["id"], target_user_id=make_user().id) is True
+
+
+def test_add_member_names_the_missing_group_or_user(db, make_user, group):
+    member = make_user()
+    with pytest.raises(ValueError, match="Group not found"):
+        group_service.add_member(db, group_id=999, target_user_id=member.id)
+    with pytest.raises(ValueError, match="User not found"):
+        group_service.add_member(db, group_id=group["id"], target_user_id=uuid.uuid4())
+    with pytest.raises(ValueError, match="Group not found"):
+        _bulk(db, {"id": 999}, group["owner"], (member, "add", "member"))
+    assert db.query(GroupMember).count() == 1  # the owner
+    assert group_service.list_user_groups(db, user_id=member.id) == []
+
+
+def test_roles_are_validated(db, make_user, group):
+    member = make_user()
+    with pytest.raises(ValueError, match="Invalid role"):
+        group_service.add_member(db, group_id=group["id"], target_user_id=member.id, role="superuser")
+    group_service.add_member(db, group_id=group["id"], target_user_id=member.id)
+    with pytest.raises(ValueError, match="Invalid role"):
+        group_service.set_member_role(db, group_id=group["id"], target_user_id=member.id, role="root")
+    assert group_service.get_member_role(db, group_id=group["id"], user_id=member.id) == "member"
+
+
+def test_has_group_role_follows_role_priority(db, make_user, group):
+    admin = make_user()
+    group_service.add_member(db, group_id=group["id"], target_user_id=admin.id, role="admin")
+    owner_id = group["owner"].id
+
+    assert has_group_role(db, group_id=group["id"], user_id=owner_id, required="owner")
+    assert has_group_role(db, group_id=group["id"], user_id=admin.id, required="admin")
+    assert not has_group_role(db, group_id=group["id"], user_id=admin.id, required="owner")
+    assert not has_group_role(db, group_id=group["id"], user_id=make_user().id)
+
+
+# ---------------------------------------------------------------------------
+# Bulk membership
+# ---------------------------------------------------------------------------
+
+def test_bulk_update_reports_an_outcome_per_member(db, make_user, group):
+    kept, promoted, leaving, newcomer, stranger = (make_user() for _ in range(5))
+    for member in (kept, promoted, leaving):
+        group_service.add_member(db, group_id=group["id"], target_user_id=member.id)
+
+    results = group_service.bulk_update_members(
+        db,
+        group_id=group["id"],
+        actor_id=group["owner"].id,
+        operations=[
+            {"user_id": kept.id, "action": "add"},
+            {"user_id": promoted.id, "action": "set_role", "role": "admin"},
+            {"user_id": leaving.id, "action": "remove"},
+            {"user_id": newcomer.id, "action": "add"},
+            {"user_id": stranger.id, "action": "set_role", "role": "admin"},
+            {"user_id": stranger.id, "action": "remove"},
+            {"user_id": make_user().id, "action": "add", "role": "owner"},
+            {"user_id": make_user().id, "action": "kick"},
+        ],
+    )
+    assert [r["status"] for r in results] == [
+        "unchanged", "updated", "removed", "added", "not_member", "error", "error", "error",
+    ]
+    assert {m["user_id"]: m["role"] for m in group_service.list_group_members(db, group_id=group["id"])} == {
+        group["owner"].id: "owner",
+        kept.id: "member",
+        promoted.id: "admin",
+        newcomer.id: "member",
+    }
+
+
+def _bulk(db, group, actor, *operations):
+    results = group_service.bulk_update_members(
+        db,
+        group_id=group["id"],
+        actor_id=actor.id,
+        operations=[{"user_id": user.id, "action": action, "role": role} for user, action, role in operations],
+    )
+    return [(r["status"], r.get("detail")) for r in results]
+
+
+def test_admins_cannot_touch_the_owner_or_other_admins(db, make_user, group):
+    admin, other_admin, member, newcomer = make_user(), make_user(), make_user(), make_user()
+    for user, role in ((admin, "admin"), (other_admin, "admin"), (member, "member")):
+        group_service.add_member(db, group_id=group["id"], target_user_id=user.id, role=role)
+
+    assert _bulk(
+        db, group, admin,
+        (group["owner"], "remove", "member"),
+        (other_admin, "set_role", "member"),
+        (member, "set_role", "admin"),
+        (newcomer, "add", "member"),
+    ) == [
+        ("error", "The group owner's membership cannot be changed"),
+        ("error", "Only the group owner can change admins"),
+        ("error", "Only the group owner can change admins"),
+        ("added", None),
+    ]
+    roles = {m["user_id"]: m["role"] for m in group_service.list_group_members(db, group_id=group["id"])}
+    assert (roles[group["owner"].id], roles[other_admin.id], roles[member.id]) == ("owner", "admin", "member")
+
+
+def test_owner_manages_admins_but_not_their_own_membership(db, make_user, group):
+    admin = make_user()
+    group_service.add_member(db, group_id=group["id"], target_user_id=admin.id, role="admin")
+    outcomes = _bulk(db, group, group["owner"], (admin, "set_role", "member"), (group["owner"], "set_role", "member"))
+    assert [status for status, _ in outcomes] == ["updated", "error"]
+    assert group_service.get_member_role(db, group_id=group["id"], user_id=group["owner"].id) == "owner"
+
+
+def test_unknown_users_are_reported_per_member(db, make_user, group):
+    newcomer = make_user()
+    ghost = type("Ghost", (), {"id": uuid.uuid4()})()
+    assert _bulk(
+        db, group, group["owner"], (ghost, "add", "member"), (newcomer, "add", "member"), (ghost, "remove", None),
+    ) == [("not_found", "User not found"), ("added", None), ("error", "Duplicate user in request")]
+    assert group_service.get_member_role(db, group_id=group["id"], user_id=newcomer.id) == "member"
+
+    assert _bulk(db, group, group["owner"], (ghost, "add", "member")) == [("not_found", "User not found")]
+
+
+def test_bulk_update_is_three_statements_for_any_batch_size(db, make_user, group):
+    joining = [make_user() for _ in range(20)]
+    leaving = [make_user() for _ in range(20)]
+    for member in leaving:
+        group_service.add_member(db, group_id=group["id"], target_user_id=member.id)
+    group_service.list_group_members(db, group_id=group["id"])
+
+    operations = [{"user_id": u.id, "action": "add"} for u in joining]
+    operations += [{"user_id": u.id, "action": "remove"} for u in leaving]
+    with count_statements() as statements:
+        group_service.bulk_update_members(db, group_id=group["id"], actor_id=group["owner"].id, operations=operations)
+    # newcomers are looked up once, then one write each for adds and removals
+    assert [s.lstrip().split()[0].upper() for s in statements] == ["SELECT", "INSERT", "DELETE"]
+
+
+def test_bulk_update_is_bounded(db, group):
+    with pytest.raises(ValueError, match="At most"):
+        group_service.bulk_update_members(
+            db, group_id=group["id"], actor_id=group["owner"].id, operations=[{"user_id": i} for i in range(group_service.MAX_BULK_MEMBERS + 1)]
+        )
+
+
+def test_bulk_route_is_for_group_admins(client, db, make_user, group):
+    member, newcomer = make_user(), make_user()
+    group_service.add_member(db, group_id=group["id"], target_user_id=member.id)
+    body = {"operations": [{"user_id": str(newcomer.id)}]}
+    path = f"/service/groups/{group['id']}/members/bulk"
+
+    assert client.post(path, json=body, headers=auth_headers(member)).status_code == 403
+    response = client.post(path, json=body, headers=auth_headers(group["owner"]))
+    assert response.status_code == 200
+    assert response.json()["results"][0]["status"] == "added"
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import random
+from datetime import date, datetime
+
+import pytest
+
+from app.services import budget_service, cache_service, event_service, group_service, leaderboard_service
+from app.utils.ranking import IndexableSkipList
+from tests.conftest import auth_headers
+
+JUNE = "2025-06"
+
+
+# ---------------------------------------------------------------------------
+# Skiplist
+# ---------------------------------------------------------------------------
+
+def test_skiplist_matches_a_sorted_list_under_random_operations():
+    rng = random.Random(7)
+    skiplist, expected = IndexableSkipList(seed=1), []
+    for _ in range(2000):
+        value = rng.randrange(300)
+        if value in expected:
+            skiplist.remove(value)
+            expected.remove(value)
+        else:
+            skiplist.insert(value)
+            expected.append(value)
+            expected.sort()
+        assert len(skiplist) == len(expected)
+
+    assert list(skiplist) == expected
+    assert [skiplist[i] for i in range(len(expected))] == expected
+    assert skiplist[-1] == expected[-1]
+    assert [skiplist.rank(v) for v in expected] == list(range(len(expected)))
+    assert list(skiplist.islice(5, 15)) == expected[5:15]
+    assert list(skiplist.islice(len(expected) - 2, len(expected) + 10)) == expected[-2:]
+
+
+def test_skiplist_misses_raise():
+    skiplist = IndexableSkipList(seed=1)
+    skiplist.insert((1.0, "a"))
+    with pytest.raises(KeyError):
+        skiplist.rank((2.0, "a"))
+    with pytest.raises(KeyError):
+        skiplist.remove((2.0, "a"))
+    with pytest.raises(IndexError):
+        skiplist[1]
+    skiplist.clear()
+    assert len(skiplist) == 0 and list(skiplist) == []
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+def test_member_metrics():
+    days = {date(2025, 5, 10): 100.0, date(2025, 6, 3): 30.0, date(2025, 6, 20): 30.0}
+    metrics = leaderboard_service.member_metrics(days, JUNE)
+    assert metrics["savings_rate"] == 0.4  # 60 spent vs. 100 last month
+    assert metrics["compliance_ratio"] == pytest.approx(60 / 80)  # plan: Needs+Wants = 80%
+    assert metrics["no_spend_streak"] == 16.0  # June 4-19
+
+    assert leaderboard_service.member_metrics({}, JUNE)["savings_rate"] == 0.0
+    assert leaderboard_service.member_metrics(days, JUNE, today=date(2025, 6, 10))["no_spend_streak"] == 7.0
+    assert leaderboard_service.member_metrics(days, JUNE, today=date(2025, 5, 31))["no_spend_streak"] == 0.0
+
+
+# ---------------------------------------------------------------------------
+# Boards
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def flat(db, make_user):
+    owner = make_user("owner")
+    group = group_service.create_group(db, owner_id=owner.id, name="Flat")
+    members = [owner]
+    for _ in range(3):
+        member = make_user()
+        group_service.add_member(db, group_id=group["id"], target_user_id=member.id)
+        members.append(member)
+    return group["id"], members
+
+
+def _spend(db, user, amount, when):
+    cat = budget_service.upsert_category(db, user_id=user.id, name="Food")
+    return budget_service.add_purchase(db, user_id=user.id, amount=amount, category_id=cat["id"], occurred_at=when)
+
+
+def _board(db, group_id, metric="savings_rate", **kwargs):
+    return group_service.get_group_leaderboard(db, group_id=group_id, month=JUNE, metric=metric, **kwargs)
+
+
+@pytest.fixture
+def computed(monkeypatch):
+    """Record which members each recompute covered (None for a full rebuild)."""
+    calls = []
+    compute, rebuild = leaderboard_service._compute, leaderboard_service._rebuild
+
+    def spy_compute(db, user_ids, month):
+        calls.append(sorted(map(str, user_ids)))
+        return compute(db, user_ids, month)
+
+    def spy_rebuild(db, board, versions):
+        drift = rebuild(db, board, versions)
+        calls[-1] = None  # the rebuild's own _compute covered everyone
+        return drift
+
+    monkeypatch.setattr(leaderboard_service, "_compute", spy_compute)
+    monkeypatch.setattr(leaderboard_service, "_rebuild", spy_rebuild)
+    return calls
+
+
+def test_ranking_order_and_ties(db, flat):
+    group_id, (owner, a, b, c) = flat
+    for user, may, june in ((owner, 100, 90), (a, 100, 50), (b, 100, 50), (c, 100, 120)):
+        _spend(db, user, may, datetime(2025, 5, 5))
+        _spend(db, user, june, datetime(2025, 6, 5))
+
+    board = _board(db, group_id, user_id=c.id)
+    tied = sorted([a, b], key=lambda u: str(u.id))  # ties break on the member id
+    assert [(e["rank"], e["user_id"], e["value"]) for e in board["top"]] == [
+        (1, tied[0].id, 0.5),
+        (2, tied[1].id, 0.5),
+        (3, owner.id, 0.1),
+        (4, c.id, -0.2),
+    ]
+    assert board["me"] == {"rank": 4, "user_id": c.id, "value": -0.2}
+    assert board["size"] == 4
+
+    # lower is better for compliance
+    assert _board(db, group_id, "compliance_ratio", limit=1)["top"][0]["user_id"] == tied[0].id
+    with pytest.raises(ValueError):
+        _board(db, group_id, "karma")
+
+
+def test_purchase_writes_recompute_only_that_member(db, flat, computed):
+    group_id, (owner, a, *_) = flat
+    _board(db, group_id)
+    assert computed[0] is None
+    computed.clear()
+
+    _spend(db, a, 10, datetime(2025, 5, 5))  # last month: the baseline for June
+    _spend(db, a, 4, datetime(2025, 6, 5))
+    board = _board(db, group_id)
+    assert computed == [[str(a.id)]]
+    assert board["top"][0] == {"rank": 1, "user_id": a.id, "value": 0.6}
+
+
+def test_membership_changes_are_diffed(db, make_user, flat, computed):
+    group_id, (owner, a, *_) = flat
+    _board(db, group_id)
+    computed.clear()
+
+    newcomer = make_user()
+    group_service.add_member(db, group_id=group_id, target_user_id=newcomer.id)
+    group_service.remove_member(db, group_id=group_id, target_user_id=a.id)
+    board = _board(db, group_id)
+    assert computed == [[str(newcomer.id)]]
+    assert {e["user_id"] for e in board["top"]} == {m.id for m in flat[1] if m is not a} | {newcomer.id}
+
+
+def test_rule_changes_requeue_the_member(db, flat, computed):
+    group_id, (owner, *_) = flat
+    _board(db, group_id)
+    computed.clear()
+
+    budget_service.upsert_budget_rule(
+        db, user_id=owner.id, label="lean", essential_pct=40, discretionary_pct=10, savings_pct=50
+    )
+    _board(db, group_id)
+    assert computed == [[str(owner.id)]]
+
+
+def test_rule_changes_from_another_worker_arrive_through_the_broker(db, flat, computed):
+    group_id, (owner, *_) = flat
+    _board(db, group_id)
+    computed.clear()
+
+    async def deliver():
+        listener = asyncio.create_task(leaderboard_service.run_rules_listener())
+        while event_service.broker.subscriber_count(leaderboard_service.RULES_CHANNEL) == 0:
+            await asyncio.sleep(0.01)
+        message = {"group_ids": [group_id], "user_id": str(owner.id)}  # as another worker sends it
+        event_service.broker.publish(leaderboard_service.RULES_CHANNEL, json.dumps(message).encode())
+        await asyncio.sleep(0.05)
+        listener.cancel()
+
+    asyncio.run(deliver())
+    _board(db, group_id)
+    assert computed == [[str(owner.id)]]
+    assert event_service.broker.subscriber_count(leaderboard_service.RULES_CHANNEL) == 0
+
+
+def test_background_refresh_rebuilds_cached_boards(db, flat, computed):
+    group_id, _ = flat
+    _board(db, group_id)
+    computed.clear()
+
+    async def run_once():
+        refresher = asyncio.create_task(leaderboard_service.run_refresher(interval=0.01))
+        await asyncio.sleep(0.1)
+        refresher.cancel()
+
+    asyncio.run(run_once())
+    assert computed and all(call is None for call in computed)
+
+
+def test_unaccounted_versions_and_age_trigger_a_full_recompute(db, monkeypatch, flat, computed):
+    group_id, _ = flat
+    _board(db, group_id)
+    computed.clear()
+
+    cache_service.invalidate_group_month([group_id], JUNE)  # another worker's purchase write
+    _board(db, group_id)
+    assert computed == [None]
+
+    monkeypatch.setattr(leaderboard_service.settings, "LEADERBOARD_FULL_REFRESH_SECONDS", 0)
+    _board(db, group_id)
+    assert computed == [None, None]
+
+
+def test_refresh_reports_drift(db, flat):
+    group_id, (owner, *_) = flat
+    _board(db, group_id)
+    board = leaderboard_service._boards.get((group_id, JUNE))
+    board.put(owner.id, {metric: 9.0 for metric in leaderboard_service.METRICS})
+
+    assert leaderboard_service.refresh_leaderboards(db) == {"boards": 1, "drifted_members": 1}
+    assert leaderboard_service.refresh_leaderboards(db) == {"boards": 1, "drifted_members": 0}
+
+
+def test_leaderboard_route_is_for_members_only(client, make_user, flat):
+    group_id, (owner, *_) = flat
+    path = f"/service/groups/{group_id}/leaderboard"
+    response = client.get(path, params={"month": JUNE, "metric": "no_spend_streak"}, headers=auth_headers(owner))
+    assert response.status_code == 200
+    assert response.json()["me"]["rank"] >= 1
+    assert client.get(path, params={"month": JUNE}, headers=auth_headers(make_user())).status_code == 403
@@ -0,0 +1,91 @@
+import asyncio
+
+import httpx
+import pytest
+
+from benchmarks import loadtest
+from benchmarks.loadtest import ALL, SUMMARY, Flow, Recorder, Slo
+from tests.conftest import fastapi_app
+
+
+def test_slo_parse_and_check():
+    slo = Slo.parse(" GET /service/budget/summary : p95 < 200 ")
+    assert (slo.route, slo.metric, slo.op, slo.limit) == ("GET /service/budget/summary", "p95", "<", 200.0)
+    assert str(slo) == "GET /service/budget/summary:p95<200"
+    assert slo.check({"p95": 150}, slo.route) is None
+    assert slo.check({"p95": 250}, slo.route) == "GET /service/budget/summary p95=250 (want <200)"
+    assert slo.check({}, slo.route) is None  # route never ran
+    assert Slo.parse("*:rps>40").check({"rps": 12.5}, ALL) == "* rps=12.5 (want >40)"
+    with pytest.raises(ValueError, match="bad SLO"):
+        Slo.parse("summary:p90<1")
+
+
+def test_recorder_summarizes_per_stage_and_route():
+    rec = Recorder()
+    for ms in range(1, 101):
+        rec.record(SUMMARY, ms / 1000, 200)
+    rec.record(SUMMARY, 0.5, 500)
+    rec.record(loadtest.LOGIN, 0.01, None)  # transport error
+    rec.stage = 1
+    rec.record(SUMMARY, 0.001, 200)
+
+    stats = rec.stats(0, elapsed=2.0)
+    summary = stats[SUMMARY]
+    assert (summary["count"], summary["errors"], summary["p50"], summary["p99"], summary["max"]) == (101, 1, 51.0, 100.0, 500.0)
+    assert summary["statuses"] == {"200": 100, "500": 1}
+    assert stats[loadtest.LOGIN]["statuses"] == {"error": 1}
+    assert stats[ALL]["count"] == 102
+    assert stats[ALL]["rps"] == 51.0
+    assert rec.stats(1, elapsed=1.0)[ALL]["count"] == 1
+
+
+def test_wildcard_slos_hold_per_route_but_rps_is_the_stage_total():
+    results = [
+        {"stage": 0, "routes": {
+            SUMMARY: {"p95": 300, "rps": 5},
+            loadtest.LOGIN: {"p95": 100, "rps": 5},
+            ALL: {"p95": 290, "rps": 10},
+        }},
+    ]
+    failures = loadtest.evaluate_slos(results, [Slo.parse("*:p95<250"), Slo.parse("*:rps>8")])
+    assert failures == [(0, f"{SUMMARY} p95=300 (want <250)")]
+
+
+def test_parse_stages():
+    assert loadtest._parse_stages("5:10,20,50:2.5") == [(5, 10.0), (20, 30.0), (50, 2.5)]
+
+
+def test_add_purchase_route(api, db, user):
+    from app.services import budget_service
+
+    category = budget_service.upsert_category(db, user_id=user.id, name="Groceries")
+    created = api.post(
+        "/service/budget/purchases",
+        json={"amount": 12.5, "category_id": str(category["id"]), "occurred_at": "2024-03-02T10:00:00"},
+    )
+    assert created.status_code == 201
+    assert created.json()["amount"] == 12.5
+    summary = api.get("/service/budget/summary", params={"month": "2024-03"}).json()
+    assert summary["total_spent"] == 12.5
+
+    assert api.post("/service/budget/purchases", json={"amount": 0}).status_code == 422
+
+
+def test_in_process_run_drives_the_mobile_flow(db):
+    from app.database import engine
+    from app.scripts import generate_data as gen
+
+    gen.generate(engine, gen.Profile(users=2, months=1, group_rate=0.0, badge_count=0, prefix="load"))
+    flow = Flow(accounts=2, prefix="load", think=0.0, add_rate=1.0, evaluate_rate=1.0, month="2024-03")
+
+    async def go():
+        # not loadtest.in_process(): its lifespan shuts down process-wide clients on exit
+        transport = httpx.ASGITransport(app=fastapi_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            return await loadtest.run_stages(client, flow, [(2, 1.5)], seed=1)
+
+    [stage] = asyncio.run(go())
+    routes = stage["routes"]
+    assert stage["concurrency"] == 2
+    assert routes[loadtest.LOGIN]["count"] >= 1
+    assert routes[ALL]["errors"] == 0, routes
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from app.config.settings import settings
+from app.middleware.timing import TimingMiddleware
+from app.services import group_service
+from app.utils import tracing
+from app.utils.metrics import CONTENT_TYPE, Registry
+
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-me")
+    return {"Authorization": "Bearer scrape-me"}
+
+
+def test_exposition_format():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    registry.gauge("in_flight", "In flight", collect=lambda: {(): 2.0})
+
+    requests.inc(('/a "quoted"\n',))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(("/a",), value)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a \\"quoted\\"\\n"} 1',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 5.55',
+        'latency_seconds_count{route="/a"} 3',
+        "# HELP in_flight In flight",
+        "# TYPE in_flight gauge",
+        "in_flight 2",
+    ]
+    assert latency.snapshot(("/a",))["p50"] == pytest.approx(0.55)
+    assert latency.snapshot(("/b",)) is None
+
+
+def test_registering_a_name_twice_shares_the_series():
+    registry = Registry()
+    assert registry.counter("x_total", "X") is registry.counter("x_total", "X")
+
+
+def test_metrics_endpoint_requires_the_token(client, metrics_token):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    response = client.get("/metrics", headers=metrics_token)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    assert "# TYPE spreadsaver_request_seconds histogram" in response.text
+
+
+def test_metrics_endpoint_can_be_disabled(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    assert client.get("/metrics").status_code == 404
+
+
+def test_requests_are_recorded_per_route_template(api, db, user):
+    group = group_service.create_group(db, owner_id=user.id, name="Flat")
+    route = "/service/groups/{group_id}/dashboard"
+    before = tracing.REQUESTS.value(("GET", route, "200"))
+    queries = tracing.REQUEST_DB_QUERIES.snapshot((route,))
+    api.get(f"/service/groups/{group['id']}/dashboard", params={"month": "2025-06"})
+    api.get("/no/such/path")
+
+    assert tracing.REQUESTS.value(("GET", route, "200")) == before + 1
+    assert tracing.REQUESTS.value(("GET", "unmatched", "404")) >= 1
+    after = tracing.REQUEST_DB_QUERIES.snapshot((route,))
+    assert after["count"] == (queries["count"] if queries else 0) + 1
+    assert after["sum"] > (queries["sum"] if queries else 0)  # auth and the dashboard query
+
+
+def test_event_streams_are_counted_but_not_timed(caplog):
+    async def stream(scope, receive, send):
+        headers = [(b"content-type", b"text/event-stream; charset=utf-8")]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def ignore(message):
+        pass
+
+    route = "/events/test-stream"
+    scope = {"type": "http", "method": "GET", "path": route, "route": SimpleNamespace(path=route), "headers": []}
+    middleware = TimingMiddleware(stream, log_requests=False, slow_ms=0)
+    with caplog.at_level(logging.INFO, logger="spreadsaver.request"):
+        asyncio.run(middleware(scope, None, ignore))
+
+    assert tracing.REQUESTS.value(("GET", route, "200")) == 1
+    assert tracing.REQUEST_SECONDS.snapshot(("GET", route)) is None
+    assert tracing.REQUEST_DB_QUERIES.snapshot((route,)) is None
+    assert not caplog.records  # never "slow", however long it stayed open
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from app.utils import profiler as sampling
+from app.utils.profiler import SamplingProfiler, profile_for
+from tests.conftest import auth_headers
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def admin(make_user):
+    return make_user("root", is_admin=True)
+
+
+def test_sampler_collects_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        with SamplingProfiler(interval=0.002) as profiler:
+            time.sleep(0.1)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert profiler.samples > 0 and profiler.duration >= 0.1
+    lines = profiler.collapsed().splitlines()
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy and any("test_profiler:_busy_loop" in line for line in busy)
+    stack, count = busy[0].rsplit(" ", 1)
+    assert int(count) > 0
+
+
+def test_one_profile_per_worker():
+    assert sampling.try_acquire()
+    try:
+        assert profile_for(0.01) is None
+    finally:
+        sampling.release()
+    assert profile_for(0.01, interval=0.002) is not None
+
+
+def test_worker_profile_is_admin_only(client, make_user, admin):
+    path = "/admin/profile?seconds=0.1&interval_ms=5"
+    assert client.get(path, headers=auth_headers(make_user())).status_code == 403
+
+    response = client.get(path, headers=auth_headers(admin))
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="profile.collapsed"'
+    assert response.text.strip()
+
+
+def test_profiled_request_can_be_downloaded_by_an_admin(client, make_user, admin):
+    user = make_user()
+    response = client.get("/badges/me", headers={**auth_headers(admin), "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    path = f"/admin/profile/{profile_id}"
+    assert client.get(path, headers=auth_headers(user)).status_code == 403
+    assert client.get(path, headers=auth_headers(admin)).status_code == 200
+    assert client.get("/admin/profile/unknown", headers=auth_headers(admin)).status_code == 404
+
+    assert "x-profile-id" not in client.get("/badges/me", headers=auth_headers(admin)).headers
+
+
+def test_only_admins_can_profile_a_request(client, make_user):
+    user = make_user()
+    for headers in ({"X-Profile": "1"}, {**auth_headers(user), "X-Profile": "1"}):
+        response = client.get("/", headers=headers)
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+    assert sampling.try_acquire()  # the slot was never taken
+    sampling.release()
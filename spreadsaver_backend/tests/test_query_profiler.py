@@ -0,0 +1,117 @@
+import logging
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.config.settings import settings
+from app.services import budget_service, group_service
+from app.utils import query_profiler
+from app.utils.pytest_query_budget import budget_problems
+from app.utils.query_profiler import QueryRecorder
+
+
+@pytest.fixture
+def flat(db, user, make_user):
+    group = group_service.create_group(db, owner_id=user.id, name="Flat")
+    for n in range(5):
+        member = make_user()
+        group_service.add_member(db, group_id=group["id"], target_user_id=member.id)
+        food = budget_service.upsert_category(db, user_id=member.id, name="Food")
+        budget_service.add_purchase(db, user_id=member.id, amount=n + 1, category_id=food["id"], occurred_at=datetime(2025, 6, 2))
+    return group["id"]
+
+
+def _n_plus_one(db, user, n):
+    """An endpoint-shaped loop: one lookup per category."""
+    ids = [budget_service.upsert_category(db, user_id=user.id, name=f"c{i}")["id"] for i in range(n)]
+    with QueryRecorder() as recorder:
+        with db.connection() as conn:
+            for category_id in ids:
+                conn.execute(text("SELECT name FROM categories WHERE id = :id"), {"id": str(category_id)})
+    return recorder
+
+
+# ---------------------------------------------------------------------------
+# Budgets on the hot endpoints
+# ---------------------------------------------------------------------------
+
+@pytest.mark.query_budget(3)
+def test_summary_query_budget(api):
+    assert api.get("/service/budget/summary", params={"month": "2025-06"}).status_code == 200
+
+
+@pytest.mark.query_budget(3)
+def test_group_dashboard_query_budget(api, flat):
+    assert api.get(f"/service/groups/{flat}/dashboard", params={"month": "2025-06"}).status_code == 200
+
+
+@pytest.mark.query_budget(6)
+def test_batch_query_budget(api, flat):
+    operations = [
+        {"id": "summary", "path": "/service/budget/summary", "params": {"month": "2025-06"}},
+        {"id": "categories", "path": "/service/budget/categories"},
+        {"id": "groups", "path": "/service/groups/my"},
+        {"id": "badges", "path": "/badges/me"},
+    ]
+    response = api.post("/batch", json={"operations": operations})
+    assert [r["status"] for r in response.json()["results"]] == [200, 200, 200, 200]
+
+
+def test_exceeding_a_budget_fails_the_test(pytester):
+    pytester.makepyfile(
+        """
+        import pytest
+        from sqlalchemy import text
+        from app.database import engine
+
+        @pytest.mark.query_budget(2)
+        def test_three_queries():
+            with engine.connect() as conn:
+                for _ in range(3):
+                    conn.execute(text("SELECT 1"))
+
+        @pytest.mark.query_budget(3)
+        def test_within_budget():
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        """
+    )
+    result = pytester.runpytest_inprocess("-p", "app.utils.pytest_query_budget")
+    result.assert_outcomes(passed=1, failed=1)
+    result.stdout.fnmatch_lines(["*query budget exceeded*", "*test: 3 queries (budget 2)*"])
+
+
+# ---------------------------------------------------------------------------
+# N+1 detection and the slow-query log
+# ---------------------------------------------------------------------------
+
+def test_repeated_statements_are_reported_as_n_plus_one(db, user):
+    recorder = _n_plus_one(db, user, settings.N_PLUS_ONE_THRESHOLD)
+    ((sql, count, _),) = recorder.repeated()
+    assert "FROM categories" in sql and count == settings.N_PLUS_ONE_THRESHOLD
+    problems = budget_problems(recorder, max_queries=100)
+    assert len(problems) == 1 and "N+1" in problems[0]
+    assert budget_problems(recorder, max_queries=100, n_plus_one=0) == []
+
+
+def test_requests_are_recorded_with_their_route(api):
+    with QueryRecorder() as recorder:
+        api.get("/service/budget/summary", params={"month": "2025-06"})
+    (request,) = recorder.requests
+    assert (request.method, request.route) == ("GET", "/service/budget/summary")
+    assert request.db_queries >= 1
+
+
+def test_slow_queries_are_logged_with_a_plan(monkeypatch, caplog, db):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(query_profiler, "_submit", lambda *args: query_profiler._log_slow(*args))
+    query_profiler._explained.clear()
+    query_profiler.install()
+    try:
+        with caplog.at_level(logging.WARNING, logger="spreadsaver.query"):
+            db.execute(text("SELECT id FROM users WHERE username = 'nobody'"))
+    finally:
+        query_profiler.uninstall()
+    (record,) = [r for r in caplog.records if "slow_query" in r.getMessage()]
+    assert '"plan":[' in record.getMessage()
@@ -0,0 +1,100 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from app import database
+from app.database import Base, ReplicaSet, RoutingSession, read_session
+from app.models.models import Category
+from app.services import budget_service, cache_service, group_service
+from tests.conftest import auth_headers
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """One replica: an empty copy of the schema that never receives the primary's writes."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(database, "replicas", ReplicaSet([engine], retry_seconds=30))
+    monkeypatch.setattr(cache_service, "_track_writes", True)
+    yield engine
+    engine.dispose()
+
+
+def _categories(client, user):
+    response = client.get("/service/budget/categories", headers=auth_headers(user))
+    assert response.status_code == 200
+    return [c["name"] for c in response.json()]
+
+
+def test_reads_go_to_the_replica_until_the_first_write(replica, user):
+    with read_session() as db:
+        assert isinstance(db, RoutingSession)
+        assert db.get_bind() is replica
+        assert db.scalars(select(Category)).all() == []
+
+        db.add(Category(user_id=user.id, name="Rent"))
+        db.flush()
+        assert db.replica is None  # pinned to the primary for the rest of the session
+        assert [c.name for c in db.scalars(select(Category))] == ["Rent"]
+        db.rollback()
+
+
+def test_pinned_or_unconfigured_reads_use_a_primary_session(replica, monkeypatch):
+    with read_session(pin_primary=True) as db:
+        assert not isinstance(db, RoutingSession)
+    monkeypatch.setattr(database, "replicas", ReplicaSet([], retry_seconds=30))
+    with read_session() as db:
+        assert not isinstance(db, RoutingSession)
+
+
+def test_route_reads_its_own_write_from_the_primary(client, db, replica, user, monkeypatch):
+    monkeypatch.setattr(cache_service.settings, "READ_YOUR_WRITES_SECONDS", 0.2)
+    budget_service.upsert_category(db, user_id=user.id, name="Groceries")
+    assert cache_service.recently_written(user_id=user.id)
+    assert _categories(client, user) == ["Groceries"]  # primary, despite the stale replica
+
+    time.sleep(0.3)
+    assert not cache_service.recently_written(user_id=user.id)
+    assert _categories(client, user) == []  # back on the (lagging) replica
+
+
+def test_group_writes_pin_reads_of_that_group(db, replica, make_user):
+    owner, other = make_user(), make_user()
+    group = group_service.create_group(db, owner_id=owner.id, name="Flat")
+    cache_service.reset()  # forget the owner's own write marker
+
+    group_service.add_member(db, group_id=group["id"], target_user_id=other.id)
+    assert cache_service.recently_written(user_id=owner.id, group_id=group["id"])
+    assert not cache_service.recently_written(user_id=owner.id)
+
+
+def test_writes_are_not_tracked_without_replicas(db, user, monkeypatch):
+    monkeypatch.setattr(cache_service, "_track_writes", False)
+    budget_service.upsert_category(db, user_id=user.id, name="Rent")
+    assert not cache_service.recently_written(user_id=user.id)
+
+
+def test_round_robin_and_failover(tmp_path, monkeypatch):
+    healthy = [create_engine(f"sqlite:///{tmp_path / f'r{i}.db'}") for i in range(2)]
+    unreachable = create_engine(f"sqlite:///{tmp_path / 'missing' / 'r.db'}")
+    replicas = ReplicaSet([healthy[0], unreachable, healthy[1]], retry_seconds=30)
+    assert [replicas.choose() for _ in range(3)] == [healthy[0], unreachable, healthy[1]]
+
+    with pytest.raises(Exception):
+        unreachable.connect()  # handle_error marks it down
+    assert [replicas.choose() for _ in range(4)] == [healthy[0], healthy[1], healthy[1], healthy[0]]
+
+    now = time.monotonic()
+    monkeypatch.setattr(database.time, "monotonic", lambda: now + 31)
+    assert unreachable in {replicas.choose() for _ in range(3)}
+
+
+def test_all_replicas_down_falls_back_to_the_primary(tmp_path, monkeypatch):
+    down = create_engine(f"sqlite:///{tmp_path / 'r.db'}")
+    replicas = ReplicaSet([down], retry_seconds=30)
+    replicas.mark_down(down)
+    monkeypatch.setattr(database, "replicas", replicas)
+    assert replicas.choose() is None
+    with read_session() as db:
+        assert not isinstance(db, RoutingSession)
@@ -0,0 +1,61 @@
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.services import budget_service
+from app.utils import responses
+from app.utils.responses import FastJSONResponse, dumps, trusted_json
+
+PAYLOAD = {
+    "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "amount": Decimal("12.50"),
+    "at": datetime(2025, 6, 2, 9, 30),
+    "day": date(2025, 6, 2),
+    "tags": ("a", "b"),
+    "name": "Café",
+}
+EXPECTED = {
+    "id": "12345678-1234-5678-1234-567812345678",
+    "amount": 12.5,
+    "at": "2025-06-02T09:30:00",
+    "day": "2025-06-02",
+    "tags": ["a", "b"],
+    "name": "Café",
+}
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_dumps_encodes_service_types_with_and_without_orjson(monkeypatch, fast):
+    if not fast:
+        monkeypatch.setattr(responses, "orjson", None)
+    encoded = dumps(PAYLOAD)
+    assert json.loads(encoded) == EXPECTED
+    assert b": " not in encoded  # compact either way
+
+
+def test_dumps_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_trusted_json_passes_content_and_headers_through():
+    response = trusted_json({"n": Decimal("1")}, status_code=201, headers={"ETag": '"x"'})
+    assert isinstance(response, FastJSONResponse)
+    assert response.status_code == 201
+    assert response.headers["etag"] == '"x"'
+    assert json.loads(response.body) == {"n": 1.0}
+
+
+def test_purchase_page_is_served_without_revalidation(api, db, user):
+    food = budget_service.upsert_category(db, user_id=user.id, name="Food")
+    budget_service.add_purchase(
+        db, user_id=user.id, amount=Decimal("3.25"), category_id=food["id"], occurred_at=datetime(2025, 6, 2)
+    )
+    response = api.get("/service/budget/purchases")
+    assert response.status_code == 200
+    item = response.json()["items"][0]
+    assert item["amount"] == 3.25
+    assert item["occurred_at"].startswith("2025-06-02")
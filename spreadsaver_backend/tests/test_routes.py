@@ -0,0 +1,37 @@
+import importlib
+import inspect
+import pkgutil
+
+from fastapi.routing import APIRoute
+
+import app.routes
+from app.database import get_db, sync_url
+from app.routes.auth import get_read_db
+
+
+def _routes():
+    for info in pkgutil.iter_modules(app.routes.__path__):
+        router = getattr(importlib.import_module(f"app.routes.{info.name}"), "router", None)
+        for route in getattr(router, "routes", ()):
+            if isinstance(route, APIRoute):
+                yield info.name, route
+
+
+def test_db_bound_handlers_do_not_run_on_the_event_loop():
+    # sync handlers run in the threadpool; these read the body, then hand the DB work to a thread
+    offloaded = {("service", "stripe_webhook"), ("stripe", "stripe_webhook")}
+    blocking = [
+        (module, route.endpoint.__name__)
+        for module, route in _routes()
+        if inspect.iscoroutinefunction(route.endpoint)
+        and {d.call for d in route.dependant.dependencies} & {get_db, get_read_db}
+    ]
+    assert sorted(blocking) == sorted(offloaded)
+
+
+def test_sync_url_pins_an_installed_driver():
+    assert sync_url("postgresql+asyncpg://u:p@h/db") == "postgresql+psycopg2://u:p@h/db"
+    assert sync_url("postgresql://u:p@h/db") == "postgresql+psycopg2://u:p@h/db"
+    assert sync_url("postgres://u:p@h/db") == "postgresql+psycopg2://u:p@h/db"
+    assert sync_url("postgresql+psycopg://u:p@h/db") == "postgresql+psycopg://u:p@h/db"
+    assert sync_url("sqlite+aiosqlite:///app.db") == "sqlite:///app.db"
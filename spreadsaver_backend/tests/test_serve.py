@@ -0,0 +1,111 @@
+import io
+import socket
+
+import pytest
+
+from app import database
+from app.config.settings import settings
+from app.scripts import serve
+
+
+@pytest.fixture
+def cgroup(monkeypatch):
+    """Serve fake cgroup files to serve._cgroup_cpu_limit()."""
+    files = {}
+
+    def fake_open(path, *args, **kwargs):
+        if path not in files:
+            raise FileNotFoundError(path)
+        return io.StringIO(files[path])
+
+    monkeypatch.setattr(serve, "open", fake_open, raising=False)
+    return files
+
+
+def test_cgroup_v2_quota(cgroup):
+    cgroup["/sys/fs/cgroup/cpu.max"] = "150000 100000\n"
+    assert serve._cgroup_cpu_limit() == 1.5
+    cgroup["/sys/fs/cgroup/cpu.max"] = "max 100000\n"
+    assert serve._cgroup_cpu_limit() is None
+
+
+def test_cgroup_v1_quota(cgroup):
+    cgroup["/sys/fs/cgroup/cpu/cpu.cfs_quota_us"] = "250000"
+    cgroup["/sys/fs/cgroup/cpu/cpu.cfs_period_us"] = "100000"
+    assert serve._cgroup_cpu_limit() == 2.5
+    cgroup["/sys/fs/cgroup/cpu/cpu.cfs_quota_us"] = "-1"
+    assert serve._cgroup_cpu_limit() is None
+
+
+def test_available_cpus_rounds_the_quota_up_and_never_exceeds_affinity(monkeypatch):
+    monkeypatch.setattr(serve.os, "sched_getaffinity", lambda pid: set(range(8)))
+    monkeypatch.setattr(serve, "_cgroup_cpu_limit", lambda: 2.5)
+    assert serve.available_cpus() == 3
+    monkeypatch.setattr(serve, "_cgroup_cpu_limit", lambda: 32.0)
+    assert serve.available_cpus() == 8
+
+
+def test_bind_listens_on_an_inheritable_socket():
+    sock = serve.bind("127.0.0.1", 0, 16)
+    try:
+        assert sock.get_inheritable()
+        with socket.create_connection(sock.getsockname(), timeout=1):
+            pass  # the backlog accepts before any worker exists
+    finally:
+        sock.close()
+
+
+def test_pool_options_only_apply_to_server_databases():
+    pool_options = {"pool_size", "max_overflow", "pool_timeout", "pool_recycle"}
+    assert not pool_options & set(database.engine_options("sqlite:///x.db"))
+    assert pool_options <= set(database.engine_options("postgresql://db/app"))
+
+
+def test_warm_pool_leaves_connections_open_in_the_pool(monkeypatch):
+    database.engine.dispose()
+    assert database.warm_pool(2) == 2
+    assert database.engine.pool.checkedin() == 2
+    assert database.engine.pool.checkedout() == 0
+
+
+def test_warm_pool_reports_failures_instead_of_raising(monkeypatch, caplog):
+    def refuse():
+        raise OSError("database is down")
+
+    monkeypatch.setattr(database.engine, "connect", refuse)
+    assert database.warm_pool(3) == 0
+    assert "stopped after 0 connection(s)" in caplog.text
+
+
+def test_after_fork_drops_inherited_connections():
+    database.warm_pool(1)
+    inherited = database.engine.pool
+    database.after_fork()
+    assert database.engine.pool is not inherited
+    assert database.engine.pool.checkedin() == 0
+
+
+def _backends(monkeypatch, cache, broker):
+    monkeypatch.setattr(serve, "available_cpus", lambda: 8)
+    monkeypatch.setattr(settings, "CACHE_BACKEND", cache)
+    monkeypatch.setattr(settings, "EVENTS_BROKER", broker)
+
+
+def test_per_cpu_default_falls_back_to_one_worker_without_shared_state(monkeypatch):
+    _backends(monkeypatch, "memory", "local")
+    assert serve.worker_count(0) == 1
+    _backends(monkeypatch, "redis", "local")
+    assert serve.worker_count(0) == 1
+
+
+def test_explicit_workers_without_shared_state_refuse_to_start(monkeypatch):
+    _backends(monkeypatch, "memory", "redis")
+    with pytest.raises(ValueError, match="CACHE_BACKEND=memory"):
+        serve.worker_count(4)
+    assert serve.worker_count(1) == 1
+
+
+def test_shared_backends_allow_several_workers(monkeypatch):
+    _backends(monkeypatch, "redis", "redis")
+    assert serve.worker_count(0) == 8
+    assert serve.worker_count(3) == 3
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app import main
+
+
+def _run(code: str) -> dict:
+    """Run `code` in a fresh interpreter and return the JSON it prints last."""
+    env = dict(os.environ, DATABASE_URL="sqlite://", WARM_DEFERRED_IMPORTS="false")
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+@pytest.fixture
+def hooks(monkeypatch):
+    registered = []
+    monkeypatch.setattr(main, "_startup_hooks", registered)
+    return registered
+
+
+def _serve_once(app):
+    async def go():
+        async with main.lifespan(app):
+            pass
+
+    asyncio.run(go())
+
+
+def test_hooks_run_in_order_and_cleanups_in_reverse(hooks, caplog):
+    calls = []
+
+    @main.on_startup
+    def first():
+        calls.append("start first")
+        return lambda: calls.append("stop first")
+
+    @main.on_startup
+    async def second():
+        calls.append("start second")
+
+        async def stop():
+            calls.append("stop second")
+            raise RuntimeError("boom")
+
+        return stop
+
+    @main.on_startup
+    def no_cleanup():
+        calls.append("start third")
+
+    _serve_once(main.app)
+    assert calls == ["start first", "start second", "start third", "stop second", "stop first"]
+    assert "shutdown hook" in caplog.text  # a failing cleanup doesn't skip the others
+
+
+def test_failed_startup_still_cleans_up_what_started(hooks):
+    calls = []
+    main.on_startup(lambda: (lambda: calls.append("stopped")))
+
+    @main.on_startup
+    def broken():
+        raise RuntimeError("no")
+
+    with pytest.raises(RuntimeError):
+        _serve_once(main.app)
+    assert calls == ["stopped"]
+
+
+def test_create_app_builds_an_independent_app():
+    other = main.create_app()
+    assert other is not main.app
+    paths = set(other.openapi()["paths"])
+    assert {"/", "/auth/login", "/service/budget/summary", "/events/me"} <= paths
+
+
+def test_routes_package_import_does_not_load_routers():
+    loaded = _run(
+        "import json, sys; import app.routes; "
+        "print(json.dumps(sorted(m for m in sys.modules if m.startswith('app.routes.'))))"
+    )
+    assert loaded == []
+
+
+def test_heavy_modules_are_deferred_until_first_use():
+    loaded = _run(
+        "import json, sys; import app.main; "
+        "print(json.dumps([m for m in ('stripe', 'requests', 'jose', 'bcrypt') if m in sys.modules]))"
+    )
+    assert loaded == []
+
+
+def test_hash_and_token_helpers_import_their_libraries_lazily():
+    from app.routes.auth import create_access_token
+    from app.utils.hash import get_password_hash, verify_password
+
+    assert verify_password("secret", get_password_hash("secret"))
+    assert create_access_token({"sub": "someone"}).count(".") == 2
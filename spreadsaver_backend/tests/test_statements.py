@@ -0,0 +1,93 @@
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT
+
+from app.database import create_db_engine, engine
+from app.services import auth_service, budget_service
+
+
+@contextmanager
+def cache_hits():
+    """(statement, compiled-cache hit?) for each statement executed inside the block."""
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append((statement, context.cache_hit == CACHE_HIT))
+
+    event.listen(engine, "after_cursor_execute", record)
+    try:
+        yield seen
+    finally:
+        event.remove(engine, "after_cursor_execute", record)
+
+
+@pytest.fixture
+def purchases(db, user):
+    groceries = budget_service.upsert_category(db, user_id=user.id, name="Groceries")
+    rent = budget_service.upsert_category(db, user_id=user.id, name="Rent")
+    for day, category, amount in [(3, groceries, 20), (1, rent, 900), (15, groceries, 35.5)]:
+        budget_service.add_purchase(
+            db, user_id=user.id, amount=amount, category_id=category["id"], occurred_at=datetime(2025, 3, day)
+        )
+    budget_service.add_purchase(db, user_id=user.id, amount=12, category_id=groceries["id"], occurred_at=datetime(2025, 2, 27))
+    return {"groceries": groceries["id"], "rent": rent["id"]}
+
+
+def test_hot_statements_are_compiled_once_and_reused(db, user, make_user, purchases):
+    other = make_user()
+    budget_service.get_month_summary(db, user_id=other.id, month="2025-01")  # warm the compiled cache
+    budget_service.list_purchases(db, user_id=other.id, month="2025-01", limit=10)
+    budget_service.list_user_categories(db, user_id=other.id)
+    auth_service.get_user_by_identifier(db, other.username)
+
+    with cache_hits() as seen:
+        budget_service.get_month_summary(db, user_id=user.id, month="2025-03")
+        budget_service.list_purchases(db, user_id=user.id, month="2025-03", limit=2)
+        budget_service.list_user_categories(db, user_id=user.id)
+        auth_service.get_user_by_identifier(db, user.username.upper())
+    assert len(seen) == 5
+    assert all(hit for _, hit in seen), seen
+
+
+def test_statements_are_built_once_per_shape():
+    assert budget_service._month_total_stmt() is budget_service._month_total_stmt()
+    for shape in range(16):
+        budget_service._purchases_stmt(*(bool(shape & bit) for bit in (1, 2, 4, 8)))
+    assert budget_service._purchases_stmt.cache_info().currsize == 16
+
+
+def test_server_side_prepares_are_reported_as_psycopg3_only(caplog):
+    pytest.importorskip("psycopg2")
+    with caplog.at_level(logging.INFO, logger="spreadsaver.db"):
+        create_db_engine("postgresql+psycopg2://app@localhost/spreadsaver").dispose()  # no connection made
+    assert "DB_PREPARE_THRESHOLD has no effect with the psycopg2 driver" in caplog.text
+
+
+def test_month_summary(db, user, purchases):
+    summary = budget_service.get_month_summary(db, user_id=user.id, month="2025-03")
+    assert summary == {"month": "2025-03", "total_spent": 955.5, "by_category": {"Groceries": 55.5, "Rent": 900.0}}
+
+
+def test_purchase_listing_filters_and_pages(db, user, purchases):
+    def amounts(**kwargs):
+        return [p["amount"] for p in budget_service.list_purchases(db, user_id=user.id, **kwargs)]
+
+    assert amounts() == [35.5, 20.0, 900.0, 12.0]  # newest first
+    assert amounts(month="2025-03") == [35.5, 20.0, 900.0]
+    assert amounts(month="2025-03", category_id=purchases["groceries"]) == [35.5, 20.0]
+    assert amounts(limit=2, offset=1) == [20.0, 900.0]
+    assert amounts(limit=1) == [35.5]
+
+
+def test_categories_are_listed_alphabetically(db, user, purchases):
+    assert [c["name"] for c in budget_service.list_user_categories(db, user_id=user.id)] == ["Groceries", "Rent"]
+
+
+def test_user_lookup_matches_username_or_email_case_insensitively(db, user):
+    assert auth_service.get_user_by_identifier(db, user.username.upper()).id == user.id
+    assert auth_service.get_user_by_identifier(db, user.email.upper()).id == user.id
+    assert auth_service.get_user_by_identifier(db, "nobody") is None
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config.settings import settings
+from app.models.models import StripeEvent, User
+from app.services import stripe_inbox, stripe_local, stripe_service
+
+SECRET = "whsec_test"
+
+
+@pytest.fixture(autouse=True)
+def prices(monkeypatch):
+    monkeypatch.setitem(stripe_service.PRICE_LOOKUP, ("plus", "monthly"), "price_plus")
+    monkeypatch.setattr(settings, "STRIPE_WEBHOOK_SECRET", SECRET)
+
+
+def _post(client, event, path="/service/stripe/webhook"):
+    payload, signature = stripe_local.signed(event, SECRET)
+    return client.post(path, content=payload, headers={"Stripe-Signature": signature, "Content-Type": "application/json"})
+
+
+def _deliver(client, db, event):
+    assert _post(client, event).status_code == 200
+    stripe_service.processor.process_pending()
+    db.expire_all()
+
+
+def _checkout(user, **session):
+    """A completed checkout whose metadata asks for a tier the purchase doesn't grant."""
+    event = stripe_local.checkout_completed(user_id=user.id, tier="elite", customer_id="cus_1", subscription_id="sub_1")
+    event["data"]["object"].update(session)
+    return event
+
+
+def _rows(db, customer="cus_1"):
+    db.expire_all()
+    return db.query(StripeEvent).filter(StripeEvent.customer_id == customer).order_by(StripeEvent.id).all()
+
+
+def test_webhooks_are_acknowledged_before_they_are_applied(client, db, make_user):
+    user = make_user()
+    event = _checkout(user, line_items={"data": [{"price": {"id": "price_plus"}}]})
+
+    response = _post(client, event)
+    assert response.json() == {"received": True, "duplicate": False}
+    assert [r.status for r in _rows(db)] == ["pending"]
+    assert db.get(User, user.id).subscription_tier == "free"
+
+    assert stripe_service.processor.process_pending() == 1
+    db.expire_all()
+    user = db.get(User, user.id)
+    assert (user.subscription_tier, user.stripe_customer_id) == ("plus", "cus_1")
+    assert [(r.status, r.attempts) for r in _rows(db)] == [("done", 1)]
+
+
+def test_one_off_payment_grants_no_tier(client, db, make_user):
+    user = make_user()
+    _deliver(client, db, _checkout(user, mode="payment", subscription=None))
+    user = db.get(User, user.id)
+    assert (user.subscription_tier, user.stripe_customer_id) == ("free", "cus_1")
+
+
+def test_subscription_without_line_items_waits_for_the_subscription_event(client, db, make_user):
+    user = make_user()
+    _deliver(client, db, _checkout(user))
+    assert db.get(User, user.id).subscription_tier == "free"
+
+    subscription = stripe_local.subscription_event(
+        "customer.subscription.created", customer_id="cus_1", price_id="price_plus", subscription_id="sub_1"
+    )
+    subscription["data"]["object"]["metadata"] = {"tier": "elite"}
+    _deliver(client, db, subscription)
+    assert db.get(User, user.id).subscription_tier == "plus"
+
+
+def test_subscription_mirrored_before_checkout_is_linked(client, db, make_user):
+    user = make_user()
+    _deliver(client, db, stripe_local.subscription_event(
+        "customer.subscription.created", customer_id="cus_1", price_id="price_plus", subscription_id="sub_1"
+    ))  # the customer isn't linked to anyone yet
+    assert db.get(User, user.id).subscription_tier == "free"
+
+    _deliver(client, db, _checkout(user))
+    assert db.get(User, user.id).subscription_tier == "plus"
+
+
+def test_redeliveries_are_stored_once(client, db, make_user):
+    event = stripe_local.checkout_completed(user_id=make_user().id, tier="plus", customer_id="cus_1")
+    assert _post(client, event).json()["duplicate"] is False
+    assert _post(client, event, "/webhook").json() == {"status": "success", "duplicate": True}
+    assert len(_rows(db)) == 1
+
+
+def test_bad_signatures_are_rejected(client, db):
+    payload, _ = stripe_local.signed(stripe_local.make_event("checkout.session.completed", {}), SECRET)
+    response = client.post("/service/stripe/webhook", content=payload, headers={"Stripe-Signature": "t=1,v1=bad"})
+    assert response.status_code == 400
+    assert db.query(StripeEvent).count() == 0
+
+
+def test_customer_events_apply_in_arrival_order(client, db, make_user):
+    user = make_user()
+    subscription = {"customer_id": "cus_1", "price_id": "price_plus", "subscription_id": "sub_1"}
+    _post(client, stripe_local.checkout_completed(user_id=user.id, tier="plus", customer_id="cus_1", subscription_id="sub_1"))
+    _post(client, stripe_local.subscription_event("customer.subscription.updated", **subscription))
+    _post(client, stripe_local.subscription_event("customer.subscription.deleted", **subscription))
+
+    # the oldest unfinished event gates the rest of the customer's queue
+    first = stripe_inbox.claim_next(db, "cus_1")
+    assert stripe_inbox.claim_next(db, "cus_1") is None
+    stripe_service.processor._run(db, first)
+
+    stripe_service.processor.process_pending()
+    assert [r.type for r in _rows(db) if r.status == "done"] == [
+        "checkout.session.completed",
+        "customer.subscription.updated",
+        "customer.subscription.deleted",
+    ]
+    db.expire_all()
+    assert db.get(User, user.id).subscription_tier == "free"
+
+
+def test_failures_back_off_and_give_up(db, make_user):
+    def broken(db, event_type, event):
+        raise RuntimeError("boom")
+
+    processor = stripe_inbox.StripeEventProcessor(broken, workers=0, max_attempts=2)
+    event = stripe_local.checkout_completed(user_id=make_user().id, tier="plus", customer_id="cus_1")
+    stripe_inbox.store_event(db, event_id=event["id"], event_type=event["type"], customer_id="cus_1", payload="{}")
+
+    assert processor.process_pending() == 1
+    (row,) = _rows(db)
+    assert (row.status, row.attempts, row.last_error) == ("pending", 1, "boom")
+    assert row.available_at > datetime.utcnow()
+    assert processor.process_pending() == 0  # still backing off
+
+    row.available_at = datetime.utcnow() - timedelta(seconds=1)
+    db.commit()
+    processor.process_pending()
+    assert [(r.status, r.attempts) for r in _rows(db)] == [("failed", 2)]
+
+
+def test_sweep_releases_orphaned_claims(db):
+    stripe_inbox.store_event(db, event_id="evt_1", event_type="x", customer_id="cus_1", payload="{}")
+    assert stripe_inbox.claim_next(db, "cus_1") is not None  # the claiming process then dies
+
+    processor = stripe_inbox.StripeEventProcessor(lambda *a: "ignored", workers=0, stale_seconds=0)
+    assert processor.sweep() == ["cus_1"]
+    assert processor.process_pending() == 1
+    assert [r.status for r in _rows(db)] == ["ignored"]
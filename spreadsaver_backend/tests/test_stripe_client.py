@@ -0,0 +1,157 @@
+import asyncio
+import time
+
+import pytest
+import stripe
+
+from app.services import stripe_client, stripe_service
+from app.services.stripe_client import CircuitBreaker, CircuitOpenError, StripeClient
+from app.services.stripe_local import FakeStripeServer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(stripe_client.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def fake():
+    with FakeStripeServer() as server:
+        server.add_price("price_plus")
+        server.add_price("price_old", active=False)
+        yield server
+
+
+def _client(**kwargs):
+    options = {"max_workers": 4, "timeout": 2.0, "max_retries": 2, "backoff_base": 0.0}
+    return StripeClient(**{**options, **kwargs})
+
+
+def test_breaker_opens_half_opens_and_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock[0] += 10
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # one trial at a time
+
+    breaker.record_failure()  # trial failed: open for another period
+    assert breaker.state == "open"
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_only_idempotent_calls_are_retried():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise stripe.error.APIConnectionError("reset")
+        return "ok"
+
+    client = _client()
+    assert asyncio.run(client.call(flaky, idempotent=True)) == "ok"
+    assert len(calls) == 3
+
+    calls.clear()
+    with pytest.raises(stripe.error.APIConnectionError):
+        asyncio.run(client.call(flaky))
+    assert len(calls) == 1
+
+
+def test_request_errors_are_not_retried_and_do_not_trip_the_breaker():
+    calls = []
+
+    def invalid():
+        calls.append(1)
+        raise stripe.error.InvalidRequestError("bad", "price")
+
+    client = _client(breaker=CircuitBreaker(failure_threshold=1, reset_seconds=60))
+    with pytest.raises(stripe.error.InvalidRequestError):
+        asyncio.run(client.call(invalid, idempotent=True))
+    assert len(calls) == 1
+    assert client.breaker.state == "closed"
+
+
+def test_open_breaker_short_circuits():
+    def down():
+        raise stripe.error.APIConnectionError("down")
+
+    client = _client(max_retries=0, breaker=CircuitBreaker(failure_threshold=1, reset_seconds=60))
+    with pytest.raises(stripe.error.APIConnectionError):
+        asyncio.run(client.call(down))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client.call(lambda: "never"))
+
+
+def test_slow_calls_time_out():
+    client = _client(timeout=0.05, max_retries=0)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(client.call(time.sleep, 0.5))
+
+
+def test_price_lookups_are_cached(fake):
+    client = _client()
+
+    async def lookups():
+        return await client.validate_prices(["price_plus", "price_old", "price_gone", None])
+
+    assert asyncio.run(lookups()) == {"price_plus": True, "price_old": False, "price_gone": False}
+    requests = fake.requests
+    asyncio.run(lookups())
+    assert fake.requests == requests
+
+
+def test_checkout_retries_reuse_one_idempotency_key(monkeypatch, fake):
+    monkeypatch.setattr(stripe_service, "client", _client())
+    monkeypatch.setitem(stripe_service.PRICE_LOOKUP, ("plus", "monthly"), "price_plus")
+    asyncio.run(stripe_service.client.get_price("price_plus"))
+
+    fake.fail_next(1)
+    session = asyncio.run(stripe_service.create_checkout_session_async("user-1", "plus:monthly"))
+    assert fake.sessions[session["id"]]["metadata"]["tier"] == "plus"
+    assert len(fake.sessions) == 1
+
+    with pytest.raises(ValueError, match="not available"):
+        asyncio.run(stripe_service.create_checkout_session_async("user-1", price_id="price_old"))
+
+
+@pytest.fixture
+def checkout(monkeypatch, fake):
+    """create_checkout_session_async against the fake server; returns the stored sessions."""
+    fake.add_price("price_elite")
+    fake.add_price("price_addon")
+    monkeypatch.setattr(stripe_service, "client", _client())
+    monkeypatch.setitem(stripe_service.PRICE_LOOKUP, ("plus", "monthly"), "price_plus")
+    monkeypatch.setitem(stripe_service.PRICE_LOOKUP, ("elite", "monthly"), "price_elite")
+
+    def create(tier_with_interval=None, **kwargs):
+        session = asyncio.run(stripe_service.create_checkout_session_async("user-1", tier_with_interval, **kwargs))
+        return fake.sessions[session["id"]]
+
+    return create
+
+
+def test_checkout_metadata_tier_always_follows_the_price(checkout):
+    session = checkout(price_id="price_plus", metadata={"tier": "elite", "campaign": "spring", "user_id": "someone-else"})
+    assert session["metadata"] == {"campaign": "spring", "user_id": "user-1", "tier": "plus"}
+
+    session = checkout(price_id="price_addon", mode="payment", metadata={"tier": "elite"})
+    assert session["metadata"] == {"user_id": "user-1"}
+
+
+def test_tier_prices_cannot_be_bought_as_one_off_payments(checkout, fake):
+    with pytest.raises(ValueError, match="subscription"):
+        checkout(price_id="price_elite", mode="payment")
+    with pytest.raises(ValueError, match="subscription"):
+        checkout("plus:monthly", mode="payment")
+    assert fake.sessions == {}
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.models import Subscription, User
+from app.services import stripe_local, stripe_service, subscription_service
+from tests.conftest import count_statements
+
+
+@pytest.fixture(autouse=True)
+def prices(monkeypatch):
+    monkeypatch.setitem(stripe_service.PRICE_LOOKUP, ("plus", "monthly"), "price_plus")
+    monkeypatch.setitem(stripe_service.PRICE_LOOKUP, ("elite", "monthly"), "price_elite")
+
+
+@pytest.fixture
+def customer(db, make_user):
+    user = make_user()
+    user.stripe_customer_id = "cus_1"
+    db.commit()
+    return user
+
+
+def _apply(db, event, created):
+    event["created"] = created
+    stripe_service.apply_event(db, event["type"], event)
+    db.commit()
+    db.expire_all()
+
+
+def _subscription(event_type, price_id, **kwargs):
+    return stripe_local.subscription_event(event_type, customer_id="cus_1", price_id=price_id, subscription_id="sub_1", **kwargs)
+
+
+def test_stale_snapshots_are_ignored(db, customer):
+    _apply(db, _subscription("customer.subscription.updated", "price_elite"), created=200)
+    _apply(db, _subscription("customer.subscription.updated", "price_plus", status="canceled"), created=100)
+
+    row = db.get(Subscription, "sub_1")
+    assert (row.status, row.tier, row.stripe_updated) == ("active", "elite", 200)
+    assert db.get(User, customer.id).subscription_tier == "elite"
+
+    _apply(db, _subscription("customer.subscription.deleted", "price_elite"), created=300)
+    assert db.get(User, customer.id).subscription_tier == "free"
+
+
+def test_effective_tier_reads_the_cached_mirror(db, customer):
+    _apply(db, _subscription("customer.subscription.created", "price_plus"), created=100)
+    user = db.get(User, customer.id)
+    assert subscription_service.effective_tier(db, user) == "plus"
+    with count_statements() as statements:
+        assert subscription_service.effective_tier(db, user) == "plus"
+    assert statements == []
+
+
+def test_lapsed_subscriptions_downgrade_after_the_grace_period(db, customer):
+    ended = int((datetime.utcnow() - timedelta(days=4)).timestamp())
+    _apply(db, _subscription("customer.subscription.created", "price_plus", current_period_end=ended), created=100)
+    user = db.get(User, customer.id)
+    assert user.subscription_tier == "plus"
+    assert subscription_service.effective_tier(db, user) == "free"
+
+    user.subscription_tier = "admin"
+    assert subscription_service.effective_tier(db, user) == "admin"
+
+
+def test_tiers_granted_outside_stripe_are_kept(db, make_user):
+    assert subscription_service.effective_tier(db, make_user(tier="pro")) == "pro"
+
+
+def test_reconcile_repairs_drift_page_by_page(db, customer, make_user):
+    other = make_user()
+    other.stripe_customer_id = "cus_2"
+    other.subscription_tier = "elite"  # Stripe says this subscription is over
+    db.commit()
+
+    with stripe_local.FakeStripeServer() as fake:
+        fake.add_subscription(_subscription("customer.subscription.updated", "price_plus")["data"]["object"])
+        for n in range(2):
+            fake.add_subscription(
+                stripe_local.subscription_event(
+                    "customer.subscription.updated", customer_id="cus_2", price_id="price_elite",
+                    status="canceled", subscription_id=f"sub_old_{n}",
+                )["data"]["object"]
+            )
+        stats = asyncio.run(subscription_service.reconcile(page_size=2))
+
+    assert stats == {"pages": 2, "subscriptions": 3, "drifted": 3, "users_fixed": 2}
+    db.expire_all()
+    assert db.get(User, customer.id).subscription_tier == "plus"
+    assert db.get(User, other.id).subscription_tier == "free"
+    assert db.get(Subscription, "sub_1").stripe_updated <= int(time.time())
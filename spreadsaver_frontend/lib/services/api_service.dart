@@ -29,6 +29,11 @@ class ApiService {
   // Reasonable network timeout to prevent infinite spinners.
   static const Duration _timeout = Duration(seconds: 20);
 
+  // Last ETag + body per GET URL (and token). Polls send If-None-Match and reuse
+  // the cached body on 304, so unchanged data costs no download or server queries.
+  static final Map<String, _CachedGet> _etagCache = <String, _CachedGet>{};
+  static const int _etagCacheMaxEntries = 64;
+
   Map<String, String> _headers({String? token}) => {
         'Content-Type': 'application/json',
         'Accept': 'application/json',
@@ -49,9 +54,24 @@ class ApiService {
 
   Future<ApiResponse> get(String path, {String? token, Map<String, dynamic>? query}) async {
     try {
-      final res = await http
-          .get(_uri(path, query: query), headers: _headers(token: token))
-          .timeout(ApiService._timeout);
+      final uri = _uri(path, query: query);
+      final cacheKey = '${token ?? ''}|$uri';
+      final cached = _etagCache[cacheKey];
+      final headers = _headers(token: token);
+      if (cached != null) headers['If-None-Match'] = cached.etag;
+
+      final res = await http.get(uri, headers: headers).timeout(ApiService._timeout);
+      if (res.statusCode == 304 && cached != null) {
+        return _toResponse(http.Response(cached.body, 200, headers: res.headers));
+      }
+      final etag = res.headers['etag'];
+      if (etag != null && res.statusCode == 200) {
+        _etagCache.remove(cacheKey);
+        if (_etagCache.length >= _etagCacheMaxEntries) {
+          _etagCache.remove(_etagCache.keys.first);
+        }
+        _etagCache[cacheKey] = _CachedGet(etag, res.body);
+      }
       return _toResponse(res);
     } on TimeoutException {
       return ApiResponse.failure('Request timed out');
@@ -149,6 +169,12 @@ class ApiService {
   }
 }
 
+class _CachedGet {
+  final String etag;
+  final String body;
+  const _CachedGet(this.etag, this.body);
+}
+
 // ---- Extra helpers (non-breaking) to support additional endpoints if needed ----
 extension ApiServiceExtras on ApiService {
   Future<ApiResponse> patch(String path, {String? token, Map<String, dynamic>? body, Map<String, dynamic>? query}) async {